@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Command tokenizer benchmark for Daedelus.
+
+Measures CommandEmbedder tokenization throughput on a synthetic command
+corpus (plain, quoted, path-heavy and escaped commands), both uncached and
+through the memo. The previous shlex/Path-based tokenizer is run on the same
+corpus as a reference (its output is checked to match).
+
+Usage:
+    python scripts/benchmark_tokenizer.py --commands 100000
+
+Created by: orpheus497
+"""
+
+import argparse
+import random
+import re
+import shlex
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from daedelus.core.embeddings import _tokenize_cached  # noqa: E402
+
+# Previous tokenizer's sub-token pattern and characters that needed shlex
+_SUBTOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SHLEX_REQUIRED_CHARS = frozenset("'\"\\\x0b\x0c\x1c\x1d\x1e\x1f")
+
+TEMPLATES = [
+    "git commit -m 'fix {word} in {word}.py'",
+    'grep -rn "{word} {word}" src/{word}/',
+    "cd ~/projects/{word}/{word}",
+    "docker run --rm -v $PWD:/app {word}:latest",
+    "ls -la /var/log/{word}",
+    "python -m pytest tests/test_{word}.py -k {word}",
+    "echo \"{word}\\\"s {word}\" | tee /tmp/{word}.log",
+    "find . -name '*.{word}' -exec rm {{}} \\;",
+    "kubectl get pods -n {word}-{word}",
+    "tar czf {word}.tar.gz ./{word}/ ./{word}.txt",
+]
+
+
+def _reference_tokenize(command: str) -> tuple[str, ...]:
+    """Previous tokenizer (shlex.split, Path.name, per-word findall), for comparison."""
+    command = command.strip()
+
+    if not command:
+        return ()
+
+    if command.isascii() and _SHLEX_REQUIRED_CHARS.isdisjoint(command):
+        parts = command.split()
+    else:
+        try:
+            parts = shlex.split(command)
+        except ValueError:
+            parts = command.split()
+
+    tokens: list[str] = []
+
+    for part in parts:
+        if part.startswith("-"):
+            tokens.append(part)
+        elif "/" in part:
+            tokens.append(part)
+            basename = Path(part).name
+            if basename != part:
+                tokens.append(basename)
+        else:
+            tokens.extend(_SUBTOKEN_PATTERN.findall(part))
+
+    return tuple(tokens)
+
+
+def _corpus(n: int, distinct: int, seed: int = 0) -> list[str]:
+    """Synthetic commands: n samples drawn from `distinct` generated commands."""
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(500)] + ["café", "naïve", "日本"]
+    pool = [
+        rng.choice(TEMPLATES).format(word=rng.choice(words)).replace("{word}", rng.choice(words))
+        for _ in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def _throughput(tokenize, commands: list[str], repeat: int = 1) -> float:
+    """Commands tokenized per second (best of `repeat` runs)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for command in commands:
+            tokenize(command)
+        best = min(best, time.perf_counter() - start)
+    return len(commands) / best
+
+
+def main() -> None:
+    """Run the benchmark and print throughput."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--commands", type=int, default=100000)
+    parser.add_argument("--distinct", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5, help="Uncached runs (best is reported)")
+    args = parser.parse_args()
+
+    commands = _corpus(args.commands, args.distinct)
+
+    mismatches = sum(
+        _tokenize_cached.__wrapped__(command) != _reference_tokenize(command)
+        for command in set(commands)
+    )
+    if mismatches:
+        print(f"warning: {mismatches} commands tokenize differently from the reference")
+
+    reference = _throughput(_reference_tokenize, commands, args.repeat)
+    uncached = _throughput(_tokenize_cached.__wrapped__, commands, args.repeat)
+    _tokenize_cached.cache_clear()
+    cold = _throughput(_tokenize_cached, commands)
+    warm = _throughput(_tokenize_cached, commands)
+
+    print(f"{'mode':<10} {'commands/s':>12} {'speedup':>8}")
+    print(f"{'reference':<10} {reference:>12,.0f} {1.0:>7.2f}x")
+    print(f"{'uncached':<10} {uncached:>12,.0f} {uncached / reference:>7.2f}x")
+    print(f"{'memo cold':<10} {cold:>12,.0f} {cold / reference:>7.2f}x")
+    print(f"{'memo warm':<10} {warm:>12,.0f} {warm / reference:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Vector search backend benchmark for Daedelus.
+
+Compares the exact (float32/float16/int8) and Annoy backends on random
+vectors: build time, query latency, recall@k against exact float32 search,
+and index size on disk.
+
+Usage:
+    python scripts/benchmark_vector_backends.py --sizes 10000 100000 --dim 128
+
+Created by: orpheus497
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from daedelus.core.vector_backends import AnnoyBackend, ExactBackend, VectorBackend  # noqa: E402
+
+
+def _true_neighbors(vectors: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    """Exact float32 angular neighbors of each query."""
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    truth = []
+    for query in queries:
+        scores = normalized @ (query / np.linalg.norm(query))
+        truth.append(set(np.argpartition(-scores, k - 1)[:k].tolist()))
+    return truth
+
+
+def _benchmark(
+    backend: VectorBackend,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    truth: list[set[int]],
+    k: int,
+    work_dir: Path,
+    search_k: int = -1,
+) -> dict[str, float]:
+    """Build, query and save one backend, returning its measurements."""
+    start = time.perf_counter()
+    backend.build(vectors)
+    build_s = time.perf_counter() - start
+
+    timings = []
+    hits = 0
+    for query, expected in zip(queries, truth, strict=True):
+        start = time.perf_counter()
+        ids, _ = backend.query(query, k, search_k=search_k)
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & set(ids))
+
+    prefix = work_dir / backend.name
+    backend.save(prefix)
+    size = sum(path.stat().st_size for path in backend.files(prefix) if path.exists())
+
+    return {
+        "build_s": build_s,
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "recall": hits / (k * len(queries)),
+        "size_mb": size / 1e6,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print a results table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-trees", type=int, default=10)
+    parser.add_argument("--search-k", type=int, default=-1, help="Annoy search_k (-1 = default)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'vectors':>8}  {'backend':<16} {'build s':>8} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'recall':>7} {'disk MB':>8}"
+    )
+
+    for n in args.sizes:
+        vectors = rng.standard_normal((n, args.dim)).astype(np.float32)
+        # Queries near indexed vectors, like a history lookup
+        queries = vectors[rng.choice(n, args.queries, replace=False)]
+        queries = queries + 0.5 * rng.standard_normal(queries.shape).astype(np.float32)
+        truth = _true_neighbors(vectors, queries, args.k)
+
+        backends: list[tuple[str, VectorBackend]] = [
+            (f"exact/{q}", ExactBackend(args.dim, "angular", quantization=q))
+            for q in ("float32", "float16", "int8")
+        ]
+        try:
+            backends.append(
+                (f"annoy/{args.n_trees}", AnnoyBackend(args.dim, "angular", args.n_trees))
+            )
+        except ImportError:
+            print("annoy not installed, skipping Annoy backend")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, backend in backends:
+                result = _benchmark(
+                    backend, vectors, queries, truth, args.k, Path(tmp), args.search_k
+                )
+                print(
+                    f"{n:>8}  {label:<16} {result['build_s']:>8.2f} {result['p50_ms']:>8.2f} "
+                    f"{result['p95_ms']:>8.2f} {result['recall']:>7.3f} {result['size_mb']:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ from dataclasses import dataclass, asdict
 
 # Import daedelus modules
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from daedelus.core.knowledge_retriever import bump_knowledge_version
 from daedelus.utils.config import Config
 
 
@@ -304,6 +305,11 @@ class RedbookIndexer:
             if i % 10 == 0:
                 print(f"   Indexed {i}/{len(sections)} sections...")
         
+        # Populate the external-content FTS index from knowledge_base
+        cursor.execute("INSERT INTO knowledge_base_fts(knowledge_base_fts) VALUES('rebuild')")
+
+        # Invalidate cached knowledge searches (e.g. in a running daemon)
+        bump_knowledge_version(conn)
         conn.commit()
         
         # Get statistics
@@ -4,7 +4,7 @@ Core components for Daedalus.
 This module contains the core AI and data management components:
 - Database: SQLite-based command history storage with FTS5
 - Embeddings: FastText-based command embeddings (Phase 1)
-- Vector Store: Annoy-based similarity search (Phase 1)
+- Vector Store: Exact (quantized) or Annoy similarity search (Phase 1)
 - Suggestions: Multi-tier suggestion engine
 
 Phase 2 will add:
@@ -0,0 +1,393 @@
+"""
+Argument-aware command structure index for Daedalus.
+
+Instead of treating every historical command line as an opaque suggestion,
+this index learns the structure of each base command from tokenized history:
+
+    base command -> subcommands -> flags / argument slots (with usage counts)
+
+so that ``git co`` completes to ``git commit`` / ``git checkout`` and
+``git commit -`` completes to the flags actually used with ``git commit``,
+regardless of how many distinct ``git commit -m '...'`` variants exist.
+
+Created by: orpheus497
+"""
+
+import logging
+import re
+import shlex
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from daedelus.core.database import CommandDatabase
+
+logger = logging.getLogger(__name__)
+
+# Tokens that end the first simple command of a pipeline/list
+SHELL_OPERATORS = frozenset({"|", "||", "&&", ";", "&", ">", ">>", "<", "2>", "2>&1"})
+
+# Operators that start a new simple command (completion works on the last one)
+COMMAND_SEPARATORS = frozenset({"|", "||", "|&", "&&", ";", "&"})
+
+# Characters that separate shell words (as shlex.split treats them)
+SHELL_WHITESPACE = " \t\r\n"
+
+# Tokens that look like subcommands (git commit, docker compose, kubectl get)
+SUBCOMMAND_PATTERN = re.compile(r"^[a-z][a-z0-9_-]*$")
+
+
+@dataclass
+class CommandNode:
+    """
+    Usage statistics for a command or subcommand.
+
+    Attributes:
+        count: Number of executions that reached this node
+        subcommands: Child subcommand nodes
+        flags: Flag -> usage count
+        arguments: Concrete argument value -> usage count (bounded)
+        argument_kinds: Argument slot kind (path, number, word, string) -> count
+    """
+
+    count: int = 0
+    subcommands: dict[str, "CommandNode"] = field(default_factory=dict)
+    flags: Counter = field(default_factory=Counter)
+    arguments: Counter = field(default_factory=Counter)
+    argument_kinds: Counter = field(default_factory=Counter)
+
+    def prune_arguments(self, max_arguments: int) -> None:
+        """Keep only the most common concrete argument values."""
+        if len(self.arguments) > max_arguments * 2:
+            self.arguments = Counter(dict(self.arguments.most_common(max_arguments)))
+
+
+class CommandStructureIndex:
+    """
+    Index of command structure built from history.
+
+    Provides token-position completion: only the token under the cursor is
+    completed, from the subcommands, flags or arguments observed at that
+    position, so the candidate space is small even for high-cardinality commands.
+
+    Attributes:
+        max_depth: Maximum subcommand nesting tracked (git -> stash -> pop)
+        max_arguments: Concrete argument values kept per node
+    """
+
+    def __init__(self, max_depth: int = 2, max_arguments: int = 50) -> None:
+        """
+        Initialize command structure index.
+
+        Args:
+            max_depth: Maximum subcommand depth to track
+            max_arguments: Concrete argument values kept per node
+        """
+        self.max_depth = max_depth
+        self.max_arguments = max_arguments
+        self.roots: dict[str, CommandNode] = {}
+        self._commands_indexed = 0
+
+        logger.debug(f"CommandStructureIndex initialized (max_depth={max_depth})")
+
+    @staticmethod
+    def split(command: str) -> list[str] | None:
+        """
+        Split a command line into shell words (first simple command only).
+
+        Args:
+            command: Command string
+
+        Returns:
+            List of shell words, or None if quoting is unbalanced
+        """
+        try:
+            words = shlex.split(command)
+        except ValueError:
+            return None
+
+        for i, word in enumerate(words):
+            if word in SHELL_OPERATORS:
+                return words[:i]
+        return words
+
+    @staticmethod
+    def classify_argument(token: str) -> str:
+        """
+        Classify an argument into a slot kind.
+
+        Args:
+            token: Argument token
+
+        Returns:
+            One of 'path', 'number', 'word' or 'string'
+        """
+        if "/" in token or token.startswith(("~", ".")):
+            return "path"
+        if token.isdigit():
+            return "number"
+        if SUBCOMMAND_PATTERN.match(token):
+            return "word"
+        return "string"
+
+    def add_command(self, command: str, count: int = 1) -> None:
+        """
+        Add a command (or several executions of it) to the index.
+
+        Args:
+            command: Command string
+            count: Number of executions to record
+        """
+        words = self.split(command)
+        if not words:
+            return
+
+        base = words[0]
+        node = self.roots.setdefault(base, CommandNode())
+        node.count += count
+
+        depth = 0
+        positional_seen = False
+        for token in words[1:]:
+            if token.startswith("-") and token != "-":
+                # Record "--name=value" flags by name only
+                node.flags[token.split("=", 1)[0]] += count
+                positional_seen = True
+            elif (
+                not positional_seen
+                and depth < self.max_depth
+                and SUBCOMMAND_PATTERN.match(token)
+            ):
+                node = node.subcommands.setdefault(token, CommandNode())
+                node.count += count
+                depth += 1
+            else:
+                node.arguments[token] += count
+                node.argument_kinds[self.classify_argument(token)] += count
+                node.prune_arguments(self.max_arguments)
+                positional_seen = True
+
+        self._commands_indexed += count
+
+    def load_from_database(self, db: CommandDatabase, limit: int = 50000) -> int:
+        """
+        Build the index from successful commands in history.
+
+        Args:
+            db: Command database
+            limit: Maximum number of distinct commands to read
+
+        Returns:
+            Number of distinct commands indexed
+        """
+        self.roots = {}
+        self._commands_indexed = 0
+
+        cursor = db.conn.execute(
+            """
+            SELECT command, COUNT(*) as frequency
+            FROM command_history
+            WHERE exit_code = 0
+            GROUP BY command
+            ORDER BY frequency DESC
+            LIMIT ?
+            """,
+            (limit,),
+        )
+
+        distinct = 0
+        for row in cursor.fetchall():
+            self.add_command(row["command"], count=row["frequency"])
+            distinct += 1
+
+        logger.info(
+            f"Command structure index built from {distinct} distinct commands "
+            f"({len(self.roots)} base commands)"
+        )
+        return distinct
+
+    def complete(self, partial: str, limit: int = 5) -> list[dict[str, Any]]:
+        """
+        Complete the token under the cursor.
+
+        Args:
+            partial: Partially typed command line
+            limit: Maximum number of completions
+
+        Returns:
+            List of dicts with 'command' (full completed line), 'token',
+            'kind' ('command', 'subcommand', 'flag' or 'argument') and 'count'
+        """
+        if not partial.strip():
+            return []
+
+        if self.split(partial) is None:
+            return []  # Cursor is inside an open quote
+
+        spans = self._word_spans(partial)
+        at_word = bool(spans) and spans[-1][1] == len(partial)
+        if at_word and partial[spans[-1][0] :] in SHELL_OPERATORS:
+            return []  # Cursor is on an operator
+
+        # Complete within the last simple command of a pipeline or list;
+        # the text before it is kept as typed
+        offset = 0
+        for start, end in spans:
+            if partial[start:end] in COMMAND_SEPARATORS:
+                offset = end
+        if any(partial[start:end] in SHELL_OPERATORS for start, end in spans if start >= offset):
+            return []  # Cursor is in a redirection target
+
+        words = self.split(partial[offset:]) or []
+
+        # Completed text replaces the raw (possibly quoted) last word
+        if at_word:
+            stem = partial[: spans[-1][0]]
+            current = words.pop() if words else ""
+        else:
+            stem = partial
+            current = ""
+
+        # Completing the base command itself
+        if not words:
+            candidates = [
+                (name, "command", node.count)
+                for name, node in self.roots.items()
+                if name.startswith(current) and name != current
+            ]
+            return self._format(stem, candidates, limit)
+
+        node = self.roots.get(words[0])
+        if node is None:
+            return []
+
+        # Walk subcommands, collecting flags already present
+        used_flags = set()
+        positional_seen = False
+        for token in words[1:]:
+            if token.startswith("-") and token != "-":
+                used_flags.add(token.split("=", 1)[0])
+                positional_seen = True
+            elif not positional_seen and token in node.subcommands:
+                node = node.subcommands[token]
+            else:
+                positional_seen = True
+
+        candidates: list[tuple[str, str, int]] = []
+
+        if current.startswith("-"):
+            candidates.extend(
+                (flag, "flag", count)
+                for flag, count in node.flags.items()
+                if flag.startswith(current) and flag not in used_flags and flag != current
+            )
+        else:
+            if not positional_seen:
+                candidates.extend(
+                    (name, "subcommand", child.count)
+                    for name, child in node.subcommands.items()
+                    if name.startswith(current) and name != current
+                )
+            candidates.extend(
+                (arg, "argument", count)
+                for arg, count in node.arguments.items()
+                if arg.startswith(current) and arg != current
+            )
+            if not current:
+                candidates.extend(
+                    (flag, "flag", count)
+                    for flag, count in node.flags.items()
+                    if flag not in used_flags
+                )
+
+        return self._format(stem, candidates, limit)
+
+    @staticmethod
+    def _word_spans(partial: str) -> list[tuple[int, int]]:
+        """
+        Raw (start, end) offsets of the shell words in a command line.
+
+        Follows shlex quoting: whitespace inside quotes or after a backslash
+        does not end a word. Unquoted |, ; and & (except in a >& or <&
+        redirection) form words of their own, so "ls|grep" splits like
+        "ls | grep".
+
+        Args:
+            partial: Command line with balanced quotes
+
+        Returns:
+            Word offsets in order
+        """
+        spans: list[tuple[int, int]] = []
+        start = None
+        operator = False
+        quote = None
+        escaped = False
+        for i, char in enumerate(partial):
+            if escaped:
+                escaped = False
+                continue
+            if quote is not None:
+                if char == quote:
+                    quote = None
+                elif char == "\\" and quote == '"':
+                    escaped = True
+                continue
+
+            is_operator = char in "|;&" and not (char == "&" and i and partial[i - 1] in "<>")
+            if start is not None and (char in SHELL_WHITESPACE or is_operator != operator):
+                spans.append((start, i))
+                start = None
+            if char in SHELL_WHITESPACE:
+                continue
+
+            if start is None:
+                start = i
+                operator = is_operator
+            if char == "\\":
+                escaped = True
+            elif char in "'\"":
+                quote = char
+
+        if start is not None:
+            spans.append((start, len(partial)))
+        return spans
+
+    @staticmethod
+    def _format(
+        stem: str,
+        candidates: list[tuple[str, str, int]],
+        limit: int,
+    ) -> list[dict[str, Any]]:
+        """Rank candidates by count and render full completed command lines."""
+        candidates.sort(key=lambda c: c[2], reverse=True)
+
+        results = []
+        for token, kind, count in candidates[:limit]:
+            rendered = token if kind == "flag" else shlex.quote(token)
+            results.append(
+                {
+                    "command": stem + rendered,
+                    "token": token,
+                    "kind": kind,
+                    "count": count,
+                }
+            )
+        return results
+
+    def get_statistics(self) -> dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary of statistics
+        """
+
+        def count_nodes(node: CommandNode) -> int:
+            return 1 + sum(count_nodes(child) for child in node.subcommands.values())
+
+        return {
+            "base_commands": len(self.roots),
+            "nodes": sum(count_nodes(node) for node in self.roots.values()),
+            "commands_indexed": self._commands_indexed,
+        }
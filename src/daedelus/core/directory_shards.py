@@ -0,0 +1,332 @@
+"""
+Per-directory suggestion shards for Daedalus.
+
+Most suggestions are decided by the current directory, so instead of
+recomputing directory affinity from raw history on every request, the daemon
+keeps precomputed top-k command lists per directory and per project root:
+- Shards loaded once from history on first visit
+- Incremental refresh as commands are logged in that directory
+- LRU eviction of directories that have not been visited recently
+- Empty-buffer suggestions served straight from the shard
+
+Created by: orpheus497
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from daedelus.core.database import CommandDatabase
+
+logger = logging.getLogger(__name__)
+
+# Files/directories that mark the root of a project
+PROJECT_MARKERS = (
+    ".git",
+    "pyproject.toml",
+    "setup.py",
+    "package.json",
+    "Cargo.toml",
+    "go.mod",
+    "pom.xml",
+    "build.gradle",
+    "Makefile",
+)
+
+
+@dataclass
+class DirectoryShard:
+    """
+    Command usage statistics for a single directory or project root.
+
+    Attributes:
+        path: Directory the shard covers
+        scope: 'directory' (exact cwd) or 'project' (root and all subdirectories)
+        counts: Command -> successful execution count
+        last_used: Command -> most recent execution timestamp
+    """
+
+    path: str
+    scope: str
+    counts: dict[str, int] = field(default_factory=dict)
+    last_used: dict[str, float] = field(default_factory=dict)
+    _ranked: list[tuple[str, float]] | None = None
+    _ranked_at: float = 0.0
+
+    def record(self, command: str, timestamp: float) -> None:
+        """Record one successful execution of a command."""
+        self.counts[command] = self.counts.get(command, 0) + 1
+        self.last_used[command] = max(timestamp, self.last_used.get(command, 0.0))
+        self._ranked = None
+
+    def trim(self, max_commands: int) -> None:
+        """Drop the least used commands beyond max_commands."""
+        if len(self.counts) <= max_commands:
+            return
+
+        keep = sorted(
+            self.counts,
+            key=lambda cmd: (self.counts[cmd], self.last_used.get(cmd, 0.0)),
+            reverse=True,
+        )[:max_commands]
+        self.counts = {cmd: self.counts[cmd] for cmd in keep}
+        self.last_used = {cmd: self.last_used[cmd] for cmd in keep}
+        self._ranked = None
+
+    def ranked(self, decay_constant: float, max_age: float) -> list[tuple[str, float]]:
+        """
+        Get commands ranked by recency-weighted frequency.
+
+        Rankings are cached and recomputed only after new executions or once
+        they are older than max_age seconds (recency weights drift slowly).
+
+        Args:
+            decay_constant: Exponential decay per day since last use
+            max_age: Maximum age of the cached ranking in seconds
+
+        Returns:
+            List of (command, score) tuples, best first
+        """
+        now = time.time()
+        if self._ranked is not None and now - self._ranked_at < max_age:
+            return self._ranked
+
+        scored = []
+        for command, count in self.counts.items():
+            days_since_use = (now - self.last_used.get(command, now)) / 86400.0
+            scored.append((command, count * math.exp(-decay_constant * days_since_use)))
+
+        scored.sort(key=lambda x: x[1], reverse=True)
+        self._ranked = scored
+        self._ranked_at = now
+        return scored
+
+
+class DirectoryShardCache:
+    """
+    LRU cache of per-directory and per-project top-k command lists.
+
+    Attributes:
+        db: Command database used to load shards on first visit
+        top_k: Number of commands returned per lookup
+        max_directories: Maximum number of resident shards
+        max_commands_per_shard: Commands tracked per shard
+    """
+
+    def __init__(
+        self,
+        db: CommandDatabase,
+        top_k: int = 10,
+        max_directories: int = 256,
+        max_commands_per_shard: int = 200,
+        decay_constant: float = 0.1,
+        max_ranking_age: float = 60.0,
+    ) -> None:
+        """
+        Initialize directory shard cache.
+
+        Args:
+            db: Command database
+            top_k: Commands returned per lookup
+            max_directories: Shards kept before least recently visited are evicted
+            max_commands_per_shard: Commands tracked per shard
+            decay_constant: Recency decay per day (matches suggestion ranking)
+            max_ranking_age: Seconds before a cached ranking is recomputed
+        """
+        self.db = db
+        self.top_k = top_k
+        self.max_directories = max_directories
+        self.max_commands_per_shard = max_commands_per_shard
+        self.decay_constant = decay_constant
+        self.max_ranking_age = max_ranking_age
+
+        # (scope, path) -> shard, least recently visited first
+        self._shards: OrderedDict[tuple[str, str], DirectoryShard] = OrderedDict()
+
+        # cwd -> project root (or None), bounded alongside the shards
+        self._project_roots: OrderedDict[str, str | None] = OrderedDict()
+
+        self.stats = {"hits": 0, "loads": 0, "evictions": 0, "updates": 0}
+
+        # Shards are read by background precomputation while requests update them
+        self._lock = threading.RLock()
+
+        logger.debug(f"DirectoryShardCache initialized (top_k={top_k})")
+
+    def find_project_root(self, cwd: str) -> str | None:
+        """
+        Find the nearest ancestor of cwd containing a project marker.
+
+        Args:
+            cwd: Working directory
+
+        Returns:
+            Project root path, or None if cwd is not inside a project
+        """
+        if cwd in self._project_roots:
+            self._project_roots.move_to_end(cwd)
+            return self._project_roots[cwd]
+
+        root = None
+        try:
+            path = Path(cwd).expanduser()
+            home = Path.home()
+            for candidate in (path, *path.parents):
+                if candidate == candidate.parent or candidate == home:
+                    break  # Never treat the filesystem root or $HOME (dotfiles) as a project
+                if any((candidate / marker).exists() for marker in PROJECT_MARKERS):
+                    root = str(candidate)
+                    break
+        except OSError as e:
+            logger.debug(f"Project root detection failed for {cwd}: {e}")
+
+        self._project_roots[cwd] = root
+        if len(self._project_roots) > self.max_directories * 4:
+            self._project_roots.popitem(last=False)
+
+        return root
+
+    def _get_shard(self, scope: str, path: str) -> DirectoryShard:
+        """Get a shard, loading it from history on first visit."""
+        key = (scope, path)
+        shard = self._shards.get(key)
+
+        if shard is not None:
+            self._shards.move_to_end(key)
+            self.stats["hits"] += 1
+            return shard
+
+        shard = self._load_shard(scope, path)
+        self._shards[key] = shard
+        self.stats["loads"] += 1
+
+        while len(self._shards) > self.max_directories:
+            evicted_key, _ = self._shards.popitem(last=False)
+            self.stats["evictions"] += 1
+            logger.debug(f"Evicted directory shard: {evicted_key[1]}")
+
+        return shard
+
+    def _load_shard(self, scope: str, path: str) -> DirectoryShard:
+        """Build a shard from command history."""
+        shard = DirectoryShard(path=path, scope=scope)
+
+        if scope == "project":
+            # Subdirectories sort between root + "/" and root + "0" ("0" follows
+            # "/"); unlike LIKE, "_" and "%" in the path match literally
+            root = path.rstrip("/")
+            cwd_filter = "(cwd = ? OR (cwd >= ? || '/' AND cwd < ? || '0'))"
+            params: tuple[Any, ...] = (path, root, root, self.max_commands_per_shard)
+        else:
+            cwd_filter = "cwd = ?"
+            params = (path, self.max_commands_per_shard)
+
+        try:
+            cursor = self.db.conn.execute(
+                f"""
+                SELECT command, COUNT(*) as frequency, MAX(timestamp) as last_used
+                FROM command_history
+                WHERE {cwd_filter}
+                  AND exit_code = 0
+                GROUP BY command
+                ORDER BY frequency DESC, last_used DESC
+                LIMIT ?
+                """,
+                params,
+            )
+            for row in cursor.fetchall():
+                shard.counts[row["command"]] = row["frequency"]
+                shard.last_used[row["command"]] = row["last_used"]
+        except Exception as e:
+            logger.warning(f"Failed to load directory shard for {path}: {e}")
+
+        return shard
+
+    def _scopes(self, cwd: str) -> list[tuple[str, str]]:
+        """Get the (scope, path) shard keys covering a directory."""
+        scopes = [("directory", cwd)]
+        root = self.find_project_root(cwd)
+        if root is not None:
+            scopes.append(("project", root))
+        return scopes
+
+    def record(self, command: str, cwd: str, timestamp: float | None = None) -> None:
+        """
+        Incrementally refresh the shards covering cwd after a successful command.
+
+        Shards that are not resident are left alone; they will be loaded from
+        history (which already contains the command) on the next visit.
+
+        Args:
+            command: Executed command
+            cwd: Directory the command ran in
+            timestamp: Execution time (defaults to now)
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+
+        with self._lock:
+            for key in self._scopes(cwd):
+                shard = self._shards.get(key)
+                if shard is None:
+                    continue
+                shard.record(command, timestamp)
+                shard.trim(self.max_commands_per_shard)
+                self._shards.move_to_end(key)
+                self.stats["updates"] += 1
+
+    def suggest(self, cwd: str, k: int | None = None) -> list[dict[str, Any]]:
+        """
+        Get the top commands for a directory, backfilled from its project root.
+
+        Args:
+            cwd: Current working directory
+            k: Number of commands (defaults to top_k)
+
+        Returns:
+            List of dicts with 'command', 'score', 'frequency', 'last_used' and 'scope'
+        """
+        k = k or self.top_k
+        results: list[dict[str, Any]] = []
+        seen: set[str] = set()
+
+        with self._lock:
+            for scope, path in self._scopes(cwd):
+                shard = self._get_shard(scope, path)
+                for command, score in shard.ranked(self.decay_constant, self.max_ranking_age):
+                    if len(results) >= k:
+                        break
+                    if command in seen:
+                        continue
+                    seen.add(command)
+                    results.append(
+                        {
+                            "command": command,
+                            "score": score,
+                            "frequency": shard.counts[command],
+                            "last_used": shard.last_used.get(command),
+                            "scope": scope,
+                        }
+                    )
+                if len(results) >= k:
+                    break
+
+        return results
+
+    def get_statistics(self) -> dict[str, Any]:
+        """
+        Get shard cache statistics.
+
+        Returns:
+            Dictionary of statistics
+        """
+        return {
+            "resident_shards": len(self._shards),
+            "max_directories": self.max_directories,
+            "top_k": self.top_k,
+            **self.stats,
+        }
@@ -0,0 +1,393 @@
+"""
+Persistent embedding cache for Daedalus.
+
+Index rebuilds used to re-encode every command even though the FastText model
+had not changed. This cache stores command embeddings on disk so that only new
+distinct commands are encoded:
+- Memory-mapped float32 matrix (one row per distinct text)
+- 64-bit content hash -> row index, persisted alongside the matrix
+- Tagged with the embedder's model version; a retrained model invalidates it
+- Grows by doubling; metadata written atomically on flush
+- Bounded to max_entries rows: least recently used entries are evicted by
+  compacting the kept rows to the front of the matrix
+- Rows referenced by the keys on disk are never overwritten in place: the
+  keys are emptied before an eviction, invalidation or clear reuses them
+
+Created by: orpheus497
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from daedelus.core.embeddings import CommandEmbedder
+
+logger = logging.getLogger(__name__)
+
+
+def _content_hash(text: str) -> int:
+    """64-bit content hash of a text (stable across processes)."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of text embeddings keyed by content hash.
+
+    Attributes:
+        embedder: Embedder used to encode cache misses
+        cache_dir: Directory holding the matrix, keys and metadata
+        dim: Embedding dimensionality
+        max_entries: Maximum number of cached embeddings
+    """
+
+    MATRIX_FILE = "embeddings.f32"
+    KEYS_FILE = "keys.npy"
+    META_FILE = "meta.json"
+
+    # Share of max_entries kept when evicting (evictions are amortized)
+    EVICT_TO = 0.9
+
+    def __init__(
+        self,
+        embedder: CommandEmbedder,
+        cache_dir: Path,
+        initial_capacity: int = 4096,
+        max_entries: int = 100000,
+    ) -> None:
+        """
+        Initialize embedding cache, loading any persisted entries.
+
+        Args:
+            embedder: Embedder for cache misses (provides encode_batch and model_version)
+            cache_dir: Cache directory (created if missing)
+            initial_capacity: Rows allocated when the matrix is first created
+            max_entries: Maximum number of cached embeddings (bounds the matrix
+                file and the in-memory key index)
+        """
+        self.embedder = embedder
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.dim = embedder.embedding_dim
+        self.max_entries = max(1, max_entries)
+        self.initial_capacity = min(initial_capacity, self.max_entries)
+
+        self._matrix: np.memmap | None = None
+        self._keys: list[int] = []
+        self._rows: dict[int, int] = {}
+        # Last use (tick) per row, for LRU eviction
+        self._used = np.zeros(0, dtype=np.int64)
+        self._tick = 0
+        self._model_version: str | None = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+        logger.debug(f"EmbeddingCache initialized ({len(self._keys)} cached embeddings)")
+
+    @property
+    def matrix_path(self) -> Path:
+        """Path of the memory-mapped embedding matrix."""
+        return self.cache_dir / self.MATRIX_FILE
+
+    def _load(self) -> None:
+        """Load persisted keys and map the matrix (resets on any mismatch)."""
+        meta_path = self.cache_dir / self.META_FILE
+        keys_path = self.cache_dir / self.KEYS_FILE
+
+        if not (meta_path.exists() and keys_path.exists() and self.matrix_path.exists()):
+            return
+
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+
+            if meta.get("dim") != self.dim:
+                logger.info("Embedding cache dimension changed, discarding cache")
+                return
+
+            keys = np.load(keys_path)
+            capacity = self.matrix_path.stat().st_size // (4 * self.dim)
+            if len(keys) > capacity:
+                logger.warning("Embedding cache keys exceed matrix size, discarding cache")
+                return
+
+            self._matrix = np.memmap(
+                self.matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+            )
+            self._keys = keys.tolist()
+            self._rows = {key: row for row, key in enumerate(self._keys)}
+            self._model_version = meta.get("model_version")
+
+            # Row order approximates recency (evicted rows are compacted away)
+            self._used = np.arange(capacity, dtype=np.int64)
+            self._tick = len(self._keys)
+
+        except Exception as e:
+            logger.warning(f"Failed to load embedding cache: {e}")
+            self._matrix = None
+            self._keys = []
+            self._rows = {}
+
+    def _ensure_capacity(self, rows_needed: int) -> None:
+        """Grow the memory-mapped matrix to hold at least rows_needed rows."""
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows_needed <= capacity:
+            return
+
+        new_capacity = max(
+            min(capacity * 2, self.max_entries), rows_needed, self.initial_capacity
+        )
+
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+
+        with open(self.matrix_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * 4)
+
+        self._matrix = np.memmap(
+            self.matrix_path, dtype=np.float32, mode="r+", shape=(new_capacity, self.dim)
+        )
+        used = np.zeros(new_capacity, dtype=np.int64)
+        used[: len(self._used)] = self._used[:new_capacity]
+        self._used = used
+        logger.debug(f"Embedding cache grown to {new_capacity} rows")
+
+    def _write_keys(self, keys: list[int]) -> None:
+        """Replace the persisted keys atomically (lock held)."""
+        keys_tmp = self.cache_dir / f"{self.KEYS_FILE}.tmp"
+        with open(keys_tmp, "wb") as f:
+            np.save(f, np.asarray(keys, dtype=np.int64))
+        os.replace(keys_tmp, self.cache_dir / self.KEYS_FILE)
+
+    def _reset(self) -> None:
+        """Drop all entries, on disk first so no row is reused under old keys (lock held)."""
+        self._write_keys([])
+        self._keys = []
+        self._rows = {}
+        self._dirty = True
+
+    def _evict(self, keep: int) -> None:
+        """
+        Keep only the `keep` most recently used entries (lock held).
+
+        Kept rows are moved to the front of the matrix in their current
+        order, so the file never needs more than max_entries rows. The keys
+        on disk are emptied while rows move and rewritten afterwards, so an
+        interrupted eviction leaves an empty cache rather than keys that
+        point at the wrong rows.
+        """
+        count = len(self._keys)
+        if count <= keep:
+            return
+
+        if keep > 0:
+            recent = np.argpartition(-self._used[:count], keep - 1)[:keep]
+            kept = np.sort(recent)
+        else:
+            kept = np.zeros(0, dtype=np.int64)
+
+        self._write_keys([])
+        self._matrix[: len(kept)] = self._matrix[kept]
+        self._matrix.flush()
+        self._used[: len(kept)] = self._used[kept]
+        self._keys = [self._keys[row] for row in kept.tolist()]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._write_keys(self._keys)
+
+        self.stats["evictions"] += count - len(kept)
+        self._dirty = True
+        logger.debug(f"Embedding cache evicted {count - len(kept)} entries")
+
+    def _insert(self, keys: list[int], vectors: npt.NDArray[np.float32]) -> None:
+        """Append new entries, evicting least recently used ones if full (lock held)."""
+        if len(keys) > self.max_entries:
+            keys, vectors = keys[-self.max_entries :], vectors[-self.max_entries :]
+
+        if len(self._keys) + len(keys) > self.max_entries:
+            self._evict(max(int(self.max_entries * self.EVICT_TO) - len(keys), 0))
+
+        start = len(self._keys)
+        self._ensure_capacity(start + len(keys))
+        self._matrix[start : start + len(keys)] = vectors
+        self._used[start : start + len(keys)] = self._tick
+
+        for offset, key in enumerate(keys):
+            self._keys.append(key)
+            self._rows[key] = start + offset
+        self._dirty = True
+
+    def _check_version(self) -> None:
+        """Invalidate all entries if the embedder's model changed (lock held)."""
+        version = self.embedder.model_version
+        if version == self._model_version:
+            return
+
+        if self._keys:
+            self.stats["invalidations"] += 1
+            logger.info("Embedding model changed, invalidating embedding cache")
+            self._reset()
+
+        self._model_version = version
+        self._dirty = True
+
+    def encode(self, texts: list[str]) -> npt.NDArray[np.float32]:
+        """
+        Get embeddings for texts, encoding only those not already cached.
+
+        Args:
+            texts: Texts (commands, sentences, queries) to embed
+
+        Returns:
+            Embedding matrix (shape: [len(texts), dim])
+
+        Raises:
+            RuntimeError: If the embedder has no model loaded
+        """
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        with self._lock:
+            self._check_version()
+            self._tick += 1
+
+            hit_positions: list[int] = []
+            hit_rows: list[int] = []
+            missing: dict[str, tuple[int, list[int]]] = {}
+            for i, text in enumerate(texts):
+                key = _content_hash(text)
+                row = self._rows.get(key)
+                if row is not None:
+                    hit_positions.append(i)
+                    hit_rows.append(row)
+                elif text in missing:
+                    missing[text][1].append(i)
+                else:
+                    missing[text] = (key, [i])
+
+            self.stats["hits"] += len(hit_positions)
+            self.stats["misses"] += len(missing)
+
+            embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+            if hit_rows:
+                embeddings[hit_positions] = self._matrix[hit_rows]
+                self._used[hit_rows] = self._tick
+
+            if missing:
+                vectors = self.embedder.encode_batch(list(missing))
+                for vector, (_, positions) in zip(vectors, missing.values(), strict=True):
+                    embeddings[positions] = vector
+                self._insert([key for key, _ in missing.values()], vectors)
+
+            return embeddings
+
+    def encode_one(self, text: str) -> npt.NDArray[np.float32]:
+        """
+        Get the embedding of a single text (see encode).
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector (shape: [dim])
+        """
+        return self.encode([text])[0]
+
+    def switch_model(
+        self,
+        embedder: CommandEmbedder,
+        texts: list[str],
+        vectors: npt.NDArray[np.float32],
+    ) -> None:
+        """
+        Switch to a new embedder, seeding entries it has already encoded.
+
+        Entries of the previous model version are dropped; texts (with their
+        vectors from the new embedder) are cached so they are not encoded
+        again.
+
+        Args:
+            embedder: New embedder
+            texts: Texts encoded with the new embedder
+            vectors: Their embeddings (shape: [len(texts), dim])
+        """
+        with self._lock:
+            self.embedder = embedder
+            self._check_version()
+            self._tick += 1
+
+            distinct: dict[int, int] = {}
+            for i, text in enumerate(texts):
+                key = _content_hash(text)
+                if key not in self._rows:
+                    distinct.setdefault(key, i)
+            if distinct:
+                self._insert(list(distinct), np.asarray(vectors)[list(distinct.values())])
+
+    def flush(self) -> None:
+        """Persist the matrix, keys and metadata (metadata written atomically)."""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            try:
+                if self._matrix is not None:
+                    self._matrix.flush()
+
+                self._write_keys(self._keys)
+
+                meta_tmp = self.cache_dir / f"{self.META_FILE}.tmp"
+                with open(meta_tmp, "w") as f:
+                    json.dump(
+                        {
+                            "dim": self.dim,
+                            "model_version": self._model_version,
+                            "count": len(self._keys),
+                        },
+                        f,
+                    )
+                os.replace(meta_tmp, self.cache_dir / self.META_FILE)
+
+                self._dirty = False
+                logger.debug(f"Embedding cache flushed ({len(self._keys)} entries)")
+
+            except Exception as e:
+                logger.error(f"Failed to flush embedding cache: {e}")
+
+    def clear(self) -> None:
+        """Drop all cached embeddings."""
+        with self._lock:
+            self._reset()
+
+    def __len__(self) -> int:
+        """Number of cached embeddings."""
+        return len(self._keys)
+
+    def get_statistics(self) -> dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary of statistics
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._keys),
+            "capacity": 0 if self._matrix is None else self._matrix.shape[0],
+            "max_entries": self.max_entries,
+            "model_version": self._model_version,
+            "hit_rate_pct": round(self.stats["hits"] / lookups * 100, 2) if lookups else 0.0,
+            **self.stats,
+        }
@@ -34,14 +34,20 @@ _MODEL_IDENTITY = {
 
 import logging
 import re
-import shlex
 import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterator
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import numpy as np
 import numpy.typing as npt
 
+from daedelus.core.training_corpus import TrainingCorpus
+
 try:
     import fasttext
 except ImportError:
@@ -49,6 +55,136 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Sub-token pattern for plain words (alphanumeric runs and single special chars)
+_SUBTOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Characters that need shell-word parsing (quoting) or that str.split treats as
+# whitespace but shell words do not; ASCII commands without them split
+# identically on whitespace
+_SHLEX_REQUIRED_CHARS = frozenset("'\"\\\x0b\x0c\x1c\x1d\x1e\x1f")
+
+# Shell words of a command, matching shlex.split (POSIX mode): whitespace is
+# space/tab/CR/LF, backslash escapes outside quotes, single quotes are
+# literal, double quotes allow escaping " and \. A lone quote or trailing
+# backslash (where shlex raises ValueError) matches as a single character.
+_SHELL_WORD_PATTERN = re.compile(
+    r"(?:[^ \t\r\n'\"\\]+|\\.|'[^']*'|\"(?:[^\"\\]|\\.)*\")+|['\"\\]",
+    re.DOTALL,
+)
+
+# Quoted/escaped segments within a shell word
+_SHELL_QUOTE_PATTERN = re.compile(r"'([^']*)'|\"((?:[^\"\\]|\\.)*)\"|\\(.)", re.DOTALL)
+
+# Escapes inside double quotes (only \" and \\ lose their backslash)
+_DQ_ESCAPE_PATTERN = re.compile(r'\\(["\\])')
+
+# Tokens of a whitespace-separated command in one pass (same rules as the
+# per-word loop in _tokenize_cached): words starting with "-" and words
+# containing "/" are kept whole, other words split into \w runs and single
+# special characters
+_FAST_TOKEN_PATTERN = re.compile(r"(?<!\S)-\S*|(?<!\S)\S*/\S*|\w+|[^\w\s]")
+
+# Commands pooled per NumPy reduction in encode_batch
+_POOLING_CHUNK_SIZE = 4096
+
+
+def _unquote(match: re.Match[str]) -> str:
+    """Replacement for one quoted or escaped segment of a shell word."""
+    single, double, escaped = match.groups()
+    if single is not None:
+        return single
+    if double is not None:
+        return _DQ_ESCAPE_PATTERN.sub(r"\1", double) if "\\" in double else double
+    return escaped
+
+
+def _split_shell_words(command: str) -> list[str] | None:
+    """
+    Split a command into shell words like shlex.split, without shlex.
+
+    Args:
+        command: Command string
+
+    Returns:
+        List of words, or None if quotes or escapes are unbalanced
+    """
+    words = _SHELL_WORD_PATTERN.findall(command)
+    for i, word in enumerate(words):
+        if "'" in word or '"' in word or "\\" in word:
+            if len(word) == 1:
+                return None
+            words[i] = _SHELL_QUOTE_PATTERN.sub(_unquote, word)
+    return words
+
+
+def _basename(path: str) -> str:
+    """Final component of a path, as Path(path).name (without the Path object)."""
+    for component in reversed(path.split("/")):
+        if component and component != ".":
+            return component
+    return ""
+
+
+@lru_cache(maxsize=65536)
+def _tokenize_cached(command: str) -> tuple[str, ...]:
+    """
+    Memoized command tokenizer (see CommandEmbedder.tokenize).
+
+    Args:
+        command: Command string
+
+    Returns:
+        Tuple of tokens
+    """
+    command = command.strip()
+
+    if not command:
+        return ()
+
+    if command.isascii() and _SHLEX_REQUIRED_CHARS.isdisjoint(command):
+        # Whitespace-separated words: one findall tokenizes the whole command
+        tokens = _FAST_TOKEN_PATTERN.findall(command)
+        if "/" not in command:
+            return tuple(tokens)
+
+        with_basenames: list[str] = []
+        for token in tokens:
+            with_basenames.append(token)
+            # Path words (flags containing "/" are kept whole only)
+            if "/" in token and token[0] != "-":
+                basename = _basename(token)
+                if basename != token:
+                    with_basenames.append(basename)
+        return tuple(with_basenames)
+
+    # Shell parsing, falling back to simple split on unbalanced quotes
+    parts = _split_shell_words(command)
+    if parts is None:
+        parts = command.split()
+
+    tokens = []
+
+    for part in parts:
+        # Keep flags whole
+        if part.startswith("-"):
+            tokens.append(part)
+        # Handle paths (keep basename)
+        elif "/" in part:
+            # Split path and keep both full path and basename
+            tokens.append(part)
+            basename = _basename(part)
+            if basename != part:
+                tokens.append(basename)
+        # Single word-character run (\w is alphanumeric or underscore)
+        elif part.isalnum():
+            tokens.append(part)
+        # Regular words: split on special chars but keep them
+        else:
+            # Extract alphanumeric sequences and special chars separately
+            tokens.extend(_SUBTOKEN_PATTERN.findall(part))
+
+    return tuple(tokens)
+
 
 class CommandEmbedder:
     """
@@ -78,6 +214,7 @@ class CommandEmbedder:
         word_ngrams: int = 3,
         epoch: int = 5,
         max_corpus_size: int = 10000,
+        token_cache_size: int = 50000,
     ) -> None:
         """
         Initialize command embedder with persistent corpus management.
@@ -90,6 +227,7 @@ class CommandEmbedder:
             word_ngrams: Max length of character ngrams (for subwords)
             epoch: Number of training epochs
             max_corpus_size: Maximum commands to keep in persistent corpus
+            token_cache_size: Token vectors kept in the LRU cache
         """
         self.model_path = Path(model_path).expanduser()
         self.embedding_dim = embedding_dim
@@ -99,9 +237,22 @@ class CommandEmbedder:
         self.epoch = epoch
         self.max_corpus_size = max_corpus_size
 
-        # Persistent corpus file for incremental learning
-        self.corpus_path = self.model_path.parent / f"{self.model_path.stem}_corpus.txt"
+        # Persistent corpus (segment files) for incremental learning
+        self.corpus_path = self.model_path.parent / f"{self.model_path.stem}_corpus"
+        self.corpus = TrainingCorpus(
+            self.corpus_path,
+            max_size=max_corpus_size,
+            legacy_file=self.model_path.parent / f"{self.model_path.stem}_corpus.txt",
+        )
+
+        # Token -> word vector LRU (cleared whenever the model changes)
+        self.token_cache_size = token_cache_size
+        self._token_vectors: OrderedDict[str, npt.NDArray[np.float32]] = OrderedDict()
+        self._token_lock = threading.Lock()
+        self.cache_stats = {"hits": 0, "misses": 0}
 
+        # Identifies the current model; embedding caches are invalidated when it changes
+        self.model_version: str | None = None
         self.model: fasttext.FastText._FastText | None = None
 
         logger.info(f"CommandEmbedder initialized (dim={embedding_dim})")
@@ -109,6 +260,24 @@ class CommandEmbedder:
             f"Model identity: {_MODEL_IDENTITY['formal_name']} (aka {_MODEL_IDENTITY['social_name']}) by {_MODEL_IDENTITY['creator']}"
         )
 
+    @property
+    def model(self) -> "fasttext.FastText._FastText | None":
+        """FastText model (assigning a new model clears the token vector cache)."""
+        return self._model
+
+    @model.setter
+    def model(self, model: "fasttext.FastText._FastText | None") -> None:
+        self._model = model
+        # Unsaved models get a unique version; save()/load() tag it with the file
+        self.model_version = None if model is None else f"unsaved-{uuid.uuid4().hex}"
+        with self._token_lock:
+            self._token_vectors.clear()
+
+    def _file_version(self) -> str:
+        """Version tag of the model file (size and modification time)."""
+        stat = self.model_path.stat()
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
     @staticmethod
     def get_model_identity() -> dict[str, str]:
         """
@@ -135,27 +304,21 @@ class CommandEmbedder:
 
         logger.info(f"Training embedder on {len(commands)} commands...")
 
-        # Create training file (persistent if save_corpus=True, temp otherwise)
-        if save_corpus:
-            train_file = self.corpus_path
-            self.corpus_path.parent.mkdir(parents=True, exist_ok=True)
-            f = open(train_file, "w")
-        else:
-            temp_f = tempfile.NamedTemporaryFile(
-                mode="w",
-                suffix=".txt",
-                delete=False,
-            )
-            train_file = Path(temp_f.name)
-            f = temp_f
-
+        # Training file: the persistent corpus if save_corpus=True, temp otherwise
+        train_file: Path | None = None
         try:
-            # Tokenize and write commands
-            for cmd in commands:
-                tokens = self.tokenize(cmd)
-                if tokens:  # Skip empty commands
-                    f.write(" ".join(tokens) + "\n")
-            f.close()
+            if save_corpus:
+                # The given commands become the corpus (deduplicated, size-capped)
+                self.corpus.clear()
+                self.corpus.add(self._tokenized_lines(commands))
+                train_file = self.corpus.training_file()
+                if train_file is None:
+                    raise ValueError("No tokens in training commands")
+            else:
+                with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+                    train_file = Path(f.name)
+                    for line in self._tokenized_lines(commands):
+                        f.write(line + "\n")
 
             # Train unsupervised FastText model
             if fasttext is None:
@@ -187,14 +350,19 @@ class CommandEmbedder:
 
         except Exception as e:
             logger.error(f"FastText training failed: {e}", exc_info=True)
-            if not save_corpus and train_file.exists():
-                train_file.unlink(missing_ok=True)
             raise RuntimeError(f"Failed to train FastText model: {e}") from e
 
         finally:
             # Clean up temp file if not saving corpus
-            if not save_corpus and train_file.exists():
-                train_file.unlink()
+            if not save_corpus and train_file is not None:
+                train_file.unlink(missing_ok=True)
+
+    def _tokenized_lines(self, commands: list[str]) -> Iterator[str]:
+        """Tokenize commands into corpus lines, skipping empty ones."""
+        for cmd in commands:
+            tokens = self.tokenize(cmd)
+            if tokens:
+                yield " ".join(tokens)
 
     def load(self) -> None:
         """
@@ -213,6 +381,7 @@ class CommandEmbedder:
 
         logger.info(f"Loading model from {self.model_path}")
         self.model = fasttext.load_model(str(self.model_path))
+        self.model_version = self._file_version()
 
         logger.info(f"Model loaded. Vocab size: {len(self.model.words)}")
 
@@ -228,6 +397,7 @@ class CommandEmbedder:
 
         self.model_path.parent.mkdir(parents=True, exist_ok=True)
         self.model.save_model(str(self.model_path))
+        self.model_version = self._file_version()
 
         logger.info(f"Model saved to {self.model_path}")
 
@@ -247,25 +417,117 @@ class CommandEmbedder:
         if self.model is None:
             raise RuntimeError("Model not loaded. Call load() first.")
 
-        tokens = self.tokenize(command)
+        tokens = _tokenize_cached(command)
 
         if not tokens:
             # Return zero vector for empty command
             return np.zeros(self.embedding_dim, dtype=np.float32)
 
         # Get word vectors
-        word_vecs = [self.model.get_word_vector(token) for token in tokens]
+        with self._token_lock:
+            word_vecs = [self._token_vector(token) for token in tokens]
 
         # Mean pooling
         embedding = np.mean(word_vecs, axis=0).astype(np.float32)
 
         return embedding
 
+    def encode_batch(self, commands: list[str]) -> npt.NDArray[np.float32]:
+        """
+        Convert many command strings to embedding vectors at once.
+
+        Each distinct command is tokenized and pooled once per batch, each
+        distinct token is looked up once (through the token vector cache), and
+        mean pooling is a segmented NumPy reduction instead of a Python loop.
+
+        Args:
+            commands: Command strings to encode
+
+        Returns:
+            Embedding matrix (shape: [len(commands), embedding_dim]); rows for
+            empty commands are zero
+
+        Raises:
+            RuntimeError: If model hasn't been loaded
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded. Call load() first.")
+
+        embeddings = np.empty((len(commands), self.embedding_dim), dtype=np.float32)
+        if not commands:
+            return embeddings
+
+        # Shell history repeats heavily: pool each distinct command once
+        distinct: dict[str, int] = {}
+        inverse = np.fromiter(
+            (distinct.setdefault(command, len(distinct)) for command in commands),
+            dtype=np.int64,
+            count=len(commands),
+        )
+        pooled = self._pool_distinct(list(distinct))
+        np.take(pooled, inverse, axis=0, out=embeddings)
+
+        return embeddings
+
+    def _pool_distinct(self, commands: list[str]) -> npt.NDArray[np.float32]:
+        """Mean-pool token vectors for distinct commands into a (N, dim) matrix."""
+        embeddings = np.zeros((len(commands), self.embedding_dim), dtype=np.float32)
+
+        # Map each token occurrence to a row of the batch vocabulary
+        token_ids: dict[str, int] = {}
+        assign_id = token_ids.setdefault
+        flat_ids: list[int] = []
+        lengths = np.zeros(len(commands), dtype=np.int64)
+        for i, command in enumerate(commands):
+            tokens = _tokenize_cached(command)
+            lengths[i] = len(tokens)
+            flat_ids.extend([assign_id(token, len(token_ids)) for token in tokens])
+
+        if not flat_ids:
+            return embeddings
+
+        vocab = np.empty((len(token_ids), self.embedding_dim), dtype=np.float32)
+        with self._token_lock:
+            for token, token_id in token_ids.items():
+                vocab[token_id] = self._token_vector(token)
+
+        # Segmented sum over each command's tokens, then divide by token count.
+        # Pooled in chunks so the gathered token matrix stays small.
+        flat = np.asarray(flat_ids, dtype=np.int64)
+        offsets = np.zeros(len(commands) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        for start in range(0, len(commands), _POOLING_CHUNK_SIZE):
+            stop = min(start + _POOLING_CHUNK_SIZE, len(commands))
+            rows = start + np.flatnonzero(lengths[start:stop])
+            if len(rows) == 0:
+                continue
+            segment = vocab[flat[offsets[start] : offsets[stop]]]
+            sums = np.add.reduceat(segment, offsets[rows] - offsets[start], axis=0)
+            embeddings[rows] = sums / lengths[rows, None]
+
+        return embeddings
+
+    def _token_vector(self, token: str) -> npt.NDArray[np.float32]:
+        """Get a word vector through the LRU cache (caller holds _token_lock)."""
+        vector = self._token_vectors.get(token)
+        if vector is not None:
+            self._token_vectors.move_to_end(token)
+            self.cache_stats["hits"] += 1
+            return vector
+
+        vector = np.asarray(self.model.get_word_vector(token), dtype=np.float32)
+        self._token_vectors[token] = vector
+        if len(self._token_vectors) > self.token_cache_size:
+            self._token_vectors.popitem(last=False)
+        self.cache_stats["misses"] += 1
+        return vector
+
     def encode_context(
         self,
         cwd: str | None = None,
         history: list[str] | None = None,
         partial: str | None = None,
+        history_vector: npt.NDArray[np.float32] | None = None,
     ) -> npt.NDArray[np.float32]:
         """
         Encode context information into a vector.
@@ -279,6 +541,8 @@ class CommandEmbedder:
             cwd: Current working directory
             history: List of recent commands
             partial: Partially typed command
+            history_vector: Precomputed mean embedding of recent history
+                (skips re-encoding history when given)
 
         Returns:
             Context embedding vector
@@ -296,11 +560,12 @@ class CommandEmbedder:
                 features.append(dir_vec)
 
         # History features (average of recent commands)
-        if history:
-            hist_vecs = [self.encode_command(cmd) for cmd in history[-5:]]
-            if hist_vecs:
-                hist_mean = np.mean(hist_vecs, axis=0)
-                features.append(hist_mean)
+        if history_vector is not None:
+            features.append(history_vector)
+        elif history:
+            hist_vecs = self.encode_batch(history[-5:])
+            hist_mean = np.mean(hist_vecs, axis=0)
+            features.append(hist_mean)
 
         # Partial command features
         if partial:
@@ -327,45 +592,13 @@ class CommandEmbedder:
             command: Command string
 
         Returns:
-            List of tokens
+            List of tokens (memoized; repeated commands are not re-parsed)
 
         Example:
             >>> embedder.tokenize("git commit -m 'Initial commit'")
             ['git', 'commit', '-m', 'Initial', 'commit']
         """
-        # Remove leading/trailing whitespace
-        command = command.strip()
-
-        if not command:
-            return []
-
-        # Try proper shell parsing first
-        try:
-            parts = shlex.split(command)
-        except ValueError:
-            # Fallback to simple split if shell parsing fails
-            parts = command.split()
-
-        tokens = []
-
-        for part in parts:
-            # Keep flags whole
-            if part.startswith("-"):
-                tokens.append(part)
-            # Handle paths (keep basename)
-            elif "/" in part:
-                # Split path and keep both full path and basename
-                tokens.append(part)
-                basename = Path(part).name
-                if basename != part:
-                    tokens.append(basename)
-            # Regular words: split on special chars but keep them
-            else:
-                # Extract alphanumeric sequences and special chars separately
-                sub_tokens = re.findall(r"\w+|[^\w\s]", part)
-                tokens.extend(sub_tokens)
-
-        return tokens
+        return list(_tokenize_cached(command))
 
     def get_similar_commands(
         self,
@@ -388,11 +621,11 @@ class CommandEmbedder:
             raise RuntimeError("Model not loaded")
 
         query_vec = self.encode_command(command)
+        candidate_vecs = self.encode_batch(candidates)
 
         # Compute similarities
         similarities = []
-        for candidate in candidates:
-            candidate_vec = self.encode_command(candidate)
+        for candidate, candidate_vec in zip(candidates, candidate_vecs, strict=True):
             similarity = self._cosine_similarity(query_vec, candidate_vec)
             similarities.append((candidate, float(similarity)))
 
@@ -442,11 +675,11 @@ class CommandEmbedder:
         while adapting to new patterns.
 
         Implementation:
-            1. Load existing training corpus (if available)
-            2. Merge with new commands
-            3. Apply corpus size management (keep most recent commands)
-            4. Retrain model on combined corpus
-            5. Save updated model and corpus
+            1. Append new commands to the corpus segments (duplicates skipped)
+            2. Compact to the corpus size limit (newest commands kept, older
+               ones sampled)
+            3. Retrain model on the corpus file
+            4. Save updated model
 
         Args:
             new_commands: List of new command strings to learn from
@@ -458,7 +691,8 @@ class CommandEmbedder:
         Note:
             FastText doesn't support true incremental training, so we maintain
             a persistent corpus and retrain on the combined dataset. This ensures
-            the model retains old knowledge while learning new patterns.
+            the model retains old knowledge while learning new patterns. The
+            corpus is streamed from disk, so memory doesn't grow with its size.
         """
         if not new_commands:
             logger.debug("No new commands for incremental training")
@@ -474,59 +708,23 @@ class CommandEmbedder:
         logger.info(f"Incremental training with {len(new_commands)} new commands...")
 
         try:
-            # Step 1: Load existing corpus if available
-            existing_commands = []
-            if self.corpus_path.exists():
-                logger.info(f"Loading existing corpus from {self.corpus_path}")
-                try:
-                    with open(self.corpus_path) as f:
-                        # Read tokenized commands from corpus file
-                        for line in f:
-                            line = line.strip()
-                            if line:
-                                # Reconstruct command from tokens (approximate)
-                                # This preserves the tokenized format
-                                existing_commands.append(line)
-                    logger.info(f"Loaded {len(existing_commands)} commands from existing corpus")
-                except Exception as e:
-                    logger.warning(f"Failed to load existing corpus: {e}")
-                    existing_commands = []
-
-            # Step 2: Tokenize new commands
-            new_tokenized = []
-            for cmd in new_commands:
-                tokens = self.tokenize(cmd)
-                if tokens:
-                    new_tokenized.append(" ".join(tokens))
-
-            # Step 3: Combine old and new, maintaining corpus size limit
-            combined = existing_commands + new_tokenized
-
-            # Apply size management - keep most recent commands
-            if len(combined) > self.max_corpus_size:
-                logger.info(
-                    f"Corpus size ({len(combined)}) exceeds max ({self.max_corpus_size}), "
-                    "keeping most recent commands"
-                )
-                combined = combined[-self.max_corpus_size :]
-
-            logger.info(f"Combined corpus size: {len(combined)} commands")
-
-            # Step 4: Create training file with combined corpus
-            train_file = self.corpus_path
-            train_file.parent.mkdir(parents=True, exist_ok=True)
+            # Steps 1-2: Append new commands and compact into a single training file
+            added = self.corpus.add(self._tokenized_lines(new_commands))
+            train_file = self.corpus.training_file()
+            if train_file is None:
+                logger.debug("Corpus is empty, skipping incremental training")
+                return False
 
-            with open(train_file, "w") as f:
-                for tokenized_cmd in combined:
-                    f.write(tokenized_cmd + "\n")
+            corpus_size = len(self.corpus)
+            logger.info(f"Corpus size: {corpus_size} commands ({added} new)")
 
-            # Step 5: Retrain model on combined corpus
+            # Step 3: Retrain model on the corpus
             if fasttext is None:
                 raise ImportError(
                     "fasttext is not installed. Install it with: pip install fasttext==0.9.2"
                 )
 
-            logger.info("Retraining model on combined corpus...")
+            logger.info("Retraining model on corpus...")
             self.model = fasttext.train_unsupervised(
                 str(train_file),
                 model="skipgram",
@@ -537,13 +735,13 @@ class CommandEmbedder:
                 verbose=1,
             )
 
-            # Step 6: Save updated model
+            # Step 4: Save updated model
             self.save()
 
             logger.info(
                 f"Incremental training complete. "
                 f"Vocabulary size: {len(self.model.words)}, "
-                f"Corpus size: {len(combined)}"
+                f"Corpus size: {corpus_size}"
             )
 
             return True
@@ -560,23 +758,22 @@ class CommandEmbedder:
             Dictionary with corpus statistics including size, path, and existence
         """
         stats = {
-            "corpus_exists": self.corpus_path.exists(),
+            "corpus_exists": False,
             "corpus_path": str(self.corpus_path),
             "corpus_size": 0,
             "max_corpus_size": self.max_corpus_size,
         }
 
-        if self.corpus_path.exists():
-            try:
-                with open(self.corpus_path) as f:
-                    stats["corpus_size"] = sum(1 for line in f if line.strip())
-
+        try:
+            corpus_stats = self.corpus.get_statistics()
+            stats["corpus_exists"] = corpus_stats["segments"] > 0
+            stats["corpus_size"] = corpus_stats["lines"]
+            stats["segments"] = corpus_stats["segments"]
+            if stats["corpus_exists"]:
                 # Get file size in KB
-                file_size = self.corpus_path.stat().st_size
-                stats["file_size_kb"] = round(file_size / 1024, 2)
-
-            except Exception as e:
-                logger.warning(f"Failed to get corpus stats: {e}")
+                stats["file_size_kb"] = round(corpus_stats["disk_bytes"] / 1024, 2)
+        except Exception as e:
+            logger.warning(f"Failed to get corpus stats: {e}")
 
         return stats
 
@@ -588,17 +785,15 @@ class CommandEmbedder:
             True if corpus was cleared, False otherwise
 
         Note:
-            This removes the persistent corpus file. The model will remain
+            This removes the corpus segment files. The model will remain
             intact, but future incremental training will start fresh.
         """
-        if self.corpus_path.exists():
-            try:
-                self.corpus_path.unlink()
+        try:
+            if self.corpus.clear():
                 logger.info(f"Cleared training corpus at {self.corpus_path}")
                 return True
-            except Exception as e:
-                logger.error(f"Failed to clear corpus: {e}")
-                return False
+        except Exception as e:
+            logger.error(f"Failed to clear corpus: {e}")
         return False
 
     def get_training_stats(self) -> dict[str, int]:
@@ -619,6 +814,9 @@ class CommandEmbedder:
             "vocab_size": len(self.model.words),
             "embedding_dim": self.embedding_dim,
             "loaded": True,
+            "cached_token_vectors": len(self._token_vectors),
+            "token_cache_hits": self.cache_stats["hits"],
+            "token_cache_misses": self.cache_stats["misses"],
         }
 
     def __repr__(self) -> str:
@@ -0,0 +1,245 @@
+"""
+Typo-tolerant fuzzy command index for Daedalus.
+
+Keeps the distinct-command vocabulary resident in the daemon so that typos
+such as ``gti status`` or ``dokcer ps`` can be matched without touching the
+database on every keystroke:
+- Vocabulary loaded once from command history, then updated incrementally
+- Precomputed lowercase prefix "heads" per query length
+- rapidfuzz ``cdist`` scoring with score cutoffs (multi-threaded for large vocabularies)
+- Per-prefix result caching
+
+Created by: orpheus497
+"""
+
+import logging
+from typing import Any
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from daedelus.core.cache import LRUCache
+from daedelus.core.database import CommandDatabase
+
+logger = logging.getLogger(__name__)
+
+
+class FuzzyCommandIndex:
+    """
+    In-memory fuzzy matcher over the distinct commands in history.
+
+    Queries are scored against the leading characters of each command
+    ("heads") truncated to the query length, so a mistyped prefix matches
+    the commands it was meant to start. Heads are computed once per query
+    length and extended in place as new commands are added.
+
+    Attributes:
+        score_cutoff: Minimum rapidfuzz score (0-100) for a match
+        min_query_length: Shortest query that is fuzzy matched
+        parallel_threshold: Vocabulary size above which cdist uses all cores
+        max_head_length: Longest query length that uses prefix heads
+    """
+
+    def __init__(
+        self,
+        score_cutoff: float = 65.0,
+        min_query_length: int = 3,
+        cache_size: int = 512,
+        parallel_threshold: int = 5000,
+        max_head_length: int = 64,
+    ) -> None:
+        """
+        Initialize fuzzy command index.
+
+        Args:
+            score_cutoff: Minimum match score (0-100)
+            min_query_length: Minimum query length to attempt fuzzy matching
+            cache_size: Number of per-prefix results to cache
+            parallel_threshold: Vocabulary size at which to use workers=-1
+            max_head_length: Maximum query length scored against prefix heads
+        """
+        self.score_cutoff = score_cutoff
+        self.min_query_length = min_query_length
+        self.parallel_threshold = parallel_threshold
+        self.max_head_length = max_head_length
+
+        # Parallel vocabulary storage
+        self._commands: list[str] = []
+        self._lowered: list[str] = []
+        self._frequencies: list[int] = []
+        self._positions: dict[str, int] = {}
+
+        # Query length -> lowercase command prefixes of that length
+        self._heads: dict[int, list[str]] = {}
+
+        # Bumped whenever the vocabulary or a frequency changes so stale cache
+        # keys stop matching
+        self._version = 0
+        self._cache = LRUCache(capacity=cache_size, ttl=None, name="fuzzy_prefix")
+
+        logger.debug(f"FuzzyCommandIndex initialized (cutoff={score_cutoff})")
+
+    def load_from_database(self, db: CommandDatabase, limit: int = 20000) -> int:
+        """
+        Load the distinct successful commands from history.
+
+        Args:
+            db: Command database
+            limit: Maximum number of distinct commands to keep (most frequent first)
+
+        Returns:
+            Number of commands in the vocabulary
+        """
+        cursor = db.conn.execute(
+            """
+            SELECT command, COUNT(*) as frequency
+            FROM command_history
+            WHERE exit_code = 0
+            GROUP BY command
+            ORDER BY frequency DESC
+            LIMIT ?
+            """,
+            (limit,),
+        )
+
+        self._commands = []
+        self._lowered = []
+        self._frequencies = []
+        self._positions = {}
+        self._heads = {}
+
+        for row in cursor.fetchall():
+            self._positions[row["command"]] = len(self._commands)
+            self._commands.append(row["command"])
+            self._lowered.append(row["command"].lower())
+            self._frequencies.append(row["frequency"])
+
+        self._version += 1
+
+        logger.info(f"Fuzzy index loaded {len(self._commands)} distinct commands")
+        return len(self._commands)
+
+    def add_command(self, command: str) -> None:
+        """
+        Record a command execution in the vocabulary.
+
+        Known commands only have their frequency incremented; new commands are
+        appended to the vocabulary and every precomputed head list.
+
+        Args:
+            command: Successfully executed command
+        """
+        command = command.strip()
+        if not command:
+            return
+
+        position = self._positions.get(command)
+        if position is not None:
+            self._frequencies[position] += 1
+            # Frequencies break score ties and are part of the results
+            self._version += 1
+            return
+
+        lowered = command.lower()
+        self._positions[command] = len(self._commands)
+        self._commands.append(command)
+        self._lowered.append(lowered)
+        self._frequencies.append(1)
+
+        for length, heads in self._heads.items():
+            heads.append(lowered[:length])
+
+        self._version += 1
+
+    def search(self, partial: str, limit: int = 5) -> list[dict[str, Any]]:
+        """
+        Find commands whose beginning fuzzily matches the partial input.
+
+        Args:
+            partial: Partially typed (possibly mistyped) command
+            limit: Maximum number of matches
+
+        Returns:
+            List of dicts with 'command', 'score' (0-100) and 'frequency',
+            sorted by score then frequency
+        """
+        query = partial.strip().lower()
+        if len(query) < self.min_query_length or not self._commands:
+            return []
+
+        cache_key = f"{self._version}|{limit}|{query}"
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        choices = self._get_heads(len(query))
+        workers = -1 if len(choices) >= self.parallel_threshold else 1
+
+        scores = process.cdist(
+            [query],
+            choices,
+            scorer=fuzz.ratio,
+            score_cutoff=self.score_cutoff,
+            dtype=np.uint8,
+            workers=workers,
+        )[0]
+
+        candidates = np.nonzero(scores)[0]
+        if len(candidates) == 0:
+            self._cache.set(cache_key, [])
+            return []
+
+        frequencies = np.asarray(self._frequencies)[candidates]
+        # lexsort sorts by the last key first: score desc, then frequency desc
+        order = np.lexsort((-frequencies, -scores[candidates].astype(np.int16)))
+
+        results = []
+        for i in order[:limit]:
+            idx = int(candidates[i])
+            results.append(
+                {
+                    "command": self._commands[idx],
+                    "score": int(scores[idx]),
+                    "frequency": self._frequencies[idx],
+                }
+            )
+
+        self._cache.set(cache_key, results)
+        return results
+
+    def _get_heads(self, length: int) -> list[str]:
+        """
+        Get (building if needed) the lowercase command prefixes of a given length.
+
+        Args:
+            length: Query length
+
+        Returns:
+            List parallel to the vocabulary
+        """
+        if length > self.max_head_length:
+            return self._lowered
+
+        heads = self._heads.get(length)
+        if heads is None:
+            heads = [cmd[:length] for cmd in self._lowered]
+            self._heads[length] = heads
+        return heads
+
+    def get_statistics(self) -> dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary of statistics
+        """
+        return {
+            "vocabulary_size": len(self._commands),
+            "head_lengths_cached": len(self._heads),
+            "score_cutoff": self.score_cutoff,
+            "cache": self._cache.get_stats(),
+        }
+
+    def __len__(self) -> int:
+        """Return number of distinct commands in the vocabulary."""
+        return len(self._commands)
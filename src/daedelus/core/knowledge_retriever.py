@@ -1,12 +1,133 @@
 """
 Knowledge Base Retrieval Module
 Provides access to indexed knowledge (Redbook, etc.) for RAG pipeline
+
+The retriever keeps one read-only connection open (statements are reused
+from its statement cache) and an LRU of search results. Writers bump a
+version counter in the knowledge_meta table (see bump_knowledge_version);
+the cache is dropped when the counter changes.
+
+Searches are ranked inside SQLite with FTS5 bm25() (title and topics
+weighted over content), boosted for exact title phrases, phrases and NEAR
+matches; only the top rows are fetched, each with a highlighted snippet.
 """
 
+import logging
+import re
 import sqlite3
-from typing import List, Dict, Optional, Tuple
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from pathlib import Path
-from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Words ignored when building FTS queries
+STOPWORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at',
+    'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is', 'are', 'was', 'were',
+    'how', 'what', 'when', 'where', 'who', 'why', 'which',
+})
+
+# bm25() column weights, in knowledge_base_fts column order:
+# title, content, chapter, section, part, topics
+BM25_WEIGHTS = (10.0, 1.0, 0.0, 0.0, 0.5, 2.0)
+
+# Score added for matches of the boost queries (bm25 scores are negated so
+# that higher is better)
+TITLE_PHRASE_BOOST = 20.0
+PHRASE_BOOST = 10.0
+NEAR_BOOST = 5.0
+NEAR_DISTANCE = 10
+
+# Statement shapes (one text per query kind, so each is prepared once per
+# connection; the optional source filter is a parameter, not a SQL variant).
+# Ranking happens entirely in FTS5: weighted bm25 plus boosts for rows that
+# also match the phrase queries, so section content is never scanned.
+_SEARCH_SQL = f"""
+    WITH hits AS (
+        SELECT
+            rowid,
+            -bm25(knowledge_base_fts, {", ".join(map(str, BM25_WEIGHTS))}) AS score
+        FROM knowledge_base_fts
+        WHERE knowledge_base_fts MATCH :terms
+    ),
+    top AS (
+        SELECT
+            kb.id,
+            hits.score
+            + CASE WHEN hits.rowid IN (
+                SELECT rowid FROM knowledge_base_fts WHERE knowledge_base_fts MATCH :title_phrase
+              ) THEN {TITLE_PHRASE_BOOST} ELSE 0 END
+            + CASE WHEN :phrase IS NOT NULL AND hits.rowid IN (
+                SELECT rowid FROM knowledge_base_fts WHERE knowledge_base_fts MATCH :phrase
+              ) THEN {PHRASE_BOOST} ELSE 0 END
+            + CASE WHEN :near IS NOT NULL AND hits.rowid IN (
+                SELECT rowid FROM knowledge_base_fts WHERE knowledge_base_fts MATCH :near
+              ) THEN {NEAR_BOOST} ELSE 0 END
+            AS relevance_score
+        FROM hits
+        JOIN knowledge_base kb ON kb.id = hits.rowid
+        WHERE (:source IS NULL OR kb.source = :source)
+        ORDER BY relevance_score DESC
+        LIMIT :limit
+    )
+    -- Snippets only for the returned rows
+    SELECT
+        kb.source,
+        kb.chapter,
+        kb.section,
+        kb.title,
+        kb.content,
+        snippet(knowledge_base_fts, 1, '**', '**', '...', 24),
+        top.relevance_score
+    FROM top
+    JOIN knowledge_base kb ON kb.id = top.id
+    JOIN knowledge_base_fts ON knowledge_base_fts.rowid = top.id
+    WHERE knowledge_base_fts MATCH :terms
+    ORDER BY top.relevance_score DESC
+"""
+
+_FALLBACK_SEARCH_SQL = """
+    SELECT
+        source, chapter, section, title, content, '' as snippet, 0 as relevance_score
+    FROM knowledge_base
+    WHERE (title LIKE ? OR content LIKE ?)
+      AND (? IS NULL OR source = ?)
+    LIMIT ?
+"""
+
+_SECTION_COMMANDS_SQL = """
+    SELECT DISTINCT command
+    FROM knowledge_commands
+    WHERE knowledge_id IN (
+        SELECT id FROM knowledge_base
+        WHERE source = ? AND chapter = ? AND section = ?
+    )
+    LIMIT 20
+"""
+
+_VERSION_SQL = "SELECT value FROM knowledge_meta WHERE key = 'version'"
+
+
+def bump_knowledge_version(conn: sqlite3.Connection) -> None:
+    """
+    Record that the knowledge tables changed (invalidates retriever caches).
+
+    Call inside the transaction that modifies knowledge_base/knowledge_commands.
+
+    Args:
+        conn: Writable connection to the knowledge database
+    """
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS knowledge_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO knowledge_meta (key, value) VALUES ('version', 1) "
+        "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+    )
+
 
 @dataclass
 class KnowledgeResult:
@@ -18,6 +139,7 @@ class KnowledgeResult:
     content: str
     rank: float
     commands: List[str]
+    snippet: str = ""  # Matching excerpt of the content (terms in **bold**)
     
     def get_context(self, max_length: int = 2000) -> str:
         """Get formatted context for LLM"""
@@ -43,157 +165,164 @@ class KnowledgeResult:
 
 class KnowledgeRetriever:
     """Retrieves relevant knowledge from database for RAG"""
-    
-    def __init__(self, db_path: Optional[Path] = None):
+
+    def __init__(self, db_path: Optional[Path] = None, cache_size: int = 256):
         if db_path is None:
             db_path = Path.home() / ".local/share/daedelus/history.db"
-        self.db_path = db_path
-        
-    def search(self, query: str, limit: int = 5, 
+        self.db_path = Path(db_path)
+        self.cache_size = cache_size
+
+        # Long-lived read-only connection (opened on first use)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+        # (normalized query, source, limit) -> results, for one knowledge version
+        self._cache: "OrderedDict[Tuple[str, Optional[str], int], List[KnowledgeResult]]" = OrderedDict()
+        self._data_version: Optional[int] = None
+        self._knowledge_version: Optional[int] = None
+
+        self.stats = {"searches": 0, "cache_hits": 0, "invalidations": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the read-only connection if needed (lock held)."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                cached_statements=32,
+            )
+        return self._conn
+
+    def _check_version(self) -> None:
+        """Drop cached results if the knowledge tables changed (lock held)."""
+        conn = self._connection()
+
+        # Cheap check first: data_version only changes when another connection commits
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+
+        try:
+            row = conn.execute(_VERSION_SQL).fetchone()
+            version = row[0] if row else 0
+        except sqlite3.OperationalError:
+            version = 0  # No knowledge_meta table yet
+
+        if version != self._knowledge_version:
+            if self._cache:
+                self.stats["invalidations"] += 1
+                logger.debug("Knowledge base changed, clearing search cache")
+            self._cache.clear()
+            self._knowledge_version = version
+
+    def close(self) -> None:
+        """Close the database connection and drop cached results."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._cache.clear()
+            self._data_version = None
+            self._knowledge_version = None
+
+    def search(self, query: str, limit: int = 5,
                source: Optional[str] = None) -> List[KnowledgeResult]:
         """
         Search knowledge base using enhanced full-text search with relevance ranking.
-        
+
+        Results are cached per (normalized query, source, limit) until the
+        knowledge tables change.
+
         Args:
             query: Search query
             limit: Maximum number of results
             source: Filter by source (e.g., 'redbook')
-        
+
         Returns:
             List of KnowledgeResult objects sorted by relevance
         """
-        conn = sqlite3.connect(self.db_path)
+        # Normalize whitespace (the normalized query is both the key and the search)
+        query = " ".join(query.split())
+        key = (query.lower(), source, limit)
+
+        with self._lock:
+            self.stats["searches"] += 1
+            self._check_version()
+
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return [replace(result) for result in cached]
+
+            results = self._search(self._connection(), query, limit, source)
+
+            self._cache[key] = results
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return [replace(result) for result in results]
+
+    def _search(self, conn: sqlite3.Connection, query: str, limit: int,
+                source: Optional[str]) -> List[KnowledgeResult]:
+        """Run a search against the database (lock held)."""
         cursor = conn.cursor()
-        
-        # Enhanced query processing
-        import re
-        
+
         # Extract meaningful words (remove stopwords)
-        stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 
-                    'to', 'for', 'of', 'with', 'by', 'from', 'as', 'is', 'are', 'was', 'were',
-                    'how', 'what', 'when', 'where', 'who', 'why', 'which'}
-        
         words = re.findall(r'\w+', query.lower())
-        meaningful_words = [w for w in words if w not in stopwords and len(w) > 2]
-        
-        # Build FTS query with proper weighting
-        # Use NEAR for phrase proximity, OR for term matching
-        if len(meaningful_words) > 1:
-            # Try phrase match first (highest relevance)
-            phrase_query = ' '.join(meaningful_words)
-            # Then individual terms
-            term_query = ' OR '.join(meaningful_words)
-            clean_query = f'"{phrase_query}" OR ({term_query})'
-        elif meaningful_words:
-            clean_query = meaningful_words[0]
-        else:
-            # Fallback to original query if no meaningful words
-            clean_query = query
-        
-        # Enhanced SQL query with better ranking
-        sql = """
-            SELECT 
-                kb.source,
-                kb.chapter,
-                kb.section,
-                kb.title,
-                kb.content,
-                fts.rank,
-                -- Calculate custom relevance score
-                (
-                    -- Title match (highest weight)
-                    CASE WHEN kb.title LIKE ? THEN 100 ELSE 0 END +
-                    -- Exact phrase in content
-                    CASE WHEN kb.content LIKE ? THEN 50 ELSE 0 END +
-                    -- FTS rank (normalized)
-                    (fts.rank * -10)
-                ) as relevance_score
-            FROM knowledge_base kb
-            JOIN knowledge_base_fts fts ON kb.id = fts.rowid
-            WHERE knowledge_base_fts MATCH ?
-        """
-        
-        # Prepare search patterns for LIKE queries
-        like_pattern = f'%{query}%'
-        params = [like_pattern, like_pattern, clean_query]
-        
-        if source:
-            sql += " AND kb.source = ?"
-            params.append(source)
-        
-        sql += " ORDER BY relevance_score DESC, fts.rank LIMIT ?"
-        params.append(limit)
-        
-        try:
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()
-        except sqlite3.OperationalError as e:
-            # Fallback to simpler query if FTS fails
-            logger.warning(f"FTS query failed, using fallback: {e}")
-            sql = """
-                SELECT 
-                    source, chapter, section, title, content, 0 as rank, 0 as relevance_score
-                FROM knowledge_base
-                WHERE title LIKE ? OR content LIKE ?
-            """
-            params = [like_pattern, like_pattern]
-            if source:
-                sql += " AND source = ?"
-                params.append(source)
-            sql += " LIMIT ?"
-            params.append(limit)
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()
-        
+        meaningful_words = [w for w in words if w not in STOPWORDS and len(w) > 2]
+        fts_words = meaningful_words or words
+
+        rows: List[tuple] = []
+        if fts_words:
+            # FTS queries (words are \w runs; quoting keeps FTS operators literal)
+            quoted = [f'"{w}"' for w in fts_words]
+            phrase = f'"{" ".join(fts_words)}"'
+            multiword = len(fts_words) > 1
+            params = {
+                "terms": " OR ".join(quoted),
+                "title_phrase": f"title : {phrase}",
+                "phrase": phrase if multiword else None,
+                "near": f"NEAR({' '.join(quoted)}, {NEAR_DISTANCE})" if multiword else None,
+                "source": source,
+                "limit": limit,
+            }
+            try:
+                rows = cursor.execute(_SEARCH_SQL, params).fetchall()
+            except sqlite3.OperationalError as e:
+                # Fallback to a plain scan if FTS is unavailable
+                logger.warning(f"FTS query failed, using fallback: {e}")
+                fts_words = []
+
+        if not fts_words:
+            like_pattern = f'%{query}%'
+            rows = cursor.execute(
+                _FALLBACK_SEARCH_SQL,
+                (like_pattern, like_pattern, source, source, limit),
+            ).fetchall()
+
         results = []
         for row in rows:
-            source_val, chapter, section, title, content, rank, score = row
-            
+            source_val, chapter, section, title, content, snippet, score = row
+
             # Get associated commands
-            cursor.execute("""
-                SELECT DISTINCT command
-                FROM knowledge_commands
-                WHERE knowledge_id IN (
-                    SELECT id FROM knowledge_base
-                    WHERE source = ? AND chapter = ? AND section = ?
-                )
-                LIMIT 20
-            """, (source_val, chapter, section))
-            
+            cursor.execute(_SECTION_COMMANDS_SQL, (source_val, chapter, section))
             commands = [cmd[0] for cmd in cursor.fetchall()]
-            
-            result = KnowledgeResult(
+
+            results.append(KnowledgeResult(
                 source=source_val,
                 chapter=chapter,
                 section=section,
                 title=title,
                 content=content,
-                rank=float(score) if score else float(rank),  # Use custom score if available
-                commands=commands
-            )
-            results.append(result)
-        
-        conn.close()
-        
-        # Additional post-processing: boost results with query terms in title
-        for result in results:
-            title_lower = result.title.lower()
-            query_lower = query.lower()
-            
-            # Boost if query appears in title
-            if query_lower in title_lower:
-                result.rank += 50
-            
-            # Boost for each meaningful word in title
-            for word in meaningful_words:
-                if word in title_lower:
-                    result.rank += 5
-        
-        # Re-sort by adjusted rank
-        results.sort(key=lambda r: r.rank, reverse=True)
-        
+                rank=float(score),
+                commands=commands,
+                snippet=snippet,
+            ))
+
         return results
-    
+
     def search_commands(self, query: str, limit: int = 10) -> List[Tuple[str, str, str]]:
         """
         Search for specific commands in knowledge base
@@ -201,36 +330,26 @@ class KnowledgeRetriever:
         Returns:
             List of (command, chapter, section) tuples
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT DISTINCT command, chapter, section
-            FROM knowledge_commands
-            WHERE command LIKE ?
-            ORDER BY chapter, section
-            LIMIT ?
-        """, (f"%{query}%", limit))
-        
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        with self._lock:
+            cursor = self._connection().execute("""
+                SELECT DISTINCT command, chapter, section
+                FROM knowledge_commands
+                WHERE command LIKE ?
+                ORDER BY chapter, section
+                LIMIT ?
+            """, (f"%{query}%", limit))
+            return cursor.fetchall()
     
     def get_chapter_summary(self, chapter_num: int, source: str = 'redbook') -> Optional[str]:
         """Get summary of a specific chapter"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT title, content
-            FROM knowledge_base
-            WHERE source = ? AND chapter LIKE ?
-            ORDER BY section
-            LIMIT 1
-        """, (source, f"%{chapter_num}%"))
-        
-        row = cursor.fetchone()
-        conn.close()
+        with self._lock:
+            row = self._connection().execute("""
+                SELECT title, content
+                FROM knowledge_base
+                WHERE source = ? AND chapter LIKE ?
+                ORDER BY section
+                LIMIT 1
+            """, (source, f"%{chapter_num}%")).fetchone()
         
         if row:
             title, content = row
@@ -277,35 +396,61 @@ class KnowledgeRetriever:
         
         return context
     
-    def get_statistics(self) -> Dict[str, int]:
-        """Get knowledge base statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        stats = {}
-        
-        # Total sections
-        cursor.execute("SELECT COUNT(*) FROM knowledge_base")
-        stats['total_sections'] = cursor.fetchone()[0]
-        
-        # Total commands
-        cursor.execute("SELECT COUNT(*) FROM knowledge_commands")
-        stats['total_commands'] = cursor.fetchone()[0]
-        
-        # By source
-        cursor.execute("""
-            SELECT source, COUNT(*) 
-            FROM knowledge_base 
-            GROUP BY source
-        """)
-        stats['by_source'] = dict(cursor.fetchall())
-        
-        # Chapters
-        cursor.execute("SELECT COUNT(DISTINCT chapter) FROM knowledge_base")
-        stats['total_chapters'] = cursor.fetchone()[0]
-        
-        conn.close()
-        return stats
+    def has_knowledge_base(self) -> bool:
+        """Check whether the knowledge tables have been created"""
+        with self._lock:
+            row = self._connection().execute("""
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type='table' AND name='knowledge_base'
+            """).fetchone()
+            return row[0] > 0
+
+    def get_statistics(self, source: Optional[str] = None) -> Dict[str, int]:
+        """
+        Get knowledge base statistics
+
+        Args:
+            source: Count only this source's sections and chapters
+        """
+        with self._lock:
+            cursor = self._connection().cursor()
+
+            stats = {}
+
+            # Total sections
+            cursor.execute(
+                "SELECT COUNT(*) FROM knowledge_base WHERE (? IS NULL OR source = ?)",
+                (source, source),
+            )
+            stats['total_sections'] = cursor.fetchone()[0]
+
+            # Total commands
+            cursor.execute(
+                "SELECT COUNT(*) FROM knowledge_commands WHERE (? IS NULL OR source = ?)",
+                (source, source),
+            )
+            stats['total_commands'] = cursor.fetchone()[0]
+
+            # By source
+            cursor.execute("""
+                SELECT source, COUNT(*)
+                FROM knowledge_base
+                GROUP BY source
+            """)
+            stats['by_source'] = dict(cursor.fetchall())
+
+            # Chapters
+            cursor.execute(
+                "SELECT COUNT(DISTINCT chapter) FROM knowledge_base WHERE (? IS NULL OR source = ?)",
+                (source, source),
+            )
+            stats['total_chapters'] = cursor.fetchone()[0]
+
+            # Result cache
+            stats.update(self.stats)
+            stats['cached_queries'] = len(self._cache)
+
+            return stats
 
 
 # Convenience function for quick access
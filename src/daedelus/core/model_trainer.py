@@ -0,0 +1,434 @@
+"""
+Out-of-process FastText retraining for Daedalus.
+
+Training FastText in the daemon process holds its CPU and blocks the caller,
+and replacing the model in place races with suggest requests that are
+encoding. Retraining is moved out of the serving path instead:
+- fastText runs in a child process (python -m daedelus.core.model_trainer)
+  with a nice level and a thread cap
+- Each run writes a new versioned model file; the serving model is untouched
+- The candidate is loaded into a separate embedder and quality-checked;
+  failed candidates are discarded (the previous model keeps serving)
+- Accepted versions are promoted to the canonical model path atomically,
+  and old versions are pruned
+
+Created by: orpheus497
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from daedelus.core.embeddings import CommandEmbedder
+
+logger = logging.getLogger(__name__)
+
+
+class ModelQualityError(Exception):
+    """Raised when a retrained model fails its quality checks."""
+
+
+class ModelTrainer:
+    """
+    Retrains command embedders in a background subprocess.
+
+    Attributes:
+        model_path: Canonical model path (accepted versions are promoted here)
+        versions_dir: Directory holding versioned model files
+        nice_level: Niceness added to the training process
+        threads: fastText training threads
+        keep_versions: Versioned models kept on disk (current and previous)
+        timeout: Seconds before a training process is killed
+    """
+
+    def __init__(
+        self,
+        model_path: Path,
+        nice_level: int = 10,
+        threads: int = 1,
+        keep_versions: int = 2,
+        timeout: float = 1800.0,
+    ) -> None:
+        """
+        Initialize model trainer.
+
+        Args:
+            model_path: Canonical model path
+            nice_level: Niceness increment for the training process
+            threads: Thread cap for fastText training
+            keep_versions: Number of versioned models to keep
+            timeout: Training timeout in seconds
+        """
+        self.model_path = Path(model_path).expanduser()
+        self.versions_dir = self.model_path.parent / f"{self.model_path.stem}_versions"
+        self.nice_level = nice_level
+        self.threads = threads
+        self.keep_versions = keep_versions
+        self.timeout = timeout
+
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+        self.stats: dict[str, Any] = {
+            "runs": 0,
+            "accepted": 0,
+            "rejected": 0,
+            "failed": 0,
+            "last_duration_s": None,
+            "last_error": None,
+        }
+
+    def is_running(self) -> bool:
+        """Check whether a background retrain is in progress."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(
+        self,
+        base: CommandEmbedder,
+        commands: list[str],
+        on_complete: Callable[[CommandEmbedder], None],
+    ) -> bool:
+        """
+        Retrain in the background and hand the accepted model to a callback.
+
+        The callback runs on the trainer thread; if it raises, the candidate
+        is rejected and the previous model stays current.
+
+        Args:
+            base: Current embedder (hyperparameters are copied from it)
+            commands: Training commands
+            on_complete: Called with the candidate embedder to install it
+
+        Returns:
+            True if a retrain was started, False if one is already running
+        """
+        with self._lock:
+            if self.is_running():
+                logger.debug("Retrain already in progress, not starting another")
+                return False
+
+            self._thread = threading.Thread(
+                target=self.run,
+                args=(base, list(commands), on_complete),
+                name="daedelus-retrain",
+                daemon=True,
+            )
+            self._thread.start()
+            return True
+
+    def wait(self, timeout: float | None = None) -> None:
+        """
+        Wait for a background retrain to finish.
+
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(
+        self,
+        base: CommandEmbedder,
+        commands: list[str],
+        on_complete: Callable[[CommandEmbedder], None],
+    ) -> bool:
+        """
+        Train, check, install and promote a new model version (blocking).
+
+        Errors are logged rather than raised; the previous model stays current.
+
+        Args:
+            base: Current embedder (hyperparameters are copied from it)
+            commands: Training commands
+            on_complete: Called with the candidate embedder to install it
+
+        Returns:
+            True if the new model was installed and promoted
+        """
+        try:
+            candidate = self.train(base, commands)
+        except Exception as e:
+            logger.warning(f"Retrain failed, keeping current model: {e}")
+            return False
+
+        try:
+            on_complete(candidate)
+        except Exception as e:
+            logger.warning(f"Retrained model not installed, keeping current model: {e}")
+            self.stats["rejected"] += 1
+            self.stats["last_error"] = str(e)
+            self.discard(candidate)
+            return False
+
+        self.promote(candidate)
+        return True
+
+    def train(self, base: CommandEmbedder, commands: list[str]) -> CommandEmbedder:
+        """
+        Train and quality-check a new model version (blocking).
+
+        The commands are added to the base embedder's persistent corpus and the
+        model is trained on the whole (deduplicated, size-capped) corpus.
+
+        Args:
+            base: Current embedder (hyperparameters and corpus are taken from it)
+            commands: New training commands
+
+        Returns:
+            Candidate embedder with the new model loaded
+
+        Raises:
+            ValueError: If there are too few commands to train
+            RuntimeError: If the training process fails
+            ModelQualityError: If the candidate fails its quality checks
+        """
+        if len(commands) < 10:
+            raise ValueError("Need at least 10 commands to train")
+
+        self.stats["runs"] += 1
+        start = time.time()
+        version = time.strftime("%Y%m%d%H%M%S") + f"-{os.getpid()}-{self.stats['runs']}"
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        version_path = self.versions_dir / f"{self.model_path.stem}-{version}.bin"
+
+        try:
+            base.corpus.add(" ".join(tokens) for tokens in map(base.tokenize, commands) if tokens)
+            corpus_path = base.corpus.training_file()
+            if corpus_path is None:
+                raise ValueError("No tokens in training commands")
+
+            self._run_subprocess(base, corpus_path, version_path)
+
+            candidate = CommandEmbedder(
+                version_path,
+                embedding_dim=base.embedding_dim,
+                vocab_size=base.vocab_size,
+                min_count=base.min_count,
+                word_ngrams=base.word_ngrams,
+                epoch=base.epoch,
+                max_corpus_size=base.max_corpus_size,
+                token_cache_size=base.token_cache_size,
+            )
+            candidate.corpus_path = base.corpus_path
+            candidate.corpus = base.corpus
+            candidate.load()
+
+            try:
+                self.check_quality(candidate, commands, reference=base)
+            except ModelQualityError:
+                self.stats["rejected"] += 1
+                self.discard(candidate)
+                raise
+
+        except ModelQualityError as e:
+            self.stats["last_error"] = str(e)
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.stats["last_error"] = str(e)
+            version_path.unlink(missing_ok=True)
+            raise
+
+        self.stats["last_duration_s"] = round(time.time() - start, 2)
+        logger.info(f"Trained model version {version_path.name} in {time.time() - start:.1f}s")
+        return candidate
+
+    def _run_subprocess(self, base: CommandEmbedder, corpus_path: Path, output_path: Path) -> None:
+        """Run fastText training in a niced, thread-capped child process."""
+        cmd = [
+            sys.executable,
+            "-m",
+            "daedelus.core.model_trainer",
+            "--input",
+            str(corpus_path),
+            "--output",
+            str(output_path),
+            "--dim",
+            str(base.embedding_dim),
+            "--epoch",
+            str(base.epoch),
+            "--min-count",
+            str(base.min_count),
+            "--word-ngrams",
+            str(base.word_ngrams),
+            "--threads",
+            str(self.threads),
+        ]
+        env = {**os.environ, "OMP_NUM_THREADS": str(self.threads)}
+        nice_level = self.nice_level
+
+        def lower_priority() -> None:
+            os.nice(nice_level)
+
+        try:
+            result = subprocess.run(
+                cmd,
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                preexec_fn=lower_priority if hasattr(os, "nice") and nice_level else None,
+            )
+        except subprocess.TimeoutExpired as e:
+            raise RuntimeError(f"Training timed out after {self.timeout}s") from e
+
+        if result.returncode != 0 or not output_path.exists():
+            error = (result.stderr or "").strip().splitlines()
+            raise RuntimeError(
+                f"Training process exited with {result.returncode}: "
+                f"{error[-1] if error else 'no output'}"
+            )
+
+    def check_quality(
+        self,
+        candidate: CommandEmbedder,
+        probe_commands: list[str],
+        reference: CommandEmbedder | None = None,
+        n_probes: int = 50,
+    ) -> None:
+        """
+        Check a candidate model before it replaces the current one.
+
+        Args:
+            candidate: Candidate embedder
+            probe_commands: Commands to embed as probes
+            reference: Current embedder (its vocabulary size is the baseline)
+            n_probes: Maximum distinct probe commands
+
+        Raises:
+            ModelQualityError: If the model has no vocabulary, a much smaller
+                vocabulary than the reference, degenerate embeddings, or
+                embeddings that don't distinguish commands
+        """
+        vocab_size = len(candidate.model.words)
+        if vocab_size == 0:
+            raise ModelQualityError("Candidate model has an empty vocabulary")
+
+        if reference is not None and reference.model is not None:
+            reference_size = len(reference.model.words)
+            if reference_size and vocab_size < reference_size // 2:
+                raise ModelQualityError(
+                    f"Candidate vocabulary shrank from {reference_size} to {vocab_size}"
+                )
+
+        probes = list(dict.fromkeys(probe_commands))[:n_probes]
+        vectors = candidate.encode_batch(probes)
+        if not np.all(np.isfinite(vectors)):
+            raise ModelQualityError("Candidate model produced non-finite embeddings")
+
+        norms = np.linalg.norm(vectors, axis=1)
+        if np.mean(norms > 1e-6) < 0.9:
+            raise ModelQualityError("Candidate model produced zero embeddings")
+
+        if len(probes) > 1:
+            unit = vectors / np.maximum(norms[:, None], 1e-12)
+            similarity = unit @ unit.T
+            mean_similarity = (similarity.sum() - len(probes)) / (len(probes) * (len(probes) - 1))
+            if mean_similarity > 0.98:
+                raise ModelQualityError(
+                    f"Candidate embeddings don't distinguish commands "
+                    f"(mean cosine {mean_similarity:.3f})"
+                )
+
+    def promote(self, candidate: CommandEmbedder) -> None:
+        """
+        Make an accepted version the canonical model file and prune old versions.
+
+        The canonical path is replaced atomically (hard link, or copy where
+        links are unsupported), so a concurrent load sees the old or the new
+        model, never a partial file.
+
+        Args:
+            candidate: Accepted candidate embedder
+        """
+        tmp_path = self.model_path.with_name(self.model_path.name + ".tmp")
+        tmp_path.unlink(missing_ok=True)
+        try:
+            os.link(candidate.model_path, tmp_path)
+        except OSError:
+            shutil.copyfile(candidate.model_path, tmp_path)
+        os.replace(tmp_path, self.model_path)
+
+        self.stats["accepted"] += 1
+        self.stats["last_error"] = None
+        logger.info(f"Promoted model version {candidate.model_path.name}")
+        self._prune_versions()
+
+    def discard(self, candidate: CommandEmbedder) -> None:
+        """
+        Delete a rejected version.
+
+        Args:
+            candidate: Rejected candidate embedder
+        """
+        candidate.model = None
+        candidate.model_path.unlink(missing_ok=True)
+
+    def _prune_versions(self) -> None:
+        """Delete all but the newest keep_versions model versions."""
+        versions = sorted(
+            self.versions_dir.glob(f"{self.model_path.stem}-*.bin"),
+            key=lambda path: path.stat().st_mtime_ns,
+        )
+        for path in versions[: -self.keep_versions] if self.keep_versions else versions:
+            path.unlink(missing_ok=True)
+
+    def get_statistics(self) -> dict[str, Any]:
+        """
+        Get retraining statistics.
+
+        Returns:
+            Dictionary of statistics
+        """
+        return {
+            "running": self.is_running(),
+            "nice_level": self.nice_level,
+            "threads": self.threads,
+            **self.stats,
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Training process entry point: train fastText on a corpus file and save it."""
+    parser = argparse.ArgumentParser(description="Train a Daedalus command embedding model")
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--epoch", type=int, default=5)
+    parser.add_argument("--min-count", type=int, default=2)
+    parser.add_argument("--word-ngrams", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    import fasttext
+
+    model = fasttext.train_unsupervised(
+        args.input,
+        model="skipgram",
+        dim=args.dim,
+        epoch=args.epoch,
+        minCount=args.min_count,
+        wordNgrams=args.word_ngrams,
+        thread=args.threads,
+        verbose=0,
+    )
+
+    # Write next to the target and rename, so a partial file is never visible
+    tmp_output = f"{args.output}.partial"
+    model.save_model(tmp_output)
+    os.replace(tmp_output, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Predictive next-command precomputation for Daedalus.
+
+The moment a command is logged, the daemon knows the session's last command
+and working directory, so suggestions for the next (still empty) prompt are
+predictable. This module precomputes them on a background worker thread and
+serves the first suggest request after a prompt from cache:
+- Post-log hook schedules precomputation per session
+- Newer logs supersede pending work for the same session
+- Empty and one-character buffers answered from the cached candidate pool
+- Hit/miss statistics for the daemon status report
+
+Created by: orpheus497
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from daedelus.core.suggestions import SuggestionEngine
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Prediction:
+    """
+    Precomputed next-command candidates for one session.
+
+    Attributes:
+        cwd: Directory the prediction was computed for
+        last_command: Command that triggered the prediction
+        candidates: Candidate pool sorted by confidence
+        computed_at: Timestamp of computation
+    """
+
+    cwd: str | None
+    last_command: str
+    candidates: list[dict[str, Any]] = field(default_factory=list)
+    computed_at: float = 0.0
+
+
+class NextCommandPredictor:
+    """
+    Background precomputation of next-command suggestions per session.
+
+    Attributes:
+        engine: Suggestion engine used to compute predictions
+        max_suggestions: Suggestions returned per request
+        pool_size: Candidates kept per session (filtered for one-character buffers)
+        max_sessions: Sessions kept before the least recently active is dropped
+    """
+
+    def __init__(
+        self,
+        engine: "SuggestionEngine",
+        pool_size: int = 50,
+        max_sessions: int = 64,
+        background: bool = True,
+    ) -> None:
+        """
+        Initialize next-command predictor.
+
+        Args:
+            engine: Suggestion engine
+            pool_size: Candidate pool size per session
+            max_sessions: Maximum sessions with cached predictions
+            background: Compute on a worker thread (False computes inline, for tests)
+        """
+        self.engine = engine
+        self.pool_size = pool_size
+        self.max_sessions = max_sessions
+        self.background = background
+
+        self._predictions: OrderedDict[str, Prediction] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self._executor: ThreadPoolExecutor | None = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="daedelus-predict")
+            if background
+            else None
+        )
+
+        self.stats = {"scheduled": 0, "computed": 0, "superseded": 0, "hits": 0, "misses": 0}
+
+        logger.debug(f"NextCommandPredictor initialized (pool_size={pool_size})")
+
+    @property
+    def max_suggestions(self) -> int:
+        """Suggestions returned per request (follows the engine setting)."""
+        return self.engine.max_suggestions
+
+    def schedule(self, session_id: str, cwd: str | None, history: list[str]) -> None:
+        """
+        Post-log hook: precompute the session's next-command suggestions.
+
+        Args:
+            session_id: Session that logged the command
+            cwd: Directory the command ran in
+            history: Recent session history (last entry is the logged command)
+        """
+        if not history:
+            return
+
+        with self._lock:
+            generation = self._generations.get(session_id, 0) + 1
+            self._generations[session_id] = generation
+            # The cached prediction is for the previous prompt and is now stale
+            self._predictions.pop(session_id, None)
+            self.stats["scheduled"] += 1
+
+        if self._executor is None:
+            self._compute(session_id, cwd, list(history), generation)
+        else:
+            self._executor.submit(self._compute, session_id, cwd, list(history), generation)
+
+    def _compute(
+        self,
+        session_id: str,
+        cwd: str | None,
+        history: list[str],
+        generation: int,
+    ) -> None:
+        """Compute and store a prediction unless a newer log superseded it."""
+        with self._lock:
+            if self._generations.get(session_id) != generation:
+                self.stats["superseded"] += 1
+                return
+
+        try:
+            candidates = self.engine.predict_next(cwd, history, limit=self.pool_size)
+        except Exception as e:
+            logger.warning(f"Next-command precomputation failed: {e}")
+            return
+
+        with self._lock:
+            if self._generations.get(session_id) != generation:
+                self.stats["superseded"] += 1
+                return
+
+            self._predictions[session_id] = Prediction(
+                cwd=cwd,
+                last_command=history[-1],
+                candidates=candidates,
+                computed_at=time.time(),
+            )
+            self._predictions.move_to_end(session_id)
+            while len(self._predictions) > self.max_sessions:
+                evicted, _ = self._predictions.popitem(last=False)
+                self._generations.pop(evicted, None)
+            self.stats["computed"] += 1
+
+    def get(
+        self,
+        partial: str,
+        cwd: str | None = None,
+        session_id: str | None = None,
+    ) -> list[dict[str, Any]] | None:
+        """
+        Serve suggestions for an empty or one-character buffer from cache.
+
+        Args:
+            partial: Current buffer (only empty or one-character buffers are served)
+            cwd: Current working directory (must match the prediction)
+            session_id: Session ID (predictions are per session; None is a miss)
+
+        Returns:
+            Cached suggestions, or None on a miss
+        """
+        prefix = partial.strip()
+        if len(prefix) > 1:
+            return None
+
+        with self._lock:
+            prediction = self._predictions.get(session_id) if session_id else None
+
+            if prediction is None or (cwd and prediction.cwd and cwd != prediction.cwd):
+                self.stats["misses"] += 1
+                return None
+
+            matches = [
+                {**sug, "precomputed": True}
+                for sug in prediction.candidates
+                if sug["command"].startswith(prefix)
+            ][: self.max_suggestions]
+
+            if not matches:
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["hits"] += 1
+            return matches
+
+    def get_statistics(self) -> dict[str, Any]:
+        """
+        Get prediction cache statistics.
+
+        Returns:
+            Dictionary of statistics including hit rate
+        """
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "cached_sessions": len(self._predictions),
+                "hit_rate_pct": round(self.stats["hits"] / lookups * 100, 2) if lookups else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the worker thread, discarding pending precomputations."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
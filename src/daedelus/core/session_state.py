@@ -0,0 +1,285 @@
+"""
+Session-resident context state for Daedalus.
+
+The daemon already sees every command a shell session runs (via log_command),
+so it keeps the suggestion context for each session itself instead of having
+clients resend it with every suggest request:
+- Rolling window of the session's recent commands and its current directory
+- Cached context vector (mean of the last command embeddings), updated
+  incrementally as commands are logged instead of re-encoded per request
+- Lazy bootstrap from history for sessions that predate a daemon restart
+- LRU bound on the number of resident sessions
+
+Created by: orpheus497
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from daedelus.core.database import CommandDatabase
+from daedelus.core.embeddings import CommandEmbedder
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SessionState:
+    """
+    Suggestion context for a single shell session.
+
+    Attributes:
+        session_id: Shell session ID
+        cwd: Directory of the most recent command or request
+        recent_commands: Most recent commands, oldest first
+        command_vectors: Embeddings of the last commands (context vector window)
+        context_vector: Cached mean of command_vectors (None until computed)
+        last_active: Timestamp of last update
+    """
+
+    session_id: str
+    cwd: str | None = None
+    recent_commands: deque[str] = field(default_factory=deque)
+    command_vectors: deque[npt.NDArray[np.float32]] = field(default_factory=deque)
+    context_vector: npt.NDArray[np.float32] | None = None
+    last_active: float = 0.0
+
+    @property
+    def history(self) -> list[str]:
+        """Recent commands as a list, oldest first."""
+        return list(self.recent_commands)
+
+
+class SessionStateStore:
+    """
+    Per-session context state maintained by the daemon.
+
+    Attributes:
+        db: Command database (used to bootstrap unknown sessions)
+        embedder: Command embedder (None disables context vectors)
+        history_size: Recent commands kept per session
+        vector_window: Commands averaged into the context vector
+        max_sessions: Sessions kept before the least recently active is dropped
+    """
+
+    def __init__(
+        self,
+        db: CommandDatabase | None = None,
+        embedder: CommandEmbedder | None = None,
+        history_size: int = 10,
+        vector_window: int = 5,
+        max_sessions: int = 128,
+    ) -> None:
+        """
+        Initialize session state store.
+
+        Args:
+            db: Command database for bootstrapping sessions after a restart
+            embedder: Command embedder for context vectors
+            history_size: Recent commands kept per session
+            vector_window: Commands averaged into the context vector
+                (matches CommandEmbedder.encode_context)
+            max_sessions: Maximum resident sessions
+        """
+        self.db = db
+        self.embedder = embedder
+        self.history_size = history_size
+        self.vector_window = vector_window
+        self.max_sessions = max_sessions
+
+        self._sessions: OrderedDict[str, SessionState] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {"bootstraps": 0, "vectors_encoded": 0, "evictions": 0}
+
+        logger.debug(f"SessionStateStore initialized (history_size={history_size})")
+
+    def _embedder_ready(self) -> bool:
+        """Check whether context vectors can be computed."""
+        return self.embedder is not None and self.embedder.model is not None
+
+    def _new_state(self, session_id: str) -> SessionState:
+        """Create an empty state with bounded windows."""
+        return SessionState(
+            session_id=session_id,
+            recent_commands=deque(maxlen=self.history_size),
+            command_vectors=deque(maxlen=self.vector_window),
+        )
+
+    def _bootstrap(self, session_id: str) -> SessionState:
+        """Rebuild a session's state from history (e.g. after a daemon restart)."""
+        state = self._new_state(session_id)
+        if self.db is None:
+            return state
+
+        try:
+            cursor = self.db.conn.execute(
+                """
+                SELECT command, cwd FROM command_history
+                WHERE session_id = ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+                """,
+                (session_id, self.history_size),
+            )
+            rows = cursor.fetchall()
+        except Exception as e:
+            logger.warning(f"Failed to bootstrap session {session_id}: {e}")
+            return state
+
+        for row in reversed(rows):
+            state.recent_commands.append(row["command"])
+        if rows:
+            state.cwd = rows[0]["cwd"]
+            self.stats["bootstraps"] += 1
+
+        return state
+
+    def _get_or_create(self, session_id: str) -> SessionState:
+        """Get a resident session, bootstrapping it on first use (lock held)."""
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = self._bootstrap(session_id)
+            self._sessions[session_id] = state
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats["evictions"] += 1
+        else:
+            self._sessions.move_to_end(session_id)
+
+        state.last_active = time.time()
+        return state
+
+    def record_command(self, session_id: str, command: str, cwd: str | None) -> SessionState:
+        """
+        Update a session after a command was logged.
+
+        The new command is encoded once here; the context vector is the mean
+        of the cached per-command vectors, so no request re-encodes history.
+
+        Args:
+            session_id: Session that ran the command
+            command: Executed command
+            cwd: Directory the command ran in
+
+        Returns:
+            Updated session state
+        """
+        with self._lock:
+            created = session_id not in self._sessions
+            state = self._get_or_create(session_id)
+            # A freshly bootstrapped session already holds the command just inserted
+            if not (created and state.recent_commands and state.recent_commands[-1] == command):
+                state.recent_commands.append(command)
+            if cwd:
+                state.cwd = cwd
+
+            if not self._embedder_ready():
+                state.command_vectors.clear()
+                state.context_vector = None
+                return state
+
+            # Vectors missing for earlier commands (model loaded mid-session): rebuild lazily
+            if len(state.command_vectors) < min(len(state.recent_commands) - 1, self.vector_window):
+                state.command_vectors.clear()
+                state.context_vector = None
+                return state
+
+            try:
+                state.command_vectors.append(self.embedder.encode_command(command))
+                self.stats["vectors_encoded"] += 1
+                state.context_vector = np.mean(state.command_vectors, axis=0).astype(np.float32)
+            except Exception as e:
+                logger.debug(f"Context vector update failed: {e}")
+                state.command_vectors.clear()
+                state.context_vector = None
+
+            return state
+
+    def update_cwd(self, session_id: str, cwd: str) -> None:
+        """
+        Record a session's current directory (e.g. after a bare ``cd``).
+
+        Args:
+            session_id: Session ID
+            cwd: Current working directory
+        """
+        with self._lock:
+            self._get_or_create(session_id).cwd = cwd
+
+    def get(self, session_id: str | None) -> SessionState | None:
+        """
+        Get a session's state, bootstrapping it from history if not resident.
+
+        Args:
+            session_id: Session ID
+
+        Returns:
+            Session state, or None if no session ID was given
+        """
+        if not session_id:
+            return None
+
+        with self._lock:
+            return self._get_or_create(session_id)
+
+    def get_context_vector(self, state: SessionState) -> npt.NDArray[np.float32] | None:
+        """
+        Get a session's rolling history vector, computing it once if missing.
+
+        Args:
+            state: Session state
+
+        Returns:
+            Mean embedding of the last vector_window commands, or None if
+            the embedder is unavailable or the session has no commands
+        """
+        if not self._embedder_ready():
+            return None
+
+        with self._lock:
+            if state.context_vector is not None:
+                return state.context_vector
+
+            window = list(state.recent_commands)[-self.vector_window :]
+            if not window:
+                return None
+
+            try:
+                state.command_vectors.clear()
+                state.command_vectors.extend(self.embedder.encode_batch(window))
+                self.stats["vectors_encoded"] += len(window)
+                state.context_vector = np.mean(state.command_vectors, axis=0).astype(np.float32)
+            except Exception as e:
+                logger.debug(f"Context vector computation failed: {e}")
+                state.command_vectors.clear()
+                return None
+
+            return state.context_vector
+
+    def invalidate_vectors(self) -> None:
+        """Drop cached vectors (call after the embedding model is retrained)."""
+        with self._lock:
+            for state in self._sessions.values():
+                state.command_vectors.clear()
+                state.context_vector = None
+
+    def get_statistics(self) -> dict[str, Any]:
+        """
+        Get session state statistics.
+
+        Returns:
+            Dictionary of statistics
+        """
+        with self._lock:
+            return {
+                "resident_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                **self.stats,
+            }
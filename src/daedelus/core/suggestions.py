@@ -1,22 +1,30 @@
 """
 Multi-tier suggestion engine for Daedalus.
 
-Implements a 3-tier cascade for intelligent command suggestions:
+Implements a 4-tier cascade for intelligent command suggestions:
 1. Exact prefix match (fastest, most relevant)
 2. Fuzzy semantic match (embeddings-based)
 3. Contextual prediction (pattern-based)
+4. Typo-tolerant fuzzy match (rapidfuzz, within a latency budget)
 
 Created by: orpheus497
 """
 
 import logging
 import math
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
+import numpy as np
+import numpy.typing as npt
+
+from daedelus.core.command_structure import CommandStructureIndex
 from daedelus.core.database import CommandDatabase
+from daedelus.core.directory_shards import DirectoryShardCache
 from daedelus.core.embeddings import CommandEmbedder
+from daedelus.core.fuzzy_index import FuzzyCommandIndex
 from daedelus.core.vector_store import VectorStore
 
 logger = logging.getLogger(__name__)
@@ -116,23 +124,32 @@ class SuggestionEngine:
     - Tier 1: Exact prefix matching (very fast, high precision)
     - Tier 2: Semantic similarity (embedding-based)
     - Tier 3: Context-aware patterns (Markov chains, sequences)
+    - Tier 4: Typo-tolerant fuzzy matching (only when tiers 1-3 come up short)
 
     Attributes:
         db: Command history database
-        embedder: FastText embedding model
-        vector_store: Annoy similarity search
+        embedder: FastText embedding model (optional)
+        vector_store: Annoy similarity search (optional)
+        fuzzy_index: In-memory fuzzy command index (optional)
+        directory_shards: Precomputed per-directory top-k lists (optional)
+        structure_index: Subcommand/flag structure index for token completion (optional)
         max_suggestions: Maximum number of suggestions to return
         min_confidence: Minimum confidence threshold
+        fuzzy_latency_budget_ms: Skip tier 4 once this much time has been spent
     """
 
     def __init__(
         self,
         db: CommandDatabase,
-        embedder: CommandEmbedder,
-        vector_store: VectorStore,
+        embedder: CommandEmbedder | None,
+        vector_store: VectorStore | None,
         max_suggestions: int = 5,
         min_confidence: float = 0.3,
         preferences: UserPreferences | None = None,
+        fuzzy_index: FuzzyCommandIndex | None = None,
+        fuzzy_latency_budget_ms: float = 15.0,
+        directory_shards: DirectoryShardCache | None = None,
+        structure_index: CommandStructureIndex | None = None,
     ) -> None:
         """
         Initialize suggestion engine with learning loop integration and personalization.
@@ -144,12 +161,23 @@ class SuggestionEngine:
             max_suggestions: Max suggestions to return
             min_confidence: Min confidence score (0-1)
             preferences: Optional user preferences for personalized scoring
+            fuzzy_index: Optional fuzzy index enabling the typo-tolerant tier
+            fuzzy_latency_budget_ms: Time budget (ms) after which tier 4 is skipped
+            directory_shards: Optional shard cache serving empty-buffer suggestions
+            structure_index: Optional structure index enabling token-position completion
         """
         self.db = db
-        self.embedder = embedder
-        self.vector_store = vector_store
+        # Embedder and vector store are replaced together (see set_models)
+        self._models: tuple[CommandEmbedder | None, VectorStore | None] = (
+            embedder,
+            vector_store,
+        )
+        self.fuzzy_index = fuzzy_index
+        self.directory_shards = directory_shards
+        self.structure_index = structure_index
         self.max_suggestions = max_suggestions
         self.min_confidence = min_confidence
+        self.fuzzy_latency_budget_ms = fuzzy_latency_budget_ms
         self.preferences = preferences or UserPreferences()
 
         # Learning loop tracking
@@ -162,6 +190,41 @@ class SuggestionEngine:
             f"(personalization={'custom' if preferences else 'default'})"
         )
 
+    @property
+    def embedder(self) -> CommandEmbedder | None:
+        """Embedding model."""
+        return self._models[0]
+
+    @embedder.setter
+    def embedder(self, embedder: CommandEmbedder | None) -> None:
+        self._models = (embedder, self._models[1])
+
+    @property
+    def vector_store(self) -> VectorStore | None:
+        """Vector similarity search (built with the current embedder)."""
+        return self._models[1]
+
+    @vector_store.setter
+    def vector_store(self, vector_store: VectorStore | None) -> None:
+        self._models = (self._models[0], vector_store)
+
+    def set_models(
+        self,
+        embedder: CommandEmbedder | None,
+        vector_store: VectorStore | None,
+    ) -> None:
+        """
+        Replace the embedder and vector store atomically (e.g. after retraining).
+
+        Requests in flight keep using the pair they started with, so a query
+        is never encoded with one model and searched in another's index.
+
+        Args:
+            embedder: New embedding model
+            vector_store: Vector store built with the new embedder
+        """
+        self._models = (embedder, vector_store)
+
     def get_suggestions(
         self,
         partial: str,
@@ -169,6 +232,8 @@ class SuggestionEngine:
         history: list[str] | None = None,
         context_window: int = 10,
         use_advanced_ranking: bool = True,
+        mode: str = "full",
+        history_vector: npt.NDArray[np.float32] | None = None,
     ) -> list[dict[str, Any]]:
         """
         Get command suggestions using multi-tier cascade with advanced reranking.
@@ -179,11 +244,29 @@ class SuggestionEngine:
             history: Recent command history
             context_window: Number of recent commands to consider
             use_advanced_ranking: Apply multi-factor reranking (default True)
+            mode: 'full' for whole-command suggestions, 'tokens' to complete only
+                the token under the cursor (falls back to 'full' when the
+                structure index has nothing for this position)
+            history_vector: Precomputed mean embedding of recent history
+                (session state); avoids re-encoding history per request
 
         Returns:
             List of suggestion dicts with 'command', 'confidence', 'source', and scoring factors
         """
         suggestions: list[dict[str, Any]] = []
+        start_time = time.perf_counter()
+
+        # Token-position completion from the command structure index
+        if mode == "tokens" and self.structure_index is not None:
+            completions = self.get_token_completions(partial)
+            if completions:
+                return completions
+
+        # Empty buffer in a known directory: serve the precomputed shard directly
+        if not partial.strip() and cwd and self.directory_shards is not None:
+            shard_suggestions = self._directory_shard_suggestions(cwd)
+            if shard_suggestions:
+                return shard_suggestions
 
         # Tier 1: Exact prefix match
         tier1 = self._tier1_exact_prefix(partial, cwd)
@@ -191,7 +274,7 @@ class SuggestionEngine:
 
         # Tier 2: Semantic similarity (if not enough from tier 1)
         if len(suggestions) < self.max_suggestions:
-            tier2 = self._tier2_semantic(partial, cwd, history)
+            tier2 = self._tier2_semantic(partial, cwd, history, history_vector)
             suggestions.extend(tier2)
 
         # Tier 3: Contextual patterns (if still not enough)
@@ -199,6 +282,15 @@ class SuggestionEngine:
             tier3 = self._tier3_contextual(partial, cwd, history)
             suggestions.extend(tier3)
 
+        # Tier 4: Typo-tolerant fuzzy match (if still not enough and within budget)
+        if len(suggestions) < self.max_suggestions and self.fuzzy_index is not None:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            if elapsed_ms < self.fuzzy_latency_budget_ms:
+                tier4 = self._tier4_fuzzy(partial)
+                suggestions.extend(tier4)
+            else:
+                logger.debug(f"Tier 4 skipped: latency budget spent ({elapsed_ms:.1f}ms)")
+
         # Deduplicate by command
         seen = set()
         unique_suggestions = []
@@ -251,6 +343,126 @@ class SuggestionEngine:
         )
         return result
 
+    def predict_next(
+        self,
+        cwd: str | None,
+        history: list[str] | None,
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        """
+        Predict likely next commands for an empty buffer.
+
+        Merges commands that historically follow the last command (tier 3)
+        with the directory/project shard, without per-suggestion statistics
+        queries. Used to precompute suggestions right after a command is logged.
+
+        Args:
+            cwd: Current working directory
+            history: Recent command history (last entry is the previous command)
+            limit: Size of the candidate pool to return
+
+        Returns:
+            List of suggestions sorted by confidence
+        """
+        candidates: dict[str, dict[str, Any]] = {}
+
+        for sug in self._tier3_contextual("", cwd, history, limit=limit):
+            candidates[sug["command"]] = sug
+
+        if cwd and self.directory_shards is not None:
+            for sug in self._directory_shard_suggestions(cwd, k=limit):
+                existing = candidates.get(sug["command"])
+                if existing is None:
+                    # Directory habits rank below observed sequences
+                    candidates[sug["command"]] = {**sug, "confidence": sug["confidence"] * 0.8}
+                else:
+                    existing["confidence"] = min(1.0, existing["confidence"] + 0.5 * sug["confidence"])
+
+        ranked = sorted(candidates.values(), key=lambda x: x["confidence"], reverse=True)
+        return ranked[:limit]
+
+    def get_token_completions(self, partial: str) -> list[dict[str, Any]]:
+        """
+        Complete the token under the cursor using the command structure index.
+
+        Candidates are the subcommands, flags and arguments observed at this
+        position for the base command, ranked by usage count.
+
+        Args:
+            partial: Partially typed command
+
+        Returns:
+            List of suggestions with the full completed command line
+        """
+        if self.structure_index is None:
+            return []
+
+        try:
+            completions = self.structure_index.complete(partial, limit=self.max_suggestions)
+        except Exception as e:
+            logger.error(f"Token completion error: {e}")
+            return []
+
+        if not completions:
+            return []
+
+        top_count = completions[0]["count"] or 1
+        return [
+            {
+                "command": completion["command"],
+                "confidence": completion["count"] / top_count,
+                "source": "structure",
+                "token": completion["token"],
+                "kind": completion["kind"],
+                "frequency": completion["count"],
+            }
+            for completion in completions
+        ]
+
+    def _directory_shard_suggestions(
+        self, cwd: str, k: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Get suggestions from the precomputed directory/project shards.
+
+        Confidence is the shard score relative to the directory's top command,
+        so no per-suggestion statistics queries are needed.
+
+        Args:
+            cwd: Current working directory
+            k: Number of shard entries to read (defaults to max_suggestions)
+
+        Returns:
+            List of suggestions (empty if the directory has no history)
+        """
+        try:
+            entries = self.directory_shards.suggest(cwd, k=k or self.max_suggestions)
+        except Exception as e:
+            logger.error(f"Directory shard error: {e}")
+            return []
+
+        if not entries:
+            return []
+
+        top_score = entries[0]["score"] or 1.0
+        suggestions = []
+        for entry in entries:
+            confidence = entry["score"] / top_score
+            if confidence < self.min_confidence:
+                continue
+            suggestions.append(
+                {
+                    "command": entry["command"],
+                    "confidence": confidence,
+                    "source": "directory_shard",
+                    "frequency": entry["frequency"],
+                    "scope": entry["scope"],
+                }
+            )
+
+        logger.debug(f"Directory shard: served {len(suggestions)} suggestions for {cwd}")
+        return suggestions
+
     def _tier1_exact_prefix(
         self,
         partial: str,
@@ -324,6 +536,7 @@ class SuggestionEngine:
         partial: str,
         cwd: str | None = None,
         history: list[str] | None = None,
+        history_vector: npt.NDArray[np.float32] | None = None,
     ) -> list[dict[str, Any]]:
         """
         Tier 2: Semantic similarity using embeddings.
@@ -335,6 +548,7 @@ class SuggestionEngine:
             partial: Partial command
             cwd: Current directory
             history: Recent commands
+            history_vector: Precomputed history embedding (used instead of history)
 
         Returns:
             List of suggestions
@@ -342,18 +556,25 @@ class SuggestionEngine:
         if not partial.strip():
             return []
 
+        embedder, vector_store = self._models
+        if embedder is None or vector_store is None or not vector_store.is_built():
+            return []
+
         try:
             # Encode query with context
-            query_embedding = self.embedder.encode_context(
+            query_embedding = embedder.encode_context(
                 cwd=cwd,
                 history=history,
                 partial=partial,
+                history_vector=history_vector,
             )
 
-            # Search vector store
-            results = self.vector_store.search(
+            # Search vector store (failing commands filtered inside the search;
+            # extra results cover overlap with the other tiers)
+            results = vector_store.search(
                 query_embedding,
-                top_k=self.max_suggestions * 2,  # Get more, filter later
+                top_k=self.max_suggestions * 2,
+                successful_only=True,
             )
 
             suggestions = []
@@ -381,6 +602,7 @@ class SuggestionEngine:
         partial: str,
         cwd: str | None = None,
         history: list[str] | None = None,
+        limit: int | None = None,
     ) -> list[dict[str, Any]]:
         """
         Tier 3: Contextual predictions using patterns.
@@ -392,6 +614,7 @@ class SuggestionEngine:
             partial: Partial command
             cwd: Current directory
             history: Recent command history
+            limit: Maximum number of results (defaults to max_suggestions)
 
         Returns:
             List of suggestions
@@ -425,7 +648,7 @@ class SuggestionEngine:
             params = [last_command]
             if partial.strip():
                 params.append(partial)
-            params.append(self.max_suggestions)
+            params.append(limit or self.max_suggestions)
 
             cursor = self.db.conn.execute(query, tuple(params))
             rows = cursor.fetchall()
@@ -453,6 +676,46 @@ class SuggestionEngine:
             logger.error(f"Tier 3 error: {e}")
             return []
 
+    def _tier4_fuzzy(self, partial: str) -> list[dict[str, Any]]:
+        """
+        Tier 4: Typo-tolerant fuzzy matching.
+
+        Scores the partial input against the beginning of every known command
+        using the in-memory fuzzy index, so mistyped prefixes still resolve.
+
+        Args:
+            partial: Partial (possibly mistyped) command
+
+        Returns:
+            List of suggestions
+        """
+        if self.fuzzy_index is None or not partial.strip():
+            return []
+
+        try:
+            matches = self.fuzzy_index.search(partial, limit=self.max_suggestions)
+
+            suggestions = []
+            for match in matches:
+                # Typo matches rank below exact matches of equal frequency
+                confidence = (match["score"] / 100.0) * 0.9
+
+                suggestions.append(
+                    {
+                        "command": match["command"],
+                        "confidence": confidence,
+                        "source": "fuzzy_typo",
+                        "frequency": match["frequency"],
+                    }
+                )
+
+            logger.debug(f"Tier 4: Found {len(suggestions)} fuzzy matches")
+            return suggestions
+
+        except Exception as e:
+            logger.error(f"Tier 4 error: {e}")
+            return []
+
     def rank_suggestions(
         self,
         suggestions: list[dict[str, Any]],
@@ -882,14 +1145,16 @@ class SuggestionEngine:
         # 2. Update embeddings and vector store (if command was successful)
         if success:
             try:
+                embedder, vector_store = self._models
+
                 # Encode command with context
-                embedding = self.embedder.encode_command(command)
+                embedding = embedder.encode_command(command)
 
                 # Add to vector store (note: vector_store.add() takes embedding, command, metadata)
-                self.vector_store.add(
+                vector_store.add(
                     embedding=embedding,
                     command=command,
-                    metadata={"cwd": cwd, "timestamp": datetime.now().timestamp()},
+                    metadata={"cwd": cwd, "timestamp": datetime.now().timestamp(), "exit_code": 0},
                 )
 
                 logger.debug(f"Added command to vector store: '{command[:50]}...'")
@@ -920,6 +1185,9 @@ class SuggestionEngine:
             "exact_prefix": "Exact match from your history",
             "semantic": "Similar command based on meaning",
             "contextual_pattern": "Often used after previous command",
+            "fuzzy_typo": "Close match for what you typed (possible typo)",
+            "directory_shard": "Frequently used in this directory",
+            "structure": "Common subcommand/flag for this command",
         }
 
         base = explanations.get(source, "Suggested command")
@@ -0,0 +1,348 @@
+"""
+Streaming, size-bounded training corpus for Daedalus.
+
+Incremental training used to read the whole corpus file into a list, append
+the new commands, slice it to the size limit and rewrite it, so memory and
+I/O grew with the corpus. The corpus is kept on disk instead:
+- Append-only segment files of tokenized commands (one per line)
+- Deduplicated by 64-bit content hash (only the hash set is resident)
+- Capped by recency-weighted sampling: when the corpus exceeds its limit,
+  the most recently seen lines are kept and older lines are uniformly
+  subsampled, so older commands fade out gradually instead of being cut off
+  (a line logged again counts as recent, wherever it sits in the segments)
+- Compaction and training preparation stream line by line; memory stays
+  bounded by the corpus limit, not by the history size
+- Training reads a hard-linked snapshot of a sealed segment, so appends and
+  compactions during training never change the file being read
+
+Created by: orpheus497
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _line_hash(line: str) -> int:
+    """64-bit content hash of a corpus line (stable across processes)."""
+    return int.from_bytes(hashlib.blake2b(line.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class TrainingCorpus:
+    """
+    Deduplicated corpus of tokenized commands stored as segment files.
+
+    Attributes:
+        directory: Directory holding the segment files
+        max_size: Lines kept after compaction
+        segment_size: Lines per segment before a new one is started
+        recent_fraction: Share of max_size reserved for the most recently seen lines
+    """
+
+    SEGMENT_GLOB = "segment-*.txt"
+    SNAPSHOT_FILE = "training.txt"
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size: int = 10000,
+        segment_size: int = 1000,
+        recent_fraction: float = 0.5,
+        legacy_file: Path | None = None,
+        seed: int | None = None,
+    ) -> None:
+        """
+        Initialize training corpus (segments are scanned on first use).
+
+        Args:
+            directory: Directory for segment files
+            max_size: Maximum lines kept after compaction
+            segment_size: Lines per segment file
+            recent_fraction: Share of max_size kept as the most recently seen lines
+            legacy_file: Single-file corpus of the previous format, imported once
+            seed: Seed for the sampling of older lines
+        """
+        self.directory = Path(directory).expanduser()
+        self.max_size = max_size
+        self.segment_size = segment_size
+        self.recent_fraction = recent_fraction
+        self.legacy_file = legacy_file
+        self._rng = np.random.default_rng(seed)
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._hashes: set[int] = set()
+        # Hash -> sequence number of the line's latest add (file order on load)
+        self._last_seen: dict[int, int] = {}
+        self._sequence = 0
+        self._segment_lines: dict[Path, int] = {}
+        # Set when a scan finds duplicates (e.g. after an interrupted compaction)
+        self._needs_compaction = False
+        # Segment shared with the training snapshot (never appended to again)
+        self._sealed: Path | None = None
+
+        self.stats = {"added": 0, "duplicates": 0, "compactions": 0, "dropped": 0}
+
+    def _segments(self) -> list[Path]:
+        """Segment files, oldest first."""
+        return sorted(self.directory.glob(self.SEGMENT_GLOB))
+
+    def _next_segment(self) -> Path:
+        """Path for a new segment after the existing ones."""
+        segments = self._segments()
+        number = int(segments[-1].stem.split("-")[1]) + 1 if segments else 1
+        return self.directory / f"segment-{number:06d}.txt"
+
+    def _ensure_loaded(self) -> None:
+        """Scan segments for line counts and hashes (lock held)."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        for segment in self._segments():
+            count = 0
+            with open(segment, encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if not line:
+                        continue
+                    digest = _line_hash(line)
+                    if digest in self._hashes:
+                        self._needs_compaction = True
+                    self._hashes.add(digest)
+                    self._touch(digest)
+                    count += 1
+            self._segment_lines[segment] = count
+
+        if self.legacy_file is not None and self.legacy_file.exists():
+            logger.info(f"Importing legacy corpus from {self.legacy_file}")
+            with open(self.legacy_file, encoding="utf-8") as f:
+                self._append(line.rstrip("\n") for line in f)
+            self.legacy_file.unlink()
+
+    def _touch(self, digest: int) -> None:
+        """Mark a line as seen now (lock held)."""
+        self._sequence += 1
+        self._last_seen[digest] = self._sequence
+
+    def _append(self, lines: Iterable[str]) -> int:
+        """Append new distinct lines to the newest segment (lock held)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+        segment = segments[-1] if segments and segments[-1] != self._sealed else self._next_segment()
+        count = self._segment_lines.get(segment, 0)
+
+        added = 0
+        f = open(segment, "a", encoding="utf-8")
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                digest = _line_hash(line)
+                self._touch(digest)
+                if digest in self._hashes:
+                    self.stats["duplicates"] += 1
+                    continue
+
+                if count >= self.segment_size:
+                    f.close()
+                    self._segment_lines[segment] = count
+                    segment = self._next_segment()
+                    count = 0
+                    f = open(segment, "a", encoding="utf-8")
+
+                f.write(line + "\n")
+                self._hashes.add(digest)
+                count += 1
+                added += 1
+        finally:
+            f.close()
+            self._segment_lines[segment] = count
+
+        self.stats["added"] += added
+        return added
+
+    def add(self, lines: Iterable[str]) -> int:
+        """
+        Append tokenized commands, skipping lines already in the corpus.
+
+        The corpus is compacted once it reaches twice its size limit, so it
+        stays bounded even when training is infrequent.
+
+        Args:
+            lines: Tokenized commands (space-separated tokens)
+
+        Returns:
+            Number of lines added
+        """
+        with self._lock:
+            self._ensure_loaded()
+            added = self._append(lines)
+            if len(self._hashes) >= 2 * self.max_size:
+                self._compact()
+            return added
+
+    def _compact(self) -> None:
+        """Merge segments into one, sampling down to max_size (lock held)."""
+        segments = self._segments()
+        total = sum(self._segment_lines.get(segment, 0) for segment in segments)
+
+        # Most recently seen lines are kept; older ones are sampled uniformly
+        # into the rest
+        by_recency = sorted(self._hashes, key=self._last_seen.__getitem__)
+        keep_recent = min(len(by_recency), int(np.ceil(self.max_size * self.recent_fraction)))
+        older = len(by_recency) - keep_recent
+        sample_size = min(older, self.max_size - keep_recent)
+        if sample_size < older:
+            sampled = self._rng.choice(older, size=sample_size, replace=False).tolist()
+        else:
+            sampled = range(older)
+        selected = set(by_recency[older:])
+        selected.update(by_recency[i] for i in sampled)
+
+        # Kept lines are written oldest first, so file order is recency order
+        kept_lines: list[tuple[int, str]] = []
+        hashes: set[int] = set()
+        for segment in segments:
+            with open(segment, encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if not line:
+                        continue
+                    digest = _line_hash(line)
+                    if digest in selected and digest not in hashes:
+                        kept_lines.append((self._last_seen[digest], line))
+                        hashes.add(digest)
+        kept_lines.sort()
+
+        target = self._next_segment()
+        tmp_path = target.with_name(target.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for _, line in kept_lines:
+                out.write(line + "\n")
+
+        os.replace(tmp_path, target)
+        for segment in segments:
+            segment.unlink(missing_ok=True)
+
+        kept = len(kept_lines)
+        self.stats["compactions"] += 1
+        self.stats["dropped"] += total - kept
+        self._hashes = hashes
+        self._last_seen = {digest: self._last_seen[digest] for digest in hashes}
+        self._segment_lines = {target: kept}
+        self._needs_compaction = False
+        logger.debug(f"Compacted corpus: {total} -> {kept} lines")
+
+    def compact(self) -> None:
+        """Merge all segments into one, sampling down to the size limit."""
+        with self._lock:
+            self._ensure_loaded()
+            if self._segments():
+                self._compact()
+
+    def training_file(self) -> Path | None:
+        """
+        Get a single file holding the whole corpus for training.
+
+        fastText reads one input file (several times), so segments are merged
+        into one when needed; a compact corpus is used as is. The returned
+        file is a snapshot: the segment is hard-linked (or copied where links
+        are unsupported) and sealed, so later lines go to a new segment and
+        the snapshot keeps its contents until the next call replaces it.
+
+        Returns:
+            Path of the training file, or None if the corpus is empty
+        """
+        with self._lock:
+            self._ensure_loaded()
+            segments = self._segments()
+            if not segments:
+                return None
+            if len(segments) > 1 or len(self._hashes) > self.max_size or self._needs_compaction:
+                self._compact()
+                segments = self._segments()
+
+            segment = segments[-1]
+            snapshot = self.directory / self.SNAPSHOT_FILE
+            tmp_path = snapshot.with_name(snapshot.name + ".tmp")
+            tmp_path.unlink(missing_ok=True)
+            try:
+                os.link(segment, tmp_path)
+            except OSError:
+                shutil.copyfile(segment, tmp_path)
+            os.replace(tmp_path, snapshot)
+
+            self._sealed = segment
+            return snapshot
+
+    def iter_lines(self) -> Iterator[str]:
+        """
+        Stream corpus lines, oldest first.
+
+        Yields:
+            Tokenized commands
+        """
+        with self._lock:
+            self._ensure_loaded()
+            segments = self._segments()
+        for segment in segments:
+            with open(segment, encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if line:
+                        yield line
+
+    def clear(self) -> bool:
+        """
+        Delete all segments.
+
+        Returns:
+            True if there was anything to delete
+        """
+        with self._lock:
+            self._ensure_loaded()
+            segments = self._segments()
+            for segment in segments:
+                segment.unlink(missing_ok=True)
+            (self.directory / self.SNAPSHOT_FILE).unlink(missing_ok=True)
+            self._hashes = set()
+            self._last_seen = {}
+            self._segment_lines = {}
+            self._needs_compaction = False
+            self._sealed = None
+            return bool(segments)
+
+    def __len__(self) -> int:
+        """Number of distinct lines in the corpus."""
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._hashes)
+
+    def get_statistics(self) -> dict[str, Any]:
+        """
+        Get corpus statistics.
+
+        Returns:
+            Dictionary of statistics
+        """
+        with self._lock:
+            self._ensure_loaded()
+            segments = self._segments()
+            return {
+                "lines": len(self._hashes),
+                "max_size": self.max_size,
+                "segments": len(segments),
+                "disk_bytes": sum(segment.stat().st_size for segment in segments),
+                **self.stats,
+            }
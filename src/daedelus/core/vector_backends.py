@@ -0,0 +1,560 @@
+"""
+Search backends for the Daedalus vector store.
+
+VectorStore delegates nearest-neighbor search over its base segment to a
+backend built from a fixed matrix of vectors:
+- AnnoyBackend: approximate search over a memory-mapped Annoy forest
+- ExactBackend: brute-force matrix-vector product over a quantized
+  (float32/float16/int8), memory-mapped matrix with argpartition top-k
+
+For personal histories (10k-100k vectors) the exact backend is usually as
+fast as Annoy, returns true nearest neighbors and needs no build step or
+n_trees tuning; Annoy remains the choice for very large indexes.
+
+Both backends accept an allowed-row mask for filtered queries: the exact
+backend scores only allowed rows, Annoy widens its candidate set until
+enough allowed neighbors are found (or scans very selective filters exactly).
+
+Created by: orpheus497
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+try:
+    from annoy import AnnoyIndex
+except ImportError:
+    AnnoyIndex = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATIONS = ("float32", "float16", "int8")
+
+
+def exact_distances(
+    query: npt.NDArray[np.float32],
+    vectors: npt.NDArray[np.float32],
+    metric: str,
+) -> npt.NDArray[np.float32]:
+    """
+    Exact distances from a query to each vector, matching Annoy's definitions.
+
+    Args:
+        query: Query vector
+        vectors: Matrix of vectors (shape: [n, dim])
+        metric: Distance metric
+
+    Returns:
+        Distance per vector
+    """
+    if metric == "angular":
+        norms = np.linalg.norm(vectors, axis=1) * max(float(np.linalg.norm(query)), 1e-12)
+        cosine = (vectors @ query) / np.maximum(norms, 1e-12)
+        return np.sqrt(np.maximum(2.0 - 2.0 * cosine, 0.0))
+    if metric == "manhattan":
+        return np.abs(vectors - query).sum(axis=1)
+    if metric == "hamming":
+        return np.count_nonzero(vectors != query, axis=1).astype(np.float32)
+    return np.linalg.norm(vectors - query, axis=1)
+
+
+def nearest_k(
+    distances: npt.NDArray[np.float32],
+    top_k: int,
+    ids: npt.NDArray[np.int64] | None = None,
+) -> tuple[list[int], list[float]]:
+    """
+    Select the top_k smallest distances with argpartition.
+
+    Args:
+        distances: Distance per candidate
+        top_k: Number of neighbors to return
+        ids: Item id per candidate (defaults to positions)
+
+    Returns:
+        Tuple of (item ids, distances), nearest first
+    """
+    k = min(top_k, len(distances))
+    if k <= 0:
+        return [], []
+
+    nearest = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(k)
+    nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+    selected = nearest if ids is None else ids[nearest]
+    return selected.tolist(), distances[nearest].tolist()
+
+
+class VectorBackend(ABC):
+    """
+    Base class for immutable nearest-neighbor indexes.
+
+    Item ids are row positions 0..len-1 of the matrix the backend was built
+    from. Distances follow Annoy's definitions for the configured metric.
+
+    Attributes:
+        dim: Dimensionality of vectors
+        metric: Distance metric ('angular', 'euclidean', 'manhattan', 'hamming')
+    """
+
+    name = "base"
+
+    def __init__(self, dim: int, metric: str = "angular") -> None:
+        """
+        Initialize backend.
+
+        Args:
+            dim: Dimensionality of vectors
+            metric: Distance metric
+        """
+        self.dim = dim
+        self.metric = metric
+
+    @abstractmethod
+    def build(self, vectors: npt.NDArray[np.float32]) -> None:
+        """
+        Build the index from a matrix of vectors.
+
+        Args:
+            vectors: Matrix of vectors (shape: [n, dim])
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        vector: npt.NDArray[np.float32],
+        top_k: int,
+        search_k: int = -1,
+        allowed: npt.NDArray[np.bool_] | None = None,
+    ) -> tuple[list[int], list[float]]:
+        """
+        Find nearest neighbors of a vector.
+
+        Args:
+            vector: Query vector
+            top_k: Number of neighbors to return
+            search_k: Accuracy parameter for approximate backends (-1 = default)
+            allowed: Optional mask of items that may be returned (one per item)
+
+        Returns:
+            Tuple of (item ids, distances), nearest first
+        """
+
+    @abstractmethod
+    def get_vectors(self) -> npt.NDArray[np.float32]:
+        """
+        Get all indexed vectors (used to rebuild the index during compaction).
+
+        Returns:
+            Matrix of vectors (shape: [n, dim])
+        """
+
+    @abstractmethod
+    def save(self, path: Path) -> None:
+        """
+        Save the index next to the given path.
+
+        Args:
+            path: Index path (backends add their own suffixes)
+        """
+
+    @abstractmethod
+    def load(self, path: Path) -> None:
+        """
+        Load (memory-map) a saved index.
+
+        Args:
+            path: Index path used when saving
+
+        Raises:
+            FileNotFoundError: If index files don't exist
+        """
+
+    @classmethod
+    @abstractmethod
+    def files(cls, path: Path) -> list[Path]:
+        """
+        Get the files this backend writes for an index path.
+
+        Args:
+            path: Index path
+
+        Returns:
+            List of file paths
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Return number of indexed vectors."""
+
+
+class AnnoyBackend(VectorBackend):
+    """
+    Approximate search with Annoy (random projection forest).
+
+    Attributes:
+        n_trees: Number of trees (more = better accuracy, slower build)
+        index: Annoy index instance
+    """
+
+    name = "annoy"
+
+    # Filters allowing at most this many items are answered by exact scan
+    SCAN_MAX_ITEMS = 1024
+
+    def __init__(self, dim: int, metric: str = "angular", n_trees: int = 10) -> None:
+        """
+        Initialize Annoy backend.
+
+        Args:
+            dim: Dimensionality of vectors
+            metric: Distance metric
+            n_trees: Number of trees to build
+
+        Raises:
+            ImportError: If annoy is not installed
+        """
+        super().__init__(dim, metric)
+        if AnnoyIndex is None:
+            raise ImportError("annoy is not installed. Install it with: pip install annoy==1.17.3")
+        self.n_trees = n_trees
+        self.index = AnnoyIndex(dim, metric)
+        self.expansions = 0  # Filtered queries that had to widen their candidate set
+
+    def build(self, vectors: npt.NDArray[np.float32]) -> None:
+        """Build the Annoy forest from a matrix of vectors."""
+        index = AnnoyIndex(self.dim, self.metric)
+        for idx, vector in enumerate(vectors):
+            index.add_item(idx, vector.tolist())
+        index.build(self.n_trees)
+        self.index = index
+
+    def query(
+        self,
+        vector: npt.NDArray[np.float32],
+        top_k: int,
+        search_k: int = -1,
+        allowed: npt.NDArray[np.bool_] | None = None,
+    ) -> tuple[list[int], list[float]]:
+        """
+        Find approximate nearest neighbors.
+
+        With a filter, the candidate count starts at top_k divided by the
+        filter's selectivity and doubles (scaling search_k along) until
+        top_k allowed neighbors are found. Filters allowing few items are
+        scanned exactly instead.
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        if allowed is None:
+            return self.index.get_nns_by_vector(
+                query.tolist(), top_k, search_k=search_k, include_distances=True
+            )
+
+        candidates = np.flatnonzero(allowed)
+        if len(candidates) <= self.SCAN_MAX_ITEMS:
+            vectors = np.array(
+                [self.index.get_item_vector(int(idx)) for idx in candidates], dtype=np.float32
+            ).reshape(-1, self.dim)
+            return nearest_k(exact_distances(query, vectors, self.metric), top_k, candidates)
+
+        n = len(self)
+        fetch = min(n, int(np.ceil(top_k * n / len(candidates) * 2)))
+        while True:
+            ids, distances = self.index.get_nns_by_vector(
+                query.tolist(),
+                fetch,
+                search_k=search_k * max(1, fetch // max(top_k, 1)) if search_k > 0 else -1,
+                include_distances=True,
+            )
+            hits = [(idx, dist) for idx, dist in zip(ids, distances, strict=False) if allowed[idx]]
+            if len(hits) >= top_k or fetch >= n:
+                break
+            fetch = min(n, fetch * 2)
+            self.expansions += 1
+
+        hits = hits[:top_k]
+        return [idx for idx, _ in hits], [dist for _, dist in hits]
+
+    def get_vectors(self) -> npt.NDArray[np.float32]:
+        """Read all vectors back out of the Annoy index."""
+        n = len(self)
+        vectors = np.empty((n, self.dim), dtype=np.float32)
+        for idx in range(n):
+            vectors[idx] = self.index.get_item_vector(idx)
+        return vectors
+
+    def save(self, path: Path) -> None:
+        """Save the Annoy index (atomically; a mapped previous file stays valid)."""
+        annoy_path = path.with_suffix(".ann")
+        tmp_path = annoy_path.with_name(annoy_path.name + ".tmp")
+        self.index.save(str(tmp_path))
+        os.replace(tmp_path, annoy_path)
+
+    def load(self, path: Path) -> None:
+        """Memory-map a saved Annoy index."""
+        annoy_path = path.with_suffix(".ann")
+        if not annoy_path.exists():
+            raise FileNotFoundError(f"Index not found: {annoy_path}")
+        self.index = AnnoyIndex(self.dim, self.metric)
+        self.index.load(str(annoy_path))
+
+    @classmethod
+    def files(cls, path: Path) -> list[Path]:
+        """Annoy writes a single .ann file."""
+        return [path.with_suffix(".ann")]
+
+    def __len__(self) -> int:
+        """Return number of indexed vectors."""
+        return self.index.get_n_items()
+
+
+class ExactBackend(VectorBackend):
+    """
+    Exact search by brute-force matrix-vector product.
+
+    For the angular metric rows are stored L2-normalized, so a query is one
+    dot product per row. Rows are quantized to save memory: int8 stores a
+    per-row scale (max |x| / 127) and is a quarter of the float32 size.
+    float16 halves the matrix but NumPy converts half floats slowly, so it
+    is the slowest to query. Scores are computed in float32 over row chunks,
+    so quantized matrices never need a full-size float32 copy; top-k is
+    selected with argpartition.
+
+    Attributes:
+        quantization: Storage type ('float32', 'float16' or 'int8')
+        matrix: Stored (quantized) rows, possibly memory-mapped
+        scales: Per-row dequantization scales (int8 only)
+        sq_norms: Squared row norms (euclidean metric only)
+    """
+
+    name = "exact"
+
+    CHUNK_ROWS = 1024  # Dequantized chunk stays cache-resident
+
+    def __init__(self, dim: int, metric: str = "angular", quantization: str = "int8") -> None:
+        """
+        Initialize exact backend.
+
+        Args:
+            dim: Dimensionality of vectors
+            metric: Distance metric
+            quantization: Storage type ('float32', 'float16' or 'int8')
+
+        Raises:
+            ValueError: If quantization is unknown
+        """
+        super().__init__(dim, metric)
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization} (expected one of {QUANTIZATIONS})")
+        self.quantization = quantization
+
+        self.matrix: npt.NDArray = np.empty((0, dim), dtype=np.dtype(quantization))
+        self.scales: npt.NDArray[np.float32] | None = None
+        self.sq_norms: npt.NDArray[np.float32] | None = None
+
+    def build(self, vectors: npt.NDArray[np.float32]) -> None:
+        """Quantize and store a matrix of vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+
+        if self.metric == "angular":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+
+        self.sq_norms = (
+            np.einsum("ij,ij->i", vectors, vectors) if self.metric == "euclidean" else None
+        )
+
+        if self.quantization == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales = np.maximum(scales, 1e-12).astype(np.float32)
+            self.matrix = np.round(vectors / scales[:, None]).astype(np.int8)
+            self.scales = scales
+        else:
+            self.matrix = vectors.astype(self.quantization)
+            self.scales = None
+
+    def _dequantize(self, start: int, stop: int) -> npt.NDArray[np.float32]:
+        """Dequantize a chunk of rows to float32."""
+        rows = np.asarray(self.matrix[start:stop], dtype=np.float32)
+        if self.scales is not None:
+            rows *= self.scales[start:stop, None]
+        return rows
+
+    def _dot(self, vector: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        """Dot product of every stored row with a vector, chunk by chunk."""
+        n = len(self)
+        if self.quantization == "float32":
+            scores = np.asarray(self.matrix @ vector, dtype=np.float32)
+        else:
+            scores = np.empty(n, dtype=np.float32)
+            for start in range(0, n, self.CHUNK_ROWS):
+                stop = min(start + self.CHUNK_ROWS, n)
+                scores[start:stop] = np.asarray(self.matrix[start:stop], dtype=np.float32) @ vector
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def distances(self, vector: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        """
+        Exact distances from a vector to every stored row.
+
+        Args:
+            vector: Query vector
+
+        Returns:
+            Distance per row (Annoy's definitions)
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+
+        if self.metric == "angular":
+            vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+            cosine = self._dot(vector)
+            return np.sqrt(np.maximum(2.0 - 2.0 * cosine, 0.0))
+
+        if self.metric == "euclidean":
+            sq = self.sq_norms - 2.0 * self._dot(vector) + float(vector @ vector)
+            return np.sqrt(np.maximum(sq, 0.0))
+
+        n = len(self)
+        distances = np.empty(n, dtype=np.float32)
+        for start in range(0, n, self.CHUNK_ROWS):
+            stop = min(start + self.CHUNK_ROWS, n)
+            rows = self._dequantize(start, stop)
+            if self.metric == "manhattan":
+                distances[start:stop] = np.abs(rows - vector).sum(axis=1)
+            else:
+                distances[start:stop] = np.count_nonzero(rows != vector, axis=1)
+        return distances
+
+    def query(
+        self,
+        vector: npt.NDArray[np.float32],
+        top_k: int,
+        search_k: int = -1,
+        allowed: npt.NDArray[np.bool_] | None = None,
+    ) -> tuple[list[int], list[float]]:
+        """
+        Find exact nearest neighbors (search_k is ignored).
+
+        Selective filters only score the allowed rows; broad ones score all
+        rows and mask the rest out.
+        """
+        if allowed is None:
+            return nearest_k(self.distances(vector), top_k)
+
+        candidates = np.flatnonzero(allowed)
+        if len(candidates) * 4 < len(self):
+            vectors = np.asarray(self.matrix[candidates], dtype=np.float32)
+            if self.scales is not None:
+                vectors *= self.scales[candidates, None]
+            query = np.asarray(vector, dtype=np.float32)
+            return nearest_k(exact_distances(query, vectors, self.metric), top_k, candidates)
+
+        distances = self.distances(vector)
+        return nearest_k(distances[candidates], top_k, candidates)
+
+    def get_vectors(self) -> npt.NDArray[np.float32]:
+        """Dequantize all stored rows."""
+        return self._dequantize(0, len(self))
+
+    @staticmethod
+    def _array_paths(path: Path) -> dict[str, Path]:
+        """Paths of the saved arrays."""
+        return {
+            "matrix": path.with_suffix(".vectors.npy"),
+            "scales": path.with_suffix(".scales.npy"),
+            "sq_norms": path.with_suffix(".norms.npy"),
+        }
+
+    def save(self, path: Path) -> None:
+        """Save the quantized matrix (and scales/norms) as .npy files.
+
+        Files are written to a temporary and renamed into place, since the
+        matrix being saved may itself be a memory map of the target file.
+        """
+        paths = self._array_paths(path)
+        for key, array in (
+            ("matrix", self.matrix),
+            ("scales", self.scales),
+            ("sq_norms", self.sq_norms),
+        ):
+            if array is None:
+                paths[key].unlink(missing_ok=True)
+                continue
+            tmp_path = paths[key].with_name(paths[key].name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.asarray(array))
+            os.replace(tmp_path, paths[key])
+
+    def load(self, path: Path) -> None:
+        """Memory-map a saved matrix; scales and norms are loaded into RAM."""
+        paths = self._array_paths(path)
+        if not paths["matrix"].exists():
+            raise FileNotFoundError(f"Index not found: {paths['matrix']}")
+
+        matrix = np.load(paths["matrix"], mmap_mode="r")
+        if matrix.ndim != 2 or matrix.shape[1] != self.dim:
+            raise ValueError(f"Index dimension mismatch: expected {self.dim}, got {matrix.shape}")
+
+        self.matrix = matrix
+        self.quantization = str(matrix.dtype)
+        self.scales = np.load(paths["scales"]) if paths["scales"].exists() else None
+        self.sq_norms = np.load(paths["sq_norms"]) if paths["sq_norms"].exists() else None
+
+    @classmethod
+    def files(cls, path: Path) -> list[Path]:
+        """Files written for the matrix, scales and norms."""
+        return list(cls._array_paths(path).values())
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the stored matrix and auxiliary arrays."""
+        total = self.matrix.nbytes
+        for array in (self.scales, self.sq_norms):
+            if array is not None:
+                total += array.nbytes
+        return total
+
+    def __len__(self) -> int:
+        """Return number of indexed vectors."""
+        return len(self.matrix)
+
+
+BACKENDS: dict[str, type[VectorBackend]] = {
+    AnnoyBackend.name: AnnoyBackend,
+    ExactBackend.name: ExactBackend,
+}
+
+
+def create_backend(
+    name: str,
+    dim: int,
+    metric: str = "angular",
+    n_trees: int = 10,
+    quantization: str = "int8",
+) -> VectorBackend:
+    """
+    Create an (empty) backend by name.
+
+    Args:
+        name: Backend name ('annoy' or 'exact')
+        dim: Dimensionality of vectors
+        metric: Distance metric
+        n_trees: Number of trees (Annoy only)
+        quantization: Storage type (exact only)
+
+    Returns:
+        Backend instance
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name == AnnoyBackend.name:
+        return AnnoyBackend(dim, metric, n_trees=n_trees)
+    if name == ExactBackend.name:
+        return ExactBackend(dim, metric, quantization=quantization)
+    raise ValueError(f"Unknown vector backend: {name} (expected one of {list(BACKENDS)})")
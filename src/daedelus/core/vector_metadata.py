@@ -0,0 +1,444 @@
+"""
+Columnar metadata storage for the Daedalus vector store.
+
+Every indexed vector carries a command string and a few fields (timestamp,
+cwd, exit code). Instead of a JSON list of dicts, metadata is kept in columns:
+- Fixed-width row records (string offset/length, timestamp, cwd ID, exit
+  code, use counts) saved as one .npy file and memory-mapped on load
+- Command strings concatenated into one UTF-8 blob, memory-mapped on load
+- Small JSON header with the cwd vocabulary and any uncommon extra fields
+
+Loading maps the files without parsing them, and a result dict is only built
+for the rows a search actually returns.
+
+A row can stand for every use of one command: its use count and successful
+use count, the timestamp of the last use and the dominant working directory
+(tracked with a majority-vote counter) are updated in place on repeat uses.
+
+Search filters (cwd, success, recency) are evaluated as boolean masks over
+the columns and cached until the metadata changes.
+
+Created by: orpheus497
+"""
+
+import json
+import logging
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+ROW_DTYPE = np.dtype(
+    [
+        ("offset", "<i8"),
+        ("length", "<i4"),
+        ("timestamp", "<f8"),
+        ("cwd_id", "<i4"),
+        ("exit_code", "<i4"),
+        ("count", "<i4"),
+        ("success_count", "<i4"),
+        ("cwd_votes", "<i4"),
+    ]
+)
+
+# Sentinels for fields a row did not set (NaN marks a missing timestamp)
+NO_CWD = -1
+NO_EXIT_CODE = np.iinfo(np.int32).min
+
+FORMAT_VERSION = 2
+
+_COLUMN_KEYS = (
+    "command",
+    "index",
+    "timestamp",
+    "cwd",
+    "exit_code",
+    "count",
+    "success_count",
+    "cwd_votes",
+)
+
+
+def _replace_file(path: Path, write: Any) -> None:
+    """Write a file via a temporary and rename it into place.
+
+    Renaming keeps the old inode alive for any existing memory maps of it.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def aggregate_uses(uses: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Combine the metadata of repeated uses of one command into one row.
+
+    Args:
+        uses: Metadata dicts of each use (timestamp, cwd, exit_code, ...)
+
+    Returns:
+        Metadata for VectorMetadata.append: last timestamp, exit code and
+        extra fields of the latest use, dominant cwd, use counts
+    """
+    latest = max(uses, key=lambda use: use.get("timestamp") or 0.0)
+    cwds = Counter(use["cwd"] for use in uses if use.get("cwd") is not None)
+
+    aggregated = {k: v for k, v in latest.items() if k not in _COLUMN_KEYS}
+    aggregated["count"] = len(uses)
+    aggregated["success_count"] = sum(1 for use in uses if use.get("exit_code") == 0)
+
+    timestamps = [use["timestamp"] for use in uses if use.get("timestamp") is not None]
+    if timestamps:
+        aggregated["timestamp"] = max(timestamps)
+    if latest.get("exit_code") is not None:
+        aggregated["exit_code"] = latest["exit_code"]
+    if cwds:
+        cwd, cwd_count = cwds.most_common(1)[0]
+        aggregated["cwd"] = cwd
+        # Majority-vote lead of the dominant cwd over all others
+        aggregated["cwd_votes"] = max(2 * cwd_count - cwds.total(), 0)
+
+    return aggregated
+
+
+class VectorMetadata:
+    """
+    Append-only columnar metadata, one row per vector index.
+
+    Rows loaded from disk stay memory-mapped (copy-on-write, so repeat uses
+    can update them); rows appended afterwards are held in memory until the
+    next save.
+
+    Attributes:
+        cwds: Distinct working directories (cwd_id -> path)
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metadata."""
+        self._rows: npt.NDArray = np.empty(0, dtype=ROW_DTYPE)
+        self._blob: npt.NDArray[np.uint8] = np.empty(0, dtype=np.uint8)
+
+        self._tail: npt.NDArray = np.empty(0, dtype=ROW_DTYPE)
+        self._tail_count = 0
+        self._tail_commands: list[str] = []
+        self._tail_offset = 0
+
+        self.cwds: list[str] = []
+        self._cwd_ids: dict[str, int] = {}
+        self._extras: dict[int, dict[str, Any]] = {}
+
+        # Bumped on every change; cached filter masks from older versions are stale
+        self._version = 0
+        self._mask_cache: dict[tuple[Any, ...], tuple[int, npt.NDArray[np.bool_]]] = {}
+
+    def __len__(self) -> int:
+        """Return number of rows."""
+        return len(self._rows) + self._tail_count
+
+    def _cwd_id(self, cwd: str | None) -> int:
+        """Intern a working directory."""
+        if cwd is None:
+            return NO_CWD
+        cwd_id = self._cwd_ids.get(cwd)
+        if cwd_id is None:
+            cwd_id = len(self.cwds)
+            self.cwds.append(cwd)
+            self._cwd_ids[cwd] = cwd_id
+        return cwd_id
+
+    def append(self, command: str, metadata: dict[str, Any] | None = None) -> int:
+        """
+        Append a row.
+
+        Args:
+            command: Command string
+            metadata: Optional fields (timestamp, cwd, exit_code, and use
+                counts from aggregate_uses; other keys are kept as extras)
+
+        Returns:
+            Row index
+        """
+        metadata = metadata or {}
+        idx = len(self)
+
+        timestamp = metadata.get("timestamp")
+        cwd = metadata.get("cwd")
+        exit_code = metadata.get("exit_code")
+        length = len(command.encode("utf-8"))
+
+        if self._tail_count == len(self._tail):
+            grown = np.empty(max(64, 2 * len(self._tail)), dtype=ROW_DTYPE)
+            grown[: self._tail_count] = self._tail[: self._tail_count]
+            self._tail = grown
+
+        self._tail[self._tail_count] = (
+            len(self._blob) + self._tail_offset,
+            length,
+            float(timestamp) if timestamp is not None else np.nan,
+            self._cwd_id(cwd),
+            int(exit_code) if exit_code is not None else NO_EXIT_CODE,
+            metadata.get("count", 1),
+            metadata.get("success_count", 1 if exit_code == 0 else 0),
+            metadata.get("cwd_votes", 1 if cwd is not None else 0),
+        )
+        self._tail_count += 1
+        self._version += 1
+        self._tail_commands.append(command)
+        self._tail_offset += length
+
+        extras = {k: v for k, v in metadata.items() if k not in _COLUMN_KEYS}
+        if extras:
+            self._extras[idx] = extras
+
+        return idx
+
+    def _locate(self, idx: int) -> tuple[npt.NDArray, int]:
+        """Array holding a row and the row's position in it."""
+        base_count = len(self._rows)
+        if idx < base_count:
+            return self._rows, idx
+        return self._tail, idx - base_count
+
+    def record_use(self, idx: int, metadata: dict[str, Any] | None = None) -> None:
+        """
+        Record another use of a row's command.
+
+        Increments the use count, keeps the latest timestamp and the last
+        recorded exit code, and votes for the use's cwd (the row's cwd
+        changes once another directory has been used more often).
+
+        Args:
+            idx: Row index
+            metadata: Fields of this use (timestamp, cwd, exit_code)
+        """
+        metadata = metadata or {}
+        rows, i = self._locate(idx)
+        rows["count"][i] += 1
+        self._version += 1
+
+        timestamp = metadata.get("timestamp")
+        if timestamp is not None and not timestamp < rows["timestamp"][i]:
+            rows["timestamp"][i] = timestamp
+
+        exit_code = metadata.get("exit_code")
+        if exit_code is not None:
+            rows["exit_code"][i] = exit_code
+            if exit_code == 0:
+                rows["success_count"][i] += 1
+
+        cwd = metadata.get("cwd")
+        if cwd is not None:
+            cwd_id = self._cwd_id(cwd)
+            if rows["cwd_id"][i] == cwd_id:
+                rows["cwd_votes"][i] += 1
+            elif rows["cwd_votes"][i] == 0:
+                rows["cwd_id"][i] = cwd_id
+                rows["cwd_votes"][i] = 1
+            else:
+                rows["cwd_votes"][i] -= 1
+
+    def _column(self, name: str) -> npt.NDArray:
+        """One column over all rows (mapped and appended)."""
+        return np.concatenate([self._rows[name], self._tail[name][: self._tail_count]])
+
+    def filter_mask(
+        self,
+        cwd: str | None = None,
+        successful_only: bool = False,
+        since: float | None = None,
+    ) -> npt.NDArray[np.bool_]:
+        """
+        Boolean mask of the rows matching all given filters.
+
+        Masks are cached per filter combination until the metadata changes.
+
+        Args:
+            cwd: Only rows whose (dominant) cwd is this directory
+            successful_only: Only rows whose command has succeeded at least
+                once or whose exit code was never recorded
+            since: Only rows last used at or after this timestamp
+
+        Returns:
+            Mask with one entry per row
+        """
+        key = (cwd, successful_only, since)
+        cached = self._mask_cache.get(key)
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+
+        mask = np.ones(len(self), dtype=bool)
+        if cwd is not None:
+            cwd_id = self._cwd_ids.get(cwd)
+            if cwd_id is None:
+                mask[:] = False
+            else:
+                mask &= self._column("cwd_id") == cwd_id
+        if successful_only:
+            # Rows added without an exit code (learned or legacy) are unknown, not failed
+            unknown = self._column("exit_code") == NO_EXIT_CODE
+            mask &= (self._column("success_count") > 0) | unknown
+        if since is not None:
+            mask &= self._column("timestamp") >= since
+
+        if len(self._mask_cache) >= 32:
+            self._mask_cache.clear()
+        self._mask_cache[key] = (self._version, mask)
+        return mask
+
+    def get_command(self, idx: int) -> str:
+        """
+        Get the command string of a row.
+
+        Args:
+            idx: Row index
+
+        Returns:
+            Command string
+        """
+        base_count = len(self._rows)
+        if idx >= base_count:
+            return self._tail_commands[idx - base_count]
+
+        row = self._rows[idx]
+        start = int(row["offset"])
+        return bytes(self._blob[start : start + int(row["length"])]).decode("utf-8")
+
+    def __getitem__(self, idx: int) -> dict[str, Any]:
+        """
+        Materialize a row as a metadata dict.
+
+        Args:
+            idx: Row index
+
+        Returns:
+            New dict with command, index, use counts and the fields the row
+            was added with (timestamp of last use, dominant cwd, last exit code)
+
+        Raises:
+            IndexError: If idx is out of range
+        """
+        if not 0 <= idx < len(self):
+            raise IndexError(f"Metadata index out of range: {idx}")
+
+        rows, i = self._locate(idx)
+        row = rows[i]
+        timestamp = float(row["timestamp"])
+        cwd_id = int(row["cwd_id"])
+        exit_code = int(row["exit_code"])
+
+        meta: dict[str, Any] = dict(self._extras.get(idx, {}))
+        if not np.isnan(timestamp):
+            meta["timestamp"] = timestamp
+        if cwd_id != NO_CWD:
+            meta["cwd"] = self.cwds[cwd_id]
+        if exit_code != NO_EXIT_CODE:
+            meta["exit_code"] = exit_code
+        meta["count"] = int(row["count"])
+        meta["success_count"] = int(row["success_count"])
+        meta["command"] = self.get_command(idx)
+        meta["index"] = idx
+        return meta
+
+    def _all_rows(self) -> npt.NDArray:
+        """All rows (mapped and appended) as one record array."""
+        return np.concatenate([np.asarray(self._rows), self._tail[: self._tail_count]])
+
+    @staticmethod
+    def _paths(path: Path) -> dict[str, Path]:
+        """Paths of the header, row records and string blob."""
+        return {
+            "header": path.with_suffix(".meta"),
+            "rows": path.with_suffix(".rows.npy"),
+            "strings": path.with_suffix(".strings"),
+        }
+
+    def save(self, path: Path) -> None:
+        """
+        Save metadata next to an index path.
+
+        Args:
+            path: Index path (writes .meta, .rows.npy and .strings)
+        """
+        paths = self._paths(path)
+        rows = self._all_rows()
+
+        def write_strings(f: Any) -> None:
+            f.write(memoryview(np.ascontiguousarray(self._blob)))
+            for command in self._tail_commands:
+                f.write(command.encode("utf-8"))
+
+        _replace_file(paths["strings"], write_strings)
+        _replace_file(paths["rows"], lambda f: np.save(f, rows))
+
+        header = {
+            "format": FORMAT_VERSION,
+            "count": len(rows),
+            "cwds": self.cwds,
+            "extras": {str(idx): extras for idx, extras in self._extras.items()},
+        }
+        _replace_file(paths["header"], lambda f: f.write(json.dumps(header).encode("utf-8")))
+
+    @classmethod
+    def load(cls, path: Path) -> "VectorMetadata":
+        """
+        Load metadata saved next to an index path.
+
+        Row records (copy-on-write) and strings are memory-mapped. A .meta
+        file holding a JSON list (the format before columnar storage) is
+        converted.
+
+        Args:
+            path: Index path
+
+        Returns:
+            Loaded metadata
+
+        Raises:
+            FileNotFoundError: If metadata files don't exist
+        """
+        paths = cls._paths(path)
+        if not paths["header"].exists():
+            raise FileNotFoundError(f"Metadata not found: {paths['header']}")
+
+        with open(paths["header"]) as f:
+            header = json.load(f)
+
+        metadata = cls()
+
+        if isinstance(header, list):
+            logger.info("Converting JSON vector metadata to columnar format")
+            for meta in header:
+                metadata.append(meta.get("command", ""), meta)
+            return metadata
+
+        for key in ("rows", "strings"):
+            if not paths[key].exists():
+                raise FileNotFoundError(f"Metadata not found: {paths[key]}")
+
+        if header["count"]:
+            rows = np.load(paths["rows"], mmap_mode="c")
+            metadata._rows = rows if rows.dtype == ROW_DTYPE else cls._upgrade_rows(rows)
+        if paths["strings"].stat().st_size:
+            metadata._blob = np.memmap(paths["strings"], dtype=np.uint8, mode="r")
+
+        metadata.cwds = header["cwds"]
+        metadata._cwd_ids = {cwd: cwd_id for cwd_id, cwd in enumerate(metadata.cwds)}
+        metadata._extras = {int(idx): extras for idx, extras in header["extras"].items()}
+        return metadata
+
+    @staticmethod
+    def _upgrade_rows(rows: npt.NDArray) -> npt.NDArray:
+        """Convert row records saved without use counts (one use per row)."""
+        upgraded = np.zeros(len(rows), dtype=ROW_DTYPE)
+        for name in rows.dtype.names:
+            upgraded[name] = rows[name]
+        upgraded["count"] = 1
+        upgraded["success_count"] = rows["exit_code"] == 0
+        upgraded["cwd_votes"] = rows["cwd_id"] != NO_CWD
+        return upgraded
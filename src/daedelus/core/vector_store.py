@@ -1,11 +1,18 @@
 """
-Annoy-based vector similarity search for Daedalus (Phase 1).
+Vector similarity search for Daedalus (Phase 1).
 
-Provides fast approximate nearest neighbor search for command embeddings:
+Provides fast nearest neighbor search for command embeddings:
+- Pluggable search backends: exact (quantized NumPy matrix) or Annoy,
+  chosen automatically from the vector count and measured query latency
 - Memory-mapped indexes for efficiency
 - Fast queries (<10ms for 1M vectors)
-- Persistent storage
-- Incremental updates
+- Persistent storage with columnar, memory-mapped metadata
+- One vector per distinct command; repeat uses update aggregated metadata
+  (use count, last use, dominant cwd) instead of adding duplicate vectors
+- Filtered search (cwd, success, recency) evaluated inside the backends
+- Incremental updates: vectors added after the Annoy index is built go to an
+  in-memory delta segment (exact search) that is periodically compacted into
+  a rebuilt base index in the background
 
 Phase 2 will upgrade to sqlite-vss for better integration with the database.
 
@@ -14,12 +21,25 @@ Created by: orpheus497
 
 import json
 import logging
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
 import numpy as np
 import numpy.typing as npt
 
+from daedelus.core.vector_backends import (
+    BACKENDS,
+    AnnoyBackend,
+    ExactBackend,
+    VectorBackend,
+    create_backend,
+    exact_distances,
+    nearest_k,
+)
+from daedelus.core.vector_metadata import VectorMetadata, aggregate_uses
+
 try:
     from annoy import AnnoyIndex
 except ImportError:
@@ -30,20 +50,36 @@ logger = logging.getLogger(__name__)
 
 class VectorStore:
     """
-    Fast vector similarity search using Annoy.
+    Fast vector similarity search over a pluggable backend.
+
+    The base segment is served by one of:
+    - ExactBackend: brute-force search over an int8/float16-quantized,
+      memory-mapped matrix; true nearest neighbors, no build tuning
+    - AnnoyBackend: approximate search over a memory-mapped Annoy forest
+
+    With backend="auto", the exact backend is used while the index has at
+    most exact_max_vectors vectors and a measured query stays within
+    latency_budget_ms; larger indexes fall back to Annoy.
+
+    Once built, the base segment is immutable. Later additions are kept in a
+    delta segment searched exactly with NumPy, and query results from both
+    segments are merged by distance. When the delta grows past
+    compaction_threshold, the base segment is rebuilt over both segments on a
+    background thread and swapped in.
 
-    Annoy (Approximate Nearest Neighbors Oh Yeah) provides:
-    - Fast queries with low latency
-    - Memory-mapped files (doesn't load entire index into RAM)
-    - Good for read-heavy workloads
-    - Simple to use
+    With deduplicate enabled, each distinct command occupies one slot: adding
+    a command that is already indexed only records another use of it, so
+    frequently repeated commands don't crowd distinct neighbors out of top-k.
 
     Attributes:
-        index_path: Path to Annoy index file
+        index_path: Path prefix of the index files
         dim: Dimensionality of vectors
-        n_trees: Number of trees (more = better accuracy, slower build)
-        index: Annoy index instance
-        metadata: List of metadata dicts for each vector
+        n_trees: Number of trees (Annoy backend)
+        backend_type: Requested backend ('auto', 'exact' or 'annoy')
+        backend: Search backend instance (base segment, None until built)
+        metadata: Columnar metadata, one row per vector (base and delta)
+        compaction_threshold: Delta size that triggers a background rebuild
+        deduplicate: Keep one vector per distinct command
     """
 
     def __init__(
@@ -52,6 +88,13 @@ class VectorStore:
         dim: int = 128,
         n_trees: int = 10,
         metric: str = "angular",
+        compaction_threshold: int = 1000,
+        background_compaction: bool = True,
+        backend: str = "auto",
+        quantization: str = "int8",
+        exact_max_vectors: int = 100000,
+        latency_budget_ms: float = 5.0,
+        deduplicate: bool = True,
     ) -> None:
         """
         Initialize vector store.
@@ -61,23 +104,57 @@ class VectorStore:
             dim: Dimensionality of vectors (must match embeddings)
             n_trees: Number of trees to build (more = better quality)
             metric: Distance metric ('angular', 'euclidean', 'manhattan', 'hamming')
+            compaction_threshold: Delta vectors that trigger merging into the base index
+            background_compaction: Compact on a worker thread (False compacts inline)
+            backend: Search backend ('auto', 'exact' or 'annoy')
+            quantization: Exact backend storage type ('int8', 'float16' or 'float32')
+            exact_max_vectors: Largest index the auto mode serves exactly
+            latency_budget_ms: Query latency the exact backend must meet in auto mode
+            deduplicate: Record repeat adds of a command as uses of its existing vector
+
+        Raises:
+            ValueError: If the backend name is unknown
+            ImportError: If the Annoy backend is requested but annoy is not installed
         """
         self.index_path = Path(index_path).expanduser()
         self.dim = dim
         self.n_trees = n_trees
         self.metric = metric
-
-        # Create Annoy index
-        if AnnoyIndex is None:
+        self.compaction_threshold = compaction_threshold
+        self.background_compaction = background_compaction
+        self.quantization = quantization
+        self.exact_max_vectors = exact_max_vectors
+        self.latency_budget_ms = latency_budget_ms
+        self.deduplicate = deduplicate
+
+        if backend != "auto" and backend not in BACKENDS:
+            raise ValueError(f"Unknown vector backend: {backend}")
+        if backend == AnnoyBackend.name and AnnoyIndex is None:
             raise ImportError("annoy is not installed. Install it with: pip install annoy==1.17.3")
-        self.index = AnnoyIndex(self.dim, self.metric)
+        self.backend_type = backend
+
+        # Base segment backend (created by build/load); vectors added before build wait here
+        self.backend: VectorBackend | None = None
+        self._pending: list[npt.NDArray[np.float32]] = []
 
         # Metadata storage (parallel to index)
-        self.metadata: list[dict[str, Any]] = []
+        self.metadata = VectorMetadata()
+        self._command_ids: dict[str, int] | None = None  # Built on first lookup
 
         # Track if index is built
         self._built = False
 
+        # Delta segment: vectors added after build, ids base_count..len(metadata)-1
+        self._base_count = 0
+        self._delta = np.empty((0, dim), dtype=np.float32)
+        self._delta_count = 0
+
+        # Guards segment swaps between queries/adds and background compaction
+        self._lock = threading.RLock()
+        self._generation = 0  # Bumped by load/rebuild; stale compactions are discarded
+        self._compaction_thread: threading.Thread | None = None
+        self.stats = {"delta_adds": 0, "compactions": 0, "repeat_uses": 0, "filtered_searches": 0}
+
         logger.info(f"VectorStore initialized (dim={dim}, metric={metric})")
 
     def add(
@@ -94,37 +171,85 @@ class VectorStore:
             command: Command string
             metadata: Additional metadata (timestamp, cwd, success_rate, etc.)
 
+        Vectors added after the index is built go to the delta segment and
+        are searchable immediately. With deduplicate enabled, a command that
+        is already indexed is recorded as another use of its vector instead.
+
         Returns:
-            Index of added vector
+            Index of added (or existing) vector
 
         Raises:
             ValueError: If vector dimension doesn't match
-            RuntimeError: If index is already built
         """
-        if self._built:
-            raise RuntimeError("Cannot add to built index. Create new index or rebuild.")
-
         if len(embedding) != self.dim:
             raise ValueError(
                 f"Vector dimension mismatch: expected {self.dim}, got {len(embedding)}"
             )
 
-        # Get next index
-        idx = len(self.metadata)
+        with self._lock:
+            if self.deduplicate:
+                existing = self.record_use(command, metadata)
+                if existing is not None:
+                    return existing
 
-        # Add vector to Annoy index
-        self.index.add_item(idx, embedding.tolist())
+            if self._built:
+                self._append_delta(embedding)
+            else:
+                self._pending.append(np.asarray(embedding, dtype=np.float32))
 
-        # Store metadata
-        meta = metadata or {}
-        meta["command"] = command
-        meta["index"] = idx
-        self.metadata.append(meta)
+            # Store metadata
+            idx = self.metadata.append(command, metadata)
+            if self._command_ids is not None:
+                self._command_ids[command] = idx
 
         logger.debug(f"Added vector {idx}: {command[:30]}...")
 
+        if self._built and self._delta_count >= self.compaction_threshold:
+            self._schedule_compaction()
+
         return idx
 
+    def record_use(self, command: str, metadata: dict[str, Any] | None = None) -> int | None:
+        """
+        Record another use of an already indexed command.
+
+        Lets callers skip encoding commands the index already holds. Without
+        deduplicate every use gets its own vector, so nothing is recorded.
+
+        Args:
+            command: Command string
+            metadata: Fields of this use (timestamp, cwd, exit_code)
+
+        Returns:
+            Index of the command's vector, or None if it is not indexed (or
+            deduplicate is disabled)
+        """
+        if not self.deduplicate:
+            return None
+
+        with self._lock:
+            if self._command_ids is None:
+                self._command_ids = {
+                    self.metadata.get_command(idx): idx for idx in range(len(self.metadata))
+                }
+
+            idx = self._command_ids.get(command)
+            if idx is not None:
+                self.metadata.record_use(idx, metadata)
+                self.stats["repeat_uses"] += 1
+            return idx
+
+    def _append_delta(self, embedding: npt.NDArray[np.float32]) -> None:
+        """Append a vector to the delta segment, growing it by doubling (lock held)."""
+        if self._delta_count == len(self._delta):
+            grown = np.empty((max(64, 2 * len(self._delta)), self.dim), dtype=np.float32)
+            grown[: self._delta_count] = self._delta[: self._delta_count]
+            self._delta = grown
+
+        self._delta[self._delta_count] = embedding
+        self._delta_count += 1
+        self.stats["delta_adds"] += 1
+
     def is_built(self) -> bool:
         """
         Check if the index has been built.
@@ -149,11 +274,62 @@ class VectorStore:
 
         logger.info(f"Building index with {len(self.metadata)} vectors...")
 
-        # Build Annoy index
-        self.index.build(self.n_trees)
-        self._built = True
+        with self._lock:
+            self.backend = self._create_backend(np.vstack(self._pending))
+            self._pending = []
+            self._built = True
+            self._base_count = len(self.metadata)
+
+        logger.info(f"Index built successfully ({self.backend.name} backend)")
+
+    def _create_backend(self, vectors: npt.NDArray[np.float32]) -> VectorBackend:
+        """Build a base segment backend over vectors, selecting one in auto mode."""
+        if self.backend_type != "auto":
+            backend = create_backend(
+                self.backend_type,
+                self.dim,
+                self.metric,
+                n_trees=self.n_trees,
+                quantization=self.quantization,
+            )
+            backend.build(vectors)
+            return backend
+
+        if AnnoyIndex is None or len(vectors) <= self.exact_max_vectors:
+            exact = ExactBackend(self.dim, self.metric, quantization=self.quantization)
+            exact.build(vectors)
+            latency_ms = self._measure_latency(exact, vectors)
+
+            if AnnoyIndex is None or latency_ms <= self.latency_budget_ms:
+                logger.info(
+                    f"Using exact search backend ({len(vectors)} vectors, "
+                    f"{latency_ms:.2f}ms/query)"
+                )
+                return exact
+
+            logger.info(
+                f"Exact search over budget ({latency_ms:.2f}ms/query > "
+                f"{self.latency_budget_ms}ms), using Annoy"
+            )
 
-        logger.info("Index built successfully")
+        annoy = AnnoyBackend(self.dim, self.metric, n_trees=self.n_trees)
+        annoy.build(vectors)
+        return annoy
+
+    @staticmethod
+    def _measure_latency(
+        backend: VectorBackend,
+        vectors: npt.NDArray[np.float32],
+        n_queries: int = 5,
+    ) -> float:
+        """Median query latency (ms) of a backend, using indexed vectors as queries."""
+        step = max(1, len(vectors) // n_queries)
+        timings = []
+        for query in vectors[::step][:n_queries]:
+            start = time.perf_counter()
+            backend.query(query, 10)
+            timings.append((time.perf_counter() - start) * 1000)
+        return float(np.median(timings))
 
     def search(
         self,
@@ -161,16 +337,26 @@ class VectorStore:
         top_k: int = 10,
         include_distances: bool = True,
         search_k: int = -1,
+        cwd: str | None = None,
+        successful_only: bool = False,
+        since: float | None = None,
     ) -> list[dict[str, Any]]:
         """
         Search for nearest neighbors.
 
+        Filters are applied inside the search (not to an over-fetched result
+        list), so up to top_k matching results are returned.
+
         Args:
             query_embedding: Query vector
             top_k: Number of results to return
             include_distances: Whether to include distances in results
             search_k: Search parameter (higher = more accurate, slower)
                      -1 means use n_trees * top_k
+            cwd: Only commands (mostly) used in this directory
+            successful_only: Only commands that have succeeded at least once
+                (or whose exit code is unknown)
+            since: Only commands used at or after this timestamp
 
         Returns:
             List of result dictionaries with 'command', 'similarity', and metadata
@@ -181,45 +367,118 @@ class VectorStore:
         if not self._built:
             raise RuntimeError("Index not built. Call build() first.")
 
-        # Get nearest neighbors
-        if include_distances:
-            indices, distances = self.index.get_nns_by_vector(
-                query_embedding.tolist(),
-                top_k,
-                search_k=search_k,
-                include_distances=True,
-            )
-        else:
-            indices = self.index.get_nns_by_vector(
-                query_embedding.tolist(),
+        filtered = cwd is not None or successful_only or since is not None
+
+        with self._lock:
+            allowed = None
+            if filtered:
+                allowed = self.metadata.filter_mask(
+                    cwd=cwd, successful_only=successful_only, since=since
+                )
+                self.stats["filtered_searches"] += 1
+
+            # Base segment: neighbors from the search backend
+            indices, distances = self.backend.query(
+                query_embedding,
                 top_k,
                 search_k=search_k,
-                include_distances=False,
+                allowed=allowed[: self._base_count] if filtered else None,
             )
-            distances = [0.0] * len(indices)
+            candidates = list(zip(indices, distances, strict=False))
+
+            # Delta segment: exact search over vectors added since the build
+            if self._delta_count:
+                delta_distances = exact_distances(
+                    np.asarray(query_embedding, dtype=np.float32),
+                    self._delta[: self._delta_count],
+                    self.metric,
+                )
+                delta_ids = np.arange(self._base_count, self._base_count + self._delta_count)
+                if filtered:
+                    delta_allowed = allowed[self._base_count : self._base_count + self._delta_count]
+                    delta_distances = delta_distances[delta_allowed]
+                    delta_ids = delta_ids[delta_allowed]
+                ids, dists = nearest_k(delta_distances, top_k, delta_ids)
+                candidates.extend(zip(ids, dists, strict=True))
+                candidates.sort(key=lambda c: c[1])
+                candidates = candidates[:top_k]
+
+            # Build result list
+            results = []
+            for idx, dist in candidates:
+                if idx < len(self.metadata):
+                    result = self.metadata[idx]
+
+                    # Convert distance to similarity
+                    # Angular distance is in [0, 2], convert to similarity in [0, 1]
+                    if self.metric == "angular":
+                        similarity = 1.0 - (dist / 2.0)
+                    elif self.metric == "euclidean":
+                        # Normalize euclidean distance to [0, 1] range (approximate)
+                        similarity = 1.0 / (1.0 + dist)
+                    else:
+                        similarity = 1.0 - dist  # Generic fallback
+
+                    result["similarity"] = float(similarity)
+                    result["distance"] = float(dist) if include_distances else 0.0
+
+                    results.append(result)
 
-        # Build result list
-        results = []
-        for idx, dist in zip(indices, distances, strict=False):
-            if idx < len(self.metadata):
-                result = self.metadata[idx].copy()
+        return results
 
-                # Convert distance to similarity
-                # Angular distance is in [0, 2], convert to similarity in [0, 1]
-                if self.metric == "angular":
-                    similarity = 1.0 - (dist / 2.0)
-                elif self.metric == "euclidean":
-                    # Normalize euclidean distance to [0, 1] range (approximate)
-                    similarity = 1.0 / (1.0 + dist)
-                else:
-                    similarity = 1.0 - dist  # Generic fallback
+    def _schedule_compaction(self) -> None:
+        """Start a background compaction unless one is already running."""
+        if not self.background_compaction:
+            self.compact()
+            return
+
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(
+                target=self.compact, name="daedelus-vector-compaction", daemon=True
+            )
+            self._compaction_thread.start()
 
-                result["similarity"] = float(similarity)
-                result["distance"] = float(dist)
+    def compact(self) -> None:
+        """
+        Merge the delta segment into a rebuilt base index.
 
-                results.append(result)
+        The new index is built outside the lock from a snapshot; vectors added
+        while it builds stay in the delta segment.
+        """
+        with self._lock:
+            if not self._built or self._delta_count == 0:
+                return
+            base_backend = self.backend
+            generation = self._generation
+            base_count = self._base_count
+            snapshot_count = self._delta_count
+            delta = self._delta[:snapshot_count].copy()
+
+        logger.info(f"Compacting {snapshot_count} delta vectors into base index...")
+
+        new_backend = self._create_backend(np.vstack([base_backend.get_vectors(), delta]))
+
+        with self._lock:
+            if generation != self._generation:
+                logger.debug("Index replaced during compaction, discarding result")
+                return
+            remaining = self._delta_count - snapshot_count
+            self._delta[:remaining] = self._delta[snapshot_count : self._delta_count]
+            self._delta_count = remaining
+            self.backend = new_backend
+            self._base_count = base_count + snapshot_count
+            self.stats["compactions"] += 1
+
+        logger.info(
+            f"Compaction complete ({self._base_count} vectors in {new_backend.name} index)"
+        )
 
-        return results
+    @property
+    def _info_path(self) -> Path:
+        """Path of the file recording which backend wrote the index."""
+        return self.index_path.with_suffix(".info")
 
     def get_by_index(self, idx: int) -> dict[str, Any] | None:
         """
@@ -232,7 +491,7 @@ class VectorStore:
             Metadata dictionary or None if index invalid
         """
         if 0 <= idx < len(self.metadata):
-            return self.metadata[idx].copy()
+            return self.metadata[idx]
         return None
 
     def save(self) -> None:
@@ -245,16 +504,27 @@ class VectorStore:
         if not self._built:
             raise RuntimeError("Cannot save unbuilt index. Call build() first.")
 
+        # Only the base segment is persisted; merge pending delta vectors first
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+        self.compact()
+
         self.index_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Save Annoy index
-        annoy_path = self.index_path.with_suffix(".ann")
-        self.index.save(str(annoy_path))
+        with self._lock:
+            backend = self.backend
+            backend.save(self.index_path)
+
+        # Record which backend wrote the index; drop files of other backends
+        with open(self._info_path, "w") as f:
+            json.dump({"backend": backend.name, "dim": self.dim, "metric": self.metric}, f)
+        for name, backend_cls in BACKENDS.items():
+            if name != backend.name:
+                for stale in backend_cls.files(self.index_path):
+                    stale.unlink(missing_ok=True)
 
         # Save metadata
-        meta_path = self.index_path.with_suffix(".meta")
-        with open(meta_path, "w") as f:
-            json.dump(self.metadata, f, indent=2)
+        self.metadata.save(self.index_path)
 
         logger.info(f"Index saved to {self.index_path}")
 
@@ -262,26 +532,47 @@ class VectorStore:
         """
         Load index and metadata from disk.
 
+        Indexes saved without backend info (before backends were pluggable)
+        are loaded as Annoy indexes.
+
         Raises:
             FileNotFoundError: If index files don't exist
         """
-        annoy_path = self.index_path.with_suffix(".ann")
-        meta_path = self.index_path.with_suffix(".meta")
-
-        if not annoy_path.exists():
-            raise FileNotFoundError(f"Index not found: {annoy_path}")
-        if not meta_path.exists():
-            raise FileNotFoundError(f"Metadata not found: {meta_path}")
-
-        # Load Annoy index
-        self.index.load(str(annoy_path))
-        self._built = True
-
-        # Load metadata
-        with open(meta_path) as f:
-            self.metadata = json.load(f)
-
-        logger.info(f"Index loaded from {self.index_path} " f"({len(self.metadata)} vectors)")
+        backend_name = AnnoyBackend.name
+        if self._info_path.exists():
+            with open(self._info_path) as f:
+                backend_name = json.load(f).get("backend", AnnoyBackend.name)
+
+        for path in BACKENDS[backend_name].files(self.index_path)[:1]:
+            if not path.exists():
+                raise FileNotFoundError(f"Index not found: {path}")
+        # Load metadata (memory-mapped; rows are materialized per search hit)
+        metadata = VectorMetadata.load(self.index_path)
+
+        backend = create_backend(
+            backend_name,
+            self.dim,
+            self.metric,
+            n_trees=self.n_trees,
+            quantization=self.quantization,
+        )
+        backend.load(self.index_path)
+
+        with self._lock:
+            self.backend = backend
+            self._pending = []
+            self._command_ids = None
+            self._built = True
+
+            self.metadata = metadata
+            self._base_count = len(self.metadata)
+            self._delta_count = 0
+            self._generation += 1
+
+        logger.info(
+            f"Index loaded from {self.index_path} "
+            f"({len(self.metadata)} vectors, {backend.name} backend)"
+        )
 
     def rebuild(
         self,
@@ -292,7 +583,9 @@ class VectorStore:
         """
         Rebuild index from scratch with new data.
 
-        Useful for incremental updates or reindexing.
+        Useful for incremental updates or reindexing. With deduplicate
+        enabled, repeated commands are merged into one vector whose metadata
+        aggregates all their uses.
 
         Args:
             embeddings: List of embedding vectors
@@ -303,14 +596,28 @@ class VectorStore:
             raise ValueError("Embeddings and commands must have same length")
 
         # Create new index
-        self.index = AnnoyIndex(self.dim, self.metric)
-        self.metadata = []
-        self._built = False
-
-        # Add all vectors
-        for i, (emb, cmd) in enumerate(zip(embeddings, commands, strict=False)):
-            meta = metadata_list[i] if metadata_list else {}
-            self.add(emb, cmd, meta)
+        with self._lock:
+            self.backend = None
+            self._pending = []
+            self.metadata = VectorMetadata()
+            self._command_ids = None
+            self._built = False
+            self._base_count = 0
+            self._delta_count = 0
+            self._generation += 1
+
+        if self.deduplicate:
+            # One vector per distinct command, with metadata aggregated over its uses
+            positions: dict[str, list[int]] = {}
+            for i, cmd in enumerate(commands):
+                positions.setdefault(cmd, []).append(i)
+            for cmd, uses in positions.items():
+                meta_uses = [metadata_list[i] for i in uses] if metadata_list else [{} for _ in uses]
+                self.add(embeddings[uses[0]], cmd, aggregate_uses(meta_uses))
+        else:
+            for i, (emb, cmd) in enumerate(zip(embeddings, commands, strict=False)):
+                meta = metadata_list[i] if metadata_list else {}
+                self.add(emb, cmd, meta)
 
         # Build index
         self.build()
@@ -324,15 +631,26 @@ class VectorStore:
         Returns:
             Dictionary of statistics
         """
-        return {
+        backend = self.backend
+        backend_cls = type(backend) if backend is not None else AnnoyBackend
+        stats = {
             "total_vectors": len(self.metadata),
             "dimension": self.dim,
             "n_trees": self.n_trees,
             "metric": self.metric,
             "built": self._built,
-            "index_file": str(self.index_path.with_suffix(".ann")),
+            "backend": backend.name if backend is not None else self.backend_type,
+            "base_vectors": self._base_count,
+            "delta_vectors": self._delta_count,
+            "deduplicate": self.deduplicate,
+            **self.stats,
+            "index_file": str(backend_cls.files(self.index_path)[0]),
             "metadata_file": str(self.index_path.with_suffix(".meta")),
         }
+        if isinstance(backend, ExactBackend):
+            stats["quantization"] = backend.quantization
+            stats["memory_bytes"] = backend.nbytes
+        return stats
 
     def __len__(self) -> int:
         """Return number of vectors in index."""
@@ -340,7 +658,7 @@ class VectorStore:
 
     def __repr__(self) -> str:
         """String representation."""
-        status = "built" if self._built else "not built"
+        status = f"built ({self.backend.name})" if self._built else "not built"
         return f"VectorStore(dim={self.dim}, vectors={len(self.metadata)}, " f"status={status})"
 
 
@@ -16,15 +16,24 @@ import os
 import re
 import signal
 import sys
+import threading
 import time
 import uuid
 from pathlib import Path
 from typing import Any
 
+from daedelus.core.command_structure import CommandStructureIndex
 from daedelus.core.database import CommandDatabase
+from daedelus.core.directory_shards import DirectoryShardCache
+from daedelus.core.embedding_cache import EmbeddingCache
 from daedelus.core.embeddings import CommandEmbedder
+from daedelus.core.fuzzy_index import FuzzyCommandIndex
+from daedelus.core.knowledge_retriever import KnowledgeRetriever
+from daedelus.core.model_trainer import ModelQualityError, ModelTrainer
 from daedelus.core.plugin_interface import DaedalusPlugin
 from daedelus.core.plugin_loader import PluginLoader
+from daedelus.core.prediction_cache import NextCommandPredictor
+from daedelus.core.session_state import SessionStateStore
 from daedelus.core.suggestions import SuggestionEngine
 from daedelus.core.vector_store import VectorStore
 from daedelus.daemon.ipc import IPCServer
@@ -67,7 +76,15 @@ class DaedelusDaemon:
         self.db: CommandDatabase | None = None
         self.embedder: CommandEmbedder | None = None
         self.vector_store: VectorStore | None = None
+        self.fuzzy_index: FuzzyCommandIndex | None = None
+        self.directory_shards: DirectoryShardCache | None = None
+        self.structure_index: CommandStructureIndex | None = None
         self.suggestion_engine: SuggestionEngine | None = None
+        self.next_command_predictor: NextCommandPredictor | None = None
+        self.session_states: SessionStateStore | None = None
+        self.embedding_cache: EmbeddingCache | None = None
+        self.model_trainer: ModelTrainer | None = None
+        self.knowledge_retriever: KnowledgeRetriever | None = None  # Created on first use
         self.ipc_server: IPCServer | None = None
         self.plugin_loader: PluginLoader | None = None
         self.plugins: list[DaedalusPlugin] = []
@@ -83,6 +100,10 @@ class DaedelusDaemon:
         self._excluded_patterns: list[re.Pattern] = []
         self._load_privacy_filters()
 
+        # Guards swapping the embedder and vector store after a retrain
+        self._models_lock = threading.Lock()
+        self._commands_since_retrain = 0
+
         # Statistics
         self.stats = {
             "start_time": None,
@@ -158,6 +179,23 @@ class DaedelusDaemon:
         # logger.info("Step 3/7: Embedding model initialized.")
         self.embedder = None  # Explicitly set to None
 
+        # Persistent embedding cache (index rebuilds only encode new distinct commands)
+        if self.embedder is not None:
+            self.embedding_cache = EmbeddingCache(
+                self.embedder,
+                Path(self.config.get("model.embedding_cache_path")),
+                max_entries=self.config.get("model.embedding_cache_max_entries", 100000),
+            )
+
+            # Retraining runs in a niced child process; new versions are swapped in
+            self.model_trainer = ModelTrainer(
+                self.embedder.model_path,
+                nice_level=self.config.get("model.retrain_nice", 10),
+                threads=self.config.get("model.retrain_threads", 1),
+                keep_versions=self.config.get("model.keep_versions", 2),
+                timeout=self.config.get("model.retrain_timeout", 1800.0),
+            )
+
         # Try to load existing model, or train new one
         # try:
         #     self.embedder.load()
@@ -183,6 +221,12 @@ class DaedelusDaemon:
         #     index_path=index_path,
         #     dim=self.config.get("model.embedding_dim"),
         #     n_trees=self.config.get("vector_store.n_trees"),
+        #     compaction_threshold=self.config.get("vector_store.compaction_threshold"),
+        #     backend=self.config.get("vector_store.index_type"),
+        #     quantization=self.config.get("vector_store.quantization"),
+        #     exact_max_vectors=self.config.get("vector_store.exact_max_vectors"),
+        #     latency_budget_ms=self.config.get("vector_store.latency_budget_ms"),
+        #     deduplicate=self.config.get("vector_store.deduplicate"),
         # )
         # try:
         #     self.vector_store.load()
@@ -192,6 +236,33 @@ class DaedelusDaemon:
         # logger.info("Step 4/7: Vector store initialized.")
         self.vector_store = None  # Explicitly set to None
 
+        # Fuzzy command index (typo-tolerant tier, resident vocabulary)
+        if self.config.get("suggestions.enable_fuzzy", True):
+            self.fuzzy_index = FuzzyCommandIndex(
+                score_cutoff=self.config.get("suggestions.fuzzy_score_cutoff", 65),
+            )
+            try:
+                self.fuzzy_index.load_from_database(
+                    self.db,
+                    limit=self.config.get("suggestions.fuzzy_vocabulary_size", 20000),
+                )
+            except Exception as e:
+                logger.warning(f"Failed to load fuzzy index: {e}")
+
+        # Per-directory top-k shards (loaded lazily on first visit)
+        self.directory_shards = DirectoryShardCache(
+            self.db,
+            top_k=self.config.get("suggestions.directory_shard_top_k", 10),
+            max_directories=self.config.get("suggestions.directory_shard_max_dirs", 256),
+        )
+
+        # Command structure index (subcommands/flags per base command)
+        self.structure_index = CommandStructureIndex()
+        try:
+            self.structure_index.load_from_database(self.db)
+        except Exception as e:
+            logger.warning(f"Failed to build command structure index: {e}")
+
         # Suggestion engine
         # logger.info("Step 5/7: Initializing suggestion engine...")
         # self.suggestion_engine = SuggestionEngine(
@@ -202,7 +273,34 @@ class DaedelusDaemon:
         #     min_confidence=self.config.get("suggestions.min_confidence"),
         # )
         # logger.info("Step 5/7: Suggestion engine initialized.")
-        self.suggestion_engine = None  # Explicitly set to None
+        # The database-backed tiers (prefix, patterns, fuzzy) work without the
+        # embedder and vector store; the semantic tier is skipped while they are None.
+        self.suggestion_engine = SuggestionEngine(
+            db=self.db,
+            embedder=self.embedder,
+            vector_store=self.vector_store,
+            max_suggestions=self.config.get("suggestions.max_suggestions", 5),
+            min_confidence=self.config.get("suggestions.min_confidence", 0.3),
+            fuzzy_index=self.fuzzy_index,
+            fuzzy_latency_budget_ms=self.config.get("suggestions.fuzzy_latency_budget_ms", 15.0),
+            directory_shards=self.directory_shards,
+            structure_index=self.structure_index,
+        )
+
+        # Session-resident context (recent commands, cwd, rolling history vector)
+        self.session_states = SessionStateStore(
+            self.db,
+            embedder=self.embedder,
+            history_size=self.config.get("suggestions.context_window", 10),
+            max_sessions=self.config.get("suggestions.max_sessions", 128),
+        )
+
+        # Next-command precomputation (post-log hook, background worker)
+        if self.config.get("suggestions.enable_prediction", True):
+            self.next_command_predictor = NextCommandPredictor(
+                self.suggestion_engine,
+                pool_size=self.config.get("suggestions.prediction_pool_size", 50),
+            )
 
         # IPC server
         logger.info("Step 6/7: Initializing IPC server...")
@@ -408,7 +506,9 @@ class DaedelusDaemon:
         Handle suggestion request.
 
         Args:
-            data: Request data with 'partial', 'cwd', 'history'
+            data: Request data with 'partial', 'session_id' and optional
+                'mode' ('full' or 'tokens'). 'cwd' and 'history' are taken from
+                the session state when omitted (older clients still send them).
 
         Returns:
             Response with 'suggestions' list
@@ -419,15 +519,39 @@ class DaedelusDaemon:
 
         partial = data.get("partial", "")
         cwd = data.get("cwd")
-        history = data.get("history", [])
+        history = data.get("history")
+        mode = data.get("mode", "full")
+        session_id = data.get("session_id")
+        history_vector = None
+
+        # Fill in context the daemon already tracks for this session
+        session = self.session_states.get(session_id) if self.session_states else None
+        if session is not None:
+            if cwd:
+                if cwd != session.cwd:
+                    self.session_states.update_cwd(session_id, cwd)
+            else:
+                cwd = session.cwd
+            if history is None:
+                history = session.history
+                history_vector = self.session_states.get_context_vector(session)
+
+        logger.debug(f"Suggestion request: partial='{partial}' (mode={mode})")
 
-        logger.debug(f"Suggestion request: partial='{partial}'")
+        # First request after a prompt: serve the precomputed next-command set
+        if self.next_command_predictor is not None and mode == "full":
+            cached = self.next_command_predictor.get(partial, cwd=cwd, session_id=session_id)
+            if cached is not None:
+                self.stats["suggestions_generated"] += len(cached)
+                return {"suggestions": cached}
 
         # Get suggestions
         suggestions = self.suggestion_engine.get_suggestions(
             partial=partial,
             cwd=cwd,
-            history=history,
+            history=history or [],
+            mode=mode,
+            history_vector=history_vector,
         )
 
         self.stats["suggestions_generated"] += len(suggestions)
@@ -474,35 +598,71 @@ class DaedelusDaemon:
                 duration=duration,
             )
 
-            # Add to vector store if model is ready
-            if (
-                self.embedder
-                and self.embedder.model
-                and self.vector_store
-                and self.vector_store.is_built()
-            ):
+            # Keep fuzzy vocabulary current
+            if self.fuzzy_index is not None:
+                self.fuzzy_index.add_command(command)
+
+            # Refresh resident shards for this directory and its project
+            if self.directory_shards is not None:
+                self.directory_shards.record(command, cwd)
+
+            # Learn subcommands/flags of the new command
+            if self.structure_index is not None:
+                self.structure_index.add_command(command)
+
+            # Add to vector store if model is ready (searchable immediately via
+            # the delta segment; merged into Annoy by background compaction)
+            with self._models_lock:
+                embedder, vector_store = self.embedder, self.vector_store
+            if embedder and embedder.model and vector_store and vector_store.is_built():
                 try:
-                    self.embedder.encode_command(command)
-                    # Note: Can't add to built index, will rebuild on shutdown
+                    use = {"timestamp": time.time(), "cwd": cwd, "exit_code": exit_code}
+                    # Known commands only update their aggregated metadata
+                    if vector_store.record_use(command, use) is None:
+                        if self.embedding_cache is not None:
+                            embedding = self.embedding_cache.encode_one(command)
+                        else:
+                            embedding = embedder.encode_command(command)
+                        vector_store.add(embedding, command, use)
                 except Exception as e:
                     logger.debug(f"Skipping embedding: {e}")
 
+            # Periodic background retrain (the serving model is swapped when done)
+            retrain_every = self.config.get("model.retrain_every", 0)
+            if self.model_trainer is not None and retrain_every:
+                self._commands_since_retrain += 1
+                if self._commands_since_retrain >= retrain_every:
+                    self._commands_since_retrain = 0
+                    self._update_models(background=True)
+
         self.stats["commands_logged"] += 1
 
+        # Keep the session's rolling context current (encodes this command once)
+        history = [command]
+        if self.session_states is not None:
+            history = self.session_states.record_command(session_id, command, cwd).history
+
+        # Post-log hook: precompute the next prompt's suggestions in the background
+        if self.next_command_predictor is not None:
+            self.next_command_predictor.schedule(session_id, cwd, history)
+
         return {"status": "logged"}
 
     def handle_complete(self, data: dict[str, Any]) -> dict[str, Any]:
         """
         Handle completion request.
 
+        Completions default to token-position mode: only the token under the
+        cursor is completed from the command structure index, falling back to
+        whole-command suggestions when the index has nothing for it.
+
         Args:
             data: Completion context
 
         Returns:
             Completion options
         """
-        # Completions are similar to suggestions
-        return self.handle_suggest(data)
+        return self.handle_suggest({**data, "mode": data.get("mode", "tokens")})
 
     def handle_search(self, data: dict[str, Any]) -> dict[str, Any]:
         """
@@ -564,6 +724,17 @@ class DaedelusDaemon:
 
         db_stats = self.db.get_statistics() if self.db else {}
         vector_stats = self.vector_store.get_statistics() if self.vector_store else {}
+        fuzzy_stats = self.fuzzy_index.get_statistics() if self.fuzzy_index else {}
+        shard_stats = self.directory_shards.get_statistics() if self.directory_shards else {}
+        structure_stats = self.structure_index.get_statistics() if self.structure_index else {}
+        prediction_stats = (
+            self.next_command_predictor.get_statistics() if self.next_command_predictor else {}
+        )
+        session_stats = self.session_states.get_statistics() if self.session_states else {}
+        embedding_cache_stats = (
+            self.embedding_cache.get_statistics() if self.embedding_cache else {}
+        )
+        trainer_stats = self.model_trainer.get_statistics() if self.model_trainer else {}
 
         return {
             "status": "running" if self.running else "stopped",
@@ -574,6 +745,13 @@ class DaedelusDaemon:
             "suggestions_generated": self.stats["suggestions_generated"],
             "database": db_stats,
             "vector_store": vector_stats,
+            "fuzzy_index": fuzzy_stats,
+            "directory_shards": shard_stats,
+            "command_structure": structure_stats,
+            "prediction_cache": prediction_stats,
+            "session_states": session_stats,
+            "embedding_cache": embedding_cache_stats,
+            "model_trainer": trainer_stats,
         }
 
     def handle_shutdown(self, data: dict[str, Any]) -> dict[str, Any]:
@@ -1219,6 +1397,14 @@ class DaedelusDaemon:
             logger.error(f"Failed to clear prompt history: {e}", exc_info=True)
             return {"status": "error", "error": str(e)}
 
+    def _get_knowledge_retriever(self) -> KnowledgeRetriever:
+        """Get the shared knowledge retriever (one read-only connection and result cache)."""
+        if self.knowledge_retriever is None:
+            self.knowledge_retriever = KnowledgeRetriever(
+                db_path=self.config.data_dir / "history.db"
+            )
+        return self.knowledge_retriever
+
     def handle_search_knowledge_base(self, data: dict[str, Any]) -> dict[str, Any]:
         """
         Handle knowledge base search request.
@@ -1235,10 +1421,8 @@ class DaedelusDaemon:
             return {"status": "error", "error": "No query provided"}
 
         try:
-            # Initialize knowledge retriever if needed
-            from daedelus.core.knowledge_retriever import KnowledgeRetriever
-            
-            retriever = KnowledgeRetriever(db_path=self.config.data_dir / "history.db")
+            # Shared retriever (repeated queries are served from its cache)
+            retriever = self._get_knowledge_retriever()
             results = retriever.search(query, limit=3, source="redbook")
             
             if not results:
@@ -1292,23 +1476,10 @@ Provide a clear, actionable answer with examples where appropriate. Include rele
         """
         try:
             # Get stats from database
-            from daedelus.core.knowledge_retriever import KnowledgeRetriever
-            
-            retriever = KnowledgeRetriever(db_path=self.config.data_dir / "history.db")
-            
-            # Try to get summary from database
-            import sqlite3
-            conn = sqlite3.connect(self.config.data_dir / "history.db")
-            cursor = conn.cursor()
-            
+            retriever = self._get_knowledge_retriever()
+
             # Check if knowledge_base table exists
-            cursor.execute("""
-                SELECT COUNT(*) FROM sqlite_master 
-                WHERE type='table' AND name='knowledge_base'
-            """)
-            
-            if cursor.fetchone()[0] == 0:
-                conn.close()
+            if not retriever.has_knowledge_base():
                 return {
                     "status": "ok",
                     "explanation": """# The Redbook Knowledge Base
@@ -1333,13 +1504,9 @@ Once indexed, you can:
                 }
             
             # Get statistics
-            cursor.execute("SELECT COUNT(*) FROM knowledge_base WHERE source='redbook'")
-            total_sections = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(DISTINCT chapter) FROM knowledge_base WHERE source='redbook'")
-            total_chapters = cursor.fetchone()[0]
-            
-            conn.close()
+            stats = retriever.get_statistics(source="redbook")
+            total_sections = stats["total_sections"]
+            total_chapters = stats["total_chapters"]
             
             explanation = f"""# The Redbook Knowledge Base
 
@@ -1426,9 +1593,17 @@ The Redbook provides comprehensive coverage of Linux command-line tools and best
             except Exception as e:
                 logger.error(f"Error stopping IPC server: {e}")
 
+        # Drop pending next-command precomputations
+        if self.next_command_predictor is not None:
+            self.next_command_predictor.shutdown()
+
         # Update models from session data
         self._update_models()
 
+        # Close the knowledge base connection
+        if self.knowledge_retriever is not None:
+            self.knowledge_retriever.close()
+
         # End session
         if self.db:
             try:
@@ -1455,8 +1630,17 @@ The Redbook provides comprehensive coverage of Linux command-line tools and best
 
         logger.info("Daemon stopped")
 
-    def _update_models(self) -> None:
-        """Update embedding model and vector index from session data."""
+    def _update_models(self, background: bool = False) -> None:
+        """
+        Update embedding model and vector index from session data.
+
+        The embedder is retrained in a child process (see ModelTrainer); the new
+        model and an index built with it replace the serving pair together, and
+        only after the candidate passes its quality checks.
+
+        Args:
+            background: Retrain on the trainer thread and return immediately
+        """
         logger.info("Updating models from session data...")
 
         try:
@@ -1470,15 +1654,6 @@ The Redbook provides comprehensive coverage of Linux command-line tools and best
             # Extract command strings
             command_strings = [cmd["command"] for cmd in commands]
 
-            # Retrain/update embedder if needed
-            if not self.embedder.model or len(commands) > 100:
-                logger.info(f"Training embedder on {len(command_strings)} commands...")
-                self.embedder.train_from_corpus(command_strings)
-
-            # Rebuild vector store
-            logger.info("Rebuilding vector index...")
-            embeddings = [self.embedder.encode_command(cmd) for cmd in command_strings]
-
             metadata_list = [
                 {
                     "timestamp": cmd["timestamp"],
@@ -1488,6 +1663,37 @@ The Redbook provides comprehensive coverage of Linux command-line tools and best
                 for cmd in commands
             ]
 
+            # Retrain/update embedder if needed
+            if self.model_trainer is not None and (not self.embedder.model or len(commands) > 100):
+                logger.info(f"Training embedder on {len(command_strings)} commands...")
+
+                def install(candidate: CommandEmbedder) -> None:
+                    self._install_models(candidate, command_strings, metadata_list)
+
+                if background:
+                    self.model_trainer.start(self.embedder, command_strings, on_complete=install)
+                    return
+
+                # Let a background retrain finish before starting the final one
+                self.model_trainer.wait()
+                if self.model_trainer.run(self.embedder, command_strings, on_complete=install):
+                    logger.info("Models updated successfully")
+                    return
+
+                # Rejected (or failed) candidate: keep the index current with the serving model
+                if not self.embedder.model:
+                    logger.warning("Retraining failed and no model is loaded; index not rebuilt")
+                    return
+                logger.info("Retrained model not installed, keeping the current model")
+
+            # Rebuild vector store with the current model
+            logger.info("Rebuilding vector index...")
+            if self.embedding_cache is not None:
+                embeddings = self.embedding_cache.encode(command_strings)
+                self.embedding_cache.flush()
+            else:
+                embeddings = self.embedder.encode_batch(command_strings)
+
             self.vector_store.rebuild(embeddings, command_strings, metadata_list)
             self.vector_store.save()
 
@@ -1496,6 +1702,80 @@ The Redbook provides comprehensive coverage of Linux command-line tools and best
         except Exception as e:
             logger.error(f"Error updating models: {e}", exc_info=True)
 
+    def _install_models(
+        self,
+        candidate: CommandEmbedder,
+        command_strings: list[str],
+        metadata_list: list[dict[str, Any]],
+    ) -> None:
+        """
+        Build an index with a retrained embedder and swap both into service.
+
+        Runs on the trainer thread; requests keep using the previous pair until
+        the swap. Commands logged during the rebuild reach the new index with
+        the next rebuild.
+
+        Args:
+            candidate: Retrained embedder
+            command_strings: Commands to index
+            metadata_list: Metadata for each command
+
+        Raises:
+            ModelQualityError: If the new index can't find indexed commands
+        """
+        current = self.vector_store
+        vector_store = VectorStore(
+            index_path=current.index_path,
+            dim=candidate.embedding_dim,
+            n_trees=current.n_trees,
+            metric=current.metric,
+            compaction_threshold=current.compaction_threshold,
+            background_compaction=current.background_compaction,
+            backend=current.backend_type,
+            quantization=current.quantization,
+            exact_max_vectors=current.exact_max_vectors,
+            latency_budget_ms=current.latency_budget_ms,
+            deduplicate=current.deduplicate,
+        )
+        embeddings = candidate.encode_batch(command_strings)
+        vector_store.rebuild(embeddings, command_strings, metadata_list)
+
+        # Each probe's own embedding must come back as its nearest neighbor
+        first_rows: dict[str, int] = {}
+        for row, command in enumerate(command_strings):
+            first_rows.setdefault(command, row)
+        probes = list(first_rows)[:50]
+        probe_vectors = embeddings[[first_rows[probe] for probe in probes]]
+        found = 0
+        for probe, vector in zip(probes, probe_vectors, strict=True):
+            results = vector_store.search(vector, top_k=1, include_distances=True)
+            if results and (results[0]["command"] == probe or results[0]["distance"] < 1e-4):
+                found += 1
+        if found < 0.9 * len(probes):
+            raise ModelQualityError(
+                f"Rebuilt index found {found}/{len(probes)} probe commands"
+            )
+
+        # Files are replaced atomically, so the serving index stays readable
+        vector_store.save()
+
+        with self._models_lock:
+            self.embedder = candidate
+            self.vector_store = vector_store
+            if self.suggestion_engine is not None:
+                self.suggestion_engine.set_models(candidate, vector_store)
+            if self.embedding_cache is not None:
+                # Drops the old version's vectors and keeps the ones just encoded
+                self.embedding_cache.switch_model(candidate, command_strings, embeddings)
+            if self.session_states is not None:
+                self.session_states.embedder = candidate
+                self.session_states.invalidate_vectors()
+
+        if self.embedding_cache is not None:
+            self.embedding_cache.flush()
+
+        logger.info(f"Installed retrained model ({len(vector_store)} commands indexed)")
+
 
 # Entry point for daemon script
 def main() -> int:
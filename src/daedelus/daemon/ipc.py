@@ -384,7 +384,8 @@ class IPCClient:
         self,
         partial: str,
         cwd: str,
-        history: list[str],
+        history: list[str] | None = None,
+        session_id: str | None = None,
     ) -> list[dict[str, Any]]:
         """
         Request command suggestions.
@@ -392,19 +393,20 @@ class IPCClient:
         Args:
             partial: Partially typed command
             cwd: Current working directory
-            history: Recent command history
+            history: Recent command history (omit when sending session_id;
+                the daemon keeps each session's history itself)
+            session_id: Session identifier
 
         Returns:
             List of suggestions
         """
-        msg = IPCMessage(
-            MessageType.SUGGEST,
-            {
-                "partial": partial,
-                "cwd": cwd,
-                "history": history,
-            },
-        )
+        data: dict[str, Any] = {"partial": partial, "cwd": cwd}
+        if history is not None:
+            data["history"] = history
+        if session_id is not None:
+            data["session_id"] = session_id
+
+        msg = IPCMessage(MessageType.SUGGEST, data)
 
         response = self.send_message(msg)
         if response.type == MessageType.ERROR:
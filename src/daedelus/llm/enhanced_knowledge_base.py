@@ -4,19 +4,90 @@ Enhanced Knowledge Base with Deep Learning and User Correction.
 Provides comprehensive Redbook parsing, recursive learning from user corrections,
 and intelligent pruning for continuous improvement.
 
+Deep search is driven by posting lists (keyword, command, title and content
+terms -> section positions), so a query only touches the sections that
+contain its terms; the content phrase check runs on those candidates
+against a cached lowercase copy of each section.
+
 Created by: orpheus497
 """
 
+import bisect
+import heapq
 import logging
 import json
 import re
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Runs matched by the title and content substring vocabularies
+_LETTER_RUN = re.compile(r'[a-z]+')
+_WORD_RUN = re.compile(r'\w+')
+_QUERY_COMMAND = re.compile(r'\b([a-z-]+)\b')
+
+
+class _SubstringVocabulary:
+    """
+    Distinct terms with posting lists, searchable by substring.
+    
+    Terms are joined into one newline-separated string, so finding every
+    term that contains a fragment is a C-level str.find scan over the
+    vocabulary instead of a check per section. Lookups are memoized.
+    """
+    
+    CACHE_SIZE = 1024
+    
+    def __init__(self, postings: Dict[str, List[int]]):
+        """
+        Initialize vocabulary.
+        
+        Args:
+            postings: Term -> section positions containing it
+        """
+        self.terms = sorted(postings)
+        self.postings = [postings[term] for term in self.terms]
+        self.blob = '\n'.join(self.terms)
+        
+        self.starts = []
+        offset = 0
+        for term in self.terms:
+            self.starts.append(offset)
+            offset += len(term) + 1
+        
+        self._cache: Dict[str, Set[int]] = {}
+    
+    def positions(self, fragment: str) -> Set[int]:
+        """
+        Get positions of sections having a term that contains fragment.
+        
+        Args:
+            fragment: Substring to look for (must not contain newlines)
+            
+        Returns:
+            Set of section positions (shared; do not modify)
+        """
+        cached = self._cache.get(fragment)
+        if cached is not None:
+            return cached
+        
+        positions: Set[int] = set()
+        index = self.blob.find(fragment)
+        while index != -1:
+            term_id = bisect.bisect_right(self.starts, index) - 1
+            positions.update(self.postings[term_id])
+            # Continue after this term; each term counts once
+            next_start = self.starts[term_id] + len(self.terms[term_id]) + 1
+            index = self.blob.find(fragment, next_start)
+        
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[fragment] = positions
+        return positions
+
 
 @dataclass
 class UserCorrection:
@@ -74,6 +145,13 @@ class EnhancedKnowledgeBase:
         self.keyword_index: Dict[str, List[str]] = {}  # keyword -> section numbers
         self.command_index: Dict[str, List[str]] = {}  # command -> section numbers
         
+        # Search postings by section position (section numbers can repeat)
+        self._keyword_postings: Dict[str, List[int]] = {}
+        self._command_postings: Dict[str, List[int]] = {}
+        self._title_terms = _SubstringVocabulary({})
+        self._content_terms = _SubstringVocabulary({})
+        self._content_lower: List[str] = []
+        
         # Learning statistics
         self.stats = {
             'total_queries': 0,
@@ -289,6 +367,41 @@ class EnhancedKnowledgeBase:
                 if cmd not in self.command_index:
                     self.command_index[cmd] = []
                 self.command_index[cmd].append(section.number)
+        
+        self._build_search_postings()
+    
+    def _build_search_postings(self) -> None:
+        """Build the posting lists and lowercase content cache used by search_deep."""
+        self._keyword_postings = {}
+        self._command_postings = {}
+        self._content_lower = []
+        title_postings: Dict[str, List[int]] = {}
+        content_postings: Dict[str, List[int]] = {}
+        
+        for position, section in enumerate(self.sections):
+            for keyword in section.keywords or []:
+                self._keyword_postings.setdefault(keyword, []).append(position)
+            for cmd in section.commands or []:
+                self._command_postings.setdefault(cmd, []).append(position)
+            
+            for term in set(_LETTER_RUN.findall(section.title.lower())):
+                title_postings.setdefault(term, []).append(position)
+            
+            content_lower = section.content.lower() if section.content else ''
+            self._content_lower.append(content_lower)
+            for term in set(_WORD_RUN.findall(content_lower)):
+                content_postings.setdefault(term, []).append(position)
+        
+        self._title_terms = _SubstringVocabulary(title_postings)
+        self._content_terms = _SubstringVocabulary(content_postings)
+    
+    def _title_matches(self, words: Iterable[str]) -> Set[int]:
+        """Positions of sections whose lowercase title contains any of the words."""
+        # A [a-z]+ word can only occur inside a [a-z]+ run of the title
+        matches: Set[int] = set()
+        for word in words:
+            matches |= self._title_terms.positions(word)
+        return matches
 
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from text."""
@@ -339,44 +452,52 @@ class EnhancedKnowledgeBase:
         query_lower = query.lower()
         query_words = self._extract_keywords(query_lower)
         
-        results = []
+        scores: Dict[int, float] = {}
+        
+        # Title match (highest weight)
+        for position in self._title_matches(query_words):
+            scores[position] = 10.0
+        
+        # Keyword match
+        for word in query_words:
+            for position in self._keyword_postings.get(word, ()):
+                scores[position] = scores.get(position, 0.0) + 3.0
+        
+        # Command match
+        query_cmds = set(_QUERY_COMMAND.findall(query_lower))
+        for cmd in query_cmds:
+            for position in self._command_postings.get(cmd, ()):
+                scores[position] = scores.get(position, 0.0) + 5.0
+        
+        # Content match (lower weight). The query's longest word can only
+        # occur inside a word of the content, so only sections with such a
+        # word are checked for the whole phrase.
+        query_runs = _WORD_RUN.findall(query_lower)
+        if query_runs:
+            candidates: Iterable[int] = self._content_terms.positions(max(query_runs, key=len))
+        else:
+            candidates = range(len(self._content_lower))
+        for position in candidates:
+            content_lower = self._content_lower[position]
+            if content_lower and query_lower in content_lower:
+                scores[position] = scores.get(position, 0.0) + 1.0
+        
+        # Highest scores first, ties in document order
+        top = heapq.nsmallest(max_results, scores.items(), key=lambda item: (-item[1], item[0]))
         
-        for section in self.sections:
-            score = 0.0
-            
-            # Title match (highest weight)
-            if any(word in section.title.lower() for word in query_words):
-                score += 10.0
-            
-            # Keyword match
-            if section.keywords:
-                matching_keywords = set(query_words) & set(section.keywords)
-                score += len(matching_keywords) * 3.0
-            
-            # Command match
-            query_cmds = re.findall(r'\b([a-z-]+)\b', query_lower)
-            if section.commands:
-                matching_cmds = set(query_cmds) & set(section.commands)
-                score += len(matching_cmds) * 5.0
-            
-            # Content match (lower weight)
-            if section.content and query_lower in section.content.lower():
-                score += 1.0
-            
-            if score > 0:
-                results.append({
-                    'section': section,
-                    'score': score,
-                    'number': section.number,
-                    'title': section.title,
-                    'type': section.type,
-                    'excerpt': self._get_excerpt(section, query_words)
-                })
-        
-        # Sort by score
-        results.sort(key=lambda x: x['score'], reverse=True)
-        
-        return results[:max_results]
+        results = []
+        for position, score in top:
+            section = self.sections[position]
+            results.append({
+                'section': section,
+                'score': score,
+                'number': section.number,
+                'title': section.title,
+                'type': section.type,
+                'excerpt': self._get_excerpt(section, query_words)
+            })
+        
+        return results
 
     def _get_excerpt(self, section: RedBookSection, keywords: List[str]) -> str:
         """Get relevant excerpt from section."""
@@ -468,19 +589,23 @@ class EnhancedKnowledgeBase:
         query_words = self._extract_keywords(correction.user_correction)
         
         # Find sections matching correction
-        for section in self.sections:
-            if any(word in section.title.lower() for word in query_words):
-                # Add correction keywords to section
-                if section.keywords:
-                    section.keywords.extend(query_words)
-                    section.keywords = list(set(section.keywords))
-                
-                # Rebuild keyword index for this section
+        for position in sorted(self._title_matches(query_words)):
+            section = self.sections[position]
+            
+            # Add correction keywords to section (and its search postings)
+            if section.keywords:
                 for keyword in query_words:
-                    if keyword not in self.keyword_index:
-                        self.keyword_index[keyword] = []
-                    if section.number not in self.keyword_index[keyword]:
-                        self.keyword_index[keyword].append(section.number)
+                    if keyword not in section.keywords:
+                        self._keyword_postings.setdefault(keyword, []).append(position)
+                section.keywords.extend(query_words)
+                section.keywords = list(set(section.keywords))
+            
+            # Rebuild keyword index for this section
+            for keyword in query_words:
+                if keyword not in self.keyword_index:
+                    self.keyword_index[keyword] = []
+                if section.number not in self.keyword_index[keyword]:
+                    self.keyword_index[keyword].append(section.number)
         
         correction.applied = True
         self.stats['corrections_applied'] += 1
@@ -6,14 +6,20 @@ Provides:
 - Query type detection (factual, procedural, conceptual)
 - Adaptive weight tuning based on query type
 - Multi-source result combination and re-ranking
+- Concurrent retrieval under a shared deadline, with per-retriever latency
+  and contribution tracking that disables retrievers which rarely reach
+  the top results for a query type
 
 Created by: orpheus497
 """
 
 import logging
 import re
+import threading
+import time
 from collections import Counter, defaultdict
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -489,3 +495,259 @@ class HybridSearch:
             f"Weights updated: keyword={self.keyword_weight:.2f}, "
             f"semantic={self.semantic_weight:.2f}, graph={self.graph_weight:.2f}"
         )
+
+
+
+class RetrievalOrchestrator:
+    """
+    Runs keyword, semantic and graph retrieval concurrently and fuses them.
+    
+    All retrievers share one deadline; whatever has arrived by then is
+    fused with HybridSearch.reciprocal_rank_fusion using the adaptive
+    weights for the query, and late or failing retrievers are skipped.
+    Each retriever runs at most one call at a time: while a late call is
+    still running, later queries skip that retriever (counted as a
+    timeout) instead of queueing work behind it.
+    
+    For each query type, latency (measured when a call finishes, even
+    after the deadline) and contribution (share of the final top-k a
+    retriever returned) are tracked as moving averages. A
+    retriever whose contribution stays below min_contribution is disabled
+    for that query type, and still runs every probe_interval queries so it
+    can be enabled again.
+    
+    Attributes:
+        hybrid: HybridSearch used for weights and fusion
+        retrievers: Retrieval function by name (keyword, semantic, graph)
+        deadline: Seconds to wait for retrievers per query
+        stats: Per query type, per retriever statistics
+    """
+    
+    RETRIEVERS = ("keyword", "semantic", "graph")
+    
+    def __init__(
+        self,
+        hybrid: HybridSearch,
+        retrievers: Dict[str, Callable[[str], List[Dict[str, Any]]]],
+        deadline: float = 0.2,
+        min_queries: int = 20,
+        min_contribution: float = 0.05,
+        probe_interval: int = 50,
+        smoothing: float = 0.1,
+    ) -> None:
+        """
+        Initialize retrieval orchestrator.
+        
+        Args:
+            hybrid: HybridSearch used for weights and fusion
+            retrievers: Function returning ranked results for a query, by name
+            deadline: Seconds to wait for retrievers per query
+            min_queries: Queries of a type before a retriever can be disabled
+            min_contribution: Average contribution below which it is disabled
+            probe_interval: Queries between runs of a disabled retriever
+            smoothing: Weight of the newest query in the moving averages
+        
+        Raises:
+            ValueError: If a retriever name is not one of RETRIEVERS
+        """
+        unknown = set(retrievers) - set(self.RETRIEVERS)
+        if unknown:
+            raise ValueError(f"Unknown retrievers: {sorted(unknown)}")
+        
+        self.hybrid = hybrid
+        # Fixed order keeps fusion independent of arrival order
+        self.retrievers = {name: retrievers[name] for name in self.RETRIEVERS if name in retrievers}
+        self.deadline = deadline
+        self.min_queries = min_queries
+        self.min_contribution = min_contribution
+        self.probe_interval = probe_interval
+        self.smoothing = smoothing
+        
+        # One worker per retriever, which runs one call at a time
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(len(self.retrievers), 1),
+            thread_name_prefix="retrieval",
+        )
+        self._running: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._queries: Dict[str, int] = defaultdict(int)
+        self.stats: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+    
+    def _retriever_stats(self, query_type: str, name: str) -> Dict[str, float]:
+        """Statistics of a retriever for a query type (created on first use)."""
+        stats = self.stats[query_type].get(name)
+        if stats is None:
+            stats = {
+                "queries": 0,
+                "calls": 0,
+                "latency_ms": 0.0,
+                "contribution": 0.0,
+                "timeouts": 0,
+                "errors": 0,
+            }
+            self.stats[query_type][name] = stats
+        return stats
+    
+    def is_enabled(self, query_type: str, name: str) -> bool:
+        """
+        Whether a retriever is enabled for a query type.
+        
+        Args:
+            query_type: Query type from HybridSearch.detect_query_type
+            name: Retriever name
+        
+        Returns:
+            False once the retriever's contribution has stayed low
+        """
+        with self._lock:
+            stats = self.stats[query_type].get(name)
+            return (
+                stats is None
+                or stats["queries"] < self.min_queries
+                or stats["contribution"] >= self.min_contribution
+            )
+    
+    def _select(self, query_type: str, weights: Dict[str, float]) -> List[str]:
+        """Retrievers to run for this query (disabled ones only on probe queries)."""
+        with self._lock:
+            self._queries[query_type] += 1
+            probe = self._queries[query_type] % self.probe_interval == 0
+        
+        candidates = [name for name in self.retrievers if weights[name] > 0]
+        selected = [name for name in candidates if probe or self.is_enabled(query_type, name)]
+        if not selected and candidates:
+            # Never disable everything: keep the best contributor
+            with self._lock:
+                selected = [
+                    max(
+                        candidates,
+                        key=lambda name: self._retriever_stats(query_type, name)["contribution"],
+                    )
+                ]
+        return selected
+    
+    def _timed(self, query_type: str, name: str, query: str) -> List[Dict[str, Any]]:
+        """Run a retriever and record its latency when it finishes."""
+        start = time.perf_counter()
+        try:
+            return self.retrievers[name](query)
+        finally:
+            latency = (time.perf_counter() - start) * 1000
+            with self._lock:
+                stats = self._retriever_stats(query_type, name)
+                # The first call seeds the average
+                alpha = 1.0 if stats["calls"] == 0 else self.smoothing
+                stats["calls"] += 1
+                stats["latency_ms"] += alpha * (latency - stats["latency_ms"])
+    
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        deadline: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve concurrently and fuse the results that arrive in time.
+        
+        Args:
+            query: Search query string
+            top_k: Number of top results to return
+            deadline: Seconds to wait (default: self.deadline)
+        
+        Returns:
+            Merged and re-ranked results
+        """
+        deadline = self.deadline if deadline is None else deadline
+        query_type = self.hybrid.detect_query_type(query)
+        weights = dict(zip(self.RETRIEVERS, self.hybrid.get_adaptive_weights(query), strict=True))
+        
+        selected = self._select(query_type, weights)
+        futures = {}
+        with self._lock:
+            for name in selected:
+                previous = self._running.get(name)
+                if previous is not None and not previous.done():
+                    # Still busy with an earlier query: skip rather than queue
+                    continue
+                futures[name] = self._executor.submit(self._timed, query_type, name, query)
+                self._running[name] = futures[name]
+        wait(futures.values(), timeout=deadline)
+        
+        arrived: Dict[str, List[Dict[str, Any]]] = {}
+        failed = set()
+        for name, future in futures.items():
+            if not future.done():
+                # Still running; its result is discarded when it finishes
+                continue
+            try:
+                arrived[name] = future.result()
+            except Exception as e:
+                logger.warning(f"{name} retrieval failed for '{query}': {e}")
+                failed.add(name)
+        
+        merged = self.hybrid.reciprocal_rank_fusion(
+            list(arrived.values()),
+            [weights[name] for name in arrived],
+        )[:top_k]
+        
+        self._record(query_type, selected, arrived, failed, merged)
+        return merged
+    
+    def _record(
+        self,
+        query_type: str,
+        selected: List[str],
+        arrived: Dict[str, List[Dict[str, Any]]],
+        failed: set,
+        merged: List[Dict[str, Any]],
+    ) -> None:
+        """Update contribution averages and counts of the retrievers selected."""
+        top_ids = [result.get("id", str(result)) for result in merged]
+        
+        with self._lock:
+            for name in selected:
+                stats = self._retriever_stats(query_type, name)
+                returned = {result.get("id", str(result)) for result in arrived.get(name, [])}
+                contribution = (
+                    sum(1 for result_id in top_ids if result_id in returned) / len(top_ids)
+                    if top_ids else 0.0
+                )
+                
+                # The first query seeds the averages
+                alpha = 1.0 if stats["queries"] == 0 else self.smoothing
+                stats["queries"] += 1
+                stats["contribution"] += alpha * (contribution - stats["contribution"])
+                if name in failed:
+                    stats["errors"] += 1
+                elif name not in arrived:
+                    stats["timeouts"] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get retriever statistics.
+        
+        Returns:
+            Per query type: query count and, per retriever, its statistics
+            and whether it is enabled
+        """
+        with self._lock:
+            snapshot = {
+                query_type: {name: dict(stats) for name, stats in by_name.items()}
+                for query_type, by_name in self.stats.items()
+            }
+            queries = dict(self._queries)
+        
+        return {
+            query_type: {
+                "queries": queries.get(query_type, 0),
+                "retrievers": {
+                    name: {**stats, "enabled": self.is_enabled(query_type, name)}
+                    for name, stats in by_name.items()
+                },
+            }
+            for query_type, by_name in snapshot.items()
+        }
+    
+    def close(self) -> None:
+        """Shut down the worker threads (without waiting for late retrievers)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
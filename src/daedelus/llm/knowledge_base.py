@@ -4,9 +4,15 @@ Knowledge Base Integration for Daedelus.
 Integrates external knowledge sources (like The Redbook) into Daedelus's
 AI intelligence, making them available for embeddings and LLM context.
 
+Loaded documents get a positional index (word -> offsets, line ends,
+chapter previews, lowercase titles), so query context windows are cut
+from known offsets instead of regex scans over the whole document.
+
 Created by: orpheus497
 """
 
+import bisect
+import hashlib
 import logging
 import re
 from pathlib import Path
@@ -16,6 +22,141 @@ import numpy.typing as npt
 
 logger = logging.getLogger(__name__)
 
+_WORD_PATTERN = re.compile(r'\w+')
+
+# Characters of context kept on each side of a word match
+CONTEXT_WINDOW = 100
+# Context windows taken per query word
+MATCHES_PER_WORD = 3
+
+
+class _ContextIndex:
+    """
+    Positional index of a parsed document for get_relevant_context.
+    
+    Attributes:
+        doc: Parsed document the index was built from
+        lines: Document lines
+        line_ends: Offset of each newline, plus the document length
+        word_positions: Lowercase word -> sorted start offsets of the word
+        chapter_previews: Chapter number -> preview line (None if no content)
+        chapter_titles: Lowercase title per chapter
+        section_titles: Lowercase title per section
+    """
+    
+    def __init__(self, doc: Dict):
+        """
+        Build index for a parsed document.
+        
+        Args:
+            doc: Document from _parse_redbook
+        """
+        self.doc = doc
+        content = doc['content']
+        self.lines = content.split('\n')
+        
+        self.line_ends: List[int] = []
+        offset = -1
+        for line in self.lines[:-1]:
+            offset += len(line) + 1
+            self.line_ends.append(offset)
+        self.line_ends.append(len(content))
+        
+        self.word_positions: Dict[str, List[int]] = {}
+        for match in _WORD_PATTERN.finditer(content):
+            word = match.group().lower()
+            positions = self.word_positions.get(word)
+            if positions is None:
+                self.word_positions[word] = [match.start()]
+            else:
+                positions.append(match.start())
+        
+        self.chapter_previews: Dict[int, Optional[str]] = {}
+        for chapter in doc['chapters']:
+            if chapter['number'] not in self.chapter_previews:
+                self.chapter_previews[chapter['number']] = self._preview(chapter['number'])
+        
+        self.chapter_titles = [chapter['title'].lower() for chapter in doc['chapters']]
+        self.section_titles = [section['title'].lower() for section in doc['sections']]
+    
+    def chapter_content(self, chapter_num: int) -> Optional[str]:
+        """Content from a chapter's header to the next higher-numbered chapter."""
+        chapters = self.doc['chapters']
+        
+        # Find chapter
+        chapter = next((ch for ch in chapters if ch['number'] == chapter_num), None)
+        if not chapter:
+            return None
+        
+        # Find next chapter or end
+        start_line = chapter['line']
+        end_line = len(self.lines)
+        
+        for ch in chapters:
+            if ch['number'] > chapter_num:
+                end_line = ch['line']
+                break
+        
+        return '\n'.join(self.lines[start_line:end_line])
+    
+    def _preview(self, chapter_num: int) -> Optional[str]:
+        """First content line of a chapter (None if the chapter has no content)."""
+        content = self.chapter_content(chapter_num)
+        if not content:
+            return None
+        
+        # Extract first meaningful paragraph
+        for line in content.split('\n')[1:]:  # Skip header
+            if line.strip() and not line.strip().startswith('#'):
+                return line.strip()[:200]
+        return ""
+    
+    def context_windows(self, word: str, limit: int = MATCHES_PER_WORD) -> List[str]:
+        """
+        Text around the first occurrences of a whole word.
+        
+        Equivalent to the first `limit` re.findall matches of
+        .{0,100}\\bword\\b.{0,100} (case-insensitive): a window starts up
+        to 100 characters before an occurrence, extends to the last
+        occurrence within reach on the same line, and ends up to 100
+        characters after it; windows do not overlap.
+        
+        Args:
+            word: Lowercase word
+            limit: Maximum windows
+            
+        Returns:
+            Context windows in document order
+        """
+        positions = self.word_positions.get(word)
+        if not positions:
+            return []
+        
+        content = self.doc['content']
+        windows = []
+        search_from = 0
+        i = 0
+        while len(windows) < limit:
+            i = bisect.bisect_left(positions, search_from, i)
+            if i == len(positions):
+                break
+            
+            position = positions[i]
+            line = bisect.bisect_left(self.line_ends, position)
+            line_start = self.line_ends[line - 1] + 1 if line else 0
+            line_end = self.line_ends[line]
+            
+            start = max(search_from, line_start, position - CONTEXT_WINDOW)
+            # Greedy prefix: last occurrence within reach on this line
+            last = bisect.bisect_right(positions, min(start + CONTEXT_WINDOW, line_end - 1), i) - 1
+            end = min(positions[last] + len(word) + CONTEXT_WINDOW, line_end)
+            
+            windows.append(content[start:end])
+            search_from = end
+            i = last + 1
+        
+        return windows
+
 
 class KnowledgeBase:
     """
@@ -42,6 +183,7 @@ class KnowledgeBase:
         
         self.documents: Dict[str, Dict] = {}
         self.chunks: List[Dict] = []
+        self._context_index: Optional[_ContextIndex] = None
         
         # Semantic search support (Phase 5)
         self.embedder = embedder
@@ -70,6 +212,7 @@ class KnowledgeBase:
             doc_info = self._parse_redbook(content)
             
             self.documents['redbook'] = doc_info
+            self._context_index = _ContextIndex(doc_info)
             
             logger.info(f"Redbook loaded: {len(doc_info['chapters'])} chapters, {len(doc_info['sections'])} sections")
             return True
@@ -147,6 +290,8 @@ class KnowledgeBase:
         if 'redbook' not in self.documents:
             return []
         
+        index = self._get_context_index()
+        
         query_lower = query.lower()
         query_words = [w for w in re.findall(r'\w+', query_lower) if len(w) > 2]
         
@@ -154,71 +299,47 @@ class KnowledgeBase:
         scored_results = []
         
         # Search chapter titles with scoring
-        for chapter in self.documents['redbook']['chapters']:
-            title_lower = chapter['title'].lower()
+        for chapter, title_lower in zip(self.documents['redbook']['chapters'], index.chapter_titles, strict=True):
             score = 0
             
             # Exact phrase match (highest priority)
             if query_lower in title_lower:
                 score += 100
             
-            # Multi-word matches
+            # Multi-word matches, plus partial word matches (a word without
+            # whitespace is in the title exactly when it is in a title word)
             matching_words = sum(1 for word in query_words if word in title_lower)
-            score += matching_words * 10
-            
-            # Partial word matches
-            for word in query_words:
-                if any(word in title_word for title_word in title_lower.split()):
-                    score += 3
+            score += matching_words * (10 + 3)
             
             if score > 0:
-                content_preview = self.get_chapter_content(chapter['number'])
-                if content_preview:
-                    # Extract first meaningful paragraph
-                    lines = content_preview.split('\n')
-                    preview_text = ""
-                    for line in lines[1:]:  # Skip header
-                        if line.strip() and not line.strip().startswith('#'):
-                            preview_text = line.strip()[:200]
-                            break
-                    
+                preview_text = index.chapter_previews[chapter['number']]
+                if preview_text is not None:
                     result = f"**Chapter {chapter['number']}: {chapter['title']}**\n{preview_text}..."
                     scored_results.append((score, result, 'chapter'))
         
         # Search section titles with scoring
-        for section in self.documents['redbook']['sections']:
-            title_lower = section['title'].lower()
+        for section, title_lower in zip(self.documents['redbook']['sections'], index.section_titles, strict=True):
             score = 0
             
             # Exact phrase match
             if query_lower in title_lower:
                 score += 50
             
-            # Multi-word matches
+            # Multi-word and partial word matches
             matching_words = sum(1 for word in query_words if word in title_lower)
-            score += matching_words * 5
-            
-            # Partial word matches
-            for word in query_words:
-                if any(word in title_word for title_word in title_lower.split()):
-                    score += 2
+            score += matching_words * (5 + 2)
             
             if score > 0:
                 result = f"  → {section['title']} (Chapter {section['chapter']})"
                 scored_results.append((score, result, 'section'))
         
-        # Search content for keyword matches
-        content = self.documents['redbook']['content']
-        content_lower = content.lower()
-        
-        # Find contextual matches in content
+        # Contextual matches in content, cut from indexed word offsets
         for word in query_words:
-            pattern = re.compile(r'.{0,100}\b' + re.escape(word) + r'\b.{0,100}', re.IGNORECASE)
-            matches = pattern.findall(content)[:3]  # Limit to 3 per word
-            for match in matches:
+            for match in index.context_windows(word):
                 score = 2
                 # Boost if multiple query words appear
-                score += sum(1 for w in query_words if w in match.lower())
+                match_lower = match.lower()
+                score += sum(1 for w in query_words if w in match_lower)
                 
                 result = f"  • ...{match.strip()}..."
                 scored_results.append((score, result, 'content'))
@@ -243,29 +364,14 @@ class KnowledgeBase:
         if 'redbook' not in self.documents:
             return None
         
+        return self._get_context_index().chapter_content(chapter_num)
+    
+    def _get_context_index(self) -> _ContextIndex:
+        """Positional index of the Redbook (rebuilt if the document was replaced)."""
         doc = self.documents['redbook']
-        content_lines = doc['content'].split('\n')
-        
-        # Find chapter
-        chapter = None
-        for ch in doc['chapters']:
-            if ch['number'] == chapter_num:
-                chapter = ch
-                break
-        
-        if not chapter:
-            return None
-        
-        # Find next chapter or end
-        start_line = chapter['line']
-        end_line = len(content_lines)
-        
-        for ch in doc['chapters']:
-            if ch['number'] > chapter_num:
-                end_line = ch['line']
-                break
-        
-        return '\n'.join(content_lines[start_line:end_line])
+        if self._context_index is None or self._context_index.doc is not doc:
+            self._context_index = _ContextIndex(doc)
+        return self._context_index
 
     def search_command(self, command: str) -> List[Dict]:
         """
@@ -378,7 +484,7 @@ class KnowledgeBase:
         
         # Generate query embedding
         query_text = self.embedder._preprocess_for_embedding(query)
-        query_embedding = self.embedder.embedder.embed(query_text)
+        query_embedding = self.embedder.embedder.encode_command(query_text)
         
         # Find similar chunks
         similar_chunks = self.embedder.find_similar_chunks(
@@ -478,6 +584,8 @@ class KnowledgeBase:
         Initialize semantic search capabilities.
         
         Creates embeddings for all knowledge base content if not already present.
+        Saved embeddings are reused when the document is unchanged; after an
+        edit only the chunks whose text changed are embedded again.
         
         Returns:
             True if initialization successful
@@ -491,22 +599,30 @@ class KnowledgeBase:
             return False
         
         embeddings_path = self.knowledge_dir / 'embeddings' / 'redbook_embeddings'
+        content = self.documents['redbook']['content']
+        content_hash = hashlib.md5(content.encode()).hexdigest()
         
         # Try to load existing embeddings
         if embeddings_path.with_suffix('.json').exists():
             logger.info("Loading existing embeddings...")
-            if self.embedder.load_embeddings(embeddings_path):
+            if (
+                self.embedder.load_embeddings(embeddings_path)
+                and self.embedder.source_hash == content_hash
+            ):
                 return True
         
-        # Generate new embeddings
+        # Generate embeddings (chunks with unchanged text reuse loaded ones)
         logger.info("Generating knowledge base embeddings...")
         
-        content = self.documents['redbook']['content']
         chunks = self.embedder.chunk_document(content, 'redbook')
         self.embedder.chunks = chunks
         
         embeddings = self.embedder.generate_embeddings(chunks)
         
+        # Drop embeddings of chunks that no longer exist
+        self.embedder.embeddings_cache = embeddings
+        self.embedder.source_hash = content_hash
+        
         # Save for future use
         self.embedder.save_embeddings(embeddings_path)
         
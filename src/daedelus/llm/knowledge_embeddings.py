@@ -4,6 +4,18 @@ Knowledge Base Semantic Embeddings for Daedelus.
 Generates and manages vector embeddings for knowledge base content,
 enabling semantic search capabilities for improved context retrieval.
 
+Chunk embeddings are kept as one contiguous, L2-normalized (N, dim) matrix
+(float32, or float16 to halve memory), memory-mapped from disk when loaded,
+so a similarity search is a single matrix-vector product plus an
+argpartition top-k instead of a Python loop over chunks.
+
+Embeddings are generated in batches: new chunks are preprocessed in one
+regex pass over all texts and encoded with CommandEmbedder.encode_batch,
+optionally across worker processes for large document sets. Saved
+embeddings are keyed by chunk id (a hash of the chunk text) and tagged with
+the model version, so re-indexing an edited document only embeds the
+chunks that changed.
+
 Phase 5 - Intelligence System Enhancement
 Created by: orpheus497
 """
@@ -11,7 +23,10 @@ Created by: orpheus497
 import hashlib
 import json
 import logging
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -19,9 +34,37 @@ import numpy as np
 import numpy.typing as npt
 
 from daedelus.core.embeddings import CommandEmbedder
+from daedelus.core.vector_backends import nearest_k
 
 logger = logging.getLogger(__name__)
 
+# Markdown cleanup applied before embedding
+_HEADER_PATTERN = re.compile(r'^#{1,6}\s+', re.MULTILINE)
+_BOLD_PATTERN = re.compile(r'\*\*(.+?)\*\*')
+_ITALIC_PATTERN = re.compile(r'\*(.+?)\*')
+_CODE_PATTERN = re.compile(r'`(.+?)`')
+_FENCE_PATTERN = re.compile(r'```[\w]*\n')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Joins texts for batch preprocessing. No pattern above matches NUL or can
+# span the newline after it, so each text is cleaned exactly as on its own.
+_BATCH_SEPARATOR = '\x00\n'
+
+# CommandEmbedder of a worker process (see _init_worker)
+_worker_embedder: Optional[CommandEmbedder] = None
+
+
+def _init_worker(model_path: str, embedding_dim: int) -> None:
+    """Load the embedding model once per worker process."""
+    global _worker_embedder
+    _worker_embedder = CommandEmbedder(Path(model_path), embedding_dim=embedding_dim)
+    _worker_embedder.load()
+
+
+def _encode_in_worker(texts: List[str]) -> npt.NDArray[np.float32]:
+    """Encode a batch of preprocessed texts in a worker process."""
+    return _worker_embedder.encode_batch(texts)
+
 
 class KnowledgeEmbedder:
     """
@@ -36,13 +79,21 @@ class KnowledgeEmbedder:
         overlap: Overlap between chunks (characters)
         chunks: List of chunked content with metadata
         embeddings_cache: Cache of chunk_id -> embedding mapping
+        matrix_dtype: Storage type of the search matrix ('float32' or 'float16')
     """
     
+    MATRIX_DTYPES = ("float32", "float16")
+    CHUNK_ROWS = 1024  # float16 rows converted per step while scoring
+    PARALLEL_MIN_CHUNKS = 2000  # Below this, worker startup costs more than it saves
+    
     def __init__(
         self,
         embedder: CommandEmbedder,
         chunk_size: int = 500,
         overlap: int = 100,
+        matrix_dtype: str = "float32",
+        batch_size: int = 256,
+        workers: int = 1,
     ):
         """
         Initialize knowledge embedder.
@@ -51,13 +102,36 @@ class KnowledgeEmbedder:
             embedder: CommandEmbedder instance to use
             chunk_size: Target characters per chunk
             overlap: Overlap between chunks for context preservation
+            matrix_dtype: Search matrix storage type; 'float16' halves memory
+                but NumPy scores half floats more slowly
+            batch_size: Chunks per encode_batch call
+            workers: Worker processes for large embedding runs (1 = in-process)
+        
+        Raises:
+            ValueError: If matrix_dtype is unknown
         """
+        if matrix_dtype not in self.MATRIX_DTYPES:
+            raise ValueError(
+                f"Unknown matrix dtype: {matrix_dtype} (expected one of {self.MATRIX_DTYPES})"
+            )
+        
         self.embedder = embedder
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.matrix_dtype = matrix_dtype
+        self.batch_size = batch_size
+        self.workers = workers
         
         self.chunks: List[Dict] = []
         self.embeddings_cache: Dict[str, npt.NDArray[np.float32]] = {}
+        # Hash of the document the saved chunks were made from (set by callers)
+        self.source_hash: Optional[str] = None
+        
+        # Normalized search matrix; row i holds the embedding of _matrix_chunks[i]
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_chunks: List[Dict] = []
+        # Identity of the chunk list/cache the matrix was built from
+        self._matrix_key: Optional[Tuple[int, int, int]] = None
         
         logger.info(f"KnowledgeEmbedder initialized (chunk_size={chunk_size}, overlap={overlap})")
     
@@ -279,6 +353,9 @@ class KnowledgeEmbedder:
         """
         Generate embeddings for all chunks.
         
+        Chunks whose id (text hash) already has an embedding are reused;
+        the rest are preprocessed together and encoded in batches.
+        
         Args:
             chunks: List of chunk dictionaries
             
@@ -286,56 +363,141 @@ class KnowledgeEmbedder:
             Dictionary mapping chunk_id to embedding vector
         """
         embeddings = {}
+        pending: Dict[str, Dict] = {}
         
         for chunk in chunks:
             chunk_id = chunk['id']
             
             # Skip if already cached
-            if chunk_id in self.embeddings_cache:
-                embeddings[chunk_id] = self.embeddings_cache[chunk_id]
-                continue
-            
-            # Generate embedding for chunk text
-            text = chunk['text']
-            
-            # Preprocess text for embedding
-            processed_text = self._preprocess_for_embedding(text)
-            
-            # Generate embedding using command embedder
-            embedding = self.embedder.embed(processed_text)
+            cached = self.embeddings_cache.get(chunk_id)
+            if cached is not None:
+                embeddings[chunk_id] = cached
+            else:
+                pending.setdefault(chunk_id, chunk)
+        
+        if pending:
+            texts = self._preprocess_batch([chunk['text'] for chunk in pending.values()])
+            vectors = self._encode(texts)
             
             # Cache and store
-            self.embeddings_cache[chunk_id] = embedding
-            embeddings[chunk_id] = embedding
+            for chunk_id, vector in zip(pending, vectors, strict=True):
+                self.embeddings_cache[chunk_id] = vector
+                embeddings[chunk_id] = vector
         
-        logger.info(f"Generated {len(embeddings)} embeddings ({len(self.embeddings_cache)} cached)")
+        self._build_matrix()
+        
+        logger.info(
+            f"Generated {len(pending)} embeddings, reused {len(embeddings) - len(pending)} "
+            f"({len(self.embeddings_cache)} cached)"
+        )
         return embeddings
     
-    def _preprocess_for_embedding(self, text: str) -> str:
+    def _encode(self, texts: List[str]) -> npt.NDArray[np.float32]:
+        """Encode preprocessed texts in batches, in worker processes if worthwhile."""
+        workers = min(self.workers, os.cpu_count() or 1)
+        if workers > 1 and len(texts) >= self.PARALLEL_MIN_CHUNKS and self._model_on_disk():
+            try:
+                return self._encode_parallel(texts, workers)
+            except Exception as e:
+                logger.warning(f"Parallel embedding failed, encoding in-process: {e}")
+        
+        batches = [
+            self.embedder.encode_batch(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate(batches)
+    
+    def _model_on_disk(self) -> bool:
+        """Whether workers can load the embedder's current model from its file."""
+        model_path = Path(self.embedder.model_path)
+        return (
+            model_path.exists()
+            and self.embedder.model_version == self.embedder._file_version()
+        )
+    
+    def _encode_parallel(self, texts: List[str], workers: int) -> npt.NDArray[np.float32]:
+        """Encode batches across worker processes that each load the model."""
+        batches = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        # Spawned, not forked: the daemon runs threads
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(str(self.embedder.model_path), self.embedder.embedding_dim),
+        ) as pool:
+            return np.concatenate(list(pool.map(_encode_in_worker, batches)))
+    
+    def _preprocess_batch(self, texts: List[str]) -> List[str]:
         """
-        Preprocess text for better embedding quality.
+        Preprocess many texts with one pass of each pattern.
         
-        Strategies:
-        - Remove markdown formatting
-        - Extract key terms
-        - Normalize whitespace
-        - Keep commands and technical terms
+        Produces the same output as _preprocess_for_embedding per text.
         """
+        if not texts:
+            return []
+        if any('\x00' in text for text in texts):
+            return [self._preprocess_for_embedding(text) for text in texts]
+        
+        joined = self._clean_markdown(_BATCH_SEPARATOR.join(texts))
+        return [text.strip() for text in joined.split('\x00')]
+    
+    @staticmethod
+    def _clean_markdown(text: str) -> str:
+        """Strip markdown formatting and normalize whitespace."""
         # Remove markdown headers
-        text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+        text = _HEADER_PATTERN.sub('', text)
         
         # Remove markdown formatting (**, *, `, etc.)
-        text = re.sub(r'\*\*(.+?)\*\*', r'\1', text)
-        text = re.sub(r'\*(.+?)\*', r'\1', text)
-        text = re.sub(r'`(.+?)`', r'\1', text)
+        text = _BOLD_PATTERN.sub(r'\1', text)
+        text = _ITALIC_PATTERN.sub(r'\1', text)
+        text = _CODE_PATTERN.sub(r'\1', text)
         
         # Remove code block markers but keep content
-        text = re.sub(r'```[\w]*\n', '', text)
+        text = _FENCE_PATTERN.sub('', text)
         
         # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
+        return _WHITESPACE_PATTERN.sub(' ', text)
+    
+    def _normalized(self, vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows (zero rows stay zero) in the matrix storage type."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        return np.ascontiguousarray(vectors, dtype=self.matrix_dtype)
+    
+    def _current_key(self) -> Tuple[int, int, int]:
+        """Identity of the current chunks and embeddings (detects replacement)."""
+        return (id(self.chunks), len(self.chunks), len(self.embeddings_cache))
+    
+    def _build_matrix(self) -> None:
+        """Stack the embeddings of self.chunks into the normalized search matrix."""
+        rows = [chunk for chunk in self.chunks if chunk['id'] in self.embeddings_cache]
+        if rows:
+            vectors = np.stack([
+                np.asarray(self.embeddings_cache[chunk['id']], dtype=np.float32).ravel()
+                for chunk in rows
+            ])
+            self._matrix = self._normalized(vectors)
+        else:
+            self._matrix = None
         
-        return text.strip()
+        self._matrix_chunks = rows
+        self._matrix_key = self._current_key()
+    
+    def _preprocess_for_embedding(self, text: str) -> str:
+        """
+        Preprocess text for better embedding quality.
+        
+        Strategies:
+        - Remove markdown formatting
+        - Extract key terms
+        - Normalize whitespace
+        - Keep commands and technical terms
+        """
+        return self._clean_markdown(text).strip()
     
     def save_embeddings(self, output_path: Path) -> None:
         """
@@ -352,22 +514,34 @@ class KnowledgeEmbedder:
             'chunks': self.chunks,
             'count': len(self.chunks),
             'chunk_size': self.chunk_size,
-            'overlap': self.overlap
+            'overlap': self.overlap,
+            'model_version': getattr(self.embedder, 'model_version', None),
+            'source_hash': self.source_hash,
         }
         
         with open(output_path.with_suffix('.json'), 'w') as f:
             json.dump(chunks_data, f, indent=2)
         
-        # Save embeddings as numpy array
+        # Save embeddings as numpy arrays: raw (one row per chunk) and the
+        # normalized search matrix that load_embeddings memory-maps
         if self.embeddings_cache:
             # Create ordered array
             chunk_ids = [chunk['id'] for chunk in self.chunks]
             embeddings_array = np.array([
                 self.embeddings_cache[chunk_id] 
                 for chunk_id in chunk_ids
-            ])
+            ], dtype=np.float32)
             
-            np.save(output_path.with_suffix('.npy'), embeddings_array)
+            # Written to a temporary and renamed, since the arrays being
+            # saved may be memory maps of the target files
+            for path, array in (
+                (output_path.with_suffix('.npy'), embeddings_array),
+                (output_path.with_suffix('.matrix.npy'), self._normalized(embeddings_array)),
+            ):
+                tmp_path = path.with_name(path.name + '.tmp')
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, array)
+                os.replace(tmp_path, path)
             
             logger.info(f"Saved {len(self.chunks)} chunks and embeddings to {output_path}")
     
@@ -390,9 +564,18 @@ class KnowledgeEmbedder:
                 self.chunks = data['chunks']
                 self.chunk_size = data.get('chunk_size', self.chunk_size)
                 self.overlap = data.get('overlap', self.overlap)
+                self.source_hash = data.get('source_hash')
             
-            # Load embeddings
-            embeddings_array = np.load(input_path.with_suffix('.npy'))
+            # Embeddings of another model are not comparable with new queries
+            model_version = getattr(self.embedder, 'model_version', None)
+            if data.get('model_version') != model_version:
+                logger.info("Embedding model changed, discarding saved knowledge embeddings")
+                self.embeddings_cache = {}
+                self._build_matrix()
+                return False
+            
+            # Load embeddings (rows stay on disk until used)
+            embeddings_array = np.load(input_path.with_suffix('.npy'), mmap_mode='r')
             
             # Rebuild cache
             self.embeddings_cache = {
@@ -400,6 +583,21 @@ class KnowledgeEmbedder:
                 for i, chunk in enumerate(self.chunks)
             }
             
+            # Memory-map the saved search matrix; rebuild it if missing,
+            # stale or stored in another dtype
+            matrix_path = input_path.with_suffix('.matrix.npy')
+            matrix = np.load(matrix_path, mmap_mode='r') if matrix_path.exists() else None
+            if (
+                matrix is not None
+                and matrix.shape == embeddings_array.shape
+                and str(matrix.dtype) == self.matrix_dtype
+            ):
+                self._matrix = matrix
+                self._matrix_chunks = list(self.chunks)
+                self._matrix_key = self._current_key()
+            else:
+                self._build_matrix()
+            
             logger.info(f"Loaded {len(self.chunks)} chunks and embeddings from {input_path}")
             return True
             
@@ -416,6 +614,9 @@ class KnowledgeEmbedder:
         """
         Find chunks most similar to query embedding.
         
+        Scores every chunk with one product against the normalized matrix
+        and selects the top_k with argpartition.
+        
         Args:
             query_embedding: Query vector
             top_k: Number of results to return
@@ -427,37 +628,34 @@ class KnowledgeEmbedder:
         if not self.embeddings_cache:
             return []
         
-        results = []
+        # Rebuild if chunks or embeddings changed since the matrix was built
+        if self._matrix_key != self._current_key():
+            self._build_matrix()
+        if self._matrix is None:
+            return []
         
-        for chunk in self.chunks:
-            chunk_id = chunk['id']
-            if chunk_id not in self.embeddings_cache:
-                continue
-            
-            chunk_embedding = self.embeddings_cache[chunk_id]
-            
-            # Compute cosine similarity
-            similarity = self._cosine_similarity(query_embedding, chunk_embedding)
-            
-            if similarity >= min_similarity:
-                results.append((chunk, float(similarity)))
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
         
-        # Sort by similarity (descending)
-        results.sort(key=lambda x: x[1], reverse=True)
+        similarities = self._similarities(query)
+        ids, negated = nearest_k(-similarities, top_k)
         
-        return results[:top_k]
+        return [
+            (self._matrix_chunks[i], -score)
+            for i, score in zip(ids, negated, strict=True)
+            if -score >= min_similarity
+        ]
     
-    def _cosine_similarity(
-        self,
-        vec1: npt.NDArray[np.float32],
-        vec2: npt.NDArray[np.float32]
-    ) -> float:
-        """Compute cosine similarity between two vectors."""
-        dot_product = np.dot(vec1, vec2)
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
-        
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-        
-        return dot_product / (norm1 * norm2)
+    def _similarities(self, query: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        """Cosine similarity of a normalized query with every matrix row."""
+        matrix = self._matrix
+        if matrix.dtype == np.float32:
+            return np.asarray(matrix @ query, dtype=np.float32)
+        
+        # Half floats are converted in cache-sized chunks, never as a whole
+        n = len(matrix)
+        similarities = np.empty(n, dtype=np.float32)
+        for start in range(0, n, self.CHUNK_ROWS):
+            stop = min(start + self.CHUNK_ROWS, n)
+            similarities[start:stop] = np.asarray(matrix[start:stop], dtype=np.float32) @ query
+        return similarities
@@ -7,15 +7,25 @@ Provides:
 - Command-to-concept relationships
 - Graph traversal for related content discovery
 - NetworkX integration for efficient queries
+- Compact CSR snapshot for queries: successor/predecessor offsets and
+  targets with typed edges, saved as .npy files and memory-mapped on load
+  (no XML parsing), precomputed PageRank, and cached 1-/2-hop
+  neighbourhoods for the nodes with the most outgoing edges
 
 Created by: orpheus497
 """
 
+import json
 import logging
+import os
 import re
+import threading
+from collections import OrderedDict, deque
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+import numpy as np
+
 try:
     import networkx as nx
 except ImportError:
@@ -24,6 +34,339 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# (node index, distance, edge type code) per node reached by a traversal
+Neighbourhood = List[Tuple[int, int, int]]
+
+
+class CompactGraph:
+    """
+    Immutable CSR snapshot of a directed knowledge graph.
+    
+    Node i's outgoing edges are targets[offsets[i]:offsets[i + 1]] (in
+    insertion order), with edge type codes alongside; incoming edges are
+    stored the same way. Traversals from the nodes with the most outgoing
+    edges (PageRank favours sinks, whose neighbourhoods are empty) are
+    computed up front and other traversals are kept in an LRU, so
+    repeated graph lookups do no traversal work.
+    
+    Attributes:
+        node_ids: Node ID per index
+        node_attrs: Attribute dictionary per index
+        type_names: Edge type per code (code 0 is an edge without a type)
+        pagerank: PageRank score per index
+    """
+    
+    FORMAT_VERSION = 1
+    ARRAYS = ("offsets", "targets", "edge_types", "pred_offsets", "pred_sources", "pagerank")
+    
+    def __init__(
+        self,
+        node_ids: List[Any],
+        node_attrs: List[Dict[str, Any]],
+        arrays: Dict[str, np.ndarray],
+        type_names: List[Optional[str]],
+        edge_attrs: Optional[Dict[int, Dict[str, Any]]] = None,
+        hot_nodes: int = 256,
+        cache_size: int = 4096,
+    ) -> None:
+        """
+        Initialize compact graph.
+        
+        Args:
+            node_ids: Node ID per index
+            node_attrs: Attribute dictionary per index
+            arrays: CSR arrays (see ARRAYS)
+            type_names: Edge type per code
+            edge_attrs: Extra attributes (besides type) by edge position
+            hot_nodes: Nodes (by out-degree) whose neighbourhoods are precomputed
+            cache_size: Traversals kept in the LRU
+        """
+        self.node_ids = node_ids
+        self.node_attrs = node_attrs
+        self.index = {node_id: i for i, node_id in enumerate(node_ids)}
+        
+        self.offsets = arrays["offsets"]
+        self.targets = arrays["targets"]
+        self.edge_types = arrays["edge_types"]
+        self.pred_offsets = arrays["pred_offsets"]
+        self.pred_sources = arrays["pred_sources"]
+        self.pagerank = arrays["pagerank"]
+        
+        self.type_names = type_names
+        self.edge_attrs = edge_attrs or {}
+        
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        
+        # Two-hop neighbourhoods of hot nodes (depth 1 is a prefix)
+        self._hot: Dict[int, Neighbourhood] = {
+            int(i): self._traverse(int(i), 2, None) for i in self.top_fanout(hot_nodes)
+        }
+    
+    @classmethod
+    def from_networkx(cls, graph: "nx.DiGraph", **kwargs: Any) -> "CompactGraph":
+        """
+        Build a snapshot of a NetworkX DiGraph.
+        
+        Args:
+            graph: Source graph
+            **kwargs: Passed to the constructor
+        
+        Returns:
+            CompactGraph
+        """
+        node_ids = list(graph.nodes)
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        node_attrs = [graph.nodes[node_id] for node_id in node_ids]
+        
+        type_codes: Dict[Optional[str], int] = {None: 0}
+        edge_attrs: Dict[int, Dict[str, Any]] = {}
+        offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        targets: List[int] = []
+        edge_types: List[int] = []
+        
+        for i, node_id in enumerate(node_ids):
+            for neighbor, data in graph.succ[node_id].items():
+                edge_type = data.get("type")
+                extra = {key: value for key, value in data.items() if key != "type"}
+                if extra:
+                    edge_attrs[len(targets)] = extra
+                targets.append(index[neighbor])
+                edge_types.append(type_codes.setdefault(edge_type, len(type_codes)))
+            offsets[i + 1] = len(targets)
+        
+        pred_offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        pred_sources: List[int] = []
+        for i, node_id in enumerate(node_ids):
+            pred_sources.extend(index[source] for source in graph.pred[node_id])
+            pred_offsets[i + 1] = len(pred_sources)
+        
+        arrays = {
+            "offsets": offsets,
+            "targets": np.asarray(targets, dtype=np.int32),
+            "edge_types": np.asarray(edge_types, dtype=np.int16),
+            "pred_offsets": pred_offsets,
+            "pred_sources": np.asarray(pred_sources, dtype=np.int32),
+        }
+        arrays["pagerank"] = cls._pagerank(arrays["offsets"], arrays["targets"])
+        
+        type_names = sorted(type_codes, key=type_codes.get)
+        return cls(node_ids, node_attrs, arrays, type_names, edge_attrs, **kwargs)
+    
+    @staticmethod
+    def _pagerank(
+        offsets: np.ndarray,
+        targets: np.ndarray,
+        alpha: float = 0.85,
+        max_iter: int = 100,
+        tol: float = 1.0e-6,
+    ) -> np.ndarray:
+        """PageRank by power iteration (NetworkX's algorithm, unweighted edges)."""
+        n = len(offsets) - 1
+        if n == 0:
+            return np.zeros(0, dtype=np.float64)
+        
+        out_degree = np.diff(offsets)
+        sources = np.repeat(np.arange(n), out_degree)
+        dangling = out_degree == 0
+        inverse_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+        
+        x = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            last = x
+            flow = np.bincount(targets, weights=(x * inverse_degree)[sources], minlength=n)
+            x = alpha * (flow + x[dangling].sum() / n) + (1.0 - alpha) / n
+            if np.abs(x - last).sum() < n * tol:
+                break
+        return x
+    
+    def to_networkx(self) -> "nx.DiGraph":
+        """Rebuild a NetworkX DiGraph with the same nodes, edges and attributes."""
+        graph = nx.DiGraph()
+        for node_id, attrs in zip(self.node_ids, self.node_attrs, strict=True):
+            graph.add_node(node_id, **attrs)
+        
+        for i, node_id in enumerate(self.node_ids):
+            for position in range(int(self.offsets[i]), int(self.offsets[i + 1])):
+                data = dict(self.edge_attrs.get(position, {}))
+                edge_type = self.type_names[int(self.edge_types[position])]
+                if edge_type is not None:
+                    data["type"] = edge_type
+                graph.add_edge(node_id, self.node_ids[int(self.targets[position])], **data)
+        return graph
+    
+    def successors(self, i: int) -> List[int]:
+        """Indexes of node i's successors, in insertion order."""
+        return self.targets[self.offsets[i]:self.offsets[i + 1]].tolist()
+    
+    def predecessors(self, i: int) -> List[int]:
+        """Indexes of node i's predecessors, in insertion order."""
+        return self.pred_sources[self.pred_offsets[i]:self.pred_offsets[i + 1]].tolist()
+    
+    def type_name(self, code: int) -> str:
+        """Edge type for a code ('unknown' for edges without a type)."""
+        return self.type_names[code] or "unknown"
+    
+    def type_codes(self, rel_types: Optional[List[str]]) -> Optional[frozenset]:
+        """Codes of the given edge types (None = all types)."""
+        if not rel_types:
+            return None
+        return frozenset(
+            code for code in range(len(self.type_names)) if self.type_name(code) in rel_types
+        )
+    
+    def _traverse(self, start: int, max_depth: int, allowed: Optional[frozenset]) -> Neighbourhood:
+        """Breadth-first traversal; nodes are reported in discovery order."""
+        reached: Neighbourhood = []
+        visited = {start}
+        queue = deque([(start, 0)])
+        
+        while queue:
+            current, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+            
+            begin, end = self.offsets[current], self.offsets[current + 1]
+            for neighbor, code in zip(self.targets[begin:end].tolist(), self.edge_types[begin:end].tolist(), strict=True):
+                if neighbor in visited:
+                    continue
+                # Filtered edges do not mark the node visited (it may be reached another way)
+                if allowed is not None and code not in allowed:
+                    continue
+                reached.append((neighbor, depth + 1, code))
+                visited.add(neighbor)
+                queue.append((neighbor, depth + 1))
+        
+        return reached
+    
+    def neighbourhood(self, start: int, max_depth: int, allowed: Optional[frozenset] = None) -> Neighbourhood:
+        """
+        Nodes reachable from start within max_depth edges, closest first.
+        
+        Depths 1 and 2 are served from the two-hop traversal (BFS reports
+        all depth-1 nodes before depth-2 ones, so depth 1 is its prefix).
+        
+        Args:
+            start: Node index
+            max_depth: Maximum number of edges
+            allowed: Edge type codes to follow (None = all)
+        
+        Returns:
+            (node index, distance, edge type code) per reached node
+        """
+        depth = 2 if 0 < max_depth <= 2 else max_depth
+        
+        reached = self._hot.get(start) if allowed is None and depth == 2 else None
+        if reached is None:
+            key = (start, depth, allowed)
+            with self._lock:
+                reached = self._cache.get(key)
+                if reached is not None:
+                    self._cache.move_to_end(key)
+                    self.stats["hits"] += 1
+            if reached is None:
+                reached = self._traverse(start, depth, allowed)
+                with self._lock:
+                    self.stats["misses"] += 1
+                    self._cache[key] = reached
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        else:
+            with self._lock:
+                self.stats["hits"] += 1
+        
+        if depth != max_depth:
+            return [item for item in reached if item[1] <= max_depth]
+        return reached
+    
+    def top_central(self, top_n: int) -> np.ndarray:
+        """Indexes of the top_n nodes by PageRank, highest first."""
+        top_n = min(top_n, len(self.pagerank))
+        if top_n <= 0:
+            return np.zeros(0, dtype=np.int64)
+        top = np.argpartition(-self.pagerank, top_n - 1)[:top_n]
+        return top[np.argsort(-self.pagerank[top], kind="stable")]
+    
+    def top_fanout(self, top_n: int) -> np.ndarray:
+        """Indexes of up to top_n nodes with outgoing edges, most first."""
+        out_degree = np.diff(self.offsets)
+        top_n = min(top_n, int(np.count_nonzero(out_degree)))
+        if top_n <= 0:
+            return np.zeros(0, dtype=np.int64)
+        top = np.argpartition(-out_degree, top_n - 1)[:top_n]
+        return top[np.argsort(-out_degree[top], kind="stable")]
+    
+    @staticmethod
+    def _paths(path: Path) -> Dict[str, Path]:
+        """Paths of the saved files."""
+        path = Path(path)
+        paths = {name: path.with_suffix(f".{name}.npy") for name in CompactGraph.ARRAYS}
+        paths["nodes"] = path.with_suffix(".nodes.json")
+        return paths
+    
+    @classmethod
+    def exists(cls, path: Path) -> bool:
+        """Whether a compact graph was saved at path."""
+        return all(p.exists() for p in cls._paths(path).values())
+    
+    def save(self, path: Path) -> None:
+        """
+        Save arrays as .npy files and nodes as JSON (each written atomically).
+        
+        Args:
+            path: Base path (suffixes are added per file)
+        """
+        paths = self._paths(path)
+        paths["nodes"].parent.mkdir(parents=True, exist_ok=True)
+        
+        for name in self.ARRAYS:
+            tmp_path = paths[name].with_name(paths[name].name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.asarray(getattr(self, name)))
+            os.replace(tmp_path, paths[name])
+        
+        tmp_path = paths["nodes"].with_name(paths["nodes"].name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "version": self.FORMAT_VERSION,
+                    "node_ids": self.node_ids,
+                    "node_attrs": self.node_attrs,
+                    "type_names": self.type_names,
+                    "edge_attrs": {str(k): v for k, v in self.edge_attrs.items()},
+                },
+                f,
+                default=str,
+            )
+        os.replace(tmp_path, paths["nodes"])
+    
+    @classmethod
+    def load(cls, path: Path, **kwargs: Any) -> "CompactGraph":
+        """
+        Load a saved compact graph, memory-mapping its arrays.
+        
+        Args:
+            path: Base path given to save()
+            **kwargs: Passed to the constructor
+        
+        Returns:
+            CompactGraph
+        
+        Raises:
+            ValueError: If the files have an unknown format version
+        """
+        paths = cls._paths(path)
+        with open(paths["nodes"]) as f:
+            data = json.load(f)
+        if data.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact graph version: {data.get('version')}")
+        
+        arrays = {name: np.load(paths[name], mmap_mode="r") for name in cls.ARRAYS}
+        edge_attrs = {int(k): v for k, v in data["edge_attrs"].items()}
+        return cls(data["node_ids"], data["node_attrs"], arrays, data["type_names"], edge_attrs, **kwargs)
+
 
 class KnowledgeGraph:
     """
@@ -39,8 +382,15 @@ class KnowledgeGraph:
     - Command-to-documentation linking
     - Contextual result expansion
     
+    Queries (traversal, node context, centrality, stats) run on a
+    CompactGraph snapshot that is rebuilt after the graph changes; the
+    NetworkX graph is only rebuilt from a loaded snapshot when it is
+    modified or used directly. Edits made directly on `graph` (other than
+    adding nodes) must be followed by invalidate().
+    
     Attributes:
         graph: NetworkX DiGraph instance
+        hot_nodes: Nodes (by out-degree) whose neighbourhoods are precomputed
     """
     
     # Node types
@@ -57,17 +407,53 @@ class KnowledgeGraph:
     EDGE_DEMONSTRATES = "demonstrates"
     EDGE_REFERENCES = "references"
     
-    def __init__(self) -> None:
-        """Initialize empty knowledge graph."""
+    def __init__(self, hot_nodes: int = 256) -> None:
+        """
+        Initialize empty knowledge graph.
+        
+        Args:
+            hot_nodes: Nodes (by out-degree) whose neighbourhoods are precomputed
+        """
         if nx is None:
             raise ImportError(
                 "NetworkX is required for knowledge graph. "
                 "Install with: pip install networkx"
             )
         
+        self.hot_nodes = hot_nodes
+        self._compact_graph: Optional[CompactGraph] = None
         self.graph = nx.DiGraph()
         logger.info("Knowledge graph initialized")
     
+    @property
+    def graph(self) -> "nx.DiGraph":
+        """NetworkX graph (rebuilt from the compact snapshot on first use after loading)."""
+        if self._graph is None:
+            self._graph = self._compact_graph.to_networkx()
+        return self._graph
+    
+    @graph.setter
+    def graph(self, graph: "nx.DiGraph") -> None:
+        self._graph = graph
+        self._compact_graph = None
+    
+    def invalidate(self) -> None:
+        """Drop the compact snapshot after a change to the graph."""
+        # Keep the graph before dropping the snapshot it may come from
+        if self._graph is None:
+            self._graph = self._compact_graph.to_networkx()
+        self._compact_graph = None
+    
+    def _compact(self) -> CompactGraph:
+        """Compact snapshot of the graph, rebuilt if the graph changed."""
+        compact = self._compact_graph
+        graph = self._graph
+        # Node count is O(1); NetworkX counts edges by walking every node
+        if compact is None or (graph is not None and len(graph) != len(compact.node_ids)):
+            compact = CompactGraph.from_networkx(graph, hot_nodes=self.hot_nodes)
+            self._compact_graph = compact
+        return compact
+    
     def add_chapter(
         self,
         chapter_id: str,
@@ -82,6 +468,7 @@ class KnowledgeGraph:
             title: Chapter title
             metadata: Additional metadata (file_path, topics, etc.)
         """
+        self.invalidate()
         self.graph.add_node(
             chapter_id,
             type=self.NODE_CHAPTER,
@@ -108,6 +495,7 @@ class KnowledgeGraph:
             parent_section_id: Parent section ID (for nested sections)
             metadata: Additional metadata (content, level, etc.)
         """
+        self.invalidate()
         self.graph.add_node(
             section_id,
             type=self.NODE_SECTION,
@@ -140,6 +528,7 @@ class KnowledgeGraph:
         """
         command_id = f"cmd:{command}"
         
+        self.invalidate()
         self.graph.add_node(
             command_id,
             type=self.NODE_COMMAND,
@@ -171,6 +560,7 @@ class KnowledgeGraph:
             related_sections: List of section IDs covering this concept
             metadata: Additional metadata (definition, keywords, etc.)
         """
+        self.invalidate()
         self.graph.add_node(
             concept_id,
             type=self.NODE_CONCEPT,
@@ -209,6 +599,7 @@ class KnowledgeGraph:
             logger.warning(f"Target node not found: {target_id}")
             return
         
+        self.invalidate()
         self.graph.add_edge(source_id, target_id, type=rel_type, **(metadata or {}))
         logger.debug(f"Added edge: {source_id} -{rel_type}-> {target_id}")
     
@@ -229,52 +620,29 @@ class KnowledgeGraph:
         Returns:
             List of related nodes with metadata and distance
         """
-        if not self.graph.has_node(node_id):
+        compact = self._compact()
+        start = compact.index.get(node_id)
+        if start is None:
             logger.warning(f"Node not found: {node_id}")
             return []
         
-        related = []
-        visited = {node_id}
-        
-        # BFS traversal with depth tracking
-        queue = [(node_id, 0)]  # (node, depth)
-        
-        while queue:
-            current_node, depth = queue.pop(0)
-            
-            if depth >= max_depth:
-                continue
-            
-            # Get outgoing edges
-            for neighbor in self.graph.successors(current_node):
-                if neighbor in visited:
-                    continue
-                
-                edge_data = self.graph.get_edge_data(current_node, neighbor)
-                edge_type = edge_data.get("type", "unknown")
-                
-                # Filter by relationship type if specified
-                if rel_types and edge_type not in rel_types:
-                    continue
-                
-                # Add to results
-                node_data = self.graph.nodes[neighbor]
-                related.append(
-                    {
-                        "id": neighbor,
-                        "distance": depth + 1,
-                        "rel_type": edge_type,
-                        "node_type": node_data.get("type", "unknown"),
-                        "title": node_data.get("title", node_data.get("name", neighbor)),
-                        "metadata": node_data,
-                    }
-                )
-                
-                visited.add(neighbor)
-                queue.append((neighbor, depth + 1))
+        # Breadth-first (closest first), cached per start node and filter
+        reached = compact.neighbourhood(start, max_depth, compact.type_codes(rel_types))
         
-        # Sort by distance (closest first)
-        related.sort(key=lambda x: x["distance"])
+        related = []
+        for neighbor, distance, code in reached:
+            node_data = compact.node_attrs[neighbor]
+            neighbor_id = compact.node_ids[neighbor]
+            related.append(
+                {
+                    "id": neighbor_id,
+                    "distance": distance,
+                    "rel_type": compact.type_name(code),
+                    "node_type": node_data.get("type", "unknown"),
+                    "title": node_data.get("title", node_data.get("name", neighbor_id)),
+                    "metadata": node_data,
+                }
+            )
         
         logger.debug(f"Found {len(related)} related nodes for {node_id}")
         return related
@@ -289,55 +657,43 @@ class KnowledgeGraph:
         Returns:
             Dictionary with ancestors, siblings, children
         """
-        if not self.graph.has_node(node_id):
+        compact = self._compact()
+        node = compact.index.get(node_id)
+        if node is None:
             return {}
         
-        # Get ancestors (parent chapters/sections)
+        def describe(i: int) -> Dict[str, Any]:
+            data = compact.node_attrs[i]
+            node_key = compact.node_ids[i]
+            return {
+                "id": node_key,
+                "type": data.get("type"),
+                "title": data.get("title", data.get("name", node_key)),
+            }
+        
+        # Get ancestors (parent chapters/sections); stops if the first
+        # parents form a cycle
         ancestors = []
-        current = node_id
+        seen = {node}
+        current = node
         while True:
-            parents = list(self.graph.predecessors(current))
-            if not parents:
+            parents = compact.predecessors(current)
+            if not parents or parents[0] in seen:
                 break
             
             parent = parents[0]  # Assume single parent for hierarchy
-            parent_data = self.graph.nodes[parent]
-            ancestors.append(
-                {
-                    "id": parent,
-                    "type": parent_data.get("type"),
-                    "title": parent_data.get("title", parent_data.get("name", parent)),
-                }
-            )
+            ancestors.append(describe(parent))
+            seen.add(parent)
             current = parent
         
         # Get siblings (nodes with same parent)
         siblings = []
-        parents = list(self.graph.predecessors(node_id))
+        parents = compact.predecessors(node)
         if parents:
-            parent = parents[0]
-            for sibling in self.graph.successors(parent):
-                if sibling != node_id:
-                    sibling_data = self.graph.nodes[sibling]
-                    siblings.append(
-                        {
-                            "id": sibling,
-                            "type": sibling_data.get("type"),
-                            "title": sibling_data.get("title", sibling_data.get("name", sibling)),
-                        }
-                    )
+            siblings = [describe(sibling) for sibling in compact.successors(parents[0]) if sibling != node]
         
         # Get children
-        children = []
-        for child in self.graph.successors(node_id):
-            child_data = self.graph.nodes[child]
-            children.append(
-                {
-                    "id": child,
-                    "type": child_data.get("type"),
-                    "title": child_data.get("title", child_data.get("name", child)),
-                }
-            )
+        children = [describe(child) for child in compact.successors(node)]
         
         return {
             "ancestors": ancestors[::-1],  # Root to immediate parent
@@ -366,19 +722,19 @@ class KnowledgeGraph:
         """
         Get most central/important nodes by PageRank.
         
+        Scores are computed once per snapshot (and saved with it).
+        
         Args:
             top_n: Number of top nodes to return
         
         Returns:
             List of (node_id, centrality_score) tuples
         """
-        try:
-            pagerank = nx.pagerank(self.graph)
-            sorted_nodes = sorted(pagerank.items(), key=lambda x: x[1], reverse=True)
-            return sorted_nodes[:top_n]
-        except Exception as e:
-            logger.error(f"Failed to calculate centrality: {e}")
-            return []
+        compact = self._compact()
+        return [
+            (compact.node_ids[i], float(compact.pagerank[i]))
+            for i in compact.top_central(top_n)
+        ]
     
     def build_from_redbook(self, redbook_path: Path) -> None:
         """
@@ -483,22 +839,25 @@ class KnowledgeGraph:
         Returns:
             Dictionary with node/edge counts by type
         """
+        compact = self._compact()
         stats = {
-            "total_nodes": self.graph.number_of_nodes(),
-            "total_edges": self.graph.number_of_edges(),
+            "total_nodes": len(compact.node_ids),
+            "total_edges": len(compact.targets),
             "nodes_by_type": {},
             "edges_by_type": {},
+            "traversal_cache": dict(compact.stats),
         }
         
         # Count nodes by type
-        for node, data in self.graph.nodes(data=True):
+        for data in compact.node_attrs:
             node_type = data.get("type", "unknown")
             stats["nodes_by_type"][node_type] = stats["nodes_by_type"].get(node_type, 0) + 1
         
         # Count edges by type
-        for source, target, data in self.graph.edges(data=True):
-            edge_type = data.get("type", "unknown")
-            stats["edges_by_type"][edge_type] = stats["edges_by_type"].get(edge_type, 0) + 1
+        codes, counts = np.unique(np.asarray(compact.edge_types), return_counts=True)
+        for code, count in zip(codes.tolist(), counts.tolist(), strict=True):
+            edge_type = compact.type_name(code)
+            stats["edges_by_type"][edge_type] = stats["edges_by_type"].get(edge_type, 0) + count
         
         return stats
     
@@ -515,15 +874,37 @@ class KnowledgeGraph:
         except Exception as e:
             logger.error(f"Failed to save graph: {e}")
     
+    def save_compact(self, output_path: Path) -> None:
+        """
+        Save graph in the compact CSR format (loads without XML parsing).
+        
+        Args:
+            output_path: Base path; .npy arrays and a .nodes.json file are written
+        """
+        try:
+            self._compact().save(output_path)
+            logger.info(f"Knowledge graph saved (compact) to {output_path}")
+        except Exception as e:
+            logger.error(f"Failed to save graph: {e}")
+    
     def load_graph(self, input_path: Path) -> None:
         """
         Load graph from file.
         
+        A compact graph saved at the path (see save_compact) is preferred;
+        its arrays are memory-mapped and the NetworkX graph is only rebuilt
+        when needed. Otherwise the path is read as GraphML.
+        
         Args:
             input_path: Path to load graph from
         """
         try:
-            self.graph = nx.read_graphml(input_path)
+            if CompactGraph.exists(input_path):
+                compact = CompactGraph.load(input_path, hot_nodes=self.hot_nodes)
+                self._graph = None
+                self._compact_graph = compact
+            else:
+                self.graph = nx.read_graphml(input_path)
             logger.info(f"Knowledge graph loaded from {input_path}")
         except Exception as e:
             logger.error(f"Failed to load graph: {e}")
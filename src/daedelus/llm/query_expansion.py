@@ -4,14 +4,20 @@ Query Expansion for Daedelus Intelligence System.
 Expands user queries with synonyms and related terms to improve search coverage
 and recall, while maintaining precision through intelligent weighting.
 
+The synonym dictionary is compiled once into per-term expansions and a
+phrase matcher (so "turn on" matches the entry "turn-on"), and expansions
+of repeated queries are served from a bounded LRU.
+
 Phase 5 - Intelligence System Enhancement
 Created by: orpheus497
 """
 
 import logging
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Any, Dict, List, Set, Tuple
 
 import yaml
 
@@ -31,13 +37,15 @@ class QueryExpander:
         reverse_index: Reverse mapping for efficient lookup
         max_expansions: Maximum number of synonyms per term
         stopwords: Common words to skip during expansion
+        cache_size: Maximum number of memoized expansions
     """
     
     def __init__(
         self,
         synonyms_path: Path | None = None,
         max_expansions: int = 3,
-        include_original: bool = True
+        include_original: bool = True,
+        cache_size: int = 1024
     ):
         """
         Initialize query expander.
@@ -46,10 +54,18 @@ class QueryExpander:
             synonyms_path: Path to synonyms YAML file
             max_expansions: Maximum synonyms to add per term
             include_original: Whether to include original term in expansion
+            cache_size: Maximum number of memoized expansions
         """
         self.max_expansions = max_expansions
         self.include_original = include_original
         
+        # Memoized expansions (cleared whenever the synonyms change)
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
         # Stopwords to skip (too common for expansion)
         self.stopwords = {
             'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
@@ -68,6 +84,11 @@ class QueryExpander:
         self.synonyms_dict: Dict[str, List[str]] = {}
         self.reverse_index: Dict[str, List[str]] = {}
         
+        # Compiled from the two above by _compile()
+        self._expansions: Dict[str, List[str]] = {}
+        self._phrases: Dict[Tuple[str, ...], str] = {}
+        self._max_phrase_length = 1
+        
         self._load_synonyms(Path(synonyms_path))
         
         logger.info(f"QueryExpander initialized with {len(self.synonyms_dict)} synonym groups")
@@ -111,6 +132,94 @@ class QueryExpander:
             
         except Exception as e:
             logger.error(f"Error loading synonyms: {e}")
+        
+        self._compile()
+    
+    def _compile(self) -> None:
+        """
+        Compile the synonym dictionary for lookup.
+        
+        Builds the synonym list of every known term (its own synonyms, or
+        those of the terms it is a synonym of) and a phrase table mapping
+        the words of multi-word entries ("turn-on", "turn on") to the entry.
+        Clears memoized expansions.
+        """
+        expansions = {term: list(synonyms) for term, synonyms in self.synonyms_dict.items()}
+        for synonym, main_terms in self.reverse_index.items():
+            if synonym in expansions:
+                continue
+            # Synonyms of the main term(s), without duplicates
+            merged: Dict[str, None] = {}
+            for main_term in main_terms:
+                merged.update(dict.fromkeys(self.synonyms_dict.get(main_term, [])))
+            expansions[synonym] = list(merged)
+        
+        phrases: Dict[Tuple[str, ...], str] = {}
+        for term in expansions:
+            words = tuple(re.split(r'[\s-]+', term.strip()))
+            if len(words) > 1:
+                phrases.setdefault(words, term)
+        
+        self._expansions = expansions
+        self._phrases = phrases
+        self._max_phrase_length = max((len(words) for words in phrases), default=1)
+        
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def _cached(self, key: Tuple[Any, ...], compute: Any) -> Any:
+        """
+        Memoize a computed value in the bounded LRU.
+        
+        Args:
+            key: Cache key
+            compute: Function computing the value on a miss
+            
+        Returns:
+            Cached or computed value
+        """
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return self._cache[key]
+            self.cache_misses += 1
+        
+        value = compute()
+        
+        with self._cache_lock:
+            self._cache[key] = value
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+    
+    def _match_terms(self, tokens: List[str]) -> List[Tuple[str, str]]:
+        """
+        Group tokens into dictionary phrases (longest match first).
+        
+        Args:
+            tokens: Query tokens
+            
+        Returns:
+            List of (query text, dictionary term) pairs; single tokens are
+            their own term
+        """
+        if self._max_phrase_length == 1:
+            return [(token, token) for token in tokens]
+        
+        terms = []
+        i = 0
+        while i < len(tokens):
+            for length in range(min(self._max_phrase_length, len(tokens) - i), 1, -1):
+                term = self._phrases.get(tuple(tokens[i:i + length]))
+                if term is not None:
+                    terms.append((' '.join(tokens[i:i + length]), term))
+                    i += length
+                    break
+            else:
+                terms.append((tokens[i], tokens[i]))
+                i += 1
+        return terms
     
     def expand_query(
         self,
@@ -121,6 +230,9 @@ class QueryExpander:
         """
         Expand query with synonyms and related terms.
         
+        Words forming a multi-word dictionary entry are expanded as one
+        term. Results are memoized per query and options.
+        
         Args:
             query: Original search query
             boost_original: Weight multiplier for original terms (vs synonyms)
@@ -129,30 +241,44 @@ class QueryExpander:
         Returns:
             List of (expanded_term, weight) tuples
         """
-        # Tokenize query
-        tokens = self._tokenize(query)
+        expanded = self._cached(
+            ('expand', query, boost_original, context, self.include_original, self.max_expansions),
+            lambda: tuple(self._expand(query, boost_original, context)),
+        )
+        return list(expanded)
+    
+    def _expand(
+        self,
+        query: str,
+        boost_original: float,
+        context: str | None
+    ) -> List[Tuple[str, float]]:
+        """Uncached expand_query."""
+        # Tokenize query and group dictionary phrases
+        terms = self._match_terms(self._tokenize(query))
         
         # Filter stopwords
-        meaningful_tokens = [t for t in tokens if t.lower() not in self.stopwords]
+        meaningful_terms = [t for t in terms if t[0] not in self.stopwords]
         
-        if not meaningful_tokens:
+        if not meaningful_terms:
             # If all stopwords, keep original
-            meaningful_tokens = tokens
+            meaningful_terms = terms
         
         # Expand each term
         expanded = []
         seen = set()
         
-        for token in meaningful_tokens:
-            token_lower = token.lower()
-            
+        for token, term in meaningful_terms:
             # Add original term with boost
-            if self.include_original and token_lower not in seen:
+            if self.include_original and token not in seen:
                 expanded.append((token, boost_original))
-                seen.add(token_lower)
+                seen.add(token)
+            # A phrase's dictionary form is not its own synonym
+            if term != token:
+                seen.add(term)
             
             # Find synonyms
-            synonyms = self._get_synonyms(token_lower, context=context)
+            synonyms = self._get_synonyms(term, context=context)
             
             # Add synonyms with decreasing weight
             for i, synonym in enumerate(synonyms[:self.max_expansions]):
@@ -172,6 +298,8 @@ class QueryExpander:
         """
         Expand query and return as string for FTS or search engines.
         
+        Memoized per query and options.
+        
         Args:
             query: Original query
             join_with: String to join expanded terms (e.g., ' OR ', ' | ')
@@ -179,14 +307,20 @@ class QueryExpander:
         Returns:
             Expanded query string
         """
-        expanded = self.expand_query(query)
-        
-        # Sort by weight (highest first)
-        expanded.sort(key=lambda x: x[1], reverse=True)
-        
-        # Join terms
-        terms = [term for term, _ in expanded]
-        return join_with.join(terms)
+        def build() -> str:
+            expanded = self.expand_query(query)
+            
+            # Sort by weight (highest first)
+            expanded.sort(key=lambda x: x[1], reverse=True)
+            
+            # Join terms
+            terms = [term for term, _ in expanded]
+            return join_with.join(terms)
+        
+        return self._cached(
+            ('string', query, join_with, self.include_original, self.max_expansions),
+            build,
+        )
     
     def get_search_variants(self, query: str) -> List[str]:
         """
@@ -241,25 +375,12 @@ class QueryExpander:
         Returns:
             List of synonyms
         """
-        term_lower = term.lower()
-        
-        # Check direct synonyms
-        if term_lower in self.synonyms_dict:
-            synonyms = self.synonyms_dict[term_lower].copy()
-        else:
-            # Check if term is a synonym of something
-            if term_lower in self.reverse_index:
-                main_terms = self.reverse_index[term_lower]
-                # Get synonyms of main term(s)
-                synonyms = []
-                for main_term in main_terms:
-                    if main_term in self.synonyms_dict:
-                        synonyms.extend(self.synonyms_dict[main_term])
-                # Remove duplicates
-                synonyms = list(set(synonyms))
-            else:
-                # No synonyms found
-                return []
+        # Direct synonyms, or those of the term(s) it is a synonym of
+        synonyms = self._expansions.get(term.lower())
+        if not synonyms:
+            # No synonyms found
+            return []
+        synonyms = list(synonyms)
         
         # Context-based filtering (if provided)
         if context:
@@ -285,6 +406,7 @@ class QueryExpander:
             Filtered and sorted synonym list
         """
         context_lower = context.lower()
+        context_tokens = set(self._tokenize(context_lower))
         
         # Score synonyms by context relevance
         scored = []
@@ -296,7 +418,6 @@ class QueryExpander:
                 score += 10
             
             # Boost if synonym is related to context keywords
-            context_tokens = set(self._tokenize(context_lower))
             if synonym in context_tokens:
                 score += 5
             
@@ -352,6 +473,7 @@ class QueryExpander:
             if term_lower not in self.reverse_index[synonym]:
                 self.reverse_index[synonym].append(term_lower)
         
+        self._compile()
         logger.debug(f"Added synonyms for '{term}': {synonyms}")
     
     def get_expansion_stats(self) -> Dict[str, int]:
@@ -368,5 +490,9 @@ class QueryExpander:
             'total_terms': len(self.synonyms_dict),
             'total_synonyms': total_synonyms,
             'avg_synonyms_per_term': round(avg_synonyms, 2),
-            'reverse_index_size': len(self.reverse_index)
+            'reverse_index_size': len(self.reverse_index),
+            'phrases': len(self._phrases),
+            'cache_size': len(self._cache),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses
         }
@@ -14,6 +14,7 @@ from pathlib import Path
 from typing import Any
 
 from daedelus.core.database import CommandDatabase
+from daedelus.core.embedding_cache import EmbeddingCache
 from daedelus.core.embeddings import CommandEmbedder
 from daedelus.core.vector_store import VectorStore
 
@@ -52,6 +53,7 @@ class RAGPipeline:
         enable_compression: bool = True,
         compression_aggressive: bool = False,
         max_context_tokens: int = 1024,
+        embedding_cache: EmbeddingCache | None = None,
     ) -> None:
         """
         Initialize RAG pipeline with token counting and management.
@@ -64,9 +66,11 @@ class RAGPipeline:
             enable_compression: Enable token compression
             compression_aggressive: Use aggressive compression
             max_context_tokens: Maximum tokens for context (default 1024)
+            embedding_cache: Persistent embedding cache for queries and sentences
         """
         self.db = db
         self.embedder = embedder
+        self.embedding_cache = embedding_cache
         self.vector_store = vector_store
         self.max_context_commands = max_context_commands
         self.max_context_tokens = max_context_tokens
@@ -79,6 +83,7 @@ class RAGPipeline:
                     embedder=embedder,
                     similarity_threshold=0.75,
                     max_chunk_tokens=512,
+                    embedding_cache=embedding_cache,
                 )
                 self.compressor = TokenCompressor(
                     semantic_chunker=chunker,
@@ -126,8 +131,11 @@ class RAGPipeline:
         # 1. Get semantically similar commands
         if include_similar:
             try:
-                # Encode query
-                query_embedding = self.embedder.encode_command(query)
+                # Encode query (repeated queries come from the embedding cache)
+                if self.embedding_cache is not None:
+                    query_embedding = self.embedding_cache.encode_one(query)
+                else:
+                    query_embedding = self.embedder.encode_command(query)
 
                 # Search vector store
                 similar_results = self.vector_store.search(
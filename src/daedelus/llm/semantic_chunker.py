@@ -5,6 +5,10 @@ Implements a 100% FOSS semantic chunking system that intelligently splits
 and compresses text based on semantic boundaries, maximizing semantic
 comprehension while minimizing token usage.
 
+Sentences are embedded as one matrix per batch and consecutive similarities
+are a single row-wise product; iter_chunks streams chunks from a sentence
+iterator with bounded memory for very large documents.
+
 Inspired by jparkerweb/semantic-chunking and chonkie-inc/chonkie.
 
 Created by: orpheus497
@@ -12,14 +16,21 @@ Created by: orpheus497
 
 import logging
 import re
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 import numpy.typing as npt
 
+if TYPE_CHECKING:
+    from daedelus.core.embedding_cache import EmbeddingCache
+
 logger = logging.getLogger(__name__)
 
+# End of a sentence as _split_sentences splits on it
+_SENTENCE_END = re.compile(r"[.!?]\s+")
+
 
 @dataclass
 class Chunk:
@@ -58,6 +69,7 @@ class SemanticChunker:
         similarity_threshold: float = 0.75,
         max_chunk_tokens: int = 512,
         min_chunk_sentences: int = 2,
+        embedding_cache: "EmbeddingCache | None" = None,
     ) -> None:
         """
         Initialize semantic chunker.
@@ -67,8 +79,11 @@ class SemanticChunker:
             similarity_threshold: Similarity threshold for grouping (0.0-1.0)
             max_chunk_tokens: Maximum tokens per chunk
             min_chunk_sentences: Minimum sentences per chunk
+            embedding_cache: Persistent embedding cache (sentences that recur
+                across contexts are not re-encoded)
         """
         self.embedder = embedder
+        self.embedding_cache = embedding_cache
         self.similarity_threshold = similarity_threshold
         self.max_chunk_tokens = max_chunk_tokens
         self.min_chunk_sentences = min_chunk_sentences
@@ -97,60 +112,200 @@ class SemanticChunker:
         if not sentences:
             return []
 
-        # Generate embeddings for each sentence
-        embeddings = []
-        for sent in sentences:
-            emb = self.embedder.encode_command(sent)
-            embeddings.append(emb)
-
-        # Calculate similarity between consecutive sentences
-        similarities = []
-        for i in range(len(embeddings) - 1):
-            sim = self._cosine_similarity(embeddings[i], embeddings[i + 1])
-            similarities.append(sim)
-
-        # Group sentences into chunks based on similarity
-        chunks = []
-        current_chunk_sentences = [sentences[0]]
+        # One embedding matrix for the whole text
+        embeddings = self._encode_sentences(sentences)
+        chunks = list(self._group_sentences([(sentences, embeddings)]))
+
+        logger.debug(f"Created {len(chunks)} semantic chunks from {len(sentences)} sentences")
+
+        return chunks
+
+    def iter_chunks(
+        self,
+        sentences: Iterable[str],
+        batch_size: int = 256,
+        use_cache: bool = False,
+    ) -> Iterator[Chunk]:
+        """
+        Stream semantic chunks from a sentence iterator.
+
+        Sentences are embedded batch_size at a time and only the current
+        chunk and the previous sentence's embedding are kept between
+        batches, so memory does not grow with the document. Chunks are the
+        ones chunk_text would produce, except that a chunk is also closed
+        once it would exceed max_chunk_tokens (4 chars per token).
+
+        Streamed documents bypass the embedding cache by default: their
+        sentences rarely recur and would evict the cached commands.
+
+        Args:
+            sentences: Sentences in document order (e.g. from iter_sentences)
+            batch_size: Sentences embedded per batch
+            use_cache: Look up and store sentence embeddings in the embedding cache
+
+        Yields:
+            Chunk objects (start_idx/end_idx count from the first sentence)
+        """
+
+        def batches() -> Iterator[tuple[list[str], npt.NDArray[np.float32]]]:
+            batch: list[str] = []
+            for sentence in sentences:
+                batch.append(sentence)
+                if len(batch) == batch_size:
+                    yield batch, self._encode_sentences(batch, use_cache)
+                    batch = []
+            if batch:
+                yield batch, self._encode_sentences(batch, use_cache)
+
+        yield from self._group_sentences(batches(), max_chars=self.max_chunk_tokens * 4)
+
+    def iter_sentences(
+        self,
+        blocks: Iterable[str],
+        max_pending: int | None = None,
+    ) -> Iterator[str]:
+        """
+        Split streamed text into sentences (as _split_sentences would).
+
+        Text after the last sentence end is kept until a later block ends
+        it. Once that text grows past max_pending characters it is yielded
+        as a sentence of its own, so input without sentence ends is not
+        buffered whole.
+
+        Args:
+            blocks: Consecutive pieces of the text (e.g. lines of a file)
+            max_pending: Longest unterminated text kept (default:
+                max_chunk_tokens * 4 chars)
+
+        Yields:
+            Sentences
+        """
+        if max_pending is None:
+            max_pending = self.max_chunk_tokens * 4
+
+        pending = ""
+        for block in blocks:
+            # Earlier text has no sentence end; only its last char can start one
+            scan_from = max(len(pending) - 1, 0)
+            pending += block
+
+            # Split up to the last sentence end; the rest may continue
+            last_end = 0
+            for match in _SENTENCE_END.finditer(pending, scan_from):
+                last_end = match.end()
+            if last_end:
+                yield from self._split_sentences(pending[:last_end])
+                pending = pending[last_end:]
+
+            if len(pending) > max_pending:
+                if pending.strip():
+                    yield pending.strip()
+                pending = ""
+
+        yield from self._split_sentences(pending)
+
+    def _encode_sentences(
+        self,
+        sentences: list[str],
+        use_cache: bool = True,
+    ) -> npt.NDArray[np.float32]:
+        """
+        Embed sentences as one matrix.
+
+        Args:
+            sentences: Sentences to embed
+            use_cache: Go through the embedding cache (if configured)
+
+        Returns:
+            Embedding matrix (shape: [len(sentences), dim])
+        """
+        if use_cache and self.embedding_cache is not None:
+            return self.embedding_cache.encode(sentences)
+        if hasattr(self.embedder, "encode_batch"):
+            return self.embedder.encode_batch(sentences)
+        return np.stack([self.embedder.encode_command(sent) for sent in sentences])
+
+    def _consecutive_similarities(
+        self,
+        embeddings: npt.NDArray[np.float32],
+    ) -> npt.NDArray[np.float64]:
+        """
+        Cosine similarity of each embedding with the next (see _cosine_similarity).
+
+        Args:
+            embeddings: Embedding matrix (shape: [n, dim])
+
+        Returns:
+            Similarities in [0, 1] (shape: [n - 1]); 0.0 where a vector is zero
+        """
+        norms = np.linalg.norm(embeddings, axis=1)
+        dots = np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+        denominators = norms[:-1] * norms[1:]
+
+        similarities = np.zeros(len(dots), dtype=np.float64)
+        nonzero = denominators != 0
+        similarities[nonzero] = (dots[nonzero] / denominators[nonzero] + 1) / 2
+        return similarities
+
+    def _group_sentences(
+        self,
+        batches: Iterable[tuple[list[str], npt.NDArray[np.float32]]],
+        max_chars: int | None = None,
+    ) -> Iterator[Chunk]:
+        """
+        Group consecutive sentences into chunks at semantic boundaries.
+
+        Args:
+            batches: (sentences, embeddings) in document order
+            max_chars: Close a chunk before it would exceed this length
+
+        Yields:
+            Chunk objects with importance scores
+        """
+        current: list[str] = []
+        current_chars = 0
         chunk_start = 0
+        index = 0
+        previous = None
 
-        for i, sim in enumerate(similarities):
-            if sim >= self.similarity_threshold:
-                # Similar enough to merge
-                current_chunk_sentences.append(sentences[i + 1])
+        for sentences, embeddings in batches:
+            if previous is None:
+                # First sentence of the text starts the first chunk
+                similarities = np.concatenate(([np.inf], self._consecutive_similarities(embeddings)))
             else:
-                # Semantic boundary detected - create chunk
-                chunk_text = " ".join(current_chunk_sentences)
-                chunk = Chunk(
-                    text=chunk_text,
-                    start_idx=chunk_start,
-                    end_idx=i,
-                    sentences=current_chunk_sentences.copy(),
-                )
-                chunks.append(chunk)
-
-                # Start new chunk
-                current_chunk_sentences = [sentences[i + 1]]
-                chunk_start = i + 1
+                similarities = self._consecutive_similarities(np.vstack((previous, embeddings)))
+            previous = embeddings[-1:]
+
+            for sentence, similarity in zip(sentences, similarities.tolist(), strict=True):
+                length = current_chars + len(sentence) + (1 if current else 0)
+                if current and (
+                    similarity < self.similarity_threshold
+                    or (max_chars is not None and length > max_chars)
+                ):
+                    # Semantic boundary detected - create chunk
+                    yield self._make_chunk(current, chunk_start, index - 1)
+                    current = []
+                    chunk_start = index
+                    length = len(sentence)
+
+                current.append(sentence)
+                current_chars = length
+                index += 1
 
         # Add final chunk
-        if current_chunk_sentences:
-            chunk_text = " ".join(current_chunk_sentences)
-            chunk = Chunk(
-                text=chunk_text,
-                start_idx=chunk_start,
-                end_idx=len(sentences) - 1,
-                sentences=current_chunk_sentences.copy(),
-            )
-            chunks.append(chunk)
-
-        # Calculate importance scores
-        for chunk in chunks:
-            chunk.importance_score = self._calculate_importance(chunk)
-
-        logger.debug(f"Created {len(chunks)} semantic chunks from {len(sentences)} sentences")
-
-        return chunks
+        if current:
+            yield self._make_chunk(current, chunk_start, index - 1)
+
+    def _make_chunk(self, sentences: list[str], start_idx: int, end_idx: int) -> Chunk:
+        """Build a scored chunk from consecutive sentences."""
+        chunk = Chunk(
+            text=" ".join(sentences),
+            start_idx=start_idx,
+            end_idx=end_idx,
+            sentences=sentences,
+        )
+        chunk.importance_score = self._calculate_importance(chunk)
+        return chunk
 
     def compress_text(
         self,
@@ -136,25 +136,8 @@ daedelus_get_suggestions() {
     local cwd_escaped="$(daedelus_json_escape "$PWD")"
     local partial_escaped="$(daedelus_json_escape "$partial")"
 
-    # Get recent history (last 10 commands)
-    local history_json="["
-    local first=1
-    local count=0
-
-    # Read history in reverse
-    while IFS= read -r line; do
-        if [[ -n "$line" ]] && [[ $count -lt 10 ]]; then
-            if [[ $first -eq 0 ]]; then
-                history_json+=","
-            fi
-            local line_escaped="$(daedelus_json_escape "$line")"
-            history_json+="\"$line_escaped\""
-            first=0
-            ((count++))
-        fi
-    done < <(history 10 | sed 's/^[[:space:]]*[0-9]*[[:space:]]*//')
-
-    history_json+="]"
+    # Recent history and its context vector are kept by the daemon per session
+    local session_escaped="$(daedelus_json_escape "$DAEDELUS_SESSION_ID")"
 
     # Build request message
     local message=$(cat <<EOF
@@ -163,7 +146,7 @@ daedelus_get_suggestions() {
     "data": {
         "partial": "$partial_escaped",
         "cwd": "$cwd_escaped",
-        "history": $history_json
+        "session_id": "$session_escaped"
     }
 }
 EOF
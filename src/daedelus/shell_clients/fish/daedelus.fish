@@ -98,20 +98,8 @@ function daedelus_get_suggestions
     set -l cwd_escaped (daedelus_json_escape "$PWD")
     set -l partial_escaped (daedelus_json_escape "$partial")
 
-    # Get recent history
-    set -l history_json "["
-    set -l first 1
-
-    for cmd in (history --max 10)
-        if test $first -eq 0
-            set history_json "$history_json,"
-        end
-        set -l cmd_escaped (daedelus_json_escape "$cmd")
-        set history_json "$history_json\"$cmd_escaped\""
-        set first 0
-    end
-
-    set history_json "$history_json]"
+    # Recent history and its context vector are kept by the daemon per session
+    set -l session_escaped (daedelus_json_escape "$DAEDELUS_SESSION_ID")
 
     # Build request message
     set -l message "{
@@ -119,7 +107,7 @@ function daedelus_get_suggestions
     \"data\": {
         \"partial\": \"$partial_escaped\",
         \"cwd\": \"$cwd_escaped\",
-        \"history\": $history_json
+        \"session_id\": \"$session_escaped\"
     }
 }"
 
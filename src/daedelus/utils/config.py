@@ -46,15 +46,27 @@ class Config:
             "embedding_dim": 128,
             "vocab_size": 50000,
             "model_path": None,  # Will be set dynamically
+            "embedding_cache_path": None,  # Will be set dynamically
+            "embedding_cache_max_entries": 100000,
             "min_count": 2,
             "word_ngrams": 3,
             "epoch": 5,
+            "retrain_every": 0,  # Retrain in the background every N logged commands (0 = on shutdown only)
+            "retrain_nice": 10,  # Niceness added to the training process
+            "retrain_threads": 1,  # fastText training threads
+            "retrain_timeout": 1800.0,  # Seconds before a training process is killed
+            "keep_versions": 2,  # Model versions kept on disk (current and previous)
         },
         "vector_store": {
-            "index_type": "annoy",  # Phase 1: annoy, Phase 2: sqlite-vss
+            "index_type": "auto",  # auto (exact or annoy by size/latency), exact, annoy
             "index_path": None,  # Will be set dynamically
             "n_trees": 10,
             "search_k": -1,  # -1 means use n_trees * n
+            "compaction_threshold": 1000,  # New vectors merged into the index in the background
+            "quantization": "int8",  # Exact backend storage: int8, float16, float32
+            "exact_max_vectors": 100000,  # Auto mode uses Annoy above this many vectors
+            "latency_budget_ms": 5.0,  # Auto mode uses Annoy if exact queries are slower
+            "deduplicate": True,  # One vector per distinct command (repeats update metadata)
         },
         "database": {
             "path": None,  # Will be set dynamically
@@ -81,7 +93,15 @@ class Config:
             "max_suggestions": 5,
             "min_confidence": 0.3,
             "context_window": 10,  # Number of recent commands to consider
+            "max_sessions": 128,  # Shell sessions whose context the daemon keeps resident
             "enable_fuzzy": True,
+            "fuzzy_score_cutoff": 65,  # Minimum rapidfuzz score (0-100) for typo matches
+            "fuzzy_latency_budget_ms": 15.0,  # Skip the fuzzy tier after this much time
+            "fuzzy_vocabulary_size": 20000,  # Distinct commands kept in memory
+            "directory_shard_top_k": 10,  # Commands precomputed per directory/project
+            "directory_shard_max_dirs": 256,  # Directory shards kept before LRU eviction
+            "enable_prediction": True,  # Precompute next-command suggestions after each log
+            "prediction_pool_size": 50,  # Candidates precomputed per session
         },
         "performance": {
             "cache_size": 1000,
@@ -181,6 +201,9 @@ class Config:
         if self.config["model"]["model_path"] is None:
             self.config["model"]["model_path"] = str(self.data_dir / "daedelus.bin")
 
+        if self.config["model"]["embedding_cache_path"] is None:
+            self.config["model"]["embedding_cache_path"] = str(self.data_dir / "embedding_cache")
+
         # Vector store paths
         if self.config["vector_store"]["index_path"] is None:
             self.config["vector_store"]["index_path"] = str(self.data_dir / "index")
@@ -202,6 +202,36 @@ def mock_embeddings(monkeypatch):
     monkeypatch.setattr("daedelus.core.embeddings.CommandEmbedder", MockEmbedder)
 
 
+@pytest.fixture
+def hashed_embedder(temp_dir: Path):
+    """
+    CommandEmbedder backed by deterministic per-token vectors instead of a
+    trained FastText model (exercises the real tokenize/pool/cache code).
+
+    Args:
+        temp_dir: Temporary directory fixture
+
+    Returns:
+        CommandEmbedder with a 16-dimensional stand-in model
+    """
+    import zlib
+
+    import numpy as np
+
+    from daedelus.core.embeddings import CommandEmbedder
+
+    class HashedWordVectors:
+        words = []
+
+        def get_word_vector(self, word: str) -> np.ndarray:
+            rng = np.random.default_rng(zlib.crc32(word.encode()))
+            return rng.random(16, dtype=np.float32)
+
+    embedder = CommandEmbedder(temp_dir / "model.bin", embedding_dim=16)
+    embedder.model = HashedWordVectors()
+    return embedder
+
+
 @pytest.fixture
 def mock_llm(monkeypatch):
     """
@@ -0,0 +1,128 @@
+"""
+Tests for argument-aware command structure index.
+
+Created by: orpheus497
+"""
+
+from daedelus.core.command_structure import CommandStructureIndex
+from daedelus.core.suggestions import SuggestionEngine
+
+
+def _build_index() -> CommandStructureIndex:
+    index = CommandStructureIndex()
+    for i in range(20):
+        index.add_command(f"git commit -m 'change {i}'")
+    for _ in range(5):
+        index.add_command("git checkout main")
+    index.add_command("git commit --amend --no-edit")
+    index.add_command("git status")
+    index.add_command("docker ps -a")
+    return index
+
+
+def test_subcommand_completion():
+    """Test subcommands are completed by usage count."""
+    index = _build_index()
+    results = index.complete("git c")
+
+    assert [r["token"] for r in results] == ["commit", "checkout"]
+    assert results[0]["command"] == "git commit"
+    assert results[0]["kind"] == "subcommand"
+
+
+def test_flag_completion_excludes_used_flags():
+    """Test flag completion under a subcommand."""
+    index = _build_index()
+    results = index.complete("git commit --amend -")
+
+    tokens = [r["token"] for r in results]
+    assert "-m" in tokens
+    assert "--no-edit" in tokens
+    assert "--amend" not in tokens
+
+
+def test_high_cardinality_collapses():
+    """Test distinct commit messages collapse into one subcommand node."""
+    index = _build_index()
+    stats = index.get_statistics()
+
+    assert stats["base_commands"] == 2
+    assert index.roots["git"].subcommands["commit"].count == 21
+
+
+def test_argument_completion():
+    """Test concrete argument values are completed."""
+    index = _build_index()
+    results = index.complete("git commit -m c")
+
+    assert results[0]["command"] == "git commit -m 'change 0'"
+    assert results[0]["kind"] == "argument"
+
+
+def test_unbalanced_quotes():
+    """Test completion inside an open quote returns nothing."""
+    index = _build_index()
+    assert index.complete("git commit -m 'wip") == []
+
+
+def test_load_from_database(test_db):
+    """Test index is built with history frequencies."""
+    for _ in range(3):
+        test_db.log_command("kubectl get pods", "/home/user", 0, 0.2)
+    test_db.log_command("kubectl apply -f app.yaml", "/home/user", 0, 0.5)
+
+    index = CommandStructureIndex()
+    assert index.load_from_database(test_db) == 2
+    assert index.roots["kubectl"].count == 4
+
+
+def test_engine_tokens_mode(test_db):
+    """Test suggestion engine token mode uses the structure index."""
+    engine = SuggestionEngine(
+        test_db, embedder=None, vector_store=None, structure_index=_build_index()
+    )
+    suggestions = engine.get_suggestions("git ch", mode="tokens")
+
+    assert suggestions[0]["command"] == "git checkout"
+    assert suggestions[0]["source"] == "structure"
+
+
+def test_completion_keeps_quoted_and_escaped_words_intact():
+    """Test the completed word replaces the raw quoted/escaped partial word."""
+    index = CommandStructureIndex()
+    for _ in range(3):
+        index.add_command("git checkout 'my branch'")
+
+    expected = "git checkout 'my branch'"
+    assert index.complete("git checkout my\\ b")[0]["command"] == expected
+    assert index.complete('git checkout "my b"')[0]["command"] == expected
+    assert index.complete("git checkout 'my'")[0]["command"] == expected
+    assert index.complete("git checkout m")[0]["command"] == expected
+    # An escaped trailing space belongs to the word being completed
+    assert index.complete("git checkout my\\ ")[0]["command"] == expected
+    assert index.complete("git  checkout ")[0]["command"] == "git  checkout 'my branch'"
+
+
+def test_completion_after_pipes_and_lists():
+    """Test the last simple command of a pipeline or list is completed."""
+    index = _build_index()
+    index.add_command("ls -la")
+    index.add_command("lsblk")
+    index.add_command("grep -i error")
+
+    assert [r["command"] for r in index.complete("ls | gr")] == ["ls | grep"]
+    assert [r["command"] for r in index.complete("ls|gr")] == ["ls|grep"]
+    assert [r["command"] for r in index.complete("git status && git c")] == [
+        "git status && git commit",
+        "git status && git checkout",
+    ]
+    assert index.complete("git status; git c")[0]["command"] == "git status; git commit"
+    assert [r["command"] for r in index.complete("git status && git co")] == ["git status && git commit"]
+    assert index.complete("ls | grep -")[0]["command"] == "ls | grep -i"
+    assert index.complete("echo 'a | b' && git st")[0]["command"] == "echo 'a | b' && git status"
+
+    # Cursor on an operator or in a redirection target
+    assert index.complete("ls |") == []
+    assert index.complete("git status &&") == []
+    assert index.complete("git status > gi") == []
+    assert index.complete("ls 2>&1 | gr")[0]["command"] == "ls 2>&1 | grep"
@@ -0,0 +1,100 @@
+"""
+Tests for per-directory suggestion shards.
+
+Created by: orpheus497
+"""
+
+from daedelus.core.directory_shards import DirectoryShardCache
+from daedelus.core.suggestions import SuggestionEngine
+
+
+def test_shard_top_k(test_db):
+    """Test directory shards rank by frequency."""
+    for _ in range(4):
+        test_db.log_command("make test", "/srv/app", 0, 1.0)
+    test_db.log_command("make lint", "/srv/app", 0, 1.0)
+    test_db.log_command("ls", "/tmp", 0, 0.01)
+
+    shards = DirectoryShardCache(test_db, top_k=5)
+    results = shards.suggest("/srv/app")
+
+    assert [r["command"] for r in results] == ["make test", "make lint"]
+    assert results[0]["frequency"] == 4
+
+
+def test_project_root_backfill(test_db, temp_dir):
+    """Test project root shards backfill subdirectory suggestions."""
+    project = temp_dir / "project"
+    (project / "src").mkdir(parents=True)
+    (project / "pyproject.toml").write_text("")
+
+    test_db.log_command("pytest", str(project), 0, 1.0)
+    test_db.log_command("vim main.py", str(project / "src"), 0, 1.0)
+
+    shards = DirectoryShardCache(test_db)
+    assert shards.find_project_root(str(project / "src")) == str(project)
+
+    results = shards.suggest(str(project / "src"))
+    commands = {r["command"]: r["scope"] for r in results}
+
+    assert commands["vim main.py"] == "directory"
+    assert commands["pytest"] == "project"
+
+
+def test_project_shard_excludes_sibling_directories(test_db, temp_dir):
+    """Test "_" and "%" in a project root match literally."""
+    project = temp_dir / "my_proj%"
+    (project / "src").mkdir(parents=True)
+    (project / "pyproject.toml").write_text("")
+
+    test_db.log_command("pytest", str(project / "src"), 0, 1.0)
+    test_db.log_command("make sibling", str(temp_dir / "myXprojY" / "src"), 0, 1.0)
+    test_db.log_command("make prefix", str(project) + "-old", 0, 1.0)
+
+    shards = DirectoryShardCache(test_db)
+    commands = {r["command"] for r in shards.suggest(str(project))}
+
+    assert commands == {"pytest"}
+
+
+def test_incremental_record(test_db):
+    """Test logged commands update resident shards without reloading."""
+    test_db.log_command("make test", "/srv/app", 0, 1.0)
+
+    shards = DirectoryShardCache(test_db)
+    shards.suggest("/srv/app")
+
+    for _ in range(3):
+        shards.record("make build", "/srv/app")
+
+    results = shards.suggest("/srv/app")
+    assert results[0]["command"] == "make build"
+    assert shards.get_statistics()["loads"] == 1
+
+
+def test_lru_eviction(test_db):
+    """Test least recently visited directories are evicted."""
+    shards = DirectoryShardCache(test_db, max_directories=2)
+
+    shards.suggest("/a")
+    shards.suggest("/b")
+    shards.suggest("/a")
+    shards.suggest("/c")
+
+    stats = shards.get_statistics()
+    assert stats["resident_shards"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_engine_empty_buffer(test_db):
+    """Test engine serves empty-buffer suggestions from the shard."""
+    for _ in range(3):
+        test_db.log_command("cargo build", "/srv/rust", 0, 5.0)
+
+    shards = DirectoryShardCache(test_db)
+    engine = SuggestionEngine(test_db, embedder=None, vector_store=None, directory_shards=shards)
+
+    suggestions = engine.get_suggestions("", cwd="/srv/rust")
+
+    assert suggestions[0]["command"] == "cargo build"
+    assert suggestions[0]["source"] == "directory_shard"
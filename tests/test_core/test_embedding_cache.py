@@ -0,0 +1,126 @@
+"""
+Tests for persistent embedding cache.
+
+Created by: orpheus497
+"""
+
+import numpy as np
+
+from daedelus.core.embedding_cache import EmbeddingCache
+
+
+def test_encode_matches_embedder(hashed_embedder, temp_dir):
+    """Test cached embeddings equal freshly encoded ones."""
+    cache = EmbeddingCache(hashed_embedder, temp_dir / "cache")
+    commands = ["git status", "ls -la", "git status"]
+
+    vectors = cache.encode(commands)
+
+    np.testing.assert_allclose(vectors, hashed_embedder.encode_batch(commands))
+    assert len(cache) == 2
+    assert cache.get_statistics()["hits"] == 0
+
+
+def test_only_new_commands_encoded(hashed_embedder, temp_dir):
+    """Test a second pass only encodes commands not seen before."""
+    cache = EmbeddingCache(hashed_embedder, temp_dir / "cache", initial_capacity=2)
+    cache.encode(["git status", "ls -la"])
+
+    vectors = cache.encode(["ls -la", "make", "git status", "npm test"])
+
+    stats = cache.get_statistics()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+    assert stats["capacity"] >= 4
+    np.testing.assert_allclose(vectors[1], hashed_embedder.encode_command("make"))
+
+
+def test_persistence(hashed_embedder, temp_dir):
+    """Test entries survive a reload when the model version is unchanged."""
+    cache = EmbeddingCache(hashed_embedder, temp_dir / "cache")
+    expected = cache.encode(["docker ps", "kubectl get pods"])
+    cache.flush()
+
+    reloaded = EmbeddingCache(hashed_embedder, temp_dir / "cache")
+    assert len(reloaded) == 2
+
+    np.testing.assert_allclose(reloaded.encode(["kubectl get pods"])[0], expected[1])
+    assert reloaded.get_statistics()["hits"] == 1
+
+
+def test_invalidated_on_retrain(hashed_embedder, temp_dir):
+    """Test a new model version drops all cached embeddings."""
+    cache = EmbeddingCache(hashed_embedder, temp_dir / "cache")
+    cache.encode(["git status", "ls -la"])
+
+    hashed_embedder.model = hashed_embedder.model  # Retrained model
+    cache.encode(["git status"])
+
+    stats = cache.get_statistics()
+    assert stats["invalidations"] == 1
+    assert stats["entries"] == 1
+    assert stats["misses"] == 3
+
+
+def test_bounded_by_max_entries(hashed_embedder, temp_dir):
+    """Test least recently used entries are evicted and the matrix stays bounded."""
+    cache = EmbeddingCache(hashed_embedder, temp_dir / "cache", initial_capacity=4, max_entries=10)
+    cache.encode([f"cmd {i}" for i in range(10)])
+    cache.encode(["cmd 0", "cmd 1"])  # Recently used, survive eviction
+
+    vectors = cache.encode([f"new {i}" for i in range(5)] + ["cmd 0"])
+
+    stats = cache.get_statistics()
+    assert stats["entries"] <= 10
+    assert stats["capacity"] <= 10
+    assert stats["evictions"] > 0
+    np.testing.assert_allclose(vectors, hashed_embedder.encode_batch([f"new {i}" for i in range(5)] + ["cmd 0"]))
+
+    hits = stats["hits"]
+    cache.encode(["cmd 1", "new 4"])
+    assert cache.get_statistics()["hits"] == hits + 2
+
+    # Compacted entries reload with their vectors
+    cache.flush()
+    reloaded = EmbeddingCache(hashed_embedder, temp_dir / "cache", max_entries=10)
+    np.testing.assert_allclose(reloaded.encode(["cmd 1"])[0], hashed_embedder.encode_command("cmd 1"))
+    assert reloaded.get_statistics()["hits"] == 1
+
+    # A batch larger than the bound is still encoded in full
+    big = [f"big {i}" for i in range(25)]
+    np.testing.assert_allclose(cache.encode(big), hashed_embedder.encode_batch(big))
+    assert len(cache) == 10
+
+
+def test_reload_after_eviction_without_flush(hashed_embedder, temp_dir):
+    """Test keys on disk never point at rows an eviction has reused."""
+    cache = EmbeddingCache(hashed_embedder, temp_dir / "cache", max_entries=10)
+    cache.encode([f"cmd {i}" for i in range(10)])
+    cache.flush()
+
+    # Evicts and refills rows; the process "dies" before the next flush
+    cache.encode([f"new {i}" for i in range(6)])
+    assert cache.get_statistics()["evictions"] > 0
+
+    reloaded = EmbeddingCache(hashed_embedder, temp_dir / "cache", max_entries=10)
+    cached = [f"cmd {i}" for i in range(10)] + [f"new {i}" for i in range(6)]
+    vectors = reloaded.encode(cached)
+    np.testing.assert_allclose(vectors, hashed_embedder.encode_batch(cached))
+    assert reloaded.get_statistics()["hits"] > 0
+
+
+def test_switch_model_seeds_entries(hashed_embedder, temp_dir):
+    """Test switching models keeps the vectors already encoded with the new one."""
+    cache = EmbeddingCache(hashed_embedder, temp_dir / "cache")
+    cache.encode(["git status", "ls -la"])
+
+    hashed_embedder.model = hashed_embedder.model  # Retrained model
+    commands = ["git status", "make", "git status"]
+    cache.switch_model(hashed_embedder, commands, hashed_embedder.encode_batch(commands))
+
+    stats = cache.get_statistics()
+    assert stats["invalidations"] == 1
+    assert stats["entries"] == 2
+
+    cache.encode(["make", "git status"])
+    assert cache.get_statistics()["hits"] == 2
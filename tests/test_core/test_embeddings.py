@@ -7,10 +7,65 @@ Created by: orpheus497
 """
 
 
+import random
+import re
+import shlex
+from pathlib import Path
+
 import numpy as np
 import pytest
 
-from daedelus.core.embeddings import CommandEmbedder
+from daedelus.core.embeddings import CommandEmbedder, _tokenize_cached
+
+GOLDEN_COMMANDS = [
+    "git status",
+    "git commit -m 'Initial commit'",
+    'git commit -m "fix \\"quoted\\" \\\\ path"',
+    "cat /etc/hosts  |grep x",
+    "cd ~/projects/app/",
+    "ls -la ./ ../ / . ..",
+    "find . -name '*.py' -exec rm {} \\;",
+    "echo it's",
+    'echo "unterminated',
+    "trailing backslash \\",
+    "tar czf a.tar.gz ./src/./lib/.",
+    "--prefix=/usr/local make install",
+    "docker run -v $PWD:/app -p 8000:8000 app:latest",
+    "echo 'a b'c\"d e\"f g",
+    "printf '%s\\n' \"$HOME\" >> ~/.bashrc",
+    "echo ''  \"\" x",
+    "grep -rn 'café' src/naïve/日本.txt",
+    "a\\ b\\\tc",
+    "tab\tseparated\x0bvertical\x1cfs",
+    "echo 'multi\nline' done",
+    "under_score and-dash dots.in.word 123abc",
+    "  padded   command  ",
+    "",
+]
+
+
+def _reference_tokenize(command: str) -> list[str]:
+    """Previous tokenizer (shlex.split, Path.name, per-word findall)."""
+    command = command.strip()
+    if not command:
+        return []
+    try:
+        parts = shlex.split(command)
+    except ValueError:
+        parts = command.split()
+
+    tokens: list[str] = []
+    for part in parts:
+        if part.startswith("-"):
+            tokens.append(part)
+        elif "/" in part:
+            tokens.append(part)
+            basename = Path(part).name
+            if basename != part:
+                tokens.append(basename)
+        else:
+            tokens.extend(re.findall(r"\w+|[^\w\s]", part))
+    return tokens
 
 
 def test_embedder_initialization(temp_dir):
@@ -158,3 +213,57 @@ def test_special_characters(temp_dir):
     vector = embedder.encode(special)
 
     assert vector.shape == (128,)
+
+
+def test_encode_batch_matches_encode_command(hashed_embedder):
+    """Test batched encoding equals per-command encoding."""
+    commands = ["git status", "", "docker run -p 8000:8000 myapp", "echo 'a b' | wc -l", "ls"]
+    matrix = hashed_embedder.encode_batch(commands * 2000)
+
+    assert matrix.shape == (10000, 16)
+    assert matrix.dtype == np.float32
+    assert not matrix[1].any()
+    for i, cmd in enumerate(commands):
+        np.testing.assert_allclose(matrix[i], hashed_embedder.encode_command(cmd), rtol=1e-5)
+        np.testing.assert_allclose(matrix[9995 + i], matrix[i], rtol=1e-6)
+
+
+def test_tokenize_fast_path_matches_shlex(hashed_embedder):
+    """Test unquoted commands tokenize like the shlex path."""
+    assert hashed_embedder.tokenize("git commit -m 'Initial commit'") == [
+        "git",
+        "commit",
+        "-m",
+        "Initial",
+        "commit",
+    ]
+    assert hashed_embedder.tokenize("cat /etc/hosts  |grep x") == [
+        "cat",
+        "/etc/hosts",
+        "hosts",
+        "|",
+        "grep",
+        "x",
+    ]
+
+
+def test_tokenize_matches_reference_on_golden_corpus():
+    """Test the single-pass tokenizer matches the shlex-based tokenizer."""
+    rng = random.Random(0)
+    alphabet = list("ab/-._ '\"\\\t\n|$é") + ["\x0b", "\xa0", "//", "./", "--"]
+    fuzzed = ["".join(rng.choices(alphabet, k=rng.randint(1, 16))) for _ in range(5000)]
+
+    for command in GOLDEN_COMMANDS + fuzzed:
+        assert list(_tokenize_cached.__wrapped__(command)) == _reference_tokenize(command), command
+
+
+def test_token_vector_cache(hashed_embedder):
+    """Test token vectors are cached and cleared when the model changes."""
+    hashed_embedder.encode_batch(["git status", "git stash"])
+    assert hashed_embedder.cache_stats["misses"] == 3
+
+    hashed_embedder.encode_command("git status")
+    assert hashed_embedder.cache_stats["hits"] == 2
+
+    hashed_embedder.model = hashed_embedder.model
+    assert hashed_embedder.get_training_stats()["cached_token_vectors"] == 0
@@ -0,0 +1,109 @@
+"""
+Tests for fuzzy command index.
+
+Tests the typo-tolerant tier of the suggestion engine.
+
+Created by: orpheus497
+"""
+
+from daedelus.core.fuzzy_index import FuzzyCommandIndex
+from daedelus.core.suggestions import SuggestionEngine
+
+
+def _populate(db):
+    for _ in range(5):
+        db.log_command("git status", "/home/user/project", 0, 0.05)
+    for _ in range(3):
+        db.log_command("docker ps", "/home/user/project", 0, 0.1)
+    db.log_command("docker pull nginx", "/home/user/project", 0, 2.0)
+    db.log_command("ls -la", "/home/user", 0, 0.01)
+
+
+def test_load_from_database(test_db):
+    """Test vocabulary loading."""
+    _populate(test_db)
+
+    index = FuzzyCommandIndex()
+    count = index.load_from_database(test_db)
+
+    assert count == 4
+    assert len(index) == 4
+
+
+def test_typo_matches(test_db):
+    """Test mistyped prefixes resolve to the intended command."""
+    _populate(test_db)
+
+    index = FuzzyCommandIndex()
+    index.load_from_database(test_db)
+
+    assert index.search("gti status")[0]["command"] == "git status"
+    assert index.search("dokcer p")[0]["command"] == "docker ps"
+
+
+def test_short_query_ignored(test_db):
+    """Test queries below minimum length return nothing."""
+    _populate(test_db)
+
+    index = FuzzyCommandIndex(min_query_length=3)
+    index.load_from_database(test_db)
+
+    assert index.search("gt") == []
+
+
+def test_add_command_updates_vocabulary():
+    """Test incremental additions are searchable immediately."""
+    index = FuzzyCommandIndex()
+    index.add_command("kubectl get pods")
+
+    # Build head cache, then add again
+    assert index.search("kubcetl get")[0]["command"] == "kubectl get pods"
+    index.add_command("kubectl get nodes")
+    index.add_command("kubectl get nodes")
+
+    results = index.search("kubcetl get")
+    assert results[0]["command"] == "kubectl get nodes"
+    assert results[0]["frequency"] == 2
+
+
+def test_cached_results(test_db):
+    """Test repeated prefixes are served from cache."""
+    _populate(test_db)
+
+    index = FuzzyCommandIndex()
+    index.load_from_database(test_db)
+
+    index.search("gti status")
+    index.search("gti status")
+
+    assert index.get_statistics()["cache"]["hits"] == 1
+
+
+def test_frequency_change_refreshes_cached_results():
+    """Test a repeated command's new frequency is not hidden by the cache."""
+    index = FuzzyCommandIndex()
+    index.add_command("git status")
+    index.add_command("git stash")
+
+    assert index.search("git sta")[0]["frequency"] == 1
+    index.add_command("git stash")
+    index.add_command("git stash")
+
+    results = index.search("git sta")
+    assert results[0]["command"] == "git stash"
+    assert results[0]["frequency"] == 3
+
+
+def test_engine_fuzzy_tier(test_db):
+    """Test suggestion engine falls through to fuzzy tier for typos."""
+    _populate(test_db)
+
+    index = FuzzyCommandIndex()
+    index.load_from_database(test_db)
+
+    engine = SuggestionEngine(test_db, embedder=None, vector_store=None, fuzzy_index=index)
+    suggestions = engine.get_suggestions("gti status", cwd="/home/user/project")
+
+    assert suggestions
+    assert suggestions[0]["command"] == "git status"
+    assert suggestions[0]["source"] == "fuzzy_typo"
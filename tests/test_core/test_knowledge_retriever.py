@@ -0,0 +1,243 @@
+"""
+Tests for knowledge base retrieval.
+
+Created by: orpheus497
+"""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from daedelus.core.knowledge_retriever import KnowledgeRetriever, bump_knowledge_version
+
+SECTIONS = [
+    (
+        "Chapter 1",
+        "1.1",
+        "Storage - Checking disk space",
+        "Use df -h to check disk space usage on mounted filesystems. df reports free space.",
+    ),
+    (
+        "Chapter 1",
+        "1.2",
+        "Storage - Disk usage per directory",
+        "du -sh shows directory sizes. Combine with sort to find directories using disk space.",
+    ),
+    (
+        "Chapter 1",
+        "1.3",
+        "Storage - Mounting filesystems",
+        "mount attaches a filesystem; check /etc/fstab. lsblk lists disk partitions.",
+    ),
+    (
+        "Chapter 2",
+        "2.1",
+        "Networking - SSH key setup",
+        "Generate keys with ssh-keygen and copy them with ssh-copy-id for passwordless login.",
+    ),
+    (
+        "Chapter 2",
+        "2.2",
+        "Networking - SSH server hardening",
+        "Edit sshd_config to disable root login. Keys are preferred over passwords for ssh.",
+    ),
+    (
+        "Chapter 2",
+        "2.3",
+        "Networking - Checking open ports",
+        "ss -tulpn lists listening ports; nmap scans remote hosts for open ports.",
+    ),
+    (
+        "Chapter 3",
+        "3.1",
+        "Archives - Compress with tar",
+        "tar czf archive.tar.gz dir/ compresses a directory with gzip.",
+    ),
+    (
+        "Chapter 3",
+        "3.2",
+        "Archives - Zip files",
+        "zip -r archive.zip dir/ creates zip archives. You can also compress with tar.",
+    ),
+    (
+        "Chapter 4",
+        "4.1",
+        "Security - Firewall configuration",
+        "Use ufw to configure the firewall. Allow ssh before enabling the firewall.",
+    ),
+    (
+        "Chapter 4",
+        "4.2",
+        "Security - File permissions",
+        "chmod and chown change permissions and ownership of files.",
+    ),
+    (
+        "Chapter 5",
+        "5.1",
+        "Services - Managing systemd services",
+        "systemctl start, stop and enable services. journalctl shows service logs.",
+    ),
+    (
+        "Chapter 6",
+        "6.1",
+        "Hardware - GPU drivers",
+        "Install nvidia drivers and check the GPU with nvidia-smi. CUDA needs matching drivers.",
+    ),
+    (
+        "Chapter 7",
+        "7.1",
+        "Packages - Installing packages with apt",
+        "apt install installs packages; apt update refreshes package lists.",
+    ),
+    (
+        "Chapter 8",
+        "8.1",
+        "Processes - Finding processes",
+        "ps aux and pgrep find running processes; kill sends signals to processes.",
+    ),
+]
+
+# Fixed relevance set: query -> expected top section
+RELEVANCE_QUERIES = {
+    "how to check disk space": "1.1",
+    "disk usage of a directory": "1.2",
+    "SSH key setup": "2.1",
+    "compress with tar": "3.1",
+    "firewall configuration": "4.1",
+    "GPU nvidia": "6.1",
+    "systemd services": "5.1",
+    "open ports": "2.3",
+    "change file permissions": "4.2",
+    "install packages": "7.1",
+    "mount a filesystem": "1.3",
+    "find running processes": "8.1",
+}
+
+
+def _create_knowledge_db(db_path: Path, sections: list[tuple[str, str, str, str]]) -> None:
+    """Create the knowledge tables (as scripts/integrate_redbook.py does) and index sections."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE knowledge_base (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL, chapter TEXT, section TEXT,
+            title TEXT NOT NULL, content TEXT NOT NULL,
+            part TEXT, topics TEXT, metadata TEXT,
+            UNIQUE(source, chapter, section)
+        );
+        CREATE VIRTUAL TABLE knowledge_base_fts USING fts5(
+            title, content, chapter, section, part, topics,
+            content='knowledge_base', content_rowid='id'
+        );
+        CREATE TABLE knowledge_commands (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, knowledge_id INTEGER,
+            source TEXT NOT NULL, command TEXT NOT NULL, chapter TEXT, section TEXT
+        );
+    """)
+    for chapter, section, title, content in sections:
+        cursor = conn.execute(
+            "INSERT INTO knowledge_base (source, chapter, section, title, content) "
+            "VALUES ('redbook', ?, ?, ?, ?)",
+            (chapter, section, title, content),
+        )
+        conn.execute(
+            "INSERT INTO knowledge_commands (knowledge_id, source, command, chapter, section) "
+            "VALUES (?, 'redbook', ?, ?, ?)",
+            (cursor.lastrowid, content.split()[1], chapter, section),
+        )
+    conn.execute("INSERT INTO knowledge_base_fts(knowledge_base_fts) VALUES('rebuild')")
+    bump_knowledge_version(conn)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def knowledge_db(temp_dir: Path) -> Path:
+    """Database with a small indexed knowledge base."""
+    db_path = temp_dir / "history.db"
+    _create_knowledge_db(db_path, SECTIONS)
+    return db_path
+
+
+def test_search_finds_relevant_section(knowledge_db):
+    """Test a query returns its section with commands attached."""
+    retriever = KnowledgeRetriever(knowledge_db)
+    results = retriever.search("how to check disk space", limit=3, source="redbook")
+
+    assert results[0].title == "Storage - Checking disk space"
+    assert results[0].commands == ["df"]
+    assert retriever.search("ssh", source="other") == []
+
+
+def test_repeated_search_uses_cache(knowledge_db):
+    """Test equivalent queries are served from the cache as copies."""
+    retriever = KnowledgeRetriever(knowledge_db)
+    first = retriever.search("disk  space")
+    first[0].rank = -1.0
+
+    second = retriever.search("Disk space")
+
+    assert retriever.stats["cache_hits"] == 1
+    assert [r.title for r in second] == [r.title for r in first]
+    assert second[0].rank != -1.0
+
+
+def test_cache_invalidated_by_version_bump(knowledge_db):
+    """Test a reindex (version bump from another connection) clears the cache."""
+    retriever = KnowledgeRetriever(knowledge_db)
+    assert retriever.search("firewall")[0].title == "Security - Firewall configuration"
+
+    conn = sqlite3.connect(knowledge_db)
+    conn.execute("UPDATE knowledge_base SET title = 'Security - Firewall rules' WHERE section = '4.1'")
+    bump_knowledge_version(conn)
+    conn.commit()
+    conn.close()
+
+    assert retriever.search("firewall")[0].title == "Security - Firewall rules"
+    assert retriever.stats["invalidations"] == 1
+    assert retriever.stats["cache_hits"] == 0
+
+
+def test_connection_is_read_only_and_reused(knowledge_db):
+    """Test the retriever keeps one read-only connection across calls."""
+    retriever = KnowledgeRetriever(knowledge_db)
+    retriever.search("tar")
+    conn = retriever._conn
+
+    assert retriever.has_knowledge_base()
+    assert retriever.get_statistics(source="redbook")["total_chapters"] == 8
+    assert retriever._conn is conn
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("DELETE FROM knowledge_base")
+
+    retriever.close()
+    assert retriever._conn is None
+
+
+@pytest.mark.parametrize("query,section", sorted(RELEVANCE_QUERIES.items()))
+def test_bm25_ranking_relevance(knowledge_db, query, section):
+    """Test the expected section ranks first for each query of the relevance set."""
+    retriever = KnowledgeRetriever(knowledge_db)
+    results = retriever.search(query, limit=3)
+
+    assert results[0].section == section
+    assert [r.rank for r in results] == sorted((r.rank for r in results), reverse=True)
+
+
+def test_search_returns_highlighted_snippet(knowledge_db):
+    """Test results carry an FTS snippet with the matched terms highlighted."""
+    retriever = KnowledgeRetriever(knowledge_db)
+    result = retriever.search("open ports")[0]
+
+    assert "**ports**" in result.snippet
+    assert result.content.startswith("ss -tulpn")
+
+
+def test_search_falls_back_without_fts_terms(knowledge_db):
+    """Test queries with FTS syntax or no words at all do not fail."""
+    retriever = KnowledgeRetriever(knowledge_db)
+
+    assert retriever.search('"') == []
+    assert retriever.search("/etc/fstab")[0].section == "1.3"
+    assert retriever.search("ssh*")[0].section.startswith("2.")
@@ -0,0 +1,119 @@
+"""
+Tests for out-of-process model retraining.
+
+Created by: orpheus497
+"""
+
+import numpy as np
+import pytest
+
+from daedelus.core.embeddings import CommandEmbedder
+from daedelus.core.model_trainer import ModelQualityError, ModelTrainer
+
+COMMANDS = [
+    "git status",
+    "git commit -m message",
+    "git push origin main",
+    "git pull --rebase",
+    "ls -la",
+    "cd /tmp",
+    "docker ps -a",
+    "docker compose up -d",
+    "python -m pytest -q",
+    "pip install -e .",
+    "make test",
+    "grep -rn pattern src",
+] * 5
+
+
+@pytest.fixture
+def base_embedder(temp_dir):
+    """Untrained embedder whose hyperparameters the trainer copies."""
+    return CommandEmbedder(temp_dir / "model.bin", embedding_dim=16, min_count=1, epoch=2)
+
+
+def test_run_trains_and_promotes(temp_dir, base_embedder):
+    """Test a retrain produces a loaded candidate and promotes it atomically."""
+    trainer = ModelTrainer(base_embedder.model_path, keep_versions=1)
+    installed = []
+
+    assert trainer.run(base_embedder, COMMANDS, on_complete=installed.append)
+
+    candidate = installed[0]
+    assert candidate.model is not None
+    assert candidate.model_path.parent == trainer.versions_dir
+    assert candidate.encode_command("git status").shape == (16,)
+    assert base_embedder.model_path.exists()
+    assert len(base_embedder.corpus) == len(set(COMMANDS))
+    assert trainer.get_statistics()["accepted"] == 1
+
+    # A second version replaces the first on disk
+    trainer.run(base_embedder, COMMANDS, on_complete=lambda candidate: None)
+    assert len(list(trainer.versions_dir.glob("*.bin"))) == 1
+    assert base_embedder.get_corpus_stats()["segments"] == 1
+
+
+def test_rejected_install_keeps_current_model(temp_dir, base_embedder):
+    """Test a candidate the callback refuses is discarded and not promoted."""
+    trainer = ModelTrainer(base_embedder.model_path)
+
+    def refuse(candidate: CommandEmbedder) -> None:
+        raise ModelQualityError("index check failed")
+
+    assert not trainer.run(base_embedder, COMMANDS, on_complete=refuse)
+    assert not base_embedder.model_path.exists()
+    assert not list(trainer.versions_dir.glob("*.bin"))
+    assert trainer.stats["rejected"] == 1
+
+
+def test_failed_training_cleans_up(temp_dir, base_embedder, monkeypatch):
+    """Test a failing training process leaves no partial files behind."""
+    trainer = ModelTrainer(base_embedder.model_path)
+
+    def fail(*args) -> None:
+        raise RuntimeError("training process exited with code 1")
+
+    monkeypatch.setattr(trainer, "_run_subprocess", fail)
+
+    with pytest.raises(RuntimeError):
+        trainer.train(base_embedder, COMMANDS)
+    assert not list(trainer.versions_dir.iterdir())
+    assert trainer.stats["failed"] == 1
+
+
+def test_background_start_runs_once(temp_dir, base_embedder):
+    """Test only one background retrain runs at a time."""
+    trainer = ModelTrainer(base_embedder.model_path)
+    installed = []
+
+    assert trainer.start(base_embedder, COMMANDS, on_complete=installed.append)
+    assert not trainer.start(base_embedder, COMMANDS, on_complete=installed.append)
+    trainer.wait(timeout=120)
+
+    assert not trainer.is_running()
+    assert len(installed) == 1
+
+
+def test_check_quality_rejects_degenerate_model(temp_dir, hashed_embedder):
+    """Test zero and indistinguishable embeddings fail the quality check."""
+    trainer = ModelTrainer(temp_dir / "model.bin")
+
+    class ZeroVectors:
+        words = ["git", "ls"]
+
+        def get_word_vector(self, word: str) -> np.ndarray:
+            return np.zeros(16, dtype=np.float32)
+
+    class ConstantVectors(ZeroVectors):
+        def get_word_vector(self, word: str) -> np.ndarray:
+            return np.ones(16, dtype=np.float32)
+
+    for model in (ZeroVectors(), ConstantVectors()):
+        candidate = CommandEmbedder(temp_dir / "candidate.bin", embedding_dim=16)
+        candidate.model = model
+        with pytest.raises(ModelQualityError):
+            trainer.check_quality(candidate, COMMANDS)
+
+    # Hashed token vectors distinguish commands
+    hashed_embedder.model.words = ["git", "ls"]
+    trainer.check_quality(hashed_embedder, COMMANDS)
@@ -0,0 +1,90 @@
+"""
+Tests for next-command precomputation.
+
+Created by: orpheus497
+"""
+
+import time
+
+from daedelus.core.directory_shards import DirectoryShardCache
+from daedelus.core.prediction_cache import NextCommandPredictor
+from daedelus.core.suggestions import SuggestionEngine
+
+
+def _engine(db) -> SuggestionEngine:
+    return SuggestionEngine(
+        db,
+        embedder=None,
+        vector_store=None,
+        directory_shards=DirectoryShardCache(db),
+    )
+
+
+def _log_sequence(db):
+    for _ in range(3):
+        db.insert_command("git add .", "/srv/app", 0, "s1")
+        db.insert_command("git commit", "/srv/app", 0, "s1")
+    db.insert_command("make test", "/srv/app", 0, "s1")
+
+
+def test_prediction_hit(test_db):
+    """Test empty buffer is served from the precomputed set."""
+    _log_sequence(test_db)
+    predictor = NextCommandPredictor(_engine(test_db), background=False)
+
+    predictor.schedule("s1", "/srv/app", ["git add ."])
+    suggestions = predictor.get("", cwd="/srv/app", session_id="s1")
+
+    assert suggestions[0]["command"] == "git commit"
+    assert suggestions[0]["precomputed"] is True
+    assert predictor.get_statistics()["hits"] == 1
+
+
+def test_one_character_buffer(test_db):
+    """Test one-character buffers filter the candidate pool."""
+    _log_sequence(test_db)
+    predictor = NextCommandPredictor(_engine(test_db), background=False)
+
+    predictor.schedule("s1", "/srv/app", ["git add ."])
+    suggestions = predictor.get("m", cwd="/srv/app", session_id="s1")
+
+    assert [s["command"] for s in suggestions] == ["make test"]
+    assert predictor.get("ma", cwd="/srv/app", session_id="s1") is None
+
+
+def test_cwd_mismatch_misses(test_db):
+    """Test predictions for another directory are not served."""
+    _log_sequence(test_db)
+    predictor = NextCommandPredictor(_engine(test_db), background=False)
+
+    predictor.schedule("s1", "/srv/app", ["git add ."])
+
+    assert predictor.get("", cwd="/tmp", session_id="s1") is None
+    assert predictor.get_statistics()["misses"] == 1
+
+
+def test_other_sessions_miss(test_db):
+    """Test a session never gets another session's predictions."""
+    _log_sequence(test_db)
+    predictor = NextCommandPredictor(_engine(test_db), background=False)
+
+    predictor.schedule("s1", "/srv/app", ["git add ."])
+
+    assert predictor.get("", cwd="/srv/app", session_id="s2") is None
+    assert predictor.get("", cwd="/srv/app") is None
+    assert predictor.get_statistics()["misses"] == 2
+
+
+def test_background_precomputation(test_db):
+    """Test predictions are computed on the worker thread."""
+    _log_sequence(test_db)
+    predictor = NextCommandPredictor(_engine(test_db))
+
+    predictor.schedule("s1", "/srv/app", ["git add ."])
+
+    deadline = time.time() + 5
+    while predictor.get_statistics()["computed"] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert predictor.get("", cwd="/srv/app", session_id="s1")[0]["command"] == "git commit"
+    predictor.shutdown()
@@ -0,0 +1,82 @@
+"""
+Tests for session-resident context state.
+
+Created by: orpheus497
+"""
+
+import numpy as np
+
+from daedelus.core.session_state import SessionStateStore
+
+
+def test_rolling_history():
+    """Test recent commands are bounded per session."""
+    store = SessionStateStore(history_size=3)
+    for cmd in ["ls", "cd src", "make", "make test"]:
+        store.record_command("s1", cmd, "/srv/app")
+
+    state = store.get("s1")
+    assert state.history == ["cd src", "make", "make test"]
+    assert state.cwd == "/srv/app"
+    assert store.get(None) is None
+
+
+def test_bootstrap_from_history(test_db):
+    """Test unknown sessions are rebuilt from the database."""
+    test_db.insert_command("git pull", "/srv/app", 0, "s1")
+    test_db.insert_command("make", "/srv/app/build", 0, "s1")
+    store = SessionStateStore(test_db)
+
+    state = store.get("s1")
+    assert state.history == ["git pull", "make"]
+    assert state.cwd == "/srv/app/build"
+
+    # The command inserted before record_command is not counted twice
+    test_db.insert_command("make install", "/srv/app/build", 0, "s2")
+    assert store.record_command("s2", "make install", "/srv/app/build").history == [
+        "make install"
+    ]
+
+
+def test_context_vector_matches_encode_context(hashed_embedder):
+    """Test the incremental vector equals re-encoding the last five commands."""
+    embedder = hashed_embedder
+    store = SessionStateStore(embedder=embedder)
+    commands = ["git status", "ls -la", "npm test", "black src/", "mypy src/", "npm install"]
+    for cmd in commands:
+        store.record_command("s1", cmd, "/srv/app")
+
+    state = store.get("s1")
+    cached = store.get_context_vector(state)
+    expected = np.mean([embedder.encode_command(c) for c in commands[-5:]], axis=0)
+
+    np.testing.assert_allclose(cached, expected, rtol=1e-5)
+    assert store.get_statistics()["vectors_encoded"] == len(commands)
+
+    np.testing.assert_allclose(
+        embedder.encode_context(cwd="/srv/app", history_vector=cached, partial="git"),
+        embedder.encode_context(cwd="/srv/app", history=commands, partial="git"),
+        rtol=1e-5,
+    )
+
+
+def test_invalidate_vectors(hashed_embedder):
+    """Test vectors are recomputed after invalidation (model retrained)."""
+    store = SessionStateStore(embedder=hashed_embedder)
+    store.record_command("s1", "git status", "/srv/app")
+    store.invalidate_vectors()
+
+    state = store.get("s1")
+    assert state.context_vector is None
+    assert store.get_context_vector(state) is not None
+
+
+def test_session_eviction():
+    """Test least recently active sessions are evicted."""
+    store = SessionStateStore(max_sessions=2)
+    for session in ["a", "b", "c"]:
+        store.record_command(session, "ls", "/tmp")
+
+    stats = store.get_statistics()
+    assert stats["resident_sessions"] == 2
+    assert stats["evictions"] == 1
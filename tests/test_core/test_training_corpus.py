@@ -0,0 +1,111 @@
+"""
+Tests for the streaming training corpus.
+
+Created by: orpheus497
+"""
+
+from daedelus.core.embeddings import CommandEmbedder
+from daedelus.core.training_corpus import TrainingCorpus
+
+
+def test_add_deduplicates_and_rolls_segments(temp_dir):
+    """Test repeated lines are skipped and segments roll at segment_size."""
+    corpus = TrainingCorpus(temp_dir / "corpus", max_size=100, segment_size=4)
+
+    assert corpus.add(["git status", "ls -la", "git status", "", "cd /tmp"]) == 3
+    assert corpus.add([f"cmd {i}" for i in range(6)] + ["ls -la"]) == 6
+
+    assert len(corpus) == 9
+    assert corpus.get_statistics()["segments"] == 3
+    assert corpus.stats["duplicates"] == 2
+    assert list(corpus.iter_lines())[:3] == ["git status", "ls -la", "cd /tmp"]
+
+    # Hashes and counts are rebuilt from the segments on reopen
+    reopened = TrainingCorpus(temp_dir / "corpus", max_size=100, segment_size=4)
+    assert reopened.add(["cmd 5", "cmd 6"]) == 1
+    assert len(reopened) == 10
+
+
+def test_training_file_keeps_recent_and_samples_older(temp_dir):
+    """Test compaction keeps the newest lines and samples older ones to the cap."""
+    corpus = TrainingCorpus(temp_dir / "corpus", max_size=100, segment_size=50, seed=0)
+    corpus.add(f"old {i}" for i in range(150))
+    corpus.add(f"new {i}" for i in range(50))
+
+    path = corpus.training_file()
+    lines = path.read_text().splitlines()
+
+    assert len(lines) == 100
+    assert len(set(lines)) == 100
+    assert lines[-50:] == [f"new {i}" for i in range(50)]
+    assert all(line.startswith("old") for line in lines[:50])
+    assert corpus.get_statistics()["segments"] == 1
+    assert len(corpus) == 100
+
+    # A compact corpus is used as is
+    assert corpus.training_file() == path
+    assert corpus.stats["compactions"] == 1
+
+
+def test_training_file_is_a_frozen_snapshot(temp_dir):
+    """Test lines added or compacted away after training_file() don't change it."""
+    corpus = TrainingCorpus(temp_dir / "corpus", max_size=10, segment_size=100)
+    corpus.add(f"cmd {i}" for i in range(5))
+
+    path = corpus.training_file()
+    expected = path.read_text()
+
+    corpus.add(["git status"])
+    assert path.read_text() == expected
+    assert corpus.get_statistics()["segments"] == 2
+
+    corpus.add(f"more {i}" for i in range(30))
+    assert corpus.stats["compactions"] == 1  # Removed the sealed segment
+    assert path.read_text() == expected
+
+    # The next call takes a new snapshot
+    lines = corpus.training_file().read_text().splitlines()
+    assert len(lines) == 10
+    assert lines[-1] == "more 29"
+    assert path.read_text() != expected
+
+
+def test_compaction_keeps_lines_seen_again(temp_dir):
+    """Test a command logged long ago but run again counts as recent."""
+    corpus = TrainingCorpus(temp_dir / "corpus", max_size=20, segment_size=50, recent_fraction=1.0)
+    corpus.add(["git status"])
+    for start in range(0, 30, 10):
+        corpus.add(f"once {i}" for i in range(start, start + 10))
+        corpus.add(["git status"])
+
+    lines = corpus.training_file().read_text().splitlines()
+
+    assert len(lines) == 20
+    assert lines[-1] == "git status"
+    assert lines[:-1] == [f"once {i}" for i in range(11, 30)]
+
+
+def test_add_bounds_corpus_without_training(temp_dir):
+    """Test the corpus compacts itself once it reaches twice its limit."""
+    corpus = TrainingCorpus(temp_dir / "corpus", max_size=50, segment_size=10)
+    for start in range(0, 1000, 100):
+        corpus.add(f"cmd {i}" for i in range(start, start + 100))
+
+    assert len(corpus) < 100
+    assert corpus.stats["compactions"] > 0
+    assert "cmd 999" in set(corpus.iter_lines())
+
+
+def test_embedder_imports_legacy_corpus_file(temp_dir):
+    """Test an embedder's single-file corpus is imported into segments once."""
+    legacy = temp_dir / "model_corpus.txt"
+    legacy.write_text("git status\nls -la\ngit status\n")
+
+    embedder = CommandEmbedder(temp_dir / "model.bin", embedding_dim=16)
+    stats = embedder.get_corpus_stats()
+
+    assert stats["corpus_exists"]
+    assert stats["corpus_size"] == 2
+    assert not legacy.exists()
+    assert embedder.clear_corpus()
+    assert embedder.get_corpus_stats()["corpus_size"] == 0
@@ -0,0 +1,140 @@
+"""
+Tests for columnar vector store metadata.
+
+Created by: orpheus497
+"""
+
+import json
+
+import numpy as np
+
+from daedelus.core.vector_metadata import VectorMetadata, aggregate_uses
+from daedelus.core.vector_store import VectorStore
+
+
+def test_rows_materialize_set_fields_only():
+    """Test rows round-trip the fields they were added with."""
+    metadata = VectorMetadata()
+    metadata.append("git status", {"timestamp": 10.0, "cwd": "/srv/app", "exit_code": 0})
+    metadata.append("ls", {"cwd": "/srv/app", "source": "import"})
+    metadata.append("échec ✓")
+
+    assert metadata[0] == {
+        "timestamp": 10.0,
+        "cwd": "/srv/app",
+        "exit_code": 0,
+        "count": 1,
+        "success_count": 1,
+        "command": "git status",
+        "index": 0,
+    }
+    assert metadata[1]["source"] == "import"
+    assert "exit_code" not in metadata[1]
+    assert metadata[2]["command"] == "échec ✓"
+    assert "cwd" not in metadata[2] and "timestamp" not in metadata[2]
+    assert metadata.cwds == ["/srv/app"]
+
+
+def test_save_load_is_memory_mapped(temp_dir):
+    """Test loaded metadata is mapped and appends survive a second save."""
+    metadata = VectorMetadata()
+    for i in range(100):
+        metadata.append(f"cmd_{i}", {"timestamp": float(i), "cwd": f"/dir/{i % 3}", "exit_code": 0})
+    metadata.save(temp_dir / "index")
+
+    loaded = VectorMetadata.load(temp_dir / "index")
+    assert isinstance(loaded._rows, np.memmap)
+    assert loaded[42]["command"] == "cmd_42"
+    assert loaded[42]["cwd"] == "/dir/0"
+
+    loaded.append("late", {"cwd": "/dir/new"})
+    loaded.save(temp_dir / "index")
+
+    reloaded = VectorMetadata.load(temp_dir / "index")
+    assert len(reloaded) == 101
+    assert reloaded[99]["command"] == "cmd_99"
+    assert reloaded[100]["cwd"] == "/dir/new"
+    assert reloaded[100]["command"] == "late"
+
+
+def test_legacy_json_metadata(temp_dir):
+    """Test a JSON list .meta file (previous format) is converted on load."""
+    store = VectorStore(temp_dir / "index", dim=8, backend="exact")
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((3, 8)).astype(np.float32)
+    store.rebuild(list(vectors), ["a", "b", "c"], [{"cwd": "/tmp"}] * 3)
+    store.save()
+
+    legacy = [{"cwd": "/tmp", "command": c, "index": i} for i, c in enumerate("abc")]
+    with open(temp_dir / "index.meta", "w") as f:
+        json.dump(legacy, f, indent=2)
+
+    reloaded = VectorStore(temp_dir / "index", dim=8)
+    reloaded.load()
+
+    assert reloaded.get_by_index(1)["command"] == "b"
+    assert reloaded.get_by_index(1)["count"] == 1
+    assert reloaded.search(vectors[2], top_k=1)[0]["command"] == "c"
+
+
+def test_record_use_updates_aggregates(temp_dir):
+    """Test repeat uses update count, last use and dominant cwd in place."""
+    metadata = VectorMetadata()
+    metadata.append("make", {"timestamp": 1.0, "cwd": "/a", "exit_code": 0})
+    metadata.save(temp_dir / "index")
+
+    loaded = VectorMetadata.load(temp_dir / "index")
+    loaded.record_use(0, {"timestamp": 5.0, "cwd": "/b", "exit_code": 2})
+    assert loaded[0]["cwd"] == "/a"  # Tied: the current cwd is kept
+    loaded.record_use(0, {"timestamp": 3.0, "cwd": "/b", "exit_code": 0})
+
+    row = loaded[0]
+    assert row["count"] == 3
+    assert row["success_count"] == 2
+    assert row["timestamp"] == 5.0
+    assert row["cwd"] == "/b"
+
+
+def test_aggregate_uses():
+    """Test repeated uses collapse to counts, last use and the most common cwd."""
+    aggregated = aggregate_uses(
+        [
+            {"timestamp": 1.0, "cwd": "/a", "exit_code": 0},
+            {"timestamp": 3.0, "cwd": "/b", "exit_code": 1},
+            {"timestamp": 2.0, "cwd": "/a", "exit_code": 0},
+        ]
+    )
+
+    assert aggregated["count"] == 3
+    assert aggregated["success_count"] == 2
+    assert aggregated["timestamp"] == 3.0
+    assert aggregated["exit_code"] == 1
+    assert aggregated["cwd"] == "/a"
+
+
+def test_filter_mask_cached_until_change():
+    """Test filter masks are reused until rows change."""
+    metadata = VectorMetadata()
+    metadata.append("a", {"cwd": "/a", "exit_code": 0, "timestamp": 1.0})
+    metadata.append("b", {"cwd": "/b", "exit_code": 1, "timestamp": 2.0})
+
+    mask = metadata.filter_mask(successful_only=True)
+    assert mask.tolist() == [True, False]
+    assert metadata.filter_mask(successful_only=True) is mask
+
+    metadata.record_use(1, {"exit_code": 0})
+    assert metadata.filter_mask(successful_only=True).tolist() == [True, True]
+    assert metadata.filter_mask(cwd="/b", since=1.5).tolist() == [False, True]
+
+
+def test_successful_only_keeps_unknown_exit_codes():
+    """Test rows added without an exit code are not treated as failures."""
+    metadata = VectorMetadata()
+    metadata.append("learned", {"cwd": "/a", "timestamp": 2.0})
+    metadata.append("failed", {"exit_code": 1})
+
+    assert metadata.filter_mask(successful_only=True).tolist() == [True, False]
+
+    # A recorded failure makes the exit code known
+    metadata.record_use(0, {"exit_code": 1})
+    assert metadata.filter_mask(successful_only=True).tolist() == [False, False]
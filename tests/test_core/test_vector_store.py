@@ -1,7 +1,7 @@
 """
 Tests for vector store module.
 
-Tests Annoy approximate nearest neighbor search.
+Tests Annoy approximate and exact (quantized) nearest neighbor search.
 
 Created by: orpheus497
 """
@@ -10,6 +10,7 @@ Created by: orpheus497
 import numpy as np
 import pytest
 
+from daedelus.core.vector_backends import ExactBackend
 from daedelus.core.vector_store import VectorStore
 
 
@@ -112,3 +113,243 @@ def test_search_performance(temp_dir):
     elapsed = time.time() - start
 
     assert elapsed < 0.01  # <10ms
+
+
+def _built_store(temp_dir, n=50, **kwargs) -> tuple[VectorStore, np.ndarray]:
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, 16)).astype(np.float32)
+    kwargs.setdefault("backend", "annoy")
+    store = VectorStore(temp_dir / "index", dim=16, n_trees=5, **kwargs)
+    store.rebuild(list(vectors), [f"cmd_{i}" for i in range(n)])
+    return store, vectors
+
+
+def test_add_after_build_is_searchable(temp_dir):
+    """Test vectors added to a built index are found immediately."""
+    store, _ = _built_store(temp_dir)
+    target = np.ones(16, dtype=np.float32)
+
+    idx = store.add(target, "new command", {"cwd": "/tmp"})
+    results = store.search(target, top_k=3)
+
+    assert idx == 50
+    assert results[0]["command"] == "new command"
+    assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-4)
+    assert store.get_statistics()["delta_vectors"] == 1
+
+
+def test_delta_distances_match_annoy(temp_dir):
+    """Test delta results rank consistently with base results."""
+    store, vectors = _built_store(temp_dir)
+    store.add(vectors[7] * 2.0, "scaled copy")  # Same angle as cmd_7
+
+    results = store.search(vectors[7], top_k=2)
+
+    assert {r["command"] for r in results} == {"cmd_7", "scaled copy"}
+    assert results[0]["distance"] == pytest.approx(results[1]["distance"], abs=1e-3)
+
+
+def test_compaction_merges_delta(temp_dir):
+    """Test the delta is merged into Annoy once the threshold is reached."""
+    store, _ = _built_store(temp_dir, compaction_threshold=5, background_compaction=False)
+    rng = np.random.default_rng(1)
+    extra = rng.standard_normal((5, 16)).astype(np.float32)
+    for i, vec in enumerate(extra):
+        store.add(vec, f"extra_{i}")
+
+    stats = store.get_statistics()
+    assert stats["compactions"] == 1
+    assert stats["delta_vectors"] == 0
+    assert stats["base_vectors"] == 55
+    assert store.search(extra[3], top_k=1)[0]["command"] == "extra_3"
+
+
+def test_save_includes_delta(temp_dir):
+    """Test saving persists vectors added after the build."""
+    store, _ = _built_store(temp_dir)
+    target = np.ones(16, dtype=np.float32)
+    store.add(target, "late command")
+    store.save()
+
+    reloaded = VectorStore(temp_dir / "index", dim=16)
+    reloaded.load()
+
+    assert len(reloaded) == 51
+    assert reloaded.search(target, top_k=1)[0]["command"] == "late command"
+
+
+@pytest.mark.parametrize("quantization", ["float32", "float16", "int8"])
+def test_exact_backend_recall(quantization):
+    """Test quantized exact search finds the true nearest neighbors."""
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((2000, 32)).astype(np.float32)
+    queries = rng.standard_normal((20, 32)).astype(np.float32)
+    backend = ExactBackend(32, "angular", quantization=quantization)
+    backend.build(vectors)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    hits = 0
+    for query in queries:
+        truth = set(np.argsort(-(normalized @ query))[:10].tolist())
+        ids, distances = backend.query(query, 10)
+        hits += len(truth & set(ids))
+        assert distances == sorted(distances)
+
+    assert hits / (10 * len(queries)) >= 0.9
+
+
+def test_exact_backend_euclidean_distances():
+    """Test euclidean distances match NumPy."""
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((100, 16)).astype(np.float32)
+    backend = ExactBackend(16, "euclidean", quantization="float32")
+    backend.build(vectors)
+
+    ids, distances = backend.query(vectors[4], 3)
+    expected = np.sort(np.linalg.norm(vectors - vectors[4], axis=1))[:3]
+
+    assert ids[0] == 4
+    np.testing.assert_allclose(distances, expected, atol=1e-3)
+
+
+def test_auto_backend_selection(temp_dir):
+    """Test auto mode picks exact search for small indexes and Annoy above the limit."""
+    small, _ = _built_store(temp_dir, backend="auto")
+    large, _ = _built_store(temp_dir, backend="auto", exact_max_vectors=10)
+
+    assert small.get_statistics()["backend"] == "exact"
+    assert large.get_statistics()["backend"] == "annoy"
+
+
+def test_exact_save_load(temp_dir):
+    """Test an exact index is memory-mapped on load and replaces stale Annoy files."""
+    annoy_store, _ = _built_store(temp_dir)
+    annoy_store.save()
+    assert (temp_dir / "index.ann").exists()
+
+    store, vectors = _built_store(temp_dir, backend="exact")
+    store.save()
+    assert not (temp_dir / "index.ann").exists()
+
+    reloaded = VectorStore(temp_dir / "index", dim=16)
+    reloaded.load()
+
+    assert isinstance(reloaded.backend.matrix, np.memmap)
+    assert reloaded.get_statistics()["backend"] == "exact"
+    assert reloaded.search(vectors[9], top_k=1)[0]["command"] == "cmd_9"
+
+
+def test_load_legacy_annoy_index(temp_dir):
+    """Test indexes saved without backend info load as Annoy."""
+    store, vectors = _built_store(temp_dir)
+    store.save()
+    (temp_dir / "index.info").unlink()
+
+    reloaded = VectorStore(temp_dir / "index", dim=16, n_trees=5)
+    reloaded.load()
+
+    assert reloaded.get_statistics()["backend"] == "annoy"
+    assert reloaded.search(vectors[3], top_k=1)[0]["command"] == "cmd_3"
+
+
+def test_deduplicated_rebuild_and_adds(temp_dir):
+    """Test repeated commands share one vector and aggregate their uses."""
+    rng = np.random.default_rng(4)
+    vectors = rng.standard_normal((3, 16)).astype(np.float32)
+    commands = ["git status", "ls", "git status"]
+    metadata = [{"timestamp": float(i), "cwd": "/srv/app", "exit_code": 0} for i in range(3)]
+
+    store = VectorStore(temp_dir / "index", dim=16, backend="exact")
+    store.rebuild([vectors[0], vectors[1], vectors[0]], commands, metadata)
+    assert len(store) == 2
+
+    idx = store.add(vectors[0], "git status", {"timestamp": 9.0, "cwd": "/tmp", "exit_code": 1})
+    assert idx == 0 and len(store) == 2
+    assert store.record_use("unknown command") is None
+
+    store.save()
+    reloaded = VectorStore(temp_dir / "index", dim=16)
+    reloaded.load()
+    hit = reloaded.search(vectors[0], top_k=1)[0]
+
+    assert hit["command"] == "git status"
+    assert hit["count"] == 3
+    assert hit["success_count"] == 2
+    assert hit["timestamp"] == 9.0
+    assert hit["cwd"] == "/srv/app"
+
+
+def test_record_use_respects_deduplicate_setting(temp_dir):
+    """Test repeat uses are not folded into one row when deduplicate is off."""
+    vector = np.ones(16, dtype=np.float32)
+    store = VectorStore(temp_dir / "index", dim=16, backend="exact", deduplicate=False)
+    store.rebuild([vector], ["git status"], [{"timestamp": 0.0, "exit_code": 0}])
+
+    assert store.record_use("git status", {"timestamp": 1.0, "exit_code": 0}) is None
+    store.add(vector, "git status", {"timestamp": 1.0, "exit_code": 0})
+    assert len(store) == 2
+
+
+def test_successful_only_keeps_commands_without_exit_code(temp_dir):
+    """Test learned commands added without an exit code pass the success filter."""
+    vector = np.ones(16, dtype=np.float32)
+    store = VectorStore(temp_dir / "index", dim=16, backend="exact")
+    store.rebuild([-vector], ["false"], [{"timestamp": 1.0, "exit_code": 1}])
+    store.add(vector, "learned", {"cwd": "/a", "timestamp": 2.0})
+
+    results = store.search(vector, top_k=5, successful_only=True)
+    assert [r["command"] for r in results] == ["learned"]
+
+
+def _filtered_store(temp_dir, backend, n=3000):
+    rng = np.random.default_rng(5)
+    vectors = rng.standard_normal((n, 16)).astype(np.float32)
+    metadata = [
+        {"timestamp": float(i), "cwd": f"/dir/{i % 10}", "exit_code": 0 if i % 2 else 1}
+        for i in range(n)
+    ]
+    store = VectorStore(temp_dir / "index", dim=16, n_trees=5, backend=backend)
+    store.rebuild(list(vectors), [f"cmd_{i}" for i in range(n)], metadata)
+    return store, vectors
+
+
+@pytest.mark.parametrize("backend", ["exact", "annoy"])
+def test_filtered_search_returns_full_results(temp_dir, backend):
+    """Test filtered searches return top_k matching results."""
+    store, vectors = _filtered_store(temp_dir, backend)
+
+    results = store.search(vectors[0], top_k=10, cwd="/dir/3", successful_only=True)
+    assert len(results) == 10
+    assert all(r["cwd"] == "/dir/3" and r["exit_code"] == 0 for r in results)
+
+    successful = store.search(vectors[0], top_k=10, successful_only=True)
+    assert len(successful) == 10
+    assert all(r["exit_code"] == 0 for r in successful)
+
+    recent = store.search(vectors[0], top_k=10, since=2990.0)
+    assert sorted(r["index"] for r in recent) == list(range(2990, 3000))
+
+    assert store.search(vectors[0], top_k=10, cwd="/nowhere") == []
+
+
+def test_filtered_search_matches_exact_neighbors(temp_dir):
+    """Test exact filtered search finds the true nearest matching vectors."""
+    store, vectors = _filtered_store(temp_dir, "exact")
+    query = vectors[42]
+
+    results = store.search(query, top_k=5, cwd="/dir/2")
+
+    candidates = np.arange(2, 3000, 10)
+    normalized = vectors[candidates] / np.linalg.norm(vectors[candidates], axis=1, keepdims=True)
+    expected = candidates[np.argsort(-(normalized @ query))[:5]]
+    assert [r["index"] for r in results] == expected.tolist()
+
+
+def test_filtered_search_covers_delta(temp_dir):
+    """Test filters apply to vectors added after the build."""
+    store, vectors = _filtered_store(temp_dir, "exact", n=100)
+    target = np.ones(16, dtype=np.float32)
+    store.add(target, "new command", {"cwd": "/dir/new", "exit_code": 0})
+
+    assert store.search(target, top_k=3, cwd="/dir/new")[0]["command"] == "new command"
+    assert all(r["cwd"] == "/dir/1" for r in store.search(target, top_k=3, cwd="/dir/1"))
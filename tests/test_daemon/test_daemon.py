@@ -143,3 +143,30 @@ def test_concurrent_request_handling(test_config):
 
     daemon.stop()
     thread.join(timeout=5)
+
+
+def test_rejected_retrain_still_rebuilds_index():
+    """Test the index is rebuilt with the current model when a retrain is rejected."""
+    from unittest.mock import MagicMock
+
+    import numpy as np
+
+    daemon = DaedelusDaemon.__new__(DaedelusDaemon)
+    daemon.db = MagicMock()
+    daemon.db.get_recent_commands.return_value = [
+        {"command": f"cmd {i}", "timestamp": float(i), "cwd": "/tmp", "exit_code": 0}
+        for i in range(200)
+    ]
+    daemon.embedder = MagicMock()
+    daemon.embedder.encode_batch.side_effect = lambda commands: np.ones((len(commands), 4))
+    daemon.model_trainer = MagicMock()
+    daemon.model_trainer.run.return_value = False
+    daemon.embedding_cache = None
+    daemon.vector_store = MagicMock()
+
+    daemon._update_models()
+
+    daemon.model_trainer.run.assert_called_once()
+    embeddings, commands, metadata = daemon.vector_store.rebuild.call_args[0]
+    assert len(embeddings) == len(commands) == len(metadata) == 200
+    daemon.vector_store.save.assert_called_once()
@@ -0,0 +1,120 @@
+"""
+Unit tests for EnhancedKnowledgeBase deep search.
+
+Created by: orpheus497
+"""
+
+import random
+import re
+
+import pytest
+
+from daedelus.llm.enhanced_knowledge_base import EnhancedKnowledgeBase
+
+REDBOOK = """# PART 1: Basics
+
+## Chapter 1: Storage and Disks
+
+### 1.1 Checking Disk Space
+Use `df` to check disk space on mounted filesystems.
+```bash
+$ df -h
+```
+
+### 1.2 Directory Sizes
+Use `du` to find large directories.
+
+## Chapter 2: Networking
+
+### 2.1 SSH Keys
+Generate keys and copy them to the server.
+```bash
+$ ssh-keygen -t ed25519
+$ ssh user@host
+```
+
+### 2.2 Firewall Rules
+Allow ssh before enabling the firewall with `ufw`.
+
+# PART 2: Administration
+
+## Chapter 3: Services
+
+### 3.1 Managing Services
+Use `systemctl` to start services; check disk space of logs with `du`.
+"""
+
+
+def _reference_scores(kb: EnhancedKnowledgeBase, query: str) -> list[tuple[int, float]]:
+    """Per-section scoring as search_deep computed it before posting lists."""
+    query_lower = query.lower()
+    query_words = kb._extract_keywords(query_lower)
+    query_cmds = set(re.findall(r'\b([a-z-]+)\b', query_lower))
+
+    scored = []
+    for position, section in enumerate(kb.sections):
+        score = 0.0
+        if any(word in section.title.lower() for word in query_words):
+            score += 10.0
+        if section.keywords:
+            score += len(set(query_words) & set(section.keywords)) * 3.0
+        if section.commands:
+            score += len(query_cmds & set(section.commands)) * 5.0
+        if section.content and query_lower in section.content.lower():
+            score += 1.0
+        if score > 0:
+            scored.append((position, score))
+
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored
+
+
+@pytest.fixture
+def knowledge_base(temp_dir):
+    """Knowledge base with a small Redbook loaded."""
+    (temp_dir / "REDBOOK.md").write_text(REDBOOK)
+    kb = EnhancedKnowledgeBase(temp_dir, temp_dir / "learning")
+    assert kb.load_redbook_deep()
+    return kb
+
+
+def test_search_ranks_by_postings(knowledge_base):
+    """Test title, keyword, command and phrase matches add up per section."""
+    results = knowledge_base.search_deep("check disk space")
+
+    assert results[0]['title'] == "Checking Disk Space"
+    # Title + keywords 'disk' and 'space' + phrase
+    assert results[0]['score'] == 10.0 + 2 * 3.0 + 1.0
+    assert "df" in results[0]['excerpt']
+    # Phrase-only match found through the content vocabulary
+    assert any(r['title'] == "Managing Services" and r['score'] == 1.0 for r in results)
+
+    assert knowledge_base.search_deep("ssh")[0]['title'] == "SSH Keys"
+    assert knowledge_base.search_deep("zzz unknown") == []
+
+
+def test_search_matches_reference_scoring(knowledge_base):
+    """Test posting-list scoring equals scoring every section directly."""
+    rng = random.Random(0)
+    words = ["disk", "space", "ssh", "keys", "firewall", "du", "df", "use", "the",
+             "check", "services", "isk", "work", "-h", "`du`", "ufw", "Dir"]
+    queries = ["", "--", "check disk space", "use `df`", "sizes"]
+    queries += [" ".join(rng.choices(words, k=rng.randint(1, 4))) for _ in range(200)]
+
+    for query in queries:
+        expected = [
+            (knowledge_base.sections[position].title, score)
+            for position, score in _reference_scores(knowledge_base, query)[:10]
+        ]
+        results = knowledge_base.search_deep(query, max_results=10)
+        assert [(r['title'], r['score']) for r in results] == expected
+
+
+def test_correction_keywords_are_searchable(knowledge_base):
+    """Test keywords added by a user correction reach the search postings."""
+    assert not any(r['title'] == "Directory Sizes" for r in knowledge_base.search_deep("quota"))
+
+    knowledge_base.add_user_correction("limit usage", "use df", "directory quota")
+
+    result = next(r for r in knowledge_base.search_deep("quota") if r['title'] == "Directory Sizes")
+    assert result['score'] == 3.0
@@ -0,0 +1,141 @@
+"""
+Unit tests for hybrid search fusion and the retrieval orchestrator.
+
+Created by: orpheus497
+"""
+
+import time
+
+import pytest
+
+from daedelus.llm.hybrid_search import HybridSearch, RetrievalOrchestrator
+
+KEYWORD = [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+SEMANTIC = [{"id": "b"}, {"id": "d"}]
+GRAPH = [{"id": "e"}]
+
+
+def _copies(results):
+    """Retriever returning fresh copies (fusion annotates result dicts)."""
+    return lambda query: [dict(r) for r in results]
+
+
+def _slow(results, seconds):
+    """Retriever that sleeps before answering."""
+    def retrieve(query):
+        time.sleep(seconds)
+        return [dict(r) for r in results]
+    return retrieve
+
+
+@pytest.fixture
+def orchestrator():
+    """Orchestrator over three in-memory retrievers."""
+    orchestrator = RetrievalOrchestrator(
+        HybridSearch(),
+        {"keyword": _copies(KEYWORD), "semantic": _copies(SEMANTIC), "graph": _copies(GRAPH)},
+        deadline=1.0,
+        min_queries=5,
+        probe_interval=10,
+    )
+    yield orchestrator
+    orchestrator.close()
+
+
+def test_fusion_matches_hybrid_search(orchestrator):
+    """Test concurrent retrieval fuses like hybrid_search over the same lists."""
+    for query in ["how to configure ssh", "what is a firewall", "git commit"]:
+        expected = HybridSearch().hybrid_search(
+            query, _copies(KEYWORD)(query), _copies(SEMANTIC)(query), _copies(GRAPH)(query), top_k=4
+        )
+        assert orchestrator.search(query, top_k=4) == expected
+
+
+def test_deadline_skips_slow_retrievers():
+    """Test retrievers run concurrently and late ones are left out of the fusion."""
+    orchestrator = RetrievalOrchestrator(
+        HybridSearch(),
+        {"keyword": _slow(KEYWORD, 0.05), "semantic": _slow(SEMANTIC, 0.05), "graph": _slow(GRAPH, 2.0)},
+        deadline=0.5,
+    )
+    try:
+        start = time.perf_counter()
+        results = orchestrator.search("how to configure ssh", top_k=10)
+        elapsed = time.perf_counter() - start
+    finally:
+        orchestrator.close()
+
+    assert 0.05 <= elapsed < 0.9
+    assert {r["id"] for r in results} == {"a", "b", "c", "d"}
+
+    stats = orchestrator.get_stats()["procedural"]["retrievers"]
+    assert stats["graph"]["timeouts"] == 1
+    assert 40.0 <= stats["keyword"]["latency_ms"] < 500.0
+    assert stats["keyword"]["contribution"] == pytest.approx(3 / 4)
+
+
+def test_slow_retrievers_do_not_starve_fast_ones():
+    """Test busy retrievers are skipped instead of queueing and report real latency."""
+    orchestrator = RetrievalOrchestrator(
+        HybridSearch(),
+        {"keyword": _slow(KEYWORD, 0.001), "semantic": _slow(SEMANTIC, 0.3), "graph": _slow(GRAPH, 0.3)},
+        deadline=0.05,
+        min_queries=1000,
+    )
+    try:
+        for _ in range(20):
+            assert [r["id"] for r in orchestrator.search("how to configure ssh")] == ["a", "b", "c"]
+        time.sleep(0.4)
+    finally:
+        orchestrator.close()
+
+    stats = orchestrator.get_stats()["procedural"]["retrievers"]
+    assert stats["keyword"]["timeouts"] == 0
+    assert stats["semantic"]["timeouts"] == 20
+    # Only a few calls ran: the rest were skipped while one was in flight
+    assert 1 <= stats["semantic"]["calls"] <= 6
+    assert stats["semantic"]["latency_ms"] >= 250.0
+
+
+def test_useless_retriever_disabled_per_query_type():
+    """Test a retriever that never reaches the top-k stops running for that query type."""
+    calls = []
+
+    def graph(query):
+        calls.append(query)
+        return [{"id": "x"}]
+
+    orchestrator = RetrievalOrchestrator(
+        HybridSearch(),
+        {"keyword": _copies(KEYWORD), "semantic": _copies(KEYWORD), "graph": graph},
+        min_queries=5,
+        probe_interval=10,
+    )
+    try:
+        for _ in range(20):
+            orchestrator.search("git status", top_k=2)
+        # Five queries to judge it, then only the probes (queries 10 and 20)
+        assert len(calls) == 7
+        assert not orchestrator.is_enabled("command", "graph")
+
+        # Other query types still use it
+        orchestrator.search("how to use git", top_k=2)
+        assert len(calls) == 8
+        assert orchestrator.get_stats()["procedural"]["retrievers"]["graph"]["enabled"]
+    finally:
+        orchestrator.close()
+
+
+def test_failing_retriever_is_skipped(orchestrator):
+    """Test an exception in one retriever leaves the others' results."""
+    def broken(query):
+        raise RuntimeError("index unavailable")
+
+    orchestrator.retrievers["semantic"] = broken
+    results = orchestrator.search("what is ssh", top_k=5)
+
+    assert [r["id"] for r in results] == ["a", "b", "c", "e"]
+    assert orchestrator.get_stats()["factual"]["retrievers"]["semantic"]["errors"] == 1
+
+    with pytest.raises(ValueError):
+        RetrievalOrchestrator(HybridSearch(), {"fts": _copies(KEYWORD)})
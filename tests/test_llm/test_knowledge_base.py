@@ -0,0 +1,80 @@
+"""
+Unit tests for KnowledgeBase context retrieval.
+
+Created by: orpheus497
+"""
+
+import random
+import re
+
+import pytest
+
+from daedelus.llm.knowledge_base import KnowledgeBase
+
+REDBOOK = """# The Redbook
+
+## Chapter 1: Storage and Disks
+
+Disks hold filesystems. Use df to check disk space, and du for directory usage.
+
+### Checking Disk Space
+
+Run `df -h` to see disk space per filesystem; DISK usage is shown in percent.
+""" + "Long line about disk " * 30 + """
+
+## Chapter 2: Networking
+
+### SSH Keys
+
+Generate ssh keys with ssh-keygen. Copy keys with ssh-copy-id (ssh_config is separate).
+
+## Chapter 3: Services
+
+### Managing Services
+
+Use systemctl; journalctl shows logs. Check disk space used by logs with du.
+"""
+
+
+@pytest.fixture
+def knowledge_base(temp_dir):
+    """Knowledge base with a small Redbook loaded."""
+    (temp_dir / "REDBOOK.md").write_text(REDBOOK)
+    kb = KnowledgeBase(temp_dir)
+    assert kb.load_redbook()
+    return kb
+
+
+def test_context_windows_match_regex(knowledge_base):
+    """Test indexed context windows equal the regex findall windows."""
+    index = knowledge_base._get_context_index()
+    words = {w.lower() for w in re.findall(r'\w+', REDBOOK) if len(w) > 2}
+
+    for word in sorted(words):
+        pattern = re.compile(r'.{0,100}\b' + re.escape(word) + r'\b.{0,100}', re.IGNORECASE)
+        assert index.context_windows(word) == pattern.findall(REDBOOK)[:3], word
+
+
+def test_relevant_context_ranks_titles_and_content(knowledge_base):
+    """Test chapter and section titles outrank content windows."""
+    results = knowledge_base.get_relevant_context("disk space", max_results=4)
+
+    assert results[0] == "  → Checking Disk Space (Chapter 1)"
+    assert results[1].startswith("**Chapter 1: Storage and Disks**\nDisks hold filesystems.")
+    assert all(r.startswith("  • ...") for r in results[2:])
+    assert knowledge_base.get_relevant_context("zzz unknown") == []
+
+
+def test_index_follows_replaced_document(knowledge_base):
+    """Test replacing the parsed document rebuilds the index."""
+    rng = random.Random(0)
+    vocabulary = ["disk", "space", "ssh", "keys", "logs", "services", "usage"]
+    before = knowledge_base.get_relevant_context(" ".join(rng.sample(vocabulary, 2)))
+    assert before
+
+    knowledge_base.documents['redbook'] = knowledge_base._parse_redbook(
+        REDBOOK.replace("Storage and Disks", "Storage and Volumes")
+    )
+
+    assert knowledge_base.get_chapter_content(1).startswith("## Chapter 1: Storage and Volumes")
+    assert knowledge_base.get_relevant_context("volumes")[0].startswith("**Chapter 1: Storage and Volumes**")
@@ -279,5 +279,170 @@ class TestEdgeCases:
         assert code_found
 
 
+class TestMatrixSearch:
+    """Test the normalized-matrix similarity search"""
+    
+    @staticmethod
+    def _filled(matrix_dtype: str = "float32", n: int = 200, dim: int = 32) -> KnowledgeEmbedder:
+        """Embedder with n chunks and random embeddings (one zero vector)"""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((n, dim)).astype(np.float32)
+        vectors[7] = 0.0
+        embedder = KnowledgeEmbedder(None, matrix_dtype=matrix_dtype)
+        embedder.chunks = [{'id': f'chunk{i}', 'text': f'text {i}'} for i in range(n)]
+        embedder.embeddings_cache = {
+            chunk['id']: vectors[i] for i, chunk in enumerate(embedder.chunks)
+        }
+        return embedder
+    
+    @staticmethod
+    def _reference(embedder: KnowledgeEmbedder, query, top_k, min_similarity):
+        """Per-chunk cosine similarity, sorted (the pre-matrix algorithm)"""
+        results = []
+        for chunk in embedder.chunks:
+            vector = embedder.embeddings_cache[chunk['id']]
+            norms = np.linalg.norm(query) * np.linalg.norm(vector)
+            similarity = float(query @ vector / norms) if norms else 0.0
+            if similarity >= min_similarity:
+                results.append((chunk['id'], similarity))
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results[:top_k]
+    
+    def test_matches_reference(self):
+        """Test matrix search returns the same chunks and scores as a per-chunk loop"""
+        embedder = self._filled()
+        rng = np.random.default_rng(1)
+        
+        for min_similarity in (-1.0, 0.0, 0.2):
+            for query in rng.standard_normal((20, 32)).astype(np.float32):
+                results = embedder.find_similar_chunks(query, top_k=5, min_similarity=min_similarity)
+                expected = self._reference(embedder, query, 5, min_similarity)
+                assert [c['id'] for c, _ in results] == [i for i, _ in expected]
+                np.testing.assert_allclose([s for _, s in results], [s for _, s in expected], atol=1e-5)
+    
+    def test_matrix_rebuilt_when_chunks_change(self):
+        """Test replacing chunks and embeddings is picked up by the next search"""
+        embedder = self._filled()
+        query = embedder.embeddings_cache['chunk3']
+        assert embedder.find_similar_chunks(query, top_k=1)[0][0]['id'] == 'chunk3'
+        
+        embedder.chunks = embedder.chunks[:3]
+        assert embedder.find_similar_chunks(query, top_k=1)[0][0]['id'] != 'chunk3'
+        assert len(embedder._matrix) == 3
+    
+    @pytest.mark.parametrize("matrix_dtype", ["float32", "float16"])
+    def test_saved_matrix_is_memory_mapped(self, temp_dir, matrix_dtype):
+        """Test load_embeddings memory-maps the saved normalized matrix"""
+        embedder = self._filled(matrix_dtype)
+        embedder.save_embeddings(temp_dir / "kb")
+        
+        loaded = KnowledgeEmbedder(None, matrix_dtype=matrix_dtype)
+        assert loaded.load_embeddings(temp_dir / "kb")
+        assert isinstance(loaded._matrix, np.memmap)
+        assert loaded._matrix.dtype == np.dtype(matrix_dtype)
+        
+        query = embedder.embeddings_cache['chunk42']
+        results = loaded.find_similar_chunks(query, top_k=3)
+        assert results[0][0]['id'] == 'chunk42'
+        assert results[0][1] == pytest.approx(1.0, abs=1e-3)
+        
+        # A matrix saved in another dtype is rebuilt in memory
+        other = KnowledgeEmbedder(None, matrix_dtype="float16" if matrix_dtype == "float32" else "float32")
+        assert other.load_embeddings(temp_dir / "kb")
+        assert not isinstance(other._matrix, np.memmap)
+        assert other.find_similar_chunks(query, top_k=1)[0][0]['id'] == 'chunk42'
+
+
+class TestBatchedGeneration:
+    """Test batched preprocessing, embedding reuse and incremental re-indexing"""
+    
+    DOCUMENT = "\n".join(
+        f"## Chapter {c}: Topic {c}\n\n### Section {c}.1\n\n"
+        f"Use **sudo** and `apt install pkg{c}` to install package {c} on the system.\n\n"
+        f"```bash\n$ apt install pkg{c}\n```\n"
+        for c in range(1, 6)
+    )
+    
+    @pytest.fixture
+    def counting_embedder(self, hashed_embedder, monkeypatch):
+        """Hashed CommandEmbedder recording every text it encodes"""
+        encoded = []
+        encode_batch = hashed_embedder.encode_batch
+        
+        def recording(texts):
+            encoded.extend(texts)
+            return encode_batch(texts)
+        
+        monkeypatch.setattr(hashed_embedder, "encode_batch", recording)
+        hashed_embedder.encoded = encoded
+        return hashed_embedder
+    
+    def test_batch_preprocessing_matches_per_text(self):
+        """Test one-pass preprocessing cleans each text exactly as on its own"""
+        embedder = KnowledgeEmbedder(None)
+        texts = [
+            "# Header\nSome **bold** and *italic* text",
+            "ends with a fence\n```",
+            "```python\nprint('x')\n```",
+            "*dangling star",
+            "star at end*",
+            "  leading and trailing  \n\n",
+            "## only header",
+            "`code` then ``` and **unclosed",
+            "",
+        ]
+        
+        assert embedder._preprocess_batch(texts) == [
+            embedder._preprocess_for_embedding(text) for text in texts
+        ]
+    
+    def test_generate_reuses_cached_chunks(self, counting_embedder):
+        """Test only chunks without an embedding are encoded, in one batch"""
+        embedder = KnowledgeEmbedder(counting_embedder, batch_size=2)
+        chunks = embedder.chunk_document(self.DOCUMENT, 'redbook')
+        embedder.chunks = chunks
+        
+        embeddings = embedder.generate_embeddings(chunks)
+        assert len(counting_embedder.encoded) == len(chunks)
+        assert set(embeddings) == {chunk['id'] for chunk in chunks}
+        
+        query = counting_embedder.encode_command("apt install pkg3")
+        first = embedder.find_similar_chunks(query, top_k=1)[0][0]
+        assert "pkg3" in first['text']
+        
+        counting_embedder.encoded.clear()
+        embedder.generate_embeddings(chunks)
+        assert counting_embedder.encoded == []
+    
+    def test_reindex_embeds_only_changed_chunks(self, temp_dir, counting_embedder):
+        """Test an edited document re-embeds only the chunks whose text changed"""
+        from daedelus.llm.knowledge_base import KnowledgeBase
+        
+        def initialize(content):
+            kb = KnowledgeBase(temp_dir, embedder=KnowledgeEmbedder(counting_embedder))
+            kb.documents['redbook'] = {'content': content}
+            counting_embedder.encoded.clear()
+            assert kb.initialize_semantic_search()
+            return kb
+        
+        kb = initialize(self.DOCUMENT)
+        total = len(kb.embedder.chunks)
+        assert len(counting_embedder.encoded) == total
+        
+        # Unchanged document: loaded from disk
+        initialize(self.DOCUMENT)
+        assert counting_embedder.encoded == []
+        
+        edited = self.DOCUMENT.replace("package 4", "package four with extra notes")
+        kb = initialize(edited)
+        assert 0 < len(counting_embedder.encoded) < total
+        assert len(kb.embedder.embeddings_cache) == len(kb.embedder.chunks)
+        
+        # A different model invalidates the saved embeddings
+        counting_embedder.model = counting_embedder.model
+        initialize(edited)
+        assert len(counting_embedder.encoded) == total
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
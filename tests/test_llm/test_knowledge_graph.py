@@ -0,0 +1,143 @@
+"""
+Unit tests for KnowledgeGraph traversal and the compact graph format.
+
+Created by: orpheus497
+"""
+
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+
+from daedelus.llm.knowledge_graph import KnowledgeGraph
+
+nx = pytest.importorskip("networkx")
+
+
+def _reference_related(graph, node_id, max_depth, rel_types=None):
+    """Breadth-first traversal of the NetworkX graph, as find_related_content did it."""
+    related = []
+    visited = {node_id}
+    queue = deque([(node_id, 0)])
+    while queue:
+        current, depth = queue.popleft()
+        if depth >= max_depth:
+            continue
+        for neighbor in graph.successors(current):
+            if neighbor in visited:
+                continue
+            edge_type = graph.get_edge_data(current, neighbor).get("type", "unknown")
+            if rel_types and edge_type not in rel_types:
+                continue
+            data = graph.nodes[neighbor]
+            related.append(
+                {
+                    "id": neighbor,
+                    "distance": depth + 1,
+                    "rel_type": edge_type,
+                    "node_type": data.get("type", "unknown"),
+                    "title": data.get("title", data.get("name", neighbor)),
+                    "metadata": data,
+                }
+            )
+            visited.add(neighbor)
+            queue.append((neighbor, depth + 1))
+    return related
+
+
+@pytest.fixture
+def knowledge_graph():
+    """Random graph of chapters, sections and commands with typed and untyped edges."""
+    rng = random.Random(0)
+    kg = KnowledgeGraph(hot_nodes=10)
+    for chapter in range(5):
+        kg.add_chapter(f"ch{chapter}", f"Chapter {chapter}")
+        for section in range(8):
+            kg.add_section(f"ch{chapter}:s{section}", f"Section {section}", f"ch{chapter}")
+    sections = [n for n in kg.graph.nodes if ":" in n]
+    for command in range(30):
+        kg.add_command(f"cmd{command}", f"Command {command}", rng.sample(sections, 3))
+    nodes = list(kg.graph.nodes)
+    for _ in range(60):
+        kg.add_relationship(rng.choice(nodes), rng.choice(nodes), rng.choice(["related_to", "prerequisite"]))
+    kg.graph.add_edge("cmd:cmd0", "ch1")
+    kg.invalidate()
+    return kg
+
+
+def test_related_content_matches_reference_traversal(knowledge_graph):
+    """Test CSR traversal (cached or not) equals BFS over the NetworkX graph."""
+    rng = random.Random(1)
+    nodes = list(knowledge_graph.graph.nodes)
+    for _ in range(300):
+        node = rng.choice(nodes)
+        depth = rng.choice([0, 1, 2, 3])
+        rel_types = rng.choice([None, [], ["contains"], ["related_to", "unknown"]])
+        expected = _reference_related(knowledge_graph.graph, node, depth, rel_types)
+        assert knowledge_graph.find_related_content(node, depth, rel_types) == expected
+        assert knowledge_graph.find_related_content(node, depth, rel_types) == expected
+
+    assert knowledge_graph.get_stats()["traversal_cache"]["hits"] > 0
+    assert knowledge_graph.find_related_content("missing") == []
+
+    # Adding content drops the snapshot
+    knowledge_graph.add_command("newcmd", "New command", ["ch0:s0"])
+    assert "cmd:newcmd" in [r["id"] for r in knowledge_graph.find_related_content("ch0", 2)]
+
+
+def test_compact_round_trip_is_memory_mapped(knowledge_graph, temp_dir):
+    """Test a saved compact graph loads mmap'd arrays with the same answers."""
+    knowledge_graph.save_compact(temp_dir / "graph")
+    loaded = KnowledgeGraph(hot_nodes=10)
+    loaded.load_graph(temp_dir / "graph")
+
+    compact = loaded._compact()
+    assert isinstance(compact.targets, np.memmap)
+    assert loaded._graph is None
+
+    for node in ["ch0", "ch3:s4", "cmd:cmd7"]:
+        assert loaded.find_related_content(node, 2) == knowledge_graph.find_related_content(node, 2)
+        assert loaded.get_node_context(node) == knowledge_graph.get_node_context(node)
+    assert loaded.get_stats()["edges_by_type"] == knowledge_graph.get_stats()["edges_by_type"]
+    assert loaded.get_stats()["edges_by_type"]["unknown"] == 1
+
+    # The NetworkX graph is rebuilt on demand with the same edges and attributes
+    assert sorted(loaded.graph.edges(data=True)) == sorted(knowledge_graph.graph.edges(data=True))
+    assert loaded.find_shortest_path("ch0", "ch0:s1") == ["ch0", "ch0:s1"]
+
+    # GraphML files still load
+    knowledge_graph.save_graph(temp_dir / "graph.graphml")
+    legacy = KnowledgeGraph()
+    legacy.load_graph(temp_dir / "graph.graphml")
+    assert legacy.get_stats()["total_edges"] == knowledge_graph.get_stats()["total_edges"]
+
+
+def test_centrality_matches_networkx_pagerank(knowledge_graph):
+    """Test precomputed PageRank equals NetworkX's power iteration."""
+    from networkx.algorithms.link_analysis.pagerank_alg import _pagerank_python
+
+    expected = _pagerank_python(knowledge_graph.graph)
+    top = knowledge_graph.get_centrality(top_n=5)
+
+    assert [node for node, _ in top] == sorted(expected, key=expected.get, reverse=True)[:5]
+    for node, score in top:
+        assert score == pytest.approx(expected[node], abs=1e-9)
+
+
+def test_hot_nodes_have_outgoing_edges(knowledge_graph):
+    """Test precomputed neighbourhoods are the nodes with the most outgoing edges."""
+    compact = knowledge_graph._compact()
+    out_degree = dict(knowledge_graph.graph.out_degree())
+
+    hot = [compact.node_ids[i] for i in compact._hot]
+    assert len(hot) == 10
+    assert min(out_degree[node] for node in hot) >= sorted(out_degree.values(), reverse=True)[9]
+    assert all(compact._hot.values())
+
+    # Sinks are never hot
+    small = KnowledgeGraph(hot_nodes=10)
+    small.add_chapter("ch0", "Chapter 0")
+    small.add_section("ch0:s0", "Section 0", "ch0")
+    compact = small._compact()
+    assert [compact.node_ids[i] for i in compact._hot] == ["ch0"]
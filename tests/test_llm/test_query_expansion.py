@@ -276,5 +276,58 @@ class TestPerformance:
         assert 'term500' in expanded
 
 
+
+class TestCompiledExpansion:
+    """Tests for the compiled synonym matcher and memoized expansions"""
+    
+    @pytest.fixture
+    def expander(self, yaml_synonym_file):
+        """Expander loaded from the sample YAML file"""
+        return QueryExpander(Path(yaml_synonym_file))
+    
+    def test_phrases_expand_as_one_term(self, expander):
+        """Test words of a multi-word entry are matched as a phrase"""
+        expander.add_synonyms('enable', ['turn-on', 'switch on'])
+        
+        expanded = expander.expand_query("turn on the firewall")
+        
+        assert expanded == [
+            ('turn on', 2.0), ('switch on', 0.7),
+            ('firewall', 2.0), ('iptables', 1.0), ('ufw', 0.7), ('firewalld', 0.5),
+        ]
+        assert expander.expand_query("turn-on")[:2] == [('turn-on', 2.0), ('switch on', 0.7)]
+        # Without a phrase, tokens expand one by one
+        assert [t for t, _ in expander.expand_query("turn off")] == ['turn', 'off']
+    
+    def test_reverse_synonyms_are_deterministic(self, expander):
+        """Test a synonym expands to its main term's synonyms in dictionary order"""
+        assert expander.expand_query("purge") == [
+            ('purge', 2.0), ('delete', 1.0), ('uninstall', 0.7),
+        ]
+    
+    def test_repeated_queries_are_memoized(self, expander, yaml_synonym_file):
+        """Test expansions and query strings come from the LRU until synonyms change"""
+        first = expander.expand_query("install firewall")
+        first.append(('mutated', 1.0))
+        
+        assert expander.expand_query("install firewall") == first[:-1]
+        assert expander.expand_query_string("install firewall") == expander.expand_query_string("install firewall")
+        # Expansion hit, expansion hit while building the string, string hit
+        assert expander.get_expansion_stats()['cache_hits'] == 3
+        
+        expander.include_original = False
+        assert ('install', 2.0) not in expander.expand_query("install firewall")
+        expander.include_original = True
+        
+        assert expander.expand_query_string("firewall rule") == "firewall OR rule OR iptables OR ufw OR firewalld"
+        expander.add_synonyms('rule', ['policy'])
+        assert 'policy' in expander.expand_query_string("firewall rule")
+        
+        small = QueryExpander(Path(yaml_synonym_file), cache_size=2)
+        for query in ["install", "remove", "list"]:
+            small.expand_query(query)
+        assert small.get_expansion_stats()['cache_size'] == 2
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
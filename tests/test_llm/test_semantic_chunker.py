@@ -0,0 +1,121 @@
+"""
+Unit tests for SemanticChunker batched and streaming chunking.
+
+Created by: orpheus497
+"""
+
+import random
+
+import pytest
+
+from daedelus.llm.semantic_chunker import SemanticChunker
+
+WORDS = ["git", "docker", "file", "error", "the", "build", "test", "run", "dir", "npm", "python"]
+
+
+def _text(rng: random.Random, sentences: int) -> str:
+    """Random text with mixed sentence endings and whitespace."""
+    parts = []
+    for _ in range(sentences):
+        parts.append(" ".join(rng.choices(WORDS, k=rng.randint(1, 4))) + rng.choice([".", "!", "?", "..."]))
+        parts.append(rng.choice([" ", "\n", "  ", " \n "]))
+    return "".join(parts)
+
+
+def _reference_chunks(chunker: SemanticChunker, text: str) -> list[tuple[str, int, int]]:
+    """Chunk boundaries from per-sentence encoding and pairwise similarity."""
+    sentences = chunker._split_sentences(text)
+    embeddings = [chunker.embedder.encode_command(s) for s in sentences]
+    chunks = []
+    start = 0
+    for i in range(len(sentences) - 1):
+        if chunker._cosine_similarity(embeddings[i], embeddings[i + 1]) < chunker.similarity_threshold:
+            chunks.append((" ".join(sentences[start:i + 1]), start, i))
+            start = i + 1
+    if sentences:
+        chunks.append((" ".join(sentences[start:]), start, len(sentences) - 1))
+    return chunks
+
+
+@pytest.fixture
+def chunker(hashed_embedder):
+    """Chunker with a threshold that splits the hashed embeddings."""
+    return SemanticChunker(hashed_embedder, similarity_threshold=0.97, max_chunk_tokens=10**6)
+
+
+def test_chunk_text_matches_pairwise_reference(chunker):
+    """Test batched encoding and vectorized similarities keep the same boundaries."""
+    rng = random.Random(0)
+    for _ in range(50):
+        text = _text(rng, rng.randint(1, 40))
+        chunks = chunker.chunk_text(text)
+        assert [(c.text, c.start_idx, c.end_idx) for c in chunks] == _reference_chunks(chunker, text)
+        assert all(0.0 < c.importance_score <= 1.0 for c in chunks)
+
+    assert len(chunker.chunk_text(_text(rng, 40))) > 1
+    assert chunker.chunk_text("   ") == []
+
+
+def test_streaming_matches_chunk_text(chunker):
+    """Test streamed chunks equal chunk_text for any block split and batch size."""
+    rng = random.Random(1)
+    for _ in range(50):
+        text = _text(rng, rng.randint(1, 40))
+        cuts = sorted(rng.sample(range(len(text) + 1), rng.randint(0, 10)))
+        blocks = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)], strict=True)]
+
+        assert list(chunker.iter_sentences(blocks)) == chunker._split_sentences(text)
+        streamed = chunker.iter_chunks(chunker.iter_sentences(blocks), batch_size=rng.randint(1, 8))
+        expected = chunker.chunk_text(text)
+        assert [(c.text, c.start_idx, c.end_idx) for c in streamed] == [
+            (c.text, c.start_idx, c.end_idx) for c in expected
+        ]
+
+
+def test_streaming_bounds_chunk_size(hashed_embedder):
+    """Test streamed chunks close at max_chunk_tokens and encode in batches."""
+    calls = []
+    encode_batch = hashed_embedder.encode_batch
+
+    def counting_encode_batch(sentences):
+        calls.append(len(sentences))
+        return encode_batch(sentences)
+
+    hashed_embedder.encode_batch = counting_encode_batch
+    chunker = SemanticChunker(hashed_embedder, similarity_threshold=0.0, max_chunk_tokens=10)
+
+    sentences = (f"git commit number {i}." for i in range(100))
+    chunks = list(chunker.iter_chunks(sentences, batch_size=32))
+
+    assert calls == [32, 32, 32, 4]
+    assert all(len(c.text) <= 40 for c in chunks)
+    assert [c.start_idx for c in chunks[1:]] == [c.end_idx + 1 for c in chunks[:-1]]
+    assert chunks[-1].end_idx == 99
+
+
+def test_streaming_bounds_pending_text(chunker):
+    """Test text without sentence ends is not buffered past max_pending."""
+    blocks = ["word " * 20] * 50 + ["end. next"]
+
+    sentences = list(chunker.iter_sentences(blocks, max_pending=300))
+
+    assert len(sentences) > 10
+    assert all(len(s) <= 300 + 100 for s in sentences)
+    assert sentences[-2].endswith("word end.")
+    assert sentences[-1] == "next"
+    assert "".join(s.replace(" ", "") for s in sentences) == "".join(blocks).replace(" ", "")
+
+
+def test_streaming_bypasses_embedding_cache(hashed_embedder, temp_dir):
+    """Test streamed sentences are not stored in the embedding cache unless asked."""
+    from daedelus.core.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache(hashed_embedder, temp_dir / "cache")
+    chunker = SemanticChunker(hashed_embedder, embedding_cache=cache)
+    sentences = [f"git commit number {i}." for i in range(10)]
+
+    list(chunker.iter_chunks(sentences))
+    assert len(cache) == 0
+
+    list(chunker.iter_chunks(sentences, use_cache=True))
+    assert len(cache) == 10